@@ -0,0 +1,223 @@
+"""
+Tüm evren taramaları için asyncio tabanlı veri çekme hattı.
+
+Semboller sağlayıcının toplu istek boyutuna göre parçalara bölünür ve her
+parça; eşzamanlılık sınırı (semaphore), token-bucket hız sınırlayıcı,
+istek başına zaman aşımı ve üstel geri çekilme + jitter ile yeniden
+denenerek çekilir. Sağlayıcı çağrıları iş parçacığında çalışır ve
+durdurulamaz: zaman aşımına uğrayan çağrının slotu ancak iş parçacığı
+bittiğinde boşalır, böylece yeniden deneme eşzamanlılık sınırını aşmaz. Sonunda hangi sembolün neden alınamadığını gösteren
+bir FetchReport döner. on_chunk verilirse her parça geldiği anda bu
+fonksiyona aktarılır (akış modu) ve çerçeveler bellekte biriktirilmez.
+"""
+import asyncio
+import inspect
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from data_provider import DEFAULT_CHUNK_SIZE, TransientFetchError, chunked
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 4.0        # saniyedeki istek
+DEFAULT_RETRIES = 4
+DEFAULT_TIMEOUT = 30.0    # istek başına saniye
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+
+# Sınıf adına göre tanınan geçici hatalar (bağımlılıkları burada içe aktarmamak için)
+_TRANSIENT_NAMES = {'ConnectionError', 'Timeout', 'ReadTimeout', 'ConnectTimeout',
+                    'ChunkedEncodingError', 'YFRateLimitError'}
+
+
+def is_transient(exc):
+    """Hatanın yeniden denemeye değer olup olmadığı"""
+    if isinstance(exc, (TransientFetchError, asyncio.TimeoutError, ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in _TRANSIENT_NAMES for cls in type(exc).__mro__)
+
+
+def describe_error(exc):
+    if isinstance(exc, asyncio.TimeoutError):
+        return 'zaman aşımı'
+    return f"{type(exc).__name__}: {exc}"
+
+
+def backoff_delay(attempt, base_delay, max_delay, retry_after=None, rng=random):
+    """Tam jitter'lı üstel geri çekilme; sunucunun Retry-After değeri alt sınırdır"""
+    delay = rng.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+    if retry_after:
+        delay = max(delay, min(retry_after, max_delay))
+    return delay
+
+
+def _release_abandoned(call, semaphore):
+    # Sonucu kimsenin beklemediği çağrının hatası sessizce tüketilir
+    if not call.cancelled() and call.exception() is not None:
+        logging.debug(f"Terk edilen istek bitti: {describe_error(call.exception())}")
+    semaphore.release()
+
+
+def run_sync(coro):
+    """Çalışan bir olay döngüsü varsa (Colab/Jupyter) koroutini ayrı iş parçacığında çalıştırır"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+# -------------------- HIZ SINIRLAYICI --------------------
+class TokenBucket:
+    """Saniyede 'rate' jeton üreten, en fazla 'capacity' biriktiren kova"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# -------------------- RAPOR --------------------
+class FetchReport:
+    """Çekme sonucu: başarılı/başarısız semboller, deneme sayıları ve gecikmeler"""
+
+    def __init__(self):
+        self.succeeded = []
+        self.failed = {}      # sembol -> neden
+        self.requests = 0
+        self.retries = 0
+        self.latencies = []   # başarılı isteklerin süresi (saniye)
+        self.elapsed = 0.0
+
+    def failure_counts(self):
+        """Nedene göre başarısız sembol sayısı"""
+        counts = {}
+        for reason in self.failed.values():
+            counts[reason] = counts.get(reason, 0) + 1
+        return counts
+
+    def summary(self):
+        text = (f"{len(self.succeeded)} sembol alındı, {len(self.failed)} başarısız "
+                f"({self.requests} istek, {self.retries} yeniden deneme, {self.elapsed:.1f} sn)")
+        for reason, count in sorted(self.failure_counts().items(), key=lambda kv: -kv[1]):
+            text += f"\n  - {reason}: {count}"
+        return text
+
+
+# -------------------- HAT --------------------
+class AsyncFetcher:
+    """Sağlayıcı çağrılarını asenkron, sınırlı ve yeniden denenebilir şekilde yürütür"""
+
+    def __init__(self, provider, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                 burst=None, retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 chunk_size=DEFAULT_CHUNK_SIZE, rng=None):
+        self.provider = provider
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        max_batch = getattr(provider, 'max_batch', None)
+        self.chunk_size = min(chunk_size, max_batch) if max_batch else chunk_size
+        self.rng = rng or random.Random()
+
+    @staticmethod
+    async def _deliver(received, frames, report, on_chunk):
+        report.succeeded.extend(received)
+        if on_chunk is None:
+            frames.update(received)
+        elif received:
+            # Tüketici yavaşsa burada beklenir; slot tutulduğu için
+            # yeni istek açılmaz (geri basınç)
+            handled = on_chunk(received)
+            if inspect.isawaitable(handled):
+                await handled
+
+    async def _fetch_chunk(self, chunk, kwargs, bucket, semaphore, frames, report, on_chunk):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            await semaphore.acquire()
+            call = None
+            try:
+                await bucket.acquire()
+                report.requests += 1
+                started = time.perf_counter()
+                call = asyncio.ensure_future(
+                    asyncio.to_thread(self.provider.fetch_history, chunk, **kwargs))
+                try:
+                    # shield: zaman aşımı iş parçacığını değil yalnızca beklemeyi keser
+                    result = await asyncio.wait_for(asyncio.shield(call), timeout=self.timeout)
+                except Exception as e:
+                    last_error = e
+                    partial = getattr(e, 'partial', None)
+                    if partial:
+                        # Gelen kısım teslim edilir; yalnızca eksik semboller yeniden denenir
+                        await self._deliver({t: partial[t] for t in chunk if t in partial},
+                                            frames, report, on_chunk)
+                        chunk = [t for t in chunk if t not in partial]
+                else:
+                    report.latencies.append(time.perf_counter() - started)
+                    for ticker in chunk:
+                        if ticker not in result:
+                            report.failed[ticker] = 'veri yok'
+                    await self._deliver({t: result[t] for t in chunk if t in result},
+                                        frames, report, on_chunk)
+                    return
+            finally:
+                if call is None or call.done():
+                    semaphore.release()
+                else:
+                    # Terk edilen çağrı hâlâ çalışıyor: slot o bitince boşalır
+                    call.add_done_callback(lambda done: _release_abandoned(done, semaphore))
+
+            if not is_transient(last_error) or attempt == self.retries:
+                break
+            report.retries += 1
+            delay = backoff_delay(attempt, self.base_delay, self.max_delay,
+                                  getattr(last_error, 'retry_after', None), self.rng)
+            logging.info(f"Geçici hata ({chunk[0]}..): {describe_error(last_error)}, "
+                         f"{delay:.2f} sn sonra tekrar denenecek")
+            await asyncio.sleep(delay)
+
+        reason = describe_error(last_error)
+        for ticker in chunk:
+            report.failed[ticker] = reason
+
+    async def fetch(self, tickers, period=None, interval='1d', start=None, on_chunk=None):
+        """({sembol: DataFrame}, FetchReport) döndürür; akış modunda sözlük boştur"""
+        report = FetchReport()
+        frames = {}
+        started = time.perf_counter()
+        bucket = TokenBucket(self.rate, self.burst)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        kwargs = {'period': period, 'interval': interval, 'start': start}
+        unique = list(dict.fromkeys(tickers))
+        await asyncio.gather(*(
+            self._fetch_chunk(chunk, kwargs, bucket, semaphore, frames, report, on_chunk)
+            for chunk in chunked(unique, self.chunk_size)
+        ))
+        report.elapsed = time.perf_counter() - started
+        return frames, report
+
+    def run(self, tickers, period=None, interval='1d', start=None, on_chunk=None):
+        """Senkron kod için fetch() sarmalayıcısı"""
+        return run_sync(self.fetch(tickers, period=period, interval=interval, start=start,
+                                   on_chunk=on_chunk))
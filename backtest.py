@@ -0,0 +1,359 @@
+"""
+Vektörel geriye dönük test (backtest) motoru.
+
+AGRESİF/DENGELİ puanlama kuralları ve haftalık SuperTrend alım kuralları
+(tarih × sembol) panelleri üzerinde tüm geçmiş için tek seferde maske
+olarak hesaplanır. Simülasyon barlar üzerinde tek geçiştir; her barda
+çıkışlar (stop/hedef/sinyal), girişler ve portföy değeri tüm semboller için
+dizi işlemleriyle bulunur. Sinyal barın kapanışında oluşur ve giriş o
+kapanıştan yapılır (tarayıcının 'Son Kapanış' tanımı); stop ve hedef bir
+sonraki bardan itibaren kontrol edilir.
+"""
+import math
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from indicators import macd, rolling_mean, rolling_volume_ratio, rsi, supertrend
+from scan_settings import (ATR_PERIOD, MAX_PULLBACK_ATR, MIN_BARS, MIN_WEEKLY_VOLUME,
+                           SUPER_TREND_MULT, SUPER_TREND_PERIOD)
+
+# Tarayıcılardaki varsayılanlar (main.py ayarlarıyla aynı; SuperTrend eşikleri scan_settings'te)
+PORTFOLIO_SIZE = 50_000
+RISK_PER_TRADE = 0.01
+MAX_POSITIONS = 3
+
+# Strateji -> (stop yüzdesi, hedef yüzdesi); calculate_risk_levels ile aynı
+RISK_LEVELS = {'AGRESİF': (0.05, 0.15), 'DENGELİ': (0.10, 0.30)}
+AGRESİF_PİYASA_DEĞERİ_MAKS = 500_000_000
+DENGELİ_PİYASA_DEĞERİ_MİN = 10_000_000_000
+
+PANEL_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+DatePanel = namedtuple('DatePanel', ['index', 'tickers', 'fields'])
+Signals = namedtuple('Signals', ['entry', 'rank', 'stop', 'target', 'exit'])
+
+
+# -------------------- PANEL --------------------
+def align_frames(frames, tickers=None, fields=PANEL_FIELDS):
+    """
+    Çerçeveleri ortak tarih eksenine (tüm tarihlerin birleşimi) yerleştirir.
+    Sembolün o tarihte barı yoksa NaN kalır. DatePanel döndürür.
+    """
+    tickers = [t for t in (list(frames) if tickers is None else tickers)
+               if frames.get(t) is not None and not frames[t].empty]
+    stamps = []
+    for ticker in tickers:
+        index = pd.DatetimeIndex(frames[ticker].index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        stamps.append(index.values.astype('datetime64[ns]').astype('i8'))   # Birimden bağımsız
+    dates = np.unique(np.concatenate(stamps)) if stamps else np.array([], dtype='i8')
+
+    panels = {f: np.full((len(dates), len(tickers)), np.nan) for f in fields}
+    for j, ticker in enumerate(tickers):
+        df = frames[ticker]
+        rows = np.searchsorted(dates, stamps[j])
+        for field in fields:
+            if field in df.columns:
+                panels[field][rows, j] = df[field].to_numpy(dtype=np.float64)
+    return DatePanel(pd.DatetimeIndex(dates), tickers, panels)
+
+
+def _static_column(tickers, fundamentals, name, default=np.nan):
+    return np.array([(fundamentals.get(t) or {}).get(name, default) for t in tickers],
+                    dtype=np.float64)
+
+
+def _percent_levels(close, strategy):
+    stop_pct, target_pct = RISK_LEVELS[strategy]
+    return close * (1 - stop_pct), close * (1 + target_pct)
+
+
+# -------------------- SİNYALLER --------------------
+def aggressive_signals(panel, fundamentals=None, min_score=1, rsi_window=7):
+    """
+    AGRESİF puanı her bar için: hacim ≥ 3x (4), MACD yukarı kesişi (3),
+    RSI(7) 30-40'tan yukarı dönüş (3). fundamentals verilirse piyasa değeri
+    filtresi uygulanır (bugünkü değerlerle; geçmişe dönük bilgi sızıntısıdır).
+    """
+    close, volume = panel.fields['Close'], panel.fields['Volume']
+    line, signal_line = macd(close, 12, 26, 9)
+    rsi_fast = rsi(close, rsi_window)
+    prev = np.s_[:-1]
+
+    score = np.zeros(close.shape)
+    with np.errstate(invalid='ignore'):
+        score += np.where(rolling_volume_ratio(volume, 20) >= 3.0, 4, 0)
+        score[1:] += np.where((line[prev] < signal_line[prev]) & (line[1:] > signal_line[1:]), 3, 0)
+        score[1:] += np.where((rsi_fast[prev] >= 30) & (rsi_fast[prev] <= 40)
+                              & (rsi_fast[1:] > rsi_fast[prev]), 3, 0)
+        entry = score >= min_score
+        if fundamentals is not None:
+            market_cap = _static_column(panel.tickers, fundamentals, 'marketCap')
+            entry &= market_cap <= AGRESİF_PİYASA_DEĞERİ_MAKS
+    stop, target = _percent_levels(close, 'AGRESİF')
+    return Signals(entry & ~np.isnan(close), score, stop, target, np.zeros_like(entry))
+
+
+def balanced_signals(panel, fundamentals=None, min_score=1, rsi_window=14, ma_window=200):
+    """
+    DENGELİ puanı her bar için: fiyat > 200 günlük MA (3), RSI(14) 40-65 (2).
+    fundamentals verilirse piyasa değeri/gelir büyümesi filtresi ve temel
+    puanlar (büyüme 3, D/E 2, ROE 2) sembol başına sabit olarak eklenir.
+    """
+    close = panel.fields['Close']
+    rsi_slow = rsi(close, rsi_window)
+
+    score = np.zeros(close.shape)
+    with np.errstate(invalid='ignore'):
+        score += np.where(close > rolling_mean(close, ma_window), 3, 0)
+        score += np.where((rsi_slow >= 40) & (rsi_slow <= 65), 2, 0)
+        passes = np.ones(close.shape[1], dtype=bool)
+        if fundamentals is not None:
+            tickers = panel.tickers
+            revenue_growth = _static_column(tickers, fundamentals, 'revenueGrowth', 0.0)
+            market_cap = _static_column(tickers, fundamentals, 'marketCap')
+            passes = (market_cap >= DENGELİ_PİYASA_DEĞERİ_MİN) & (revenue_growth > 0.10)
+            score += (np.where(revenue_growth > 0.10, 3, 0)
+                      + np.where(_static_column(tickers, fundamentals, 'debtToEquity') < 0.5, 2, 0)
+                      + np.where(_static_column(tickers, fundamentals, 'returnOnEquity') > 0.15, 2, 0))
+    entry = (score >= min_score) & passes & ~np.isnan(close)
+    stop, target = _percent_levels(close, 'DENGELİ')
+    return Signals(entry, score, stop, target, np.zeros_like(entry))
+
+
+def supertrend_signals(panel, period=SUPER_TREND_PERIOD, multiplier=SUPER_TREND_MULT,
+                       atr_period=ATR_PERIOD, max_pullback_atr=MAX_PULLBACK_ATR,
+                       min_bars=MIN_BARS, min_volume=MIN_WEEKLY_VOLUME, result=None):
+    """
+    evaluate_entry kuralları her bar için: yukarı trend, fiyat SuperTrend
+    üstünde ve en çok max_pullback_atr ATR uzakta; validate_data'daki en az
+    50 bar ve son 10 bar ortalama hacim koşullarıyla. Stop giriş barındaki
+    SuperTrend çizgisi, hedef yok; trend aşağı döndüğünde kapanıştan çıkılır.
+    Sıralama R-Score ile yapılır. result, önceden hesaplanmış SuperTrend'dir.
+    """
+    high, low, close = panel.fields['High'], panel.fields['Low'], panel.fields['Close']
+    if result is None:
+        result = supertrend(high, low, close, period=period, multiplier=multiplier,
+                            atr_period=atr_period)
+    line, direction, atr = result.supertrend, result.direction, result.atr
+    bars_seen = np.cumsum(~np.isnan(close), axis=0)
+
+    with np.errstate(invalid='ignore'):
+        entry = ((direction == 1) & (close > line) & (close - line <= max_pullback_atr * atr)
+                 & (bars_seen >= min_bars))
+        if min_volume:
+            entry &= rolling_mean(panel.fields['Volume'], 10) >= min_volume
+        exit_signal = direction == -1
+    return Signals(entry, result.r_score, line, np.full_like(close, np.nan), exit_signal)
+
+
+# -------------------- SİMÜLASYON --------------------
+class BacktestResult:
+    """Özsermaye eğrisi, işlem listesi ve özet istatistikler"""
+
+    def __init__(self, equity, trades, traded_value, exposure, periods_per_year):
+        self.equity = equity
+        self.trades = trades
+        self.traded_value = traded_value
+        self.exposure = exposure
+        self.periods_per_year = periods_per_year
+        self.stats = self._stats()
+
+    def _stats(self):
+        equity = self.equity.to_numpy()
+        if len(equity) == 0:
+            return {'trades': 0}
+        start, end = equity[0], equity[-1]
+        years = len(equity) / self.periods_per_year
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+        returns = np.diff(equity) / equity[:-1]
+        pnl = self.trades['pnl'].to_numpy() if len(self.trades) else np.array([])
+        return {
+            'total_return': end / start - 1,
+            'cagr': (end / start) ** (1 / years) - 1 if years > 0 and end > 0 else math.nan,
+            'max_drawdown': float(drawdown.min()),
+            'sharpe': (returns.mean() / returns.std() * math.sqrt(self.periods_per_year)
+                       if len(returns) > 1 and returns.std() > 0 else math.nan),
+            'trades': len(pnl),
+            'hit_rate': float((pnl > 0).mean()) if len(pnl) else math.nan,
+            'avg_bars_held': float(self.trades['bars'].mean()) if len(pnl) else math.nan,
+            'turnover': self.traded_value / equity.mean() / years if years > 0 else math.nan,
+            'exposure': self.exposure,
+        }
+
+    def summary(self):
+        s = self.stats
+        if not s.get('trades'):
+            return "İşlem yok"
+        return (f"Getiri %{s['total_return'] * 100:.1f} (yıllık %{s['cagr'] * 100:.1f}), "
+                f"maks. düşüş %{s['max_drawdown'] * 100:.1f}, Sharpe {s['sharpe']:.2f}\n"
+                f"{s['trades']} işlem, isabet %{s['hit_rate'] * 100:.0f}, "
+                f"ort. {s['avg_bars_held']:.1f} bar, yıllık devir {s['turnover']:.1f}x, "
+                f"piyasada %{s['exposure'] * 100:.0f}")
+
+
+def periods_per_year(index):
+    """Bar aralığından yıllık bar sayısı (günlük 252, haftalık 52, aylık 12)"""
+    if len(index) < 2:
+        return 252
+    days = np.median(np.diff(index.values.astype('datetime64[ns]').astype('i8'))) / 86_400e9
+    return 252 if days < 3 else 52 if days < 10 else 12
+
+
+def simulate(panel, signals, portfolio_size=PORTFOLIO_SIZE, risk_per_trade=RISK_PER_TRADE,
+             max_positions=MAX_POSITIONS):
+    """
+    Sinyalleri portföy kısıtlarıyla oynatır. Pozisyon büyüklüğü tarayıcıdaki
+    gibi (portföy × risk) / (fiyat - stop) tam sayı hisse, nakitle sınırlı.
+    Aynı bar içinde hem stop hem hedef görülürse stop varsayılır; boşlukla
+    açılışta seviye aşılmışsa açılış fiyatından çıkılır.
+    """
+    opens, high, low, close = (panel.fields[f] for f in ('Open', 'High', 'Low', 'Close'))
+    opens = np.where(np.isnan(opens), close, opens)
+    n_bars, n_tickers = close.shape
+    risk_usd = portfolio_size * risk_per_trade
+
+    cash = float(portfolio_size)
+    shares = np.zeros(n_tickers)
+    stop = np.full(n_tickers, np.nan)
+    target = np.full(n_tickers, np.nan)
+    entry_price = np.full(n_tickers, np.nan)
+    entry_bar = np.full(n_tickers, -1)
+    mark = np.full(n_tickers, np.nan)
+    equity = np.empty(n_bars)
+    traded_value = 0.0
+    bars_exposed = 0
+    exits = []   # (sembol indeksleri, giriş barı, çıkış barı, giriş, çıkış, hisse, neden)
+
+    with np.errstate(invalid='ignore'):
+        for t in range(n_bars):
+            c = close[t]
+            mark = np.where(np.isnan(c), mark, c)
+            held = shares > 0
+
+            if held.any():
+                stop_hit = held & (low[t] <= stop)
+                target_hit = held & ~stop_hit & (high[t] >= target)
+                signal_exit = held & ~stop_hit & ~target_hit & signals.exit[t] & ~np.isnan(c)
+                leaving = stop_hit | target_hit | signal_exit
+                if leaving.any():
+                    price = np.where(stop_hit, np.fmin(opens[t], stop),
+                                     np.where(target_hit, np.fmax(opens[t], target), c))
+                    idx = np.flatnonzero(leaving)
+                    proceeds = shares[idx] * price[idx]
+                    cash += proceeds.sum()
+                    traded_value += proceeds.sum()
+                    reason = np.where(stop_hit[idx], 'stop',
+                                      np.where(target_hit[idx], 'hedef', 'sinyal'))
+                    exits.append((idx, entry_bar[idx], np.full(len(idx), t), entry_price[idx],
+                                  price[idx], shares[idx], reason))
+                    shares[idx] = 0
+                    held = shares > 0
+            else:
+                leaving = np.zeros(n_tickers, dtype=bool)
+
+            slots = max_positions - int(held.sum())
+            if slots > 0:
+                candidates = np.flatnonzero(signals.entry[t] & ~held & ~leaving)
+                if len(candidates):
+                    order = candidates[np.argsort(-signals.rank[t, candidates], kind='stable')]
+                    risk_per_share = c[order] - signals.stop[t, order]
+                    wanted = np.floor(risk_usd / np.where(risk_per_share > 0, risk_per_share, np.nan))
+                    for j, count in zip(order, wanted):
+                        if slots == 0:
+                            break
+                        count = min(count, math.floor(cash / c[j])) if count >= 1 else 0
+                        if not count >= 1:
+                            continue
+                        cost = count * c[j]
+                        cash -= cost
+                        traded_value += cost
+                        shares[j] = count
+                        entry_price[j] = c[j]
+                        entry_bar[j] = t
+                        stop[j] = signals.stop[t, j]
+                        target[j] = signals.target[t, j]
+                        slots -= 1
+
+            if (shares > 0).any():
+                bars_exposed += 1
+            equity[t] = cash + np.nansum(shares * mark)
+
+    # Dönem sonunda açık pozisyonlar son fiyattan kapatılmış sayılır
+    open_idx = np.flatnonzero(shares > 0)
+    if len(open_idx):
+        exits.append((open_idx, entry_bar[open_idx], np.full(len(open_idx), n_bars - 1),
+                      entry_price[open_idx], mark[open_idx], shares[open_idx],
+                      np.full(len(open_idx), 'açık')))
+
+    trades = _trades_frame(panel, exits)
+    return BacktestResult(pd.Series(equity, index=panel.index, name='equity'), trades,
+                          traded_value, bars_exposed / max(1, n_bars),
+                          periods_per_year(panel.index))
+
+
+def _trades_frame(panel, exits):
+    columns = ['ticker', 'entry_date', 'exit_date', 'entry', 'exit', 'shares', 'pnl',
+               'return', 'bars', 'reason']
+    if not exits:
+        return pd.DataFrame(columns=columns)
+    idx, entry_bar, exit_bar, entry, exit_price, shares, reason = (
+        np.concatenate(parts) for parts in zip(*exits))
+    trades = pd.DataFrame({
+        'ticker': np.asarray(panel.tickers, dtype=object)[idx],
+        'entry_date': panel.index[entry_bar],
+        'exit_date': panel.index[exit_bar],
+        'entry': entry,
+        'exit': exit_price,
+        'shares': shares.astype(int),
+        'pnl': (exit_price - entry) * shares,
+        'return': exit_price / entry - 1,
+        'bars': exit_bar - entry_bar,
+        'reason': reason,
+    }, columns=columns)
+    return trades.sort_values(['entry_date', 'ticker'], kind='stable').reset_index(drop=True)
+
+
+STRATEGIES = {
+    'AGRESİF': aggressive_signals,
+    'DENGELİ': balanced_signals,
+    'SUPERTREND': supertrend_signals,
+}
+
+
+def run_backtest(frames, strategy, fundamentals=None, portfolio_size=PORTFOLIO_SIZE,
+                 risk_per_trade=RISK_PER_TRADE, max_positions=MAX_POSITIONS, **signal_options):
+    """{sembol: DataFrame} üzerinde stratejiyi test eder; BacktestResult döndürür"""
+    strategy = strategy.upper()
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Strateji {', '.join(STRATEGIES)} olmalıdır.")
+    panel = align_frames(frames)
+    if strategy != 'SUPERTREND':
+        signal_options['fundamentals'] = fundamentals
+    signals = STRATEGIES[strategy](panel, **signal_options)
+    return simulate(panel, signals, portfolio_size, risk_per_trade, max_positions)
+
+
+# -------------------- KOMUT SATIRI --------------------
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2 or argv[0].upper() not in STRATEGIES:
+        print("Kullanım: python backtest.py AGRESİF|DENGELİ|SUPERTREND <sembol> [<sembol> ...]")
+        return 2
+    from data_provider import get_default_loader
+
+    strategy, tickers = argv[0].upper(), argv[1:]
+    interval = '1wk' if strategy == 'SUPERTREND' else '1d'
+    panel = get_default_loader().load(tickers, period='10y', interval=interval)
+    result = run_backtest(panel.frames, strategy)
+    print(f"📊 {strategy}: {len(panel.tickers)} hisse, {len(result.equity)} bar")
+    print(result.summary())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,490 @@
+"""
+Kalıcı, artımlı OHLCV bar önbelleği.
+
+Her (sembol, aralık) çifti tek bir yapılandırılmış NumPy dosyasında
+(.npy, bellek eşlemeli okunur) tutulur. manifest.json her kayıt için son
+bar damgasını (watermark), sağlayıcıya son sorulduğu anı, boyutu ve son
+erişim zamanını saklar. Yazmalar geçici dosya + os.replace ile atomiktir;
+bozuk kayıtlar soğuk kabul edilir.
+attach() ile bağlanan tek dosyalık sıcak anlık görüntünün (warm_state)
+kayıtları, dizindekinden daha yeni olduklarında doğrudan eşlemeden okunur.
+
+Komut satırı (GitHub Actions anlık görüntüsü için):
+    python bar_cache.py export bar_cache_snapshot.tar.gz
+    python bar_cache.py import bar_cache_snapshot.tar.gz
+"""
+import json
+import logging
+import os
+import re
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_provider import (OHLCV_FIELDS, DataProvider, TransientFetchError, clock_now,
+                           normalize_frame, period_to_offset)
+from market_calendar import is_current
+
+DEFAULT_CACHE_DIR = '.bar_cache'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+MANIFEST_NAME = 'manifest.json'
+REBASE_TOLERANCE = 1e-4   # Çakışan kapanışlar arasında izin verilen göreli fark
+
+BAR_DTYPE = np.dtype([('ts', 'i8')] + [(f, 'f8') for f in OHLCV_FIELDS])
+
+
+# -------------------- HATALAR --------------------
+class HistoryMismatch(ValueError):
+    """
+    Önbellekteki barlar yeni çekilen çakışan barlarla uyuşmuyor: sağlayıcı
+    bölünme/temettü sonrası düzeltilmiş geçmişi yeniden ölçeklemiştir
+    """
+
+
+# -------------------- YARDIMCI FONKSİYONLAR --------------------
+def _safe_name(symbol, interval):
+    return f"{re.sub(r'[^A-Za-z0-9._-]', '_', symbol)}__{interval}.npy"
+
+
+def _atomic_write(path, write_fn):
+    """Aynı dizinde geçici dosyaya yazar, fsync sonrası yerine taşır"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def frame_to_records(df):
+    """OHLCV DataFrame -> BAR_DTYPE dizisi (zaman damgası tz'siz ns)"""
+    index = df.index
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    records = np.empty(len(df), dtype=BAR_DTYPE)
+    records['ts'] = index.values.astype('datetime64[ns]').astype('i8')
+    for field in OHLCV_FIELDS:
+        records[field] = df[field].to_numpy(dtype=np.float64) if field in df else np.nan
+    return records
+
+
+def records_to_frame(records, tz=None):
+    """BAR_DTYPE dizisi -> OHLCV DataFrame (bellek eşlemesinden kopyalanır)"""
+    index = pd.DatetimeIndex(records['ts'].astype('datetime64[ns]'))
+    if tz:
+        index = index.tz_localize(tz)
+    return pd.DataFrame({f: np.array(records[f]) for f in OHLCV_FIELDS}, index=index)
+
+
+# -------------------- ÖNBELLEK --------------------
+class BarCache:
+    """(sembol, aralık) anahtarlı disk önbelleği"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._read_manifest()
+        self.snapshot = None    # warm_state.WarmSnapshot (salt okunur)
+        # Asenkron hat sağlayıcıyı birden fazla iş parçacığından çağırabilir
+        self._lock = threading.RLock()
+
+    # --- manifest ---
+    def _manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def _read_manifest(self):
+        path = self._manifest_path()
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Önbellek manifesti okunamadı, sıfırlanıyor: {e}")
+            return {}
+
+    def _write_manifest(self):
+        with self._lock:
+            payload = json.dumps(self.manifest, indent=1, sort_keys=True).encode('utf-8')
+            _atomic_write(self._manifest_path(), lambda f: f.write(payload))
+
+    @staticmethod
+    def _key(symbol, interval):
+        return f"{symbol}|{interval}"
+
+    def attach(self, snapshot):
+        """Sıcak anlık görüntüyü salt okunur alt katman olarak bağlar"""
+        self.snapshot = snapshot
+
+    # --- okuma ---
+    def keys(self):
+        """Dizindeki ve bağlı anlık görüntüdeki tüm kayıt anahtarları"""
+        keys = dict.fromkeys(self.manifest)
+        if self.snapshot is not None:
+            keys.update(dict.fromkeys(self.snapshot.entries))
+        return list(keys)
+
+    def entry(self, symbol, interval):
+        """Kayıt bilgisi; anlık görüntüdeki daha yeniyse o (dosya yerine ofset taşır)"""
+        key = self._key(symbol, interval)
+        local = self.manifest.get(key)
+        if self.snapshot is None:
+            return local
+        snap = self.snapshot.entries.get(key)
+        if local is None or (snap is not None and snap['last_ts'] > local['last_ts']):
+            return snap
+        return local
+
+    def records(self, symbol, interval):
+        """Kaydın BAR_DTYPE dizisi (eşlemeden, kopyasız); yoksa ya da bozuksa None"""
+        entry = self.entry(symbol, interval)
+        if entry is None:
+            return None
+        try:
+            if 'offset' in entry:
+                records = self.snapshot.records(entry)
+            else:
+                records = np.load(os.path.join(self.directory, entry['file']), mmap_mode='r')
+            if records.dtype != BAR_DTYPE or len(records) != entry['rows']:
+                raise ValueError('boyut/şema uyuşmazlığı')
+        except (OSError, ValueError) as e:
+            logging.warning(f"{symbol} ({interval}) önbellek kaydı bozuk, atlanıyor: {e}")
+            self.invalidate(symbol, interval)
+            return None
+        entry['accessed'] = time.time()
+        return records
+
+    def watermark(self, symbol, interval):
+        """Son barın zaman damgası (yoksa None)"""
+        entry = self.entry(symbol, interval)
+        return pd.Timestamp(entry['last_ts']) if entry else None
+
+    def get(self, symbol, interval):
+        """Önbellekteki çerçeve; kayıt yoksa ya da bozuksa None"""
+        records = self.records(symbol, interval)
+        if records is None:
+            return None
+        return records_to_frame(records, self.entry(symbol, interval).get('tz'))
+
+    # --- yazma ---
+    def put(self, symbol, interval, df, covered_from=None):
+        """Çerçeveyi kaydın tamamı olarak yazar (manifest için flush() gerekir)"""
+        df = normalize_frame(df)
+        if df is None:
+            return
+        with self._lock:
+            self._put(symbol, interval, df, covered_from)
+
+    def _put(self, symbol, interval, df, covered_from):
+        records = frame_to_records(df)
+        name = _safe_name(symbol, interval)
+        _atomic_write(os.path.join(self.directory, name), lambda f: np.save(f, records))
+
+        key = self._key(symbol, interval)
+        previous = self.entry(symbol, interval) or {}
+        tz = getattr(df.index, 'tz', None)
+        self.manifest[key] = {
+            'symbol': symbol,
+            'interval': interval,
+            'file': name,
+            'rows': int(len(records)),
+            'bytes': int(records.nbytes),
+            'first_ts': str(df.index[0].tz_localize(None) if tz else df.index[0]),
+            'last_ts': str(df.index[-1].tz_localize(None) if tz else df.index[-1]),
+            # Artımlı güncelleme sondan bir önceki (tamamlanmış) bardan başlar
+            'prev_ts': str(df.index[-2 if len(df) > 1 else -1].tz_localize(None) if tz
+                           else df.index[-2 if len(df) > 1 else -1]),
+            'tz': str(tz) if tz else None,
+            'covered_from': covered_from or previous.get('covered_from'),
+            'accessed': time.time(),
+        }
+        # Manifest flush() ile toplu yazılır; arada kesilirse satır sayısı
+        # uyuşmayan kayıt get() tarafından soğuk kabul edilir
+        self._evict()
+
+    def overlap_start(self, symbol, interval):
+        """Artımlı isteğin başlangıcı: sondan bir önceki barın damgası (yoksa son bar)"""
+        entry = self.entry(symbol, interval)
+        return entry.get('prev_ts') or entry['last_ts']
+
+    def append(self, symbol, interval, new_bars):
+        """
+        Watermark sonrası barları ekler. Son bar (yarım gün/hafta) yeni
+        veriyle değişmiş olabileceğinden çakışan barlar yenisiyle değiştirilir.
+        Çakışan tamamlanmış barların kapanışı yenisinden farklıysa (geçmiş
+        yeniden ölçeklenmiş) hiçbir şey yazılmadan HistoryMismatch yükseltilir.
+        """
+        new_bars = normalize_frame(new_bars)
+        if new_bars is None:
+            return self.get(symbol, interval)
+        with self._lock:
+            return self._append(symbol, interval, new_bars)
+
+    def _append(self, symbol, interval, new_bars):
+        cached = self.get(symbol, interval)
+        if cached is None:
+            merged = new_bars
+        else:
+            if getattr(cached.index, 'tz', None) is None and getattr(new_bars.index, 'tz', None) is not None:
+                new_bars = new_bars.tz_localize(None)
+            self._check_overlap(symbol, interval, cached, new_bars)
+            merged = pd.concat([cached[cached.index < new_bars.index[0]], new_bars])
+            merged = merged[~merged.index.duplicated(keep='last')]
+        self.put(symbol, interval, merged)
+        return merged
+
+    @staticmethod
+    def _check_overlap(symbol, interval, cached, new_bars):
+        common = cached.index.intersection(new_bars.index)
+        if len(common) > 1:
+            common = common[common < cached.index[-1]]   # Son bar yarım olabilir
+        if not len(common):
+            return
+        old = cached.loc[common, 'Close'].to_numpy(dtype=np.float64)
+        new = new_bars.loc[common, 'Close'].to_numpy(dtype=np.float64)
+        if not np.allclose(old, new, rtol=REBASE_TOLERANCE, atol=0.0, equal_nan=True):
+            ratio = np.nanmedian(new / old)
+            raise HistoryMismatch(f"{symbol} ({interval}) geçmişi yeniden ölçeklenmiş "
+                                  f"(çakışan kapanış oranı {ratio:.4f})")
+
+    def mark_checked(self, symbol, interval, when):
+        """Kaydın sağlayıcıya en son sorulduğu anı (epoch sn) işler"""
+        with self._lock:
+            entry = self.entry(symbol, interval)
+            if entry is not None:
+                entry['checked'] = when
+
+    def invalidate(self, symbol, interval):
+        with self._lock:
+            key = self._key(symbol, interval)
+            entry = self.manifest.pop(key, None)
+            if self.snapshot is not None:
+                self.snapshot.entries.pop(key, None)
+        if entry:
+            path = os.path.join(self.directory, entry['file'])
+            if os.path.exists(path):
+                os.remove(path)
+            self._write_manifest()
+
+    def total_bytes(self):
+        return sum(e['bytes'] for e in self.manifest.values())
+
+    def _evict(self):
+        """Boyut sınırı aşılınca en uzun süredir erişilmeyen kayıtları siler"""
+        if self.max_bytes is None:
+            return
+        total = self.total_bytes()
+        for key, entry in sorted(self.manifest.items(), key=lambda kv: kv[1]['accessed']):
+            if total <= self.max_bytes:
+                break
+            path = os.path.join(self.directory, entry['file'])
+            if os.path.exists(path):
+                os.remove(path)
+            del self.manifest[key]
+            total -= entry['bytes']
+            logging.info(f"Önbellekten çıkarıldı: {entry['symbol']} ({entry['interval']})")
+
+    def flush(self):
+        """Manifesti (watermark'lar, erişim zamanları) diske yazar"""
+        self._write_manifest()
+
+    # --- anlık görüntü ---
+    def materialize(self):
+        """Bağlı sıcak anlık görüntüden okunan kayıtları dizine dosya olarak yazar"""
+        if self.snapshot is None:
+            return
+        with self._lock:
+            for key in list(self.snapshot.entries):
+                entry = self.snapshot.entries[key]
+                if self.entry(entry['symbol'], entry['interval']) is entry:
+                    df = records_to_frame(self.snapshot.records(entry), entry.get('tz'))
+                    self._put(entry['symbol'], entry['interval'], df, entry.get('covered_from'))
+
+    def export_snapshot(self, path):
+        """
+        Manifest, bar dosyaları ve dizindeki yan dosyaları (temel veri
+        deposu vb.) tek bir .tar.gz dosyasına yazar
+        """
+        self.materialize()
+        self._write_manifest()
+        bar_files = {entry['file'] for entry in self.manifest.values()}
+        extras = sorted(
+            name for name in os.listdir(self.directory)
+            if not name.endswith('.npy') and not name.startswith('.tmp-')
+            and name != MANIFEST_NAME and os.path.isfile(os.path.join(self.directory, name))
+        )
+
+        def write(f):
+            with tarfile.open(fileobj=f, mode='w:gz') as tar:
+                tar.add(self._manifest_path(), arcname=MANIFEST_NAME)
+                for name in sorted(bar_files) + extras:
+                    tar.add(os.path.join(self.directory, name), arcname=name)
+
+        _atomic_write(os.path.abspath(path), write)
+        return path
+
+    def import_snapshot(self, path):
+        """Anlık görüntüyü önbellek dizinine açar; mevcut kayıtların üzerine yazar"""
+        with tarfile.open(path, mode='r:gz') as tar:
+            members = [m for m in tar.getmembers()
+                       if m.isfile() and os.path.basename(m.name) == m.name]
+            for member in members:
+                data = tar.extractfile(member).read()
+                _atomic_write(os.path.join(self.directory, member.name),
+                              lambda f, data=data: f.write(data))
+        self.manifest = self._read_manifest()
+        return len(self.manifest)
+
+
+# -------------------- ÖNBELLEKLİ SAĞLAYICI --------------------
+class CachingProvider(DataProvider):
+    """
+    Başka bir sağlayıcıyı sarar: soğuk semboller için tam geçmişi,
+    sıcak semboller için yalnızca watermark sonrası barları çeker.
+    Son sorulduğundan beri borsasında hiç seans kapanmamış (ve seansı şu
+    an açık olmayan) semboller için hiç istek atılmaz (bkz. market_calendar).
+    Artımlı istek sondan bir önceki bardan başlar; çakışan bar önbellektekiyle
+    uyuşmazsa (bölünme/temettü düzeltmesi) sembolün tam geçmişi yeniden çekilir.
+    """
+    name = 'cache'
+
+    def __init__(self, inner, cache):
+        self.inner = inner
+        self.cache = cache
+        self.max_batch = getattr(inner, 'max_batch', None)
+        self.hits = 0      # Önbellekten karşılanan (sıcak) semboller
+        self.misses = 0    # Tam geçmişi çekilen (soğuk) semboller
+        self.current = 0   # Takvime göre güncel olduğu için hiç sorulmayan semboller
+        self.rebased = 0   # Geçmişi yeniden ölçeklendiği için tamamen yeniden çekilenler
+
+    def _is_covered(self, entry, period):
+        offset = period_to_offset(period)
+        if entry is None or entry.get('covered_from') is None:
+            return False
+        if offset is None:
+            return entry['covered_from'] == 'max'
+        if entry['covered_from'] == 'max':
+            return True
+        required = clock_now().normalize() - offset
+        return pd.Timestamp(entry['covered_from']) <= required
+
+    def fetch_history(self, tickers, period=None, interval='1d', start=None):
+        if start is not None:
+            return self.inner.fetch_history(tickers, interval=interval, start=start)
+
+        now = clock_now(tz='UTC')
+        checked = now.timestamp()
+        cold, warm, current = [], {}, []
+        for ticker in tickers:
+            entry = self.cache.entry(ticker, interval)
+            if not self._is_covered(entry, period):
+                cold.append(ticker)
+            elif is_current(ticker, interval, entry.get('checked'), now):
+                current.append(ticker)
+            else:
+                warm.setdefault(self.cache.overlap_start(ticker, interval)[:10], []).append(ticker)
+        self.hits += len(tickers) - len(cold)
+        self.misses += len(cold)
+        self.current += len(current)
+        if current:
+            logging.info(f"{len(current)} sembol ({interval}) son seanstan sonra alınmış, istek atlandı")
+
+        frames = {}
+        for ticker in current:
+            df = self.cache.get(ticker, interval)
+            if df is not None:
+                frames[ticker] = df
+
+        # Aynı başlangıca sahip semboller tek istekte güncellenir
+        rebased = []
+        for watermark, group in warm.items():
+            try:
+                new_bars = self.inner.fetch_history(group, interval=interval, start=watermark)
+            except Exception as e:
+                logging.warning(f"Artımlı güncelleme başarısız ({watermark}), önbellek kullanılıyor: {e}")
+                new_bars = None
+            for ticker in group:
+                try:
+                    if new_bars and ticker in new_bars:
+                        df = self.cache.append(ticker, interval, new_bars[ticker])
+                    else:
+                        df = self.cache.get(ticker, interval)
+                except HistoryMismatch as e:
+                    logging.warning(f"{e}; tam geçmiş yeniden çekiliyor")
+                    rebased.append(ticker)
+                    continue
+                if new_bars is not None:
+                    self.cache.mark_checked(ticker, interval, checked)
+                if df is not None:
+                    frames[ticker] = df
+        self.rebased += len(rebased)
+
+        cold += rebased
+        error = None
+        if cold:
+            offset = period_to_offset(period)
+            covered_from = 'max' if offset is None else \
+                str((clock_now().normalize() - offset).date())
+            try:
+                fetched = self.inner.fetch_history(cold, period=period, interval=interval)
+            except TransientFetchError as e:
+                # Alınabilenler önbelleğe yazılır; hata sıcak/güncel sembollerle birlikte iletilir
+                fetched, error = e.partial, e
+            for ticker, df in fetched.items():
+                self.cache.put(ticker, interval, df, covered_from=covered_from)
+                self.cache.mark_checked(ticker, interval, checked)
+                frames[ticker] = df
+
+        self.cache.flush()
+        offset = period_to_offset(period)
+        if offset is not None:
+            end = clock_now()
+            for ticker, df in frames.items():
+                cut = end - offset
+                if getattr(df.index, 'tz', None) is not None:
+                    cut = cut.tz_localize(df.index.tz)
+                frames[ticker] = df[df.index > cut]
+        frames = {t: df for t, df in frames.items() if not df.empty}
+        if error is not None:
+            raise TransientFetchError(str(error), error.status, error.retry_after,
+                                      partial=frames) from error
+        return frames
+
+    def fetch_fundamentals(self, ticker):
+        return self.inner.fetch_fundamentals(ticker)
+
+
+# -------------------- KOMUT SATIRI --------------------
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] not in ('export', 'import'):
+        print("Kullanım: python bar_cache.py export|import <dosya.tar.gz>")
+        return 2
+    command, path = argv
+    cache = BarCache(os.environ.get('BIST_CACHE_DIR', DEFAULT_CACHE_DIR))
+    if command == 'export':
+        cache.export_snapshot(path)
+        print(f"✅ {len(cache.manifest)} kayıt dışa aktarıldı: {path}")
+    else:
+        if not os.path.exists(path):
+            print(f"ℹ️ Anlık görüntü bulunamadı, soğuk başlangıç: {path}")
+            return 0
+        count = cache.import_snapshot(path)
+        print(f"✅ {count} kayıt içe aktarıldı: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
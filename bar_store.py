@@ -0,0 +1,239 @@
+"""
+Sıkıştırılmış sütunsal bar ve temel veri deposu.
+
+BarStore tüm sembollerin barlarını alan başına tek bir bitişik dizide
+uç uca tutar: fiyatlar varsayılan float32, hacim float64 (float32 yalnızca
+2^24'e kadar tam sayıları tam tutar; günlük hacimler bunu aşar). Zaman
+damgaları int64 (UTC ns), her sembolün yeri [başlangıç, bitiş) ofsetleriyle
+bulunur; saat dilimi sembol başınadır (aynı depoda İstanbul ve New York
+işlem gören semboller kendi yerel saatleriyle döner). Mapping arayüzü
+sayesinde {sembol: DataFrame} bekleyen kod değişmeden çalışır; çerçeve
+yalnızca istendiğinde kurulur. indicators.stack_frames depoyu tanır ve
+panelleri DataFrame kurmadan doğrudan dizilerden (istenirse hazır bir
+karalama tamponuna) yazar.
+
+FieldTable temel verilerin yalnızca kullanılan alanlarını (sembol × alan)
+float64 matrisinde tutar.
+
+Bellek bütçesi: estimate_ticker_bytes bir sembolün yükleme, depolama ve
+indikatör karalama maliyetini tahmin eder; chunk_size bütçeye sığan
+sembol sayısını verir.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+VOLUME_DTYPE = np.float64   # Büyük hacimler float32'de yuvarlanır; NaN (bilinmiyor) korunur
+LOAD_BYTES_PER_BAR = 2 * (len(FIELDS) * 8 + 8)   # sağlayıcı çıktısı + float64 DataFrame
+SCRATCH_PANELS = 12                              # float64 indikatör paneli (sembol başına)
+
+
+def _utc_ns(index):
+    """DatetimeIndex -> UTC int64 ns (birimden bağımsız)"""
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.values.astype('datetime64[ns]').astype('i8')
+
+
+class BarStore(Mapping):
+    """Sembol indeksli, alan başına bitişik dizilerde OHLCV barları"""
+
+    def __init__(self, tickers, times, values, starts, ends, fields=FIELDS, tz=None):
+        self.tickers = list(tickers)
+        self.times = times          # (toplam bar,) int64
+        self.values = list(values)  # alan başına (toplam bar,) dizi; türleri farklı olabilir
+        self.starts = starts        # (sembol,) int64
+        self.ends = ends
+        self.fields = tuple(fields)
+        # Sembol başına saat dilimi (None: tz'siz); tek değer verilirse hepsine
+        self.tzs = list(tz) if isinstance(tz, (list, tuple)) else [tz] * len(self.tickers)
+        self._index = {t: j for j, t in enumerate(self.tickers)}
+        self._field_index = {f: k for k, f in enumerate(self.fields)}
+
+    @classmethod
+    def from_frames(cls, frames, tickers=None, fields=FIELDS, dtype=np.float32):
+        """{sembol: DataFrame}'den kurar; boş ya da eksik çerçeveler atlanır"""
+        tickers = [t for t in (list(frames) if tickers is None else tickers)
+                   if frames.get(t) is not None and len(frames[t])]
+        lengths = np.array([len(frames[t]) for t in tickers], dtype=np.int64)
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        total = int(ends[-1]) if len(ends) else 0
+        times = np.empty(total, dtype=np.int64)
+        values = [np.empty(total, dtype=VOLUME_DTYPE if f == 'Volume' else dtype) for f in fields]
+        tzs, columns = [], list(fields)
+        for j, ticker in enumerate(tickers):
+            df = frames[ticker]
+            a, b = starts[j], ends[j]
+            times[a:b] = _utc_ns(df.index)
+            tzs.append(getattr(df.index, 'tz', None))
+            if list(df.columns) != columns:   # sütun seçimi pahalı; gerekmedikçe yapılmaz
+                df = df[columns]
+            block = df.to_numpy(dtype=np.float64)
+            for k, row in enumerate(values):
+                row[a:b] = block[:, k]
+        return cls(tickers, times, values, starts, ends, fields, tzs)
+
+    # --- Mapping ---
+    def __getitem__(self, ticker):
+        j = self._index[ticker]
+        a, b = self.starts[j], self.ends[j]
+        index = pd.DatetimeIndex(self.times[a:b].view('datetime64[ns]'))
+        if self.tzs[j] is not None:
+            index = index.tz_localize('UTC').tz_convert(self.tzs[j])
+        return pd.DataFrame(np.column_stack([row[a:b] for row in self.values]).astype(np.float64),
+                            index=index, columns=list(self.fields))
+
+    def __iter__(self):
+        return iter(self.tickers)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._index
+
+    # --- erişim ---
+    def length(self, ticker):
+        j = self._index[ticker]
+        return int(self.ends[j] - self.starts[j])
+
+    def tz_of(self, ticker):
+        """Sembolün saat dilimi (None: tz'siz)"""
+        return self.tzs[self._index[ticker]]
+
+    def local_days(self, times, owners):
+        """
+        Barların (times: UTC ns, owners: sembol sırası) kendi sembollerinin
+        yerel tarihi (1970'ten gün sayısı)
+        """
+        days = np.empty(len(times), dtype=np.int64)
+        groups = {}
+        for j, tz in enumerate(self.tzs):
+            groups.setdefault(str(tz), (tz, []))[1].append(j)
+        for tz, members in groups.values():
+            mask = np.isin(owners, members)
+            index = pd.DatetimeIndex(times[mask].view('datetime64[ns]'))
+            if tz is not None:
+                index = index.tz_localize('UTC').tz_convert(tz).tz_localize(None)
+            days[mask] = index.values.astype('datetime64[D]').astype(np.int64)
+        return days
+
+    def last_times(self, tickers):
+        """Sembollerin son bar zamanları (UTC ns; barı olmayanlarda -1)"""
+        idx = np.array([self._index[t] for t in tickers], dtype=np.int64)
+        starts, ends = self.starts[idx], self.ends[idx]
+        return np.where(ends > starts, self.times[np.maximum(ends - 1, 0)], -1)
+
+    def column(self, ticker, field):
+        """Sembolün alan dizisi (kopyasız görünüm)"""
+        j = self._index[ticker]
+        return self.values[self._field_index[field], self.starts[j]:self.ends[j]]
+
+    def select(self, tickers):
+        """Aynı dizileri paylaşan alt depo (kopyasız)"""
+        idx = np.array([self._index[t] for t in tickers], dtype=np.int64)
+        return BarStore([self.tickers[j] for j in idx], self.times, self.values,
+                        self.starts[idx], self.ends[idx], self.fields, [self.tzs[j] for j in idx])
+
+    def tail(self, period):
+        """
+        Her sembolün son bardan geriye 'period' ('30d', '1y'...) kadarını
+        gösteren alt depo (kopyasız); data_provider.trim_to_period ile aynı.
+        """
+        from data_provider import period_to_offset
+
+        offset = period_to_offset(period)
+        if offset is None:
+            return self
+        starts = self.starts.copy()
+        for j in range(len(self.tickers)):
+            a, b = self.starts[j], self.ends[j]
+            if b <= a:
+                continue
+            end = pd.Timestamp(int(self.times[b - 1]), tz='UTC')
+            if self.tzs[j] is not None:
+                end = end.tz_convert(self.tzs[j])
+            cutoff = (end - offset).tz_convert('UTC') if end.tz is not None else end - offset
+            starts[j] = a + np.searchsorted(self.times[a:b], cutoff.value, side='right')
+        return BarStore(self.tickers, self.times, self.values, starts, self.ends, self.fields,
+                        self.tzs)
+
+    def stack(self, tickers, fields, length=None, out=None):
+        """
+        {alan: sağa hizalı float64 panel}; indicators.stack_frames ile aynı
+        çıktı. out, (alan × uzunluk × sembol) karalama tamponu olabilir.
+        """
+        idx = [self._index[t] for t in tickers]
+        lengths = [int(self.ends[j] - self.starts[j]) for j in idx]
+        if length is None:
+            length = max(lengths, default=0)
+        panels = {}
+        for k, field in enumerate(fields):
+            row = self.values[self._field_index[field]]
+            panel = np.full((length, len(idx)), np.nan) if out is None else out[k]
+            if out is not None:
+                panel.fill(np.nan)
+            for col, (j, n) in enumerate(zip(idx, lengths)):
+                n = min(n, length)
+                if n:
+                    panel[length - n:, col] = row[self.ends[j] - n:self.ends[j]]
+            panels[field] = panel
+        return panels
+
+    @property
+    def nbytes(self):
+        return (self.times.nbytes + sum(row.nbytes for row in self.values)
+                + self.starts.nbytes + self.ends.nbytes)
+
+
+class FieldTable(Mapping):
+    """Sembol × alan float64 matrisi; satırlar eksik alanlar atlanmış sözlük olarak okunur"""
+
+    def __init__(self, records, fields, tickers=None):
+        self.tickers = [t for t in (list(records) if tickers is None else tickers) if t in records]
+        self.fields = tuple(fields)
+        self.values = np.full((len(self.tickers), len(self.fields)), np.nan)
+        for j, ticker in enumerate(self.tickers):
+            record = records[ticker]
+            for k, field in enumerate(self.fields):
+                value = record.get(field)
+                if value is not None:
+                    self.values[j, k] = value
+        self._index = {t: j for j, t in enumerate(self.tickers)}
+
+    def __getitem__(self, ticker):
+        row = self.values[self._index[ticker]]
+        return {f: float(v) for f, v in zip(self.fields, row) if not np.isnan(v)}
+
+    def __iter__(self):
+        return iter(self.tickers)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._index
+
+    def column(self, field, tickers=None, default=np.nan):
+        """Alanın sembol sırasına göre dizisi; eksikler default ile doldurulur"""
+        values = self.values[:, self.fields.index(field)]
+        if tickers is not None:
+            values = values[[self._index[t] for t in tickers]]
+        return np.where(np.isnan(values), default, values)
+
+
+# -------------------- BELLEK BÜTÇESİ --------------------
+def estimate_ticker_bytes(bars, fields=FIELDS, dtype=np.float32):
+    """Bir sembolün yükleme + depo + indikatör karalama maliyeti (bayt)"""
+    store = sum(np.dtype(VOLUME_DTYPE if f == 'Volume' else dtype).itemsize for f in fields) + 8
+    return bars * (LOAD_BYTES_PER_BAR + store + SCRATCH_PANELS * 8)
+
+
+def chunk_size(budget_bytes, bars, fields=FIELDS, dtype=np.float32):
+    """Bütçeye sığan sembol sayısı (en az 1); bütçe yoksa None"""
+    if not budget_bytes:
+        return None
+    return max(1, int(budget_bytes // estimate_ticker_bytes(bars, fields, dtype)))
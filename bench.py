@@ -0,0 +1,246 @@
+"""
+Tarayıcı aşamaları için benchmark.
+
+Sentetik evrenler (10/100/1.000/5.000 sembol) fixture sağlayıcısıyla
+kurulur; ağ erişimi yapılmaz. DualStrategyScreener'ın her aşaması (veri
+çekme, filtre, skor, risk seviyeleri, rapor) iki strateji için ve haftalık
+SuperTrend analizi (veri kalitesi denetimi, soğuk ve sıcak durum) ile
+kaset kaydı ve oynatımı ayrı ayrı ölçülür: duvar saati, CPU süresi, aşama boyunca en yüksek RSS ve
+saniyedeki sembol sayısı.
+
+Sonuçlar JSON olarak kaydedilir; önceki bir sonuçla (--baseline)
+karşılaştırıldığında eşiği aşan yavaşlamalar listelenir ve çıkış kodu 1
+olur.
+
+    python bench.py --sizes 10,100,1000,5000 --output bench.json
+    python bench.py --baseline bench.json --threshold 0.25
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from cassette import RecordingProvider, ReplayProvider
+from data_provider import BatchDataLoader, set_clock
+from fundamentals_store import FundamentalsStore
+from indicator_state import IndicatorStateStore
+from metrics import PeakRSS
+from result_cache import ResultCache
+from synthetic_data import SyntheticUniverse
+from timeframes import ResamplingProvider
+
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+DEFAULT_THRESHOLD = 0.25   # %25'ten fazla yavaşlama gerileme sayılır
+NOISE_FLOOR = 0.05         # Bu süreden (sn) kısa aşamalar karşılaştırılmaz
+STRATEGIES = ('AGRESİF', 'DENGELİ')
+
+
+# -------------------- ÖLÇÜM --------------------
+def measure(fn, items):
+    """fn()'i çalıştırır; (sonuç, ölçüm sözlüğü) döndürür"""
+    with PeakRSS(interval=0.002) as rss:
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = fn()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return result, {
+        'seconds': round(wall, 6),
+        'cpu_seconds': round(cpu, 6),
+        'peak_rss_mb': round(rss.peak / 2 ** 20, 1),
+        'items': items,
+        'throughput': round(items / wall, 1) if wall > 0 else None,
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """Aşamaların print ve uyarı çıktılarını bastırır"""
+    logging.disable(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+# -------------------- AŞAMALAR --------------------
+def bench_screener(universe, strategy):
+    """DualStrategyScreener aşamaları (fixture sağlayıcı, boş depolar)"""
+    from main import DualStrategyScreener
+
+    loader = BatchDataLoader(universe.provider())
+    store = FundamentalsStore(loader.provider)
+    with quiet():
+        screener = DualStrategyScreener(universe.tickers, strategy, None, None, loader=loader,
+                                        store=store, state_store=IndicatorStateStore(),
+                                        result_cache=ResultCache())
+    stages = (('prefilter', screener.prefilter_universe),
+              ('fetch', screener.fetch_data),
+              ('filter', screener.filter_by_market_cap_and_fundamentals),
+              ('score', screener.calculate_indicators_and_score),
+              ('risk', screener.calculate_risk_levels),
+              ('report', screener.generate_report))
+    results = {}
+    for name, stage in stages:
+        items = len(screener.analysis_results) if name in ('risk', 'report') \
+            else len(screener.tickers)
+        with quiet():
+            _, results[f"{strategy}.{name}"] = measure(stage, items)
+    return results
+
+
+def bench_supertrend(universe):
+    """
+    Haftalık çekme, günlük seriden haftalık türetme, veri kalitesi
+    denetimi ve SuperTrend analizi; ikinci analiz kayıtlı durumla (sıcak),
+    üçüncüsü sonuç önbelleğinden. Saat son haftalık barın kapanışından
+    sonraya sabitlenir (süren haftanın sonucu önbelleğe girmez).
+    """
+    from main import analyze_universe, validate_universe
+
+    resampler = ResamplingProvider(universe.provider())
+    loader = BatchDataLoader(universe.provider())
+    state_store = IndicatorStateStore()
+    tickers = universe.tickers
+    results = {}
+    last_week = max(df.index[-1] for df in universe.weekly.values())
+    set_clock((last_week + pd.Timedelta(days=1)).timestamp())
+    with quiet():
+        panel, results['supertrend.fetch'] = measure(
+            lambda: loader.load(tickers, period='2y', interval='1wk'), len(tickers))
+        resampler.fetch_history(tickers, period='2y', interval='1d')
+        _, results['supertrend.resample'] = measure(
+            lambda: resampler.fetch_history(tickers, period='2y', interval='1wk'), len(tickers))
+        _, results['supertrend.validate'] = measure(
+            lambda: validate_universe(panel.frames, '1wk'), len(panel.tickers))
+        # Durum soğuk/sıcak ölçümlerinde sonuç önbelleği boş; son ölçüm tamamen isabet
+        for name in ('supertrend.cold', 'supertrend.warm'):
+            memo = ResultCache()
+            _, results[name] = measure(
+                lambda: analyze_universe(panel.frames, state_store=state_store, result_cache=memo),
+                len(panel.tickers))
+        _, results['supertrend.memo'] = measure(
+            lambda: analyze_universe(panel.frames, state_store=state_store, result_cache=memo),
+            len(panel.tickers))
+    set_clock(None)
+    return results
+
+
+def bench_cassette(universe):
+    """Günlük barların kasete kaydı ve ağsız oynatımı (fixture çekmeyle karşılaştırılır)"""
+    tickers = universe.tickers
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, quiet():
+        path = os.path.join(directory, 'bench.cassette')
+        recorder = RecordingProvider(universe.provider(), path)
+        _, results['cassette.record'] = measure(
+            lambda: (BatchDataLoader(recorder).load_frames(tickers, period='2y'), recorder.save()),
+            len(tickers))
+        replay = ReplayProvider(path)
+        _, results['cassette.replay'] = measure(
+            lambda: BatchDataLoader(replay).load_frames(tickers, period='2y'), len(tickers))
+        replay.cassette.close()
+    return results
+
+
+def run(sizes=DEFAULT_SIZES, seed=0, log=print):
+    """{boyut: {aşama: ölçüm}}"""
+    results = {}
+    for size in sizes:
+        started = time.perf_counter()
+        universe = SyntheticUniverse(size, seed=seed)
+        stages = {}
+        for strategy in STRATEGIES:
+            stages.update(bench_screener(universe, strategy))
+        stages.update(bench_supertrend(universe))
+        stages.update(bench_cassette(universe))
+        results[str(size)] = stages
+        log(f"⏱️ {size} sembol: {time.perf_counter() - started:.1f} sn")
+    return results
+
+
+# -------------------- KARŞILAŞTIRMA --------------------
+def metadata():
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD, noise_floor=NOISE_FLOOR):
+    """Eşiği aşan süre/bellek artışlarını metin listesi olarak döndürür"""
+    regressions = []
+    for size, stages in current.items():
+        for stage, now in stages.items():
+            before = baseline.get(size, {}).get(stage)
+            if before is None:
+                continue
+            if max(now['seconds'], before['seconds']) >= noise_floor and \
+                    now['seconds'] > before['seconds'] * (1 + threshold):
+                regressions.append(
+                    f"{size} sembol {stage}: {before['seconds']:.3f} → {now['seconds']:.3f} sn "
+                    f"(+%{(now['seconds'] / before['seconds'] - 1) * 100:.0f})")
+            if now['peak_rss_mb'] > before['peak_rss_mb'] * (1 + threshold):
+                regressions.append(
+                    f"{size} sembol {stage}: RSS {before['peak_rss_mb']:.0f} → "
+                    f"{now['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def format_table(results):
+    lines = [f"{'boyut':>6} {'aşama':<18} {'sn':>9} {'cpu sn':>9} {'RSS MB':>8} {'sembol/sn':>10}"]
+    for size, stages in results.items():
+        for stage, m in stages.items():
+            throughput = '-' if m['throughput'] is None else f"{m['throughput']:.0f}"
+            lines.append(f"{size:>6} {stage:<18} {m['seconds']:>9.3f} {m['cpu_seconds']:>9.3f} "
+                         f"{m['peak_rss_mb']:>8.0f} {throughput:>10}")
+    return "\n".join(lines)
+
+
+# -------------------- KOMUT SATIRI --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tarayıcı aşamaları benchmark')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Virgülle ayrılmış evren boyutları')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+    parser.add_argument('--baseline', help='Karşılaştırılacak önceki sonuç dosyası')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    results = run(sizes, seed=args.seed)
+    print(format_table(results))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'meta': metadata(), 'results': results}, indent=2,
+                               ensure_ascii=False))
+        print(f"💾 Sonuçlar kaydedildi: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"🐢 {len(regressions)} gerileme (eşik %{args.threshold * 100:.0f}):")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("✅ Gerileme yok")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
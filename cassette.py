@@ -0,0 +1,362 @@
+"""
+Sağlayıcı yanıtlarının kaydı ve ağsız yeniden oynatımı (kaset).
+
+Canlı çekilen veriyle yapılan taramalar tekrarlanamaz; performans
+karşılaştırmaları da ağ gecikmesinin gürültüsünü taşır. Kayıt kipinde
+RecordingProvider asıl sağlayıcıyı sarar ve her yanıtı (sembol başına bar
+dizisi ve temel veri sözlüğü) kasete ekler; oynatım kipinde ReplayProvider
+aynı istekleri yalnızca kasetten karşılar, ağa hiç çıkmaz. Biçim:
+
+    MAGIC (8 bayt) | başlık uzunluğu (u64, LE) | başlık (JSON) | zlib blokları
+
+Başlık her kaydın dizinini taşır (anahtar -> tür, ofset, uzunluk; barlar
+için satır sayısı, saat dilimi, dizin çözünürlüğü ve frekansı, sütunlar ve
+sütun türleri). Anahtarlar
+istek parçasından bağımsızdır:
+
+    sembol | aralık | dönem | başlangıç     (bar dizisi, BAR_DTYPE)
+    sembol | info                           (temel veri, JSON)
+
+Veri bulunamayan semboller de boş kayıt olarak saklanır; oynatımda ıska
+yalnızca kayıtta hiç sorulmamış istekler içindir. Kaset bellek eşlemesiyle
+açılır, yalnızca istenen bloklar açılır. Kaydın alındığı an başlıkta
+tutulur ve oynatımda saat (data_provider.clock_now) o ana dondurulur;
+böylece dönem kesimleri ve tazelik denetimi kayıttaki gibi sonuçlanır.
+
+BIST_CASSETTE bir dosya yolu gösteriyorsa get_default_loader
+BIST_CASSETTE_MODE'a (record|replay, varsayılan replay) göre sağlayıcıyı
+kasetle sarar ya da yalnızca kaseti kullanır. Kayıt ve oynatım bar
+önbelleğini atlamalıdır (BIST_CACHE_DIR=''): aksi halde artımlı istekler
+kaydedilir. cli.py --record/--replay bunu kendisi ayarlar.
+
+    python cli.py --record scan.cassette scan
+    python cli.py --replay scan.cassette scan
+    python cassette.py info scan.cassette
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from data_provider import DataProvider, set_clock
+
+MAGIC = b'BISTCASS'
+VERSION = 1
+COMPRESSION_LEVEL = 6
+_HEADER = struct.Struct('<8sQ')
+
+
+def history_key(ticker, period=None, interval='1d', start=None):
+    start = '' if start is None else str(pd.Timestamp(start))
+    return f"{ticker}|{interval}|{period or ''}|{start}"
+
+
+def info_key(ticker):
+    return f"{ticker}|info"
+
+
+def _encode_frame(df):
+    """DataFrame -> (dizin kaydı, sıkıştırılmış BAR_DTYPE baytları)"""
+    from bar_cache import frame_to_records
+
+    if df is None or df.empty:
+        return {'kind': 'bars', 'rows': 0}, b''
+    records = frame_to_records(df)
+    entry = {
+        'kind': 'bars', 'rows': len(records),
+        'tz': str(df.index.tz) if getattr(df.index, 'tz', None) is not None else None,
+        'index_name': df.index.name,
+        'index_unit': getattr(df.index, 'unit', None),   # pandas 2: s/ms/us/ns
+        'index_freq': df.index.freqstr,
+        'columns': list(df.columns),
+        'dtypes': {c: str(t) for c, t in df.dtypes.items()},
+    }
+    return entry, zlib.compress(records.tobytes(), COMPRESSION_LEVEL)
+
+
+def _encode_info(info):
+    payload = json.dumps(info, sort_keys=True, default=str).encode('utf-8')
+    return {'kind': 'info'}, zlib.compress(payload, COMPRESSION_LEVEL)
+
+
+# -------------------- OKUMA --------------------
+class Cassette:
+    """Bellek eşlemeli, salt okunur kaset"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Kaset değil: {path}")
+        header = json.loads(bytes(self._mmap[_HEADER.size:_HEADER.size + length]))
+        if header.get('version') != VERSION:
+            self.close()
+            raise ValueError(f"Desteklenmeyen kaset sürümü: {header.get('version')}")
+        self.recorded = header['recorded']
+        self.provider = header.get('provider')
+        self.entries = header['entries']
+        self._base = _HEADER.size + length
+
+    def blob(self, entry):
+        """Kaydın sıkıştırılmış baytları"""
+        start = self._base + entry['offset']
+        return bytes(self._mmap[start:start + entry['length']])
+
+    def frame(self, entry):
+        """Bar kaydı -> DataFrame (boş kayıtta None)"""
+        from bar_cache import BAR_DTYPE
+
+        if not entry['rows']:
+            return None
+        records = np.frombuffer(zlib.decompress(self.blob(entry)), dtype=BAR_DTYPE)
+        # Sütun türleri ve dizin çözünürlüğü kayıttaki çerçeveyle aynı kurulur
+        times = records['ts'].astype('datetime64[ns]')
+        if entry['index_unit']:
+            times = times.astype(f"datetime64[{entry['index_unit']}]")
+        index = pd.DatetimeIndex(times, name=entry['index_name'])
+        if entry['tz']:
+            index = index.tz_localize(entry['tz'])
+        if entry['index_freq']:
+            index.freq = entry['index_freq']
+        return pd.DataFrame({c: records[c].astype(entry['dtypes'][c]) for c in entry['columns']},
+                            index=index, copy=False)
+
+    def info(self, entry):
+        return json.loads(zlib.decompress(self.blob(entry)))
+
+    @property
+    def nbytes(self):
+        return len(self._mmap)
+
+    def close(self):
+        self._mmap.close()
+
+
+def open_cassette(path):
+    """Kaseti açar; dosya yoksa ya da bozuksa None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return Cassette(path)
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        logging.warning(f"Kaset okunamadı: {e}")
+        return None
+
+
+# -------------------- YAZMA --------------------
+def write_cassette(path, blobs, recorded=None, provider=None):
+    """{anahtar: (dizin kaydı, baytlar)} -> kaset dosyası (atomik); bayt döndürür"""
+    from bar_cache import _atomic_write
+
+    entries, offset = {}, 0
+    for key in sorted(blobs):
+        entry, data = blobs[key]
+        entries[key] = dict(entry, offset=offset, length=len(data))
+        offset += len(data)
+    header = json.dumps({'version': VERSION, 'provider': provider,
+                         'recorded': time.time() if recorded is None else recorded,
+                         'entries': entries}, sort_keys=True).encode('utf-8')
+
+    def write(f):
+        f.write(_HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        for key in sorted(blobs):
+            f.write(blobs[key][1])
+
+    _atomic_write(os.path.abspath(path), write)
+    return _HEADER.size + len(header) + offset
+
+
+# -------------------- SAĞLAYICILAR --------------------
+class RecordingProvider(DataProvider):
+    """
+    Asıl sağlayıcıyı sarar, her yanıtı kasete ekler. Aynı dosyadaki
+    önceki kayıtlar korunur, yeniden sorulan istekler güncellenir.
+    save() çağrılana dek kayıtlar bellekte (sıkıştırılmış) tutulur.
+    """
+    name = 'cassette-record'
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = path
+        self.max_batch = getattr(inner, 'max_batch', None)
+        self.blobs = {}
+        self.recorded = time.time()
+        previous = open_cassette(path)
+        if previous is not None:
+            self.blobs = {key: ({k: v for k, v in entry.items() if k not in ('offset', 'length')},
+                                previous.blob(entry))
+                          for key, entry in previous.entries.items()}
+            previous.close()
+        self.hits = 0       # Kasete eklenen yanıtlar (veri bulunan)
+        self.misses = 0     # Boş yanıtlar (sağlayıcıda veri yok)
+        # Asenkron hat sağlayıcıyı birden fazla iş parçacığından çağırabilir
+        self._lock = threading.Lock()
+
+    def fetch_history(self, tickers, period=None, interval='1d', start=None):
+        frames = self.inner.fetch_history(tickers, period=period, interval=interval, start=start)
+        encoded = {history_key(t, period, interval, start): _encode_frame(frames.get(t))
+                   for t in tickers}
+        with self._lock:
+            self.blobs.update(encoded)
+            self.hits += len(frames)
+            self.misses += len(tickers) - len(frames)
+        return frames
+
+    def fetch_fundamentals(self, ticker):
+        info = self.inner.fetch_fundamentals(ticker)
+        encoded = _encode_info(info or {})
+        with self._lock:
+            self.blobs[info_key(ticker)] = encoded
+        return info
+
+    def save(self):
+        """Kaseti diske yazar; (kayıt sayısı, bayt) döndürür"""
+        with self._lock:
+            size = write_cassette(self.path, self.blobs, self.recorded,
+                                  getattr(self.inner, 'name', None))
+            return len(self.blobs), size
+
+
+class ReplayProvider(DataProvider):
+    """
+    Kasetteki yanıtları ağa çıkmadan döndürür. hits/misses sembol başına
+    sayılır; kasette olmayan istekler boş döner (strict ise hata).
+    bars, nbytes ve seconds oynatım verimini (throughput) verir.
+    """
+    name = 'cassette-replay'
+
+    def __init__(self, cassette, strict=False):
+        self.cassette = Cassette(cassette) if isinstance(cassette, str) else cassette
+        self.strict = strict
+        self.hits = 0
+        self.misses = 0
+        self.bars = 0        # Döndürülen bar sayısı
+        self.nbytes = 0      # Açılan (sıkıştırılmış) bayt
+        self.seconds = 0.0   # Kasetten okumada geçen süre
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        entry = self.cassette.entries.get(key)
+        if entry is None:
+            if self.strict:
+                raise KeyError(f"Kasette yok: {key}")
+            logging.debug(f"Kasette yok, boş dönülüyor: {key}")
+        return entry
+
+    def fetch_history(self, tickers, period=None, interval='1d', start=None):
+        started = time.perf_counter()
+        frames, hits, bars, nbytes = {}, 0, 0, 0
+        for ticker in tickers:
+            entry = self._lookup(history_key(ticker, period, interval, start))
+            if entry is None:
+                continue
+            hits += 1
+            df = self.cassette.frame(entry)
+            if df is not None:
+                frames[ticker] = df
+                bars += len(df)
+                nbytes += entry['length']
+        with self._lock:
+            self.hits += hits
+            self.misses += len(tickers) - hits
+            self.bars += bars
+            self.nbytes += nbytes
+            self.seconds += time.perf_counter() - started
+        return frames
+
+    def fetch_fundamentals(self, ticker):
+        entry = self._lookup(info_key(ticker))
+        with self._lock:
+            self.hits += entry is not None
+            self.misses += entry is None
+        return self.cassette.info(entry) if entry is not None else {}
+
+    def throughput(self):
+        """Saniyede oynatılan bar sayısı (henüz okuma yoksa None)"""
+        return self.bars / self.seconds if self.seconds > 0 else None
+
+
+# -------------------- PAYLAŞILAN KASET --------------------
+def cassette_mode():
+    """BIST_CASSETTE tanımlıysa 'record' ya da 'replay', değilse None"""
+    if not os.environ.get('BIST_CASSETTE'):
+        return None
+    mode = os.environ.get('BIST_CASSETTE_MODE') or 'replay'
+    if mode not in ('record', 'replay'):
+        raise ValueError(f"Geçersiz BIST_CASSETTE_MODE: {mode}")
+    return mode
+
+
+def attach_cassette(provider):
+    """
+    Kayıtta sağlayıcıyı RecordingProvider ile sarar; oynatımda sağlayıcı
+    yerine ReplayProvider döner ve saat kaydın alındığı ana dondurulur
+    """
+    mode, path = cassette_mode(), os.environ.get('BIST_CASSETTE')
+    if mode == 'record':
+        logging.info(f"Sağlayıcı yanıtları kasete kaydediliyor: {path}")
+        return RecordingProvider(provider, path)
+    if mode == 'replay':
+        replay = ReplayProvider(path)
+        set_clock(replay.cassette.recorded)
+        logging.info(f"Kaset oynatılıyor: {path} ({len(replay.cassette.entries)} kayıt, "
+                     f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(replay.cassette.recorded))})")
+        return replay
+    return provider
+
+
+def find_cassette(provider):
+    """Sağlayıcı zincirindeki kaset katmanı (yoksa None)"""
+    while provider is not None and not isinstance(provider, (RecordingProvider, ReplayProvider)):
+        provider = getattr(provider, 'inner', None)
+    return provider
+
+
+def summary_line(provider):
+    """Kaset katmanının tek satırlık özeti"""
+    if isinstance(provider, RecordingProvider):
+        return (f"📼 Kaset kaydı: {provider.hits} yanıt, {provider.misses} boş, "
+                f"{len(provider.blobs)} kayıt → {provider.path}")
+    rate = provider.throughput()
+    return (f"📼 Kaset oynatımı: {provider.hits} isabet, {provider.misses} ıska, "
+            f"{provider.bars} bar, {provider.nbytes / 1e6:.1f} MB, "
+            f"{provider.seconds:.3f} sn" + (f" ({rate:,.0f} bar/sn)" if rate else ""))
+
+
+# -------------------- KOMUT SATIRI --------------------
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] != 'info':
+        print("Kullanım: python cassette.py info <dosya>")
+        return 2
+    path = argv[1]
+    cassette = open_cassette(path)
+    if cassette is None:
+        print(f"ℹ️ Kaset yok: {path}")
+        return 1
+    kinds = {}
+    rows = 0
+    for entry in cassette.entries.values():
+        kinds[entry['kind']] = kinds.get(entry['kind'], 0) + 1
+        rows += entry.get('rows', 0)
+    print(f"📼 {path}: {kinds.get('bars', 0)} bar kaydı ({rows} bar), "
+          f"{kinds.get('info', 0)} temel veri kaydı, {cassette.nbytes / 1e6:.1f} MB, "
+          f"sağlayıcı {cassette.provider or '-'}, "
+          f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(cassette.recorded))}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Zamanlanmış iş ve yerel kullanım için komut satırı.
+
+Alt komutlar ağır modülleri (pandas, numpy, stratejiler, yfinance...)
+yalnızca kendileri çalıştırılırken içe aktarır; bu modül yalnızca
+standart kütüphaneyi kullanır.
+
+    python cli.py scan                              # haftalık alım taraması
+    python cli.py sell-check                        # açık pozisyonların satış kontrolü
+    python cli.py screen [SEMBOL ...]               # strateji raporu (AGRESİF/DENGELİ/SUPERTREND)
+    python cli.py test AAPL MSFT                    # tek hisse analizi
+    python cli.py backtest SUPERTREND AAPL MSFT     # backtest.py ile aynı argümanlar
+    python cli.py sweep SUPERTREND AAPL MSFT        # param_sweep.py
+    python cli.py bench --sizes 100                 # bench.py
+    python cli.py stream replay --tickers 100       # intraday_stream.py
+    python cli.py snapshot save|info warm_state.bin
+    python cli.py cassette info scan.cassette
+
+--snapshot DOSYA (ya da BIST_WARM_SNAPSHOT) bar önbelleği, temel veri ve
+indikatör durumunu tek dosyalık sıcak anlık görüntüden bellek eşlemesiyle
+açar; --save-snapshot komut bitince güncel durumu aynı dosyaya yazar.
+Süreç başlangıcından içe aktarmaların bitişine, anlık görüntünün açılışına
+ve ilk sonuca kadar geçen süre metrics.mark ile kaydedilir (çalıştırma
+metriklerinde 'startup') ve komut sonunda basılır.
+
+--record KASET sağlayıcı yanıtlarını kasete kaydeder, --replay KASET
+komutu ağa çıkmadan kasetten yeniden çalıştırır (bkz. cassette). İkisi de
+bar önbelleğini ve sıcak anlık görüntüyü devre dışı bırakır; oynatımda saat
+kaydın alındığı ana dondurulur.
+"""
+import argparse
+import os
+import sys
+
+STARTUP_PHASES = (('imports', 'içe aktarma'), ('snapshot', 'anlık görüntü'),
+                  ('first_result', 'ilk sonuç'), ('done', 'toplam'))
+
+
+# -------------------- ALT KOMUTLAR --------------------
+# Her yükleyici gereken modülleri içe aktarır ve çalıştırılacak işi döndürür
+def _load_scan(args, extra):
+    from main import run_weekly_scan
+
+    return run_weekly_scan
+
+
+def _load_sell_check(args, extra):
+    from main import run_sell_check
+
+    return run_sell_check
+
+
+def _load_screen(args, extra):
+    from main import SAMPLE_TICKERS, run_strategy_screen
+
+    # Türkçe büyük harf: 'agresif' -> 'AGRESİF'
+    strategies = [s.strip().replace('i', 'İ').upper() for s in args.strategy.split(',')] \
+        if args.strategy else None
+    return lambda: run_strategy_screen(args.tickers or SAMPLE_TICKERS, strategies)
+
+
+def _load_test(args, extra):
+    from main import test_single_stock
+
+    def run():
+        print("🚀 S&P 500 SuperTrend Scanner - Colab Optimize")
+        print("=" * 50)
+        results = [test_single_stock(ticker) for ticker in args.tickers]
+        print("\n" + "=" * 50)
+        return results
+
+    return run
+
+
+def _passthrough(module):
+    """Kendi main(argv) fonksiyonu olan modüle kalan argümanları aktarır"""
+    def load(args, extra):
+        import importlib
+
+        entry = importlib.import_module(module).main
+        return lambda: entry(extra)
+
+    return load
+
+
+def _load_snapshot(args, extra):
+    import warm_state
+
+    return lambda: warm_state.main([args.action, args.path])
+
+
+def _load_cassette(args, extra):
+    import cassette
+
+    return lambda: cassette.main([args.action, args.path])
+
+
+COMMANDS = {
+    'scan': (_load_scan, "Haftalık SuperTrend alım taraması"),
+    'sell-check': (_load_sell_check, "Defterdeki açık pozisyonların satış kontrolü"),
+    'screen': (_load_screen, "Kayıtlı stratejilerle tarama raporu"),
+    'test': (_load_test, "Tek hisse SuperTrend analizi"),
+    'backtest': (_passthrough('backtest'), "Geriye dönük test (backtest.py)"),
+    'sweep': (_passthrough('param_sweep'), "Parametre taraması (param_sweep.py)"),
+    'bench': (_passthrough('bench'), "Aşama benchmark'ı (bench.py)"),
+    'stream': (_passthrough('intraday_stream'), "Gün içi akış taraması (intraday_stream.py)"),
+    'snapshot': (_load_snapshot, "Sıcak anlık görüntüyü yazar ya da bilgisini basar"),
+    'cassette': (_load_cassette, "Kaset bilgisini basar"),
+}
+PASSTHROUGH = ('backtest', 'sweep', 'bench', 'stream')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description='BIST/ABD hisse tarayıcı')
+    parser.add_argument('--snapshot', default=os.environ.get('BIST_WARM_SNAPSHOT'),
+                        help='Sıcak anlık görüntü dosyası (warm_state)')
+    parser.add_argument('--save-snapshot', action='store_true',
+                        help='Komut bitince güncel durumu --snapshot dosyasına yazar')
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument('--record', metavar='KASET', help='Sağlayıcı yanıtlarını kasete kaydeder')
+    cassette.add_argument('--replay', metavar='KASET', help='Ağa çıkmadan kasetten oynatır')
+    commands = parser.add_subparsers(dest='command', metavar='KOMUT')
+    for name, (load, help_text) in COMMANDS.items():
+        aliases = ['sell'] if name == 'sell-check' else []
+        sub = commands.add_parser(name, aliases=aliases, help=help_text,
+                                  add_help=name not in PASSTHROUGH)
+        sub.set_defaults(load=load, passthrough=name in PASSTHROUGH)
+        if name == 'screen':
+            sub.add_argument('tickers', nargs='*')
+            sub.add_argument('--strategy', help='Virgülle ayrılmış strateji adları (varsayılan: tümü)')
+        elif name == 'test':
+            sub.add_argument('tickers', nargs='*', default=['AAPL'])
+        elif name == 'snapshot':
+            sub.add_argument('action', choices=('save', 'info'))
+            sub.add_argument('path')
+        elif name == 'cassette':
+            sub.add_argument('action', choices=('info',))
+            sub.add_argument('path')
+    return parser
+
+
+def startup_line(timings):
+    parts = [f"{label} {timings[key]:.2f} sn" for key, label in STARTUP_PHASES if key in timings]
+    return "⏱️ Başlangıç: " + " | ".join(parts)
+
+
+# -------------------- ÇALIŞTIRMA --------------------
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    if extra and not args.passthrough:
+        parser.error(f"tanınmayan argümanlar: {' '.join(extra)}")
+    if args.save_snapshot and not args.snapshot:
+        parser.error("--save-snapshot için --snapshot DOSYA gerekir")
+    cassette_path = args.record or args.replay
+    if cassette_path and args.snapshot:
+        parser.error("--record/--replay ile --snapshot birlikte kullanılamaz")
+    if cassette_path:
+        if args.replay and not os.path.exists(args.replay):
+            parser.error(f"kaset bulunamadı: {args.replay}")
+        # Kaset doğrudan sağlayıcının üstünde durur: önbellekler atlanır
+        os.environ.update(BIST_CASSETTE=cassette_path, BIST_CACHE_DIR='',
+                          BIST_CASSETTE_MODE='record' if args.record else 'replay')
+        os.environ.pop('BIST_WARM_SNAPSHOT', None)
+    if args.snapshot:
+        os.environ['BIST_WARM_SNAPSHOT'] = args.snapshot
+
+    task = args.load(args, extra)
+    import metrics
+
+    metrics.mark('imports')
+    if args.snapshot and args.command != 'snapshot':
+        from warm_state import get_default_snapshot
+
+        get_default_snapshot()
+        metrics.mark('snapshot')
+
+    result = task()
+    metrics.mark('first_result')   # Komut ilk sonucunu daha önce işaretlemediyse
+    if args.save_snapshot:
+        from warm_state import save_default
+
+        count, size = save_default(args.snapshot)
+        print(f"💾 Sıcak anlık görüntü: {count} bar kaydı, {size / 1e6:.1f} MB → {args.snapshot}")
+    if cassette_path and args.command != 'cassette':
+        from cassette import find_cassette, summary_line
+        from data_provider import get_default_loader
+
+        layer = find_cassette(get_default_loader().provider)
+        if args.record:
+            count, size = layer.save()
+            print(f"💾 Kaset: {count} kayıt, {size / 1e6:.1f} MB → {args.record}")
+        print(summary_line(layer))
+    metrics.mark('done')
+    print(startup_line(metrics.timings()))
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
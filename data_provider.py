@@ -0,0 +1,465 @@
+"""
+Fiyat/temel veri sağlayıcıları ve toplu (batch) veri yükleyici.
+
+Tüm tarayıcılar barlarını BatchDataLoader üzerinden alır. Sağlayıcı
+(provider) tek bir arayüzü uygular; Yahoo yerine FixtureProvider takılarak
+testler ve benchmark'lar ağ erişimi olmadan çalıştırılabilir.
+"""
+import json
+import logging
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+OHLCV_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DEFAULT_CHUNK_SIZE = 50  # Tek istekte indirilecek sembol sayısı
+
+_PERIOD_RE = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+_frozen_clock = None   # Kaset oynatımında kaydın alındığı an (epoch saniye)
+
+# yf.download hataları yükseltmez, 'yfinance' günlüğüne yazar; bu ifadeler geçicidir
+_YF_RATE_LIMIT = ('YFRateLimitError', 'Too Many Requests', 'Rate limited', '429')
+_YF_TRANSIENT = ('500 Server Error', '502 Server Error', '503 Server Error', '504 Server Error',
+                 'Internal Server Error', 'Bad Gateway', 'Service Unavailable',
+                 'Gateway Timeout', 'ConnectionError', 'DNSError', 'Timeout', 'timed out',
+                 'Failed to perform')   # curl_cffi ağ hataları
+
+
+# -------------------- YARDIMCI FONKSİYONLAR --------------------
+def clock_now(tz=None):
+    """Şimdiki zaman (pd.Timestamp.now gibi); saat dondurulmuşsa o an"""
+    if _frozen_clock is None:
+        return pd.Timestamp.now(tz=tz)
+    return pd.Timestamp.fromtimestamp(_frozen_clock, tz=tz)
+
+
+def set_clock(epoch):
+    """Saati verilen ana (epoch saniye) dondurur; None gerçek saate döndürür"""
+    global _frozen_clock
+    _frozen_clock = epoch
+
+
+def period_to_offset(period):
+    """'30d', '6mo', '2y' gibi yfinance periyotlarını DateOffset'e çevirir"""
+    if period is None or period in ('max', 'ytd'):
+        return None
+    match = _PERIOD_RE.match(period)
+    if not match:
+        raise ValueError(f"Geçersiz periyot: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == 'd':
+        return pd.DateOffset(days=count)
+    if unit == 'wk':
+        return pd.DateOffset(weeks=count)
+    if unit == 'mo':
+        return pd.DateOffset(months=count)
+    return pd.DateOffset(years=count)
+
+
+def normalize_frame(df):
+    """Sağlayıcı çıktısını düz OHLCV sütunlarına indirger, boş satırları atar"""
+    if df is None or df.empty:
+        return None
+    if isinstance(df.columns, pd.MultiIndex):
+        # yfinance tek sembolde de (alan, sembol) çok seviyeli sütun dönebiliyor
+        level = 0 if set(OHLCV_FIELDS) & set(df.columns.get_level_values(0)) else 1
+        df = df.copy()
+        df.columns = df.columns.get_level_values(level)
+    columns = [c for c in OHLCV_FIELDS if c in df.columns]
+    if 'Close' not in columns:
+        return None
+    # Farklı takvimli semboller aynı istekte indirildiğinde oluşan boş satırlar
+    df = df[columns].dropna(how='all')
+    if df.empty:
+        return None
+    return df.sort_index()
+
+
+def trim_to_period(df, period, end=None):
+    """Çerçeveyi son bardan geriye doğru 'period' uzunluğunda keser"""
+    offset = period_to_offset(period)
+    if df is None or offset is None or df.empty:
+        return df
+    end = df.index[-1] if end is None else end
+    return df[df.index > end - offset]
+
+
+def chunked(items, size):
+    """Listeyi 'size' büyüklüğünde parçalara böler"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# -------------------- HATALAR --------------------
+class TransientFetchError(Exception):
+    """
+    Yeniden denenebilir veri çekme hatası (HTTP 429/5xx, bağlantı kopması).
+    partial: toplu istekte yine de alınabilmiş {sembol: DataFrame}
+    """
+
+    def __init__(self, message, status=None, retry_after=None, partial=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.partial = partial or {}
+
+
+# -------------------- SAĞLAYICI ARAYÜZÜ --------------------
+class DataProvider:
+    """
+    Veri sağlayıcı arayüzü. fetch_history çoklu sembolü tek seferde
+    almalı; dönen sözlük yalnızca verisi bulunan sembolleri içerir.
+    """
+    name = 'base'
+    max_batch = None  # Tek istekte alınabilecek en fazla sembol (None: sınırsız)
+
+    def fetch_history(self, tickers, period=None, interval='1d', start=None):
+        """{sembol: OHLCV DataFrame} döndürür"""
+        raise NotImplementedError
+
+    def fetch_fundamentals(self, ticker):
+        """Sembolün temel verilerini (info sözlüğü) döndürür"""
+        raise NotImplementedError
+
+
+class _LogCapture(logging.Handler):
+    """İndirme süresince bir günlüğün hata kayıtlarını toplar"""
+
+    def __init__(self, logger_name):
+        super().__init__(logging.ERROR)
+        self.logger = logging.getLogger(logger_name)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+    def __enter__(self):
+        self.logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.logger.removeHandler(self)
+
+
+class YahooProvider(DataProvider):
+    """
+    yfinance üzerinden çoklu sembol indirme. yf.download 429/5xx hatalarını
+    yükseltmeyip günlüğe yazdığından, verisi gelmeyen sembollerden birine
+    ait hız sınırı ya da sunucu hatası kaydı TransientFetchError'a çevrilir
+    (yeniden denenebilsin diye); gelen çerçeveler hatanın partial alanındadır.
+    """
+    name = 'yahoo'
+
+    def __init__(self, threads=True):
+        self.threads = threads
+
+    @staticmethod
+    def _raise_transient(tickers, messages, frames):
+        # Eşzamanlı indirmelerin kayıtları karışabilir: yalnızca bu parçanın eksik sembolleri
+        missing = [t.upper() for t in tickers if t not in frames]
+        ours = [m for m in messages if any(f"'{t}'" in m or f"${t}" in m for t in missing)]
+        for message in ours:
+            if any(marker in message for marker in _YF_RATE_LIMIT):
+                raise TransientFetchError(f"yfinance hız sınırı: {message}", status=429,
+                                          partial=frames)
+        for message in ours:
+            if any(marker in message for marker in _YF_TRANSIENT):
+                raise TransientFetchError(f"yfinance geçici hata: {message}", partial=frames)
+
+    def fetch_history(self, tickers, period=None, interval='1d', start=None):
+        import yfinance as yf
+
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        kwargs = {'interval': interval, 'progress': False, 'group_by': 'ticker',
+                  'threads': self.threads}
+        if start is not None:
+            kwargs['start'] = start
+        else:
+            kwargs['period'] = period
+        with _LogCapture('yfinance') as errors:
+            data = yf.download(tickers, **kwargs)
+
+        frames = {}
+        if data is None or data.empty:
+            pass
+        elif isinstance(data.columns, pd.MultiIndex) and len(tickers) > 1:
+            available = set(data.columns.get_level_values(0))
+            for ticker in tickers:
+                if ticker in available:
+                    df = normalize_frame(data[ticker])
+                    if df is not None:
+                        frames[ticker] = df
+        else:
+            df = normalize_frame(data)
+            if df is not None:
+                frames[tickers[0]] = df
+        self._raise_transient(tickers, errors.messages, frames)
+        return frames
+
+    def fetch_fundamentals(self, ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker).info
+
+
+class YahooChartProvider(DataProvider):
+    """
+    Yahoo chart API'sine sembol başına doğrudan HTTP isteği. yf.download'un
+    aksine HTTP durum kodlarını görünür kılar: 429/5xx TransientFetchError
+    olarak yükseltilir. base_url yerel bir sahte sunucuya yönlendirilebilir.
+    """
+    name = 'yahoo-chart'
+    max_batch = 1
+    BASE_URL = 'https://query1.finance.yahoo.com/v8/finance/chart/'
+    DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+
+    def __init__(self, base_url=BASE_URL, timeout=20, session=None):
+        import requests
+
+        self.base_url = base_url.rstrip('/') + '/'
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', 'Mozilla/5.0')
+
+    def _fetch_one(self, ticker, period, interval, start):
+        from urllib.parse import quote
+
+        params = {'interval': interval, 'includePrePost': 'false'}
+        if start is not None:
+            params['period1'] = int(pd.Timestamp(start).timestamp())
+            params['period2'] = int(clock_now(tz='UTC').timestamp())
+        else:
+            params['range'] = period or '1y'
+        response = self.session.get(self.base_url + quote(ticker), params=params, timeout=self.timeout)
+
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = response.headers.get('Retry-After')
+            raise TransientFetchError(
+                f"HTTP {response.status_code}", status=response.status_code,
+                retry_after=float(retry_after) if retry_after else None)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        results = (response.json().get('chart') or {}).get('result') or []
+        if not results or not results[0].get('timestamp'):
+            return None
+        result = results[0]
+        quote_data = result['indicators']['quote'][0]
+        index = pd.to_datetime(result['timestamp'], unit='s', utc=True)
+        tz_name = (result.get('meta') or {}).get('exchangeTimezoneName')
+        if tz_name:
+            index = index.tz_convert(tz_name)
+        if interval in self.DAILY_INTERVALS:
+            # Günlük ve üstü barlar borsa yerel tarihine indirgenir (yf.download gibi)
+            index = index.tz_localize(None).normalize()
+        df = pd.DataFrame({
+            'Open': quote_data.get('open'), 'High': quote_data.get('high'),
+            'Low': quote_data.get('low'), 'Close': quote_data.get('close'),
+            'Volume': quote_data.get('volume'),
+        }, index=index, dtype=np.float64)
+        return normalize_frame(df[~df.index.duplicated(keep='last')])
+
+    def fetch_history(self, tickers, period=None, interval='1d', start=None):
+        frames = {}
+        for ticker in tickers:
+            try:
+                df = self._fetch_one(ticker, period, interval, start)
+            except TransientFetchError as e:
+                e.partial = frames   # Kalan semboller yeniden denenir
+                raise
+            if df is not None:
+                frames[ticker] = df
+        return frames
+
+    def fetch_fundamentals(self, ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker).info
+
+
+class FixtureProvider(DataProvider):
+    """
+    Yerel fixture sağlayıcısı. Veriler bellekten ({(sembol, aralık): df})
+    ya da bir dizindeki '<sembol>_<aralık>.csv' ve '<sembol>.info.json'
+    dosyalarından okunur. Ağ erişimi yapmaz.
+    """
+    name = 'fixture'
+
+    def __init__(self, bars=None, fundamentals=None, directory=None):
+        self.bars = dict(bars or {})
+        self.fundamentals = dict(fundamentals or {})
+        self.directory = directory
+        self.calls = 0  # Benchmark/test için istek sayacı
+
+    def _load_bars(self, ticker, interval):
+        key = (ticker, interval)
+        if key not in self.bars and self.directory:
+            path = os.path.join(self.directory, f"{ticker}_{interval}.csv")
+            if os.path.exists(path):
+                self.bars[key] = pd.read_csv(path, index_col=0, parse_dates=True)
+        return self.bars.get(key)
+
+    def fetch_history(self, tickers, period=None, interval='1d', start=None):
+        self.calls += 1
+        frames = {}
+        for ticker in tickers:
+            df = normalize_frame(self._load_bars(ticker, interval))
+            if df is None:
+                continue
+            if start is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            else:
+                df = trim_to_period(df, period)
+            if not df.empty:
+                frames[ticker] = df
+        return frames
+
+    def fetch_fundamentals(self, ticker):
+        self.calls += 1
+        if ticker not in self.fundamentals and self.directory:
+            path = os.path.join(self.directory, f"{ticker}.info.json")
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    self.fundamentals[ticker] = json.load(f)
+        return dict(self.fundamentals.get(ticker, {}))
+
+
+# -------------------- HİZALI PANEL --------------------
+class BarPanel:
+    """
+    Sembol başına OHLCV çerçevelerini tutar ve talep edildiğinde
+    (tarih × sembol) hizalı alan tabloları üretir.
+    """
+
+    def __init__(self, frames, interval='1d'):
+        self.frames = frames
+        self.interval = interval
+        self._fields = {}
+
+    @property
+    def tickers(self):
+        return list(self.frames)
+
+    @property
+    def empty(self):
+        return not self.frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, ticker):
+        return ticker in self.frames
+
+    def frame(self, ticker):
+        """Sembolün kendi takvimindeki OHLCV çerçevesi (yoksa None)"""
+        return self.frames.get(ticker)
+
+    def field(self, name):
+        """(tarih × sembol) hizalı alan tablosu; eksik barlar NaN"""
+        if name not in self._fields:
+            columns = {t: df[name] for t, df in self.frames.items() if name in df}
+            if columns:
+                table = pd.concat(columns, axis=1).sort_index()
+            else:
+                table = pd.DataFrame(dtype=np.float64)
+            self._fields[name] = table
+        return self._fields[name]
+
+    def __getitem__(self, name):
+        return self.field(name)
+
+
+# -------------------- TOPLU YÜKLEYİCİ --------------------
+class BatchDataLoader:
+    """Sembol listesini parçalara bölerek sağlayıcıdan toplu veri çeker"""
+
+    def __init__(self, provider=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.provider = provider or YahooProvider()
+        self.chunk_size = chunk_size
+
+    def load_frames(self, tickers, period=None, interval='1d', start=None):
+        """{sembol: DataFrame} döndürür; hatalı parça loglanır, diğerleri devam eder"""
+        frames = {}
+        unique = list(dict.fromkeys(tickers))
+        for chunk in chunked(unique, self.chunk_size):
+            try:
+                frames.update(self.provider.fetch_history(
+                    chunk, period=period, interval=interval, start=start))
+            except Exception as e:
+                frames.update(getattr(e, 'partial', None) or {})
+                logging.error(f"Toplu veri çekme hatası ({chunk[0]}..{chunk[-1]}): {e}")
+        missing = len(unique) - len(frames)
+        if missing:
+            logging.warning(f"{missing} sembol için veri bulunamadı ({interval}, {period})")
+        return frames
+
+    def load(self, tickers, period=None, interval='1d', start=None):
+        """Hizalı BarPanel döndürür"""
+        return BarPanel(self.load_frames(tickers, period, interval, start), interval)
+
+    def load_concurrent(self, tickers, period=None, interval='1d', start=None, **options):
+        """
+        Asenkron hattı (sınırlı eşzamanlılık, hız sınırı, yeniden deneme)
+        kullanarak yükler; (BarPanel, FetchReport) döndürür.
+        """
+        from async_fetch import AsyncFetcher
+
+        fetcher = AsyncFetcher(self.provider, chunk_size=self.chunk_size, **options)
+        frames, report = fetcher.run(tickers, period=period, interval=interval, start=start)
+        return BarPanel(frames, interval), report
+
+    def load_one(self, ticker, period=None, interval='1d'):
+        """Tek sembolün çerçevesi (yoksa None)"""
+        return self.load([ticker], period=period, interval=interval).frame(ticker)
+
+    def fundamentals(self, ticker):
+        return self.provider.fetch_fundamentals(ticker)
+
+
+_default_loader = None
+
+
+def get_default_loader():
+    """
+    Paylaşılan yükleyici. BIST_FIXTURE_DIR tanımlıysa Yahoo yerine
+    o dizindeki fixture verileri kullanılır; BIST_PROVIDER=chart ise chart API
+    sağlayıcısı (adresi BIST_CHART_URL) seçilir. Sağlayıcı, BIST_CACHE_DIR
+    (varsayılan '.bar_cache', boş bırakılırsa kapalı) disk önbelleğiyle sarılır;
+    haftalık/aylık barlar ise (BIST_RESAMPLE=0 değilse) önbellekteki günlük
+    seriden türetilir (bkz. timeframes). BIST_WARM_SNAPSHOT tek dosyalık
+    sıcak anlık görüntüyü önbelleğin altına bağlar (bkz. warm_state).
+    BIST_CASSETTE sağlayıcı yanıtlarını kasete kaydeder ya da sağlayıcı
+    yerine kaseti oynatır (bkz. cassette).
+    """
+    global _default_loader
+    if _default_loader is None:
+        from bar_cache import DEFAULT_CACHE_DIR, BarCache, CachingProvider
+        from cassette import attach_cassette
+        from timeframes import wrap_provider
+        from warm_state import get_default_snapshot
+
+        fixture_dir = os.environ.get('BIST_FIXTURE_DIR')
+        if fixture_dir:
+            provider = FixtureProvider(directory=fixture_dir)
+        elif os.environ.get('BIST_PROVIDER') == 'chart':
+            provider = YahooChartProvider(os.environ.get('BIST_CHART_URL', YahooChartProvider.BASE_URL))
+        else:
+            provider = YahooProvider()
+        provider = attach_cassette(provider)
+        cache_dir = os.environ.get('BIST_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if cache_dir:
+            cache = BarCache(cache_dir)
+            cache.attach(get_default_snapshot())
+            provider = CachingProvider(provider, cache)
+        _default_loader = BatchDataLoader(wrap_provider(provider))
+    return _default_loader
+
+
+def set_default_loader(loader):
+    """Paylaşılan yükleyiciyi değiştirir (test/benchmark için)"""
+    global _default_loader
+    _default_loader = loader
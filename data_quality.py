@@ -0,0 +1,417 @@
+"""
+Toplu, vektörel veri kalitesi denetimi.
+
+Bir parçadaki tüm semboller (tarih × sembol) panellerine yerleştirilir ve
+kontroller tek geçişte dizi işlemleriyle yapılır; sonuç sembol başına
+geçerlilik maskesi ve ret nedeni bitleridir. Satırlar barların borsa
+yerel tarihine göre (haftalık/aylıkta takvim haftası/ayına göre) hizalanır.
+
+- Boşluk: sembolün ilk ve son barı arasında, kendi borsasının seans
+  olduğu (market_calendar; haftalık/aylıkta dönemde en az bir seans olan)
+  bir satırda barı yoksa (ya da kapanışı NaN/sıfırsa) boşluktur. Aynı
+  borsadan birden fazla aktif sembol varsa satırın seans sayılması için
+  bunların en az CALENDAR_QUORUM oranının bar vermesi de gerekir (tabloda
+  olmayan kapanışlar); gün içi aralıklarda yalnızca bu oran kullanılır. En çok max_fill ardışık
+  boşluk önceki kapanışla doldurulur (OHLC = önceki kapanış, hacim 0);
+  daha uzun boşluk 'eksik_veri' ile reddedilir. Tek bir eksik bar yüzünden
+  hisse atılmaz. Kapanışı olan satırdaki eksik açılış/yüksek/düşük/hacim
+  ve yüksek/düşüğün açılış-kapanış aralığının dışında kalmaması da onarılır.
+- Sıçrama: bir bar sonra neredeyse tamamen geri dönen tek barlık fiyat
+  sıçraması (hatalı kotasyon) boşluk sayılıp doldurulur. Geri dönmeyen
+  büyük getiri, oranı bir bölünme oranına (2:1, 3:1, 1:2...) yakınsa
+  'bolunme' (düzeltilmemiş bölünme), değilse çok büyükse 'aykiri_getiri'.
+- Durgunluk: son bardan sonra, sembolün borsasında asof anına kadar
+  tamamlanan seans sayısı max_stale_sessions'ı aşıyorsa 'guncel_degil'
+  (tatiller ve hafta sonları sayılmaz, bkz. market_calendar); son
+  STALE_BARS barda fiyat hiç değişmemiş ve hacim sıfırsa 'durgun'.
+- Likidite: son VOLUME_BARS gerçek barın ortalama hacmi min_volume'un, ortalama
+  işlem değeri (kapanış × hacim) min_dollar_volume'un altındaysa
+  'dusuk_hacim'. Hiç hacim bilgisi olmayan sembolde hacim kontrolü atlanır.
+
+Onarılmayan geçerli semboller için çerçevenin kendisi döner; yalnızca
+onarılanların çerçevesi panelden yeniden kurulur.
+"""
+import logging
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from bar_store import FIELDS, BarStore, _utc_ns
+from market_calendar import exchange_for
+from timeframes import DERIVED_INTERVALS, period_keys
+
+# Ret nedenleri; sıra, birden fazla neden varsa sayaca yazılan birincil nedeni belirler
+REASONS = ('yetersiz_veri', 'dusuk_hacim', 'eksik_veri', 'guncel_degil', 'durgun',
+           'bolunme', 'aykiri_getiri')
+REASON_BITS = {reason: 1 << k for k, reason in enumerate(REASONS)}
+REASON_TEXT = {
+    'yetersiz_veri': "Yetersiz veri",
+    'dusuk_hacim': "Düşük hacim",
+    'eksik_veri': "Eksik veri var",
+    'guncel_degil': "Güncel olmayan veri",
+    'durgun': "Fiyat/hacim donmuş",
+    'bolunme': "Düzeltilmemiş bölünme şüphesi",
+    'aykiri_getiri': "Aykırı getiri",
+}
+
+CALENDAR_QUORUM = 0.5        # Satırın seans sayılması için bar veren aktif sembol oranı (aynı borsa)
+SPIKE_LOG = np.log(1.5)      # Tek barlık sıçrama eşiği (log getiri)
+SPIKE_REVERT = 0.25          # Sıçramanın geri dönmeyen kısmı bu oranın altındaysa hatalı kotasyon
+JUMP_LOG = np.log(1.8)       # Geri dönmeyen sıçrama: bu eşiği ve JUMP_SIGMAS oynaklığı aşan getiri
+JUMP_SIGMAS = 8.0
+SPLIT_RATIOS = (2, 3, 4, 5, 8, 10, 20)
+SPLIT_TOLERANCE = 0.05       # |log getiri - log oran| en az bu kadar yakınsa bölünme
+OUTLIER_LOG = np.log(2.5)    # Bölünme oranına uymayan bu büyüklükteki getiri aykırıdır
+STALE_BARS = 4
+VOLUME_BARS = 10
+
+
+class QualityReport:
+    """Denetim sonucu: sembol başına maske, neden bitleri ve onarılan hücre sayısı"""
+
+    def __init__(self, tickers, mask, reasons, repaired, details, frames):
+        self.tickers = tickers
+        self.mask = mask            # (sembol,) bool, True: geçerli
+        self.reasons = reasons      # (sembol,) int, REASON_BITS toplamı
+        self.repaired = repaired    # (sembol,) int, doldurulan/düzeltilen hücre
+        self.details = details      # {ad: (sembol,) dizi}: kaçırılan seans, ortalama hacim...
+        self.frames = frames        # geçerli semboller -> (onarılmış) çerçeve
+
+    def reasons_for(self, ticker):
+        bits = int(self.reasons[self.tickers.index(ticker)])
+        return [r for r in REASONS if bits & REASON_BITS[r]]
+
+    def primary_reasons(self):
+        """{sembol: birincil ret nedeni} (yalnızca reddedilenler)"""
+        lowest = self.reasons & -self.reasons
+        return {t: REASONS[int(b).bit_length() - 1]
+                for t, b in zip(self.tickers, lowest) if b}
+
+    def rejected(self):
+        """{neden: birincil nedeni bu olan sembol sayısı}"""
+        counts = {}
+        for reason in self.primary_reasons().values():
+            counts[reason] = counts.get(reason, 0) + 1
+        return counts
+
+    def summary(self):
+        rejected = ', '.join(f"{r} {n}" for r, n in sorted(self.rejected().items()))
+        return (f"{int(self.mask.sum())}/{len(self.tickers)} hisse geçerli, "
+                f"{int((self.repaired > 0).sum())} onarıldı"
+                + (f" (ret: {rejected})" if rejected else ""))
+
+
+class RepairedFrames(Mapping):
+    """
+    Geçerli semboller -> çerçeve. Onarılmayanlar için gelen çerçevenin
+    kendisi döner; onarılanlarınki (ve BarStore girdisindekiler) ilk
+    erişimde panelden kurulur.
+    """
+
+    def __init__(self, tickers, originals, tzs, index, repaired, panels, rows, stamps):
+        self.tickers = tickers
+        self._valid = set(tickers)
+        self._originals = originals
+        self._tzs = tzs     # sembol sırasıyla saat dilimleri
+        self._index = index
+        self._repaired = repaired
+        self._panels = panels
+        self._rows = rows
+        self._stamps = stamps
+        self._built = {}
+
+    def __getitem__(self, ticker):
+        if ticker not in self._built:
+            if ticker not in self._valid:
+                raise KeyError(ticker)
+            j = self._index[ticker]
+            if self._originals is not None and self._repaired[j] == 0:
+                return self._originals[ticker]
+            keep = self._rows[:, j]
+            index = pd.DatetimeIndex(self._stamps[keep, j].view('datetime64[ns]'))
+            if self._tzs[j] is not None:
+                index = index.tz_localize('UTC').tz_convert(self._tzs[j])
+            self._built[ticker] = pd.DataFrame(
+                np.column_stack([panel[keep, j] for panel in self._panels]),
+                index=index, columns=list(FIELDS))
+        return self._built[ticker]
+
+    def __iter__(self):
+        return iter(self.tickers)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._valid
+
+
+# -------------------- PANEL --------------------
+def _store(frames):
+    """{sembol: çerçeve} ya da BarStore -> float64 OHLCV BarStore"""
+    if isinstance(frames, BarStore) and set(FIELDS) <= set(frames.fields):
+        return frames
+    frames = {t: df if all(f in df.columns for f in FIELDS) else df.reindex(columns=list(FIELDS))
+              for t, df in frames.items() if df is not None and len(df)}
+    return BarStore.from_frames(frames, dtype=np.float64)
+
+
+def build_panel(store, interval='1d'):
+    """
+    (satır zamanları, {alan: (satır × sembol) panel}, (satır × sembol) bar
+    zamanı, satır anahtarları). Satırlar yerel gün, dönem anahtarı ya da
+    (gün içinde) bar zamanıdır; anahtarlar gün/dönem numarasıdır (gün içinde
+    None). Barı olmayan hücreler NaN (zaman -1) kalır. Aynı satıra birden
+    fazla bar düşerse sonuncusu kullanılır.
+    """
+    lengths = (store.ends - store.starts).astype(np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    bars = np.arange(int(lengths.sum())) + np.repeat(store.starts - offsets, lengths)
+    times = store.times[bars]
+    owners = np.repeat(np.arange(len(lengths)), lengths)
+    if interval in DERIVED_INTERVALS or interval == '1d':
+        keys = store.local_days(times, owners)
+        if interval != '1d':
+            keys = period_keys(keys, interval)
+        # Gün/dönem anahtarları sıkışık tam sayılar: sıralama yerine sayımla satır numarası
+        low = keys.min() if len(keys) else 0
+        used = np.bincount(keys - low) > 0
+        rows = (np.cumsum(used) - 1)[keys - low]
+        n_rows = int(used.sum())
+        row_keys = low + np.flatnonzero(used)
+    else:
+        _, rows = np.unique(times, return_inverse=True)   # Gün içi: bar zamanının kendisi
+        n_rows = int(rows.max()) + 1 if len(rows) else 0
+        row_keys = None
+    shape = (n_rows, len(lengths))
+    panels = {}
+    for field in FIELDS:
+        panel = np.full(shape, np.nan)
+        panel[rows, owners] = store.values[store.fields.index(field)][bars]
+        panels[field] = panel
+    bar_times = np.full(shape, -1, dtype=np.int64)
+    bar_times[rows, owners] = times
+    row_times = bar_times.max(axis=1) if len(lengths) else np.full(n_rows, -1, dtype=np.int64)
+    return row_times, panels, bar_times, row_keys
+
+
+def _exchange_sessions(exchange, row_keys, interval):
+    """Satırlarda (gün/dönem anahtarı) borsanın seansı var mı; gün içinde None"""
+    if row_keys is None:
+        return None
+    if interval == '1d':
+        return exchange.is_session(row_keys.astype('datetime64[D]'))
+    if interval == '1wk':
+        first = 7 * row_keys - 3              # period_keys: Pazartesi (7k-3) - Pazar (7k+3)
+        last = first + 6
+    else:
+        months = row_keys.astype('datetime64[M]')
+        first = months.astype('datetime64[D]').astype(np.int64)
+        last = (months + 1).astype('datetime64[D]').astype(np.int64) - 1
+    days = lambda d: np.asarray(d, dtype=np.int64).astype('datetime64[D]')
+    return exchange.sessions_between(days(first - 1), days(last)) > 0
+
+
+def _cell_times(store, exchanges, interval, row_keys, row_times, bar_times):
+    """
+    Hücre zamanları; doldurulan (barı olmayan) hücrelerde günlükte sembolün
+    yerel gece yarısı, diğerlerinde aynı borsadaki sembollerin o satırdaki
+    bar zamanı (yoksa herhangi bir sembolünki)
+    """
+    stamps = np.repeat(row_times[:, None], bar_times.shape[1], axis=1)
+    for exchange in set(exchanges):
+        members = np.array([e is exchange for e in exchanges])
+        own = bar_times[:, members].max(axis=1)
+        stamps[:, members] = np.where(own >= 0, own, row_times)[:, None]
+    if interval == '1d' and row_keys is not None:
+        days = pd.DatetimeIndex(row_keys.astype('datetime64[D]'))
+        zones = {}
+        for j, tz in enumerate(store.tzs):
+            zones.setdefault(str(tz), (tz, []))[1].append(j)
+        for tz, members in zones.values():
+            stamps[:, members] = _utc_ns(days if tz is None else days.tz_localize(tz))[:, None]
+    return np.where(bar_times >= 0, bar_times, stamps)
+
+
+def _last_valid(present):
+    """Her hücre için o satıra kadarki son geçerli satırın indeksi (yoksa -1)"""
+    rows = np.arange(present.shape[0])[:, None]
+    return np.maximum.accumulate(np.where(present, rows, -1), axis=0)
+
+
+def _next_valid(present):
+    """Her hücre için o satırdan sonraki ilk geçerli satırın indeksi (yoksa satır sayısı)"""
+    n = present.shape[0]
+    rows = np.arange(n)[:, None]
+    nxt = np.where(present, rows, n)[::-1]
+    nxt = np.minimum.accumulate(nxt, axis=0)[::-1]
+    return np.vstack([nxt[1:], np.full((1, present.shape[1]), n)])
+
+
+def _log_returns(close, present):
+    """Geçerli barlar arasında (boşluklar atlanarak) log getiri; ilk barda NaN"""
+    prev = _last_valid(present)
+    prev = np.vstack([np.full((1, close.shape[1]), -1), prev[:-1]])
+    cols = np.arange(close.shape[1])[None, :]
+    base = np.where(prev >= 0, close[np.maximum(prev, 0), cols], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(present, np.log(close / base), np.nan)
+
+
+def _tail_mask(rows_mask, count):
+    """Her sütunda rows_mask'in son 'count' doğru hücresi"""
+    from_end = np.cumsum(rows_mask[::-1], axis=0)[::-1]
+    return rows_mask & (from_end <= count)
+
+
+# -------------------- DENETİM --------------------
+def check(frames, interval='1d', asof=None, min_bars=50, min_volume=0, min_dollar_volume=0,
+          max_fill=2, max_stale_sessions=10):
+    """
+    {sembol: çerçeve} (ya da BarStore) için QualityReport. asof varsayılan
+    şimdidir (tz'siz verilirse borsa yerel saati); interval satır
+    hizalamasını belirler.
+    """
+    originals = frames
+    store = _store(frames)
+    tickers = list(store.tickers)
+    empty = [t for t in frames if t not in store]   # None ya da boş çerçeve
+    row_times, p, bar_times, row_keys = build_panel(store, interval)
+    T, N = p['Close'].shape
+    cols = np.arange(N)[None, :]
+    reasons = np.zeros(N, dtype=np.int64)
+    repaired = np.zeros(N, dtype=np.int64)
+
+    with np.errstate(invalid='ignore'):
+        present = p['Close'] > 0              # NaN ve sıfır/negatif kapanış bar sayılmaz
+    # Hatalı tek bar sıçramaları: ileri ve geri getiri büyük, toplamları küçük
+    r = _log_returns(p['Close'], present)
+    nxt = _next_valid(present)
+    r_next = np.where(nxt < T, r[np.minimum(nxt, T - 1), cols], np.nan)
+    with np.errstate(invalid='ignore'):
+        spike = ((np.abs(r) > SPIKE_LOG) & (np.abs(r_next) > SPIKE_LOG)
+                 & (np.abs(r + r_next) < SPIKE_REVERT * np.abs(r)))
+    present &= ~spike
+
+    # Sembolün kendi aralığı ve seans takvimi
+    count = present.sum(axis=0)
+    first = np.argmax(present, axis=0)
+    last = T - 1 - np.argmax(present[::-1], axis=0)
+    rows = np.arange(T)[:, None]
+    active = (rows >= first) & (rows <= last) & (count > 0)
+    # Seanslar sembolün kendi borsasının takviminden (karışık BIST/ABD evreni)
+    exchanges = [exchange_for(t) for t in tickers]
+    session = np.zeros((T, N), dtype=bool)
+    for exchange in set(exchanges):
+        members = np.array([e is exchange for e in exchanges])
+        n_active = active[:, members].sum(axis=1)
+        quorum = present[:, members].sum(axis=1) >= CALENDAR_QUORUM * np.maximum(n_active, 1)
+        calendar = _exchange_sessions(exchange, row_keys, interval)
+        rows_open = quorum if calendar is None else calendar & ((n_active < 2) | quorum)
+        session[:, members] = rows_open[:, None]
+    # Sembolün kendi verdiği ama kapanışı geçersiz satırlar her zaman boşluktur
+    gap = active & ~present & (session | (bar_times >= 0))
+
+    # Boşluk uzunluğu: son geçerli bardan bu yana geçen seans sayısı
+    sessions = np.cumsum(session | gap, axis=0)
+    prev = _last_valid(present)
+    run = np.where(gap, sessions - sessions[np.maximum(prev, 0), cols], 0)
+    longest = run.max(axis=0) if T else np.zeros(N, dtype=np.int64)
+    reasons |= np.where(longest > max_fill, REASON_BITS['eksik_veri'], 0)
+    fill = gap & (run <= max_fill)
+    repaired += fill.sum(axis=0)
+
+    # Onarım: boşluklar önceki kapanışla, eksik/tutarsız alanlar kapanıştan
+    o, h, l, c, v = (p[f].copy() for f in FIELDS)
+    prev_close = np.where(prev >= 0, c[np.maximum(prev, 0), cols], np.nan)
+    for panel in (o, h, l, c):
+        panel[fill] = prev_close[fill]
+    v[fill] = 0.0
+    valid_rows = present | fill
+    volume_known = (~np.isnan(v) & valid_rows).any(axis=0)
+    fixes = valid_rows & (np.isnan(o) | np.isnan(h) | np.isnan(l) | (np.isnan(v) & volume_known))
+    o = np.where(np.isnan(o), c, o)
+    with np.errstate(invalid='ignore'):
+        inconsistent = valid_rows & ((h < np.maximum(o, c)) | (l > np.minimum(o, c)))
+    h = np.fmax(h, np.maximum(o, c))
+    l = np.fmin(l, np.minimum(o, c))
+    v = np.where(np.isnan(v) & volume_known, 0.0, v)
+    repaired += ((fixes | inconsistent) & ~fill).sum(axis=0)
+
+    # Bar sayısı
+    bars = valid_rows.sum(axis=0)
+    reasons |= np.where(bars < min_bars, REASON_BITS['yetersiz_veri'], 0)
+
+    # Bölünme ve aykırı getiri (onarılmış seride)
+    r = _log_returns(c, present)
+    with np.errstate(invalid='ignore'):
+        size = np.abs(r)
+        # Oynaklık: sıçrama eşiğinin altındaki getirilerin karekök ortalama karesi
+        calm = size < JUMP_LOG
+        sigma = np.sqrt(np.where(calm, r * r, 0.0).sum(axis=0) / np.maximum(calm.sum(axis=0), 1))
+        jump = (size > JUMP_LOG) & (size > JUMP_SIGMAS * sigma)
+        # Dönemin kendi getirisi de bölünme oranına eklenir: tolerans oynaklıkla genişler
+        tolerance = np.maximum(SPLIT_TOLERANCE, 3 * sigma)
+        split = np.zeros((T, N), dtype=bool)
+        for k in SPLIT_RATIOS:
+            split |= np.abs(size - np.log(k)) < tolerance
+        split &= jump
+        outlier = ~split & (size > OUTLIER_LOG)
+    reasons |= np.where(split.any(axis=0), REASON_BITS['bolunme'], 0)
+    reasons |= np.where(outlier.any(axis=0), REASON_BITS['aykiri_getiri'], 0)
+
+    # Güncellik ve durgunluk
+    last_days = store.local_days(np.where(count > 0, bar_times[last, np.arange(N)], 0),
+                                 np.arange(N)).astype('datetime64[D]')
+    missed = np.zeros(N, dtype=np.int64)
+    for exchange in set(exchanges):
+        members = np.array([e is exchange for e in exchanges])
+        missed[members] = exchange.sessions_between(last_days[members], exchange.last_session(asof))
+    reasons |= np.where((count > 0) & (missed > max_stale_sessions), REASON_BITS['guncel_degil'], 0)
+    recent = _tail_mask(valid_rows, STALE_BARS)
+    frozen = ((np.where(recent, c, -np.inf).max(axis=0) == np.where(recent, c, np.inf).min(axis=0))
+              & (np.where(recent, v, 0.0).sum(axis=0) == 0) & (bars >= STALE_BARS))
+    reasons |= np.where(frozen, REASON_BITS['durgun'], 0)
+
+    # Likidite (doldurulanlar hariç son VOLUME_BARS bar)
+    recent = _tail_mask(present, VOLUME_BARS)
+    n_recent = np.maximum(recent.sum(axis=0), 1)
+    avg_volume = np.where(recent, v, 0.0).sum(axis=0) / n_recent
+    avg_value = np.where(recent, v * c, 0.0).sum(axis=0) / n_recent
+    illiquid = (avg_volume < min_volume) | (avg_value < min_dollar_volume)
+    reasons |= np.where(volume_known & illiquid, REASON_BITS['dusuk_hacim'], 0)
+
+    mask = reasons == 0
+    valid = [tickers[j] for j in np.flatnonzero(mask)]
+    frames = RepairedFrames(valid, originals if originals is not store else None, store.tzs,
+                            {t: j for j, t in enumerate(tickers)}, repaired,
+                            (o, h, l, c, v), valid_rows,
+                            _cell_times(store, exchanges, interval, row_keys, row_times, bar_times))
+    details = {'bars': bars, 'missed_sessions': np.where(count > 0, missed, -1),
+               'longest_gap': longest, 'avg_volume': avg_volume}
+    if empty:
+        pad = np.zeros(len(empty), dtype=np.int64)
+        mask = np.concatenate([mask, pad.astype(bool)])
+        reasons = np.concatenate([reasons, pad + REASON_BITS['yetersiz_veri']])
+        repaired = np.concatenate([repaired, pad])
+        details = {k: np.concatenate([a, pad]) for k, a in details.items()}
+        tickers += empty
+    return QualityReport(tickers, mask, reasons, repaired, details, frames)
+
+
+def validate(frames, interval='1d', asof=None, **limits):
+    """
+    check() ile denetler, ret nedenlerini loglar ve sayaçlara yazar.
+    Geçerli semboller için {sembol: çerçeve} döndürür (onarılmışlar yeniden
+    kurulmuş, diğerleri gelen çerçevenin kendisi).
+    """
+    report = check(frames, interval, asof, **limits)
+    for symbol, reason in report.primary_reasons().items():
+        logging.warning(f"{symbol}: {REASON_TEXT[reason]}")
+        metrics.count('validation_rejections', reason)
+    repaired = int((report.repaired > 0).sum())
+    if repaired:
+        metrics.count('validation_repairs', '', repaired)
+    return report.frames
@@ -0,0 +1,167 @@
+"""
+Alan bazlı TTL'li temel veri (Ticker.info) deposu.
+
+Stratejilerin kullandığı alanlar sembol başına zaman damgasıyla diskte
+tutulur. Sıcak önbellekte ağ çağrısı yapılmaz; yalnızca süresi dolmuş ya
+da hiç alınmamış alanlara sahip semboller sağlayıcıdan yeniden çekilir;
+gelen info'dan yalnızca süresi dolmuş alanlar yazılır, taze alanlar (ör.
+günlük piyasa değeri yenilenirken çeyreklik oranlar) eski zaman damgasını
+korur. Zaman data_provider.clock_now ile ölçülür.
+"""
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from data_provider import clock_now
+
+DAY = 24 * 60 * 60
+
+# Alan -> geçerlilik süresi (saniye). Piyasa değeri, fiyat ve hacim günlük,
+# oranlar çeyreklik, sektör yıllık.
+FIELD_TTLS = {
+    'marketCap': DAY,
+    'revenueGrowth': 90 * DAY,
+    'debtToEquity': 90 * DAY,
+    'returnOnEquity': 90 * DAY,
+    'averageVolume': DAY,
+    'regularMarketPrice': DAY,
+    'sector': 365 * DAY,
+}
+DEFAULT_STORE_FILE = 'fundamentals.json'
+
+
+class FundamentalsStore:
+    """Sembol -> {alan: (değer, alınma zamanı)} deposu"""
+
+    def __init__(self, provider, path=None, field_ttls=None, max_workers=8):
+        self.provider = provider
+        self.path = path
+        self.field_ttls = dict(field_ttls or FIELD_TTLS)
+        self.max_workers = max_workers
+        self.records = self._load()
+        self.network_calls = 0
+        self.hits = 0      # Depodan taze okunan semboller
+        self.misses = 0    # Yenilenmesi gereken semboller
+        self._dirty = False
+
+    # --- kalıcılık ---
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Temel veri deposu okunamadı, sıfırlanıyor: {e}")
+            return {}
+
+    def save(self):
+        """Değişiklik varsa depoyu atomik olarak diske yazar"""
+        if not self.path or not self._dirty:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.records))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def merge(self, records):
+        """Başka kaynaktaki kayıtları alan bazında ekler; daha yeni alınmış değer kalır"""
+        for ticker, fields in (records or {}).items():
+            record = self.records.setdefault(ticker, {})
+            for field, entry in fields.items():
+                if field not in record or entry[1] > record[field][1]:
+                    record[field] = entry
+                    self._dirty = True
+
+    # --- tazelik ---
+    def _expired(self, ticker, fields, now, max_age=None):
+        """Süresi dolmuş ya da hiç alınmamış alanlar"""
+        record = self.records.get(ticker) or {}
+        expired = []
+        for field in fields:
+            entry = record.get(field)
+            ttl = self.field_ttls.get(field, DAY)
+            if entry is None or now - entry[1] > (ttl if max_age is None else max(ttl, max_age)):
+                expired.append(field)
+        return expired
+
+    def _refresh(self, ticker):
+        try:
+            info = self.provider.fetch_fundamentals(ticker) or {}
+        except Exception as e:
+            logging.error(f"{ticker} temel veri çekme hatası: {e}")
+            return ticker, None
+        return ticker, info
+
+    # --- okuma ---
+    def get_many(self, tickers, fields=None, max_age=None):
+        """
+        {sembol: {alan: değer}} döndürür. Bayat semboller paralel olarak
+        yenilenir; yalnızca süresi dolmuş alanları güncellenir. API'nin boş döndürdüğü alanlar da önbelleğe alınır
+        (tekrar sorulmaz) ama sonuç sözlüğüne eklenmez. max_age (saniye)
+        verilirse alanların TTL'inden daha eski (en fazla max_age) değerler
+        de kabul edilir; kaba ön filtreler için.
+        """
+        fields = list(fields or self.field_ttls)
+        now = clock_now().timestamp()
+        unique = list(dict.fromkeys(tickers))
+        stale = [t for t in unique if self._expired(t, fields, now, max_age)]
+        self.hits += len(unique) - len(stale)
+        self.misses += len(stale)
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for ticker, info in executor.map(self._refresh, stale):
+                    self.network_calls += 1
+                    if info is None:  # Hata: bir sonraki çalıştırmada yeniden denenir
+                        continue
+                    expired = self._expired(ticker, dict.fromkeys([*fields, *self.field_ttls]), now)
+                    record = self.records.setdefault(ticker, {})
+                    for field in expired:
+                        record[field] = [info.get(field), now]
+                    self._dirty = True
+
+        result = {}
+        for ticker in tickers:
+            record = self.records.get(ticker)
+            if record is not None:
+                result[ticker] = {f: record[f][0] for f in fields
+                                  if f in record and record[f][0] is not None}
+        return result
+
+    def get(self, ticker, fields=None):
+        """Tek sembolün alanları (kayıt yoksa boş sözlük)"""
+        return self.get_many([ticker], fields).get(ticker, {})
+
+
+_default_store = None
+
+
+def get_default_store():
+    """
+    Stratejiler arasında paylaşılan depo (bar önbelleği dizininde tutulur);
+    sıcak anlık görüntü (BIST_WARM_SNAPSHOT) varsa kayıtları da eklenir
+    """
+    global _default_store
+    if _default_store is None:
+        from bar_cache import DEFAULT_CACHE_DIR
+        from data_provider import get_default_loader
+        from warm_state import get_default_snapshot
+
+        cache_dir = os.environ.get('BIST_CACHE_DIR', DEFAULT_CACHE_DIR)
+        path = os.path.join(cache_dir, DEFAULT_STORE_FILE) if cache_dir else None
+        _default_store = FundamentalsStore(get_default_loader().provider, path)
+        snapshot = get_default_snapshot()
+        if snapshot is not None:
+            _default_store.merge(snapshot.section('fundamentals'))
+    return _default_store
+
+
+def set_default_store(store):
+    """Paylaşılan depoyu değiştirir (test/benchmark için)"""
+    global _default_store
+    _default_store = store
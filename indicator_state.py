@@ -0,0 +1,562 @@
+"""
+Bar bar güncellenebilen, serileştirilebilir indikatör durumları.
+
+Her durum nesnesi yeni bir bar için O(1) iş yapar ve JSON'a yazılabilir.
+Durumlar bar önbelleğinin yanında (indicator_state.json) saklanır.
+
+Durum her zaman son *kesinleşmiş* bara (sondan bir önceki bar) kadar
+ilerletilir. Son bar yarım gün/hafta olabileceği için yalnızca bir kopya
+üzerinde uygulanır ve çıktı üretmekte kullanılır; önbellekte son bar
+sonradan düzeltildiğinde durum bozulmaz.
+
+EMA ve Wilder ATR gibi sonsuz hafızalı durumların değeri serinin ilk
+barına bağlıdır. Bu paketler (anchored) kuruldukları ilk barı saklar:
+
+- Kısa pencerede (ör. AGRESİF'in kayan '30d' dönemi) başlangıcın etkisi
+  sönmez; çerçeve başka bir bardan başlıyorsa paket ilerletilmez, toplu
+  yola düşülür.
+- Uzun pencerede (haftalık taramanın '2y' dönemi, ~105 bar) pencere her
+  hafta bir bar ileri kayar; slides=True paketler ilk barı first_ts'den
+  sonra olan çerçeveyle de ilerler. Çıktılar first_ts'den bu yana tüm
+  geçmişle hesaplanmış değerlerdir (tam yeniden hesaplamayla aynı); kayan
+  pencereyle toplu hesaplamadan farkı ATR(14) için (13/14)^105 ≈ 4e-4
+  mertebesindedir. Çerçeve first_ts'den önce başlıyorsa (daha uzun geçmiş)
+  yeniden kurulur.
+"""
+import copy
+import hashlib
+import json
+import logging
+import math
+import os
+from collections import deque
+
+import numpy as np
+
+from indicators import true_range
+
+NAN = float('nan')
+MAX_INCREMENTAL_BARS = 20  # Daha fazla yeni bar varsa tam hesaplama daha ucuz
+DEFAULT_STATE_FILE = 'indicator_state.json'
+
+
+def _ns_index(index):
+    """DatetimeIndex -> tz'siz int64 ns dizisi"""
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[ns]').astype('i8')
+
+
+def _float(x):
+    return NAN if x is None else float(x)
+
+
+def _json_float(x):
+    return None if x is None or math.isnan(x) else float(x)
+
+
+# -------------------- TEMEL DURUMLAR --------------------
+class EMAState:
+    """pandas ewm(span, adjust=False) ile aynı üstel ortalama"""
+
+    def __init__(self, span, value=NAN):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = _float(value)
+
+    def update(self, x):
+        if math.isnan(self.value):
+            self.value = x
+        elif self.value != x:
+            self.value = (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+    def clone(self):
+        return copy.copy(self)
+
+    def to_dict(self):
+        return {'span': self.span, 'value': _json_float(self.value)}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['span'], _float(d['value']))
+
+
+class WindowState:
+    """Sabit uzunluklu kayan pencere (hareketli ortalama, hacim penceresi)"""
+
+    def __init__(self, window, values=()):
+        self.window = window
+        self.values = deque((float(v) for v in values), maxlen=window)
+        self.total = sum(self.values)
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+
+    def mean(self, full=True):
+        """Pencere ortalaması; full=True ise pencere dolmadan NaN"""
+        count = len(self.values)
+        if count == 0 or (full and count < self.window):
+            return NAN
+        return self.total / count
+
+    def clone(self):
+        other = copy.copy(self)
+        other.values = self.values.copy()
+        return other
+
+    def to_dict(self):
+        return {'window': self.window, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['window'], d['values'])
+
+
+class RSIState:
+    """Basit hareketli ortalamalı RSI (DualStrategyScreener tanımı)"""
+
+    def __init__(self, window, prev_close=NAN, gains=(), losses=()):
+        self.window = window
+        self.prev_close = _float(prev_close)
+        self.gains = WindowState(window, gains)
+        self.losses = WindowState(window, losses)
+
+    def update(self, close):
+        prev, self.prev_close = self.prev_close, close
+        if math.isnan(prev):
+            return NAN
+        delta = close - prev
+        self.gains.update(delta if delta > 0 else 0.0)
+        self.losses.update(-delta if delta < 0 else 0.0)
+        gain, loss = self.gains.mean(), self.losses.mean()
+        if math.isnan(gain) or (gain == 0 and loss == 0):
+            return NAN
+        if loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + gain / loss)
+
+    def clone(self):
+        other = copy.copy(self)
+        other.gains, other.losses = self.gains.clone(), self.losses.clone()
+        return other
+
+    def to_dict(self):
+        return {'window': self.window, 'prev_close': _json_float(self.prev_close),
+                'gains': list(self.gains.values), 'losses': list(self.losses.values)}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['window'], _float(d['prev_close']), d['gains'], d['losses'])
+
+
+class ATRState:
+    """Wilder ATR; ilk değer ilk 'window' TR'nin ortalaması"""
+
+    def __init__(self, window, prev_close=NAN, count=0, total=0.0, value=NAN):
+        self.window = window
+        self.prev_close = _float(prev_close)
+        self.count = count
+        self.total = total
+        self.value = _float(value)
+
+    def update(self, high, low, close):
+        if math.isnan(self.prev_close):
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.count += 1
+        if self.count < self.window:
+            self.total += tr
+        elif self.count == self.window:
+            self.value = (self.total + tr) / self.window
+        else:
+            self.value = (self.value * (self.window - 1) + tr) / self.window
+        return self.value
+
+    def clone(self):
+        return copy.copy(self)
+
+    def to_dict(self):
+        return {'window': self.window, 'prev_close': _json_float(self.prev_close),
+                'count': self.count, 'total': self.total, 'value': _json_float(self.value)}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['window'], _float(d['prev_close']), d['count'], d['total'], _float(d['value']))
+
+    @classmethod
+    def from_history(cls, window, high, low, close, value):
+        """Toplu hesaplamanın son değerinden durum kurar (high/low/close: geçmiş)"""
+        count = len(close)
+        total = 0.0
+        if count < window:
+            tr = true_range(high[:, None], low[:, None], close[:, None])[:, 0]
+            total = float(np.sum(tr))
+        return cls(window, close[-1] if count else NAN, count, total, value)
+
+
+class SuperTrendState:
+    """SuperTrend bantları ve yönü (TradingView tanımı)"""
+
+    def __init__(self, period, multiplier, atr=None, upper=NAN, lower=NAN,
+                 trend=NAN, prev_close=NAN):
+        self.period = period
+        self.multiplier = multiplier
+        self.atr = atr or ATRState(period)
+        self.upper = _float(upper)
+        self.lower = _float(lower)
+        self.trend = _float(trend)
+        self.prev_close = _float(prev_close)
+
+    def update(self, high, low, close):
+        """(çizgi, yön) döndürür; ısınmada (NaN, NaN)"""
+        atr = self.atr.update(high, low, close)
+        prev_close, self.prev_close = self.prev_close, close
+        if math.isnan(atr):
+            return NAN, NAN
+        hl2 = (high + low) / 2
+        upper = hl2 + self.multiplier * atr
+        lower = hl2 - self.multiplier * atr
+        if math.isnan(self.upper):
+            trend = 1.0
+        else:
+            if prev_close > self.lower:
+                lower = max(lower, self.lower)
+            if prev_close < self.upper:
+                upper = min(upper, self.upper)
+            trend = self.trend
+            if self.trend == -1 and close > self.upper:
+                trend = 1.0
+            elif self.trend == 1 and close < self.lower:
+                trend = -1.0
+        self.upper, self.lower, self.trend = upper, lower, trend
+        return (lower if trend == 1 else upper), trend
+
+    def clone(self):
+        other = copy.copy(self)
+        other.atr = self.atr.clone()
+        return other
+
+    def to_dict(self):
+        return {'period': self.period, 'multiplier': self.multiplier,
+                'atr': self.atr.to_dict(), 'upper': _json_float(self.upper),
+                'lower': _json_float(self.lower), 'trend': _json_float(self.trend),
+                'prev_close': _json_float(self.prev_close)}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['period'], d['multiplier'], ATRState.from_dict(d['atr']),
+                   _float(d['upper']), _float(d['lower']), _float(d['trend']),
+                   _float(d['prev_close']))
+
+
+_STATE_TYPES = {cls.__name__: cls for cls in (EMAState, WindowState, RSIState, ATRState, SuperTrendState)}
+
+
+# -------------------- DURUM PAKETLERİ --------------------
+class StateBundle:
+    """
+    Bir sembolün bir stratejiye ait tüm durumları. Alt sınıflar step()
+    ile bir barın çıktılarını üretir ve seed() ile toplu hesaplamadan kurulur.
+    """
+    kind = 'base'
+    anchored = False    # Çıktılar serinin ilk barına bağlı mı (sonsuz hafızalı durumlar)
+    slides = False      # anchored: ileri kaymış çerçeveyle de ilerletilebilir mi
+
+    def __init__(self, params, states, committed_ts=None, prev=None, first_ts=None):
+        self.params = params
+        self.states = states
+        self.committed_ts = committed_ts
+        self.prev = prev or {}  # Kesinleşmiş bardaki çıktılar (iloc[-2])
+        self.first_ts = first_ts  # Kurulduğu çerçevenin ilk barı (anchored paketler)
+
+    def step(self, bar):
+        raise NotImplementedError
+
+    def advance(self, frame, max_new_bars=MAX_INCREMENTAL_BARS):
+        """
+        Kesinleşmiş bardan sonraki barları uygular ve (önceki, son) çıktıları
+        döndürür. Kesinleşmiş bar çerçevede yoksa, çok fazla yeni bar varsa
+        ya da anchored paketin çerçevesi başka bir bardan (slides ise
+        first_ts'den önce) başlıyorsa None döner (çağıran tam hesaplamaya düşer).
+        """
+        if self.committed_ts is None or frame is None or len(frame) < 2:
+            return None
+        stamps = _ns_index(frame.index)
+        if self.anchored and (self.first_ts is None or int(stamps[0]) < self.first_ts
+                              or (int(stamps[0]) > self.first_ts and not self.slides)):
+            return None
+        pos = int(np.searchsorted(stamps, self.committed_ts))
+        if pos >= len(stamps) or stamps[pos] != self.committed_ts:
+            return None
+        new_count = len(stamps) - pos - 1
+        if new_count < 1 or new_count > max_new_bars:
+            return None
+
+        # Yalnızca yeni barlar tek to_numpy çağrısıyla okunur
+        columns = list(frame.columns)
+        rows = frame.to_numpy(dtype=np.float64)[pos + 1:].tolist()
+        bars = [dict(zip(columns, row)) for row in rows]
+        for i, bar in enumerate(bars[:-1]):
+            self.prev = self.step(bar)
+            self.committed_ts = int(stamps[pos + 1 + i])
+        return self.prev, self.clone().step(bars[-1])
+
+    def clone(self):
+        return type(self)(self.params, {name: s.clone() for name, s in self.states.items()},
+                          self.committed_ts, dict(self.prev), self.first_ts)
+
+    def to_dict(self):
+        return {'kind': self.kind, 'params': self.params, 'committed_ts': self.committed_ts,
+                'first_ts': self.first_ts,
+                'prev': {k: _json_float(v) for k, v in self.prev.items()},
+                'states': {name: dict(s.to_dict(), type=type(s).__name__)
+                           for name, s in self.states.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        states = {name: _STATE_TYPES[s['type']].from_dict(s) for name, s in d['states'].items()}
+        return cls(d['params'], states, d['committed_ts'],
+                   {k: _float(v) for k, v in d['prev'].items()}, d.get('first_ts'))
+
+
+class MomentumBundle(StateBundle):
+    """AGRESİF kuralları (gün içi akış): EMA12/EMA26/MACD sinyali, RSI(7), 20 bar hacim"""
+    kind = 'momentum'
+    anchored = True
+
+    def step(self, bar):
+        s = self.states
+        close, volume = bar['Close'], bar['Volume']
+        macd = s['ema12'].update(close) - s['ema26'].update(close)
+        signal = s['signal'].update(macd)
+        average_volume = s['volume'].mean(full=False)
+        ratio = volume / average_volume if average_volume else NAN
+        s['volume'].update(volume)
+        return {'close': close, 'macd': macd, 'signal': signal,
+                'rsi': s['rsi'].update(close), 'volume_ratio': ratio}
+
+    @classmethod
+    def seed(cls, frame, ema12, ema26, signal, rsi_window=7, volume_window=20):
+        """Toplu hesaplamanın sondan bir önceki bar değerlerinden kurar"""
+        closes = frame['Close'].to_numpy(dtype=np.float64)[:-1]
+        volumes = frame['Volume'].to_numpy(dtype=np.float64)[:-1]
+        rsi = RSIState(rsi_window)
+        rsi_value = NAN
+        for close in closes[-(rsi_window + 1):]:
+            rsi_value = rsi.update(close)
+        states = {'ema12': EMAState(12, ema12), 'ema26': EMAState(26, ema26),
+                  'signal': EMAState(9, signal), 'rsi': rsi,
+                  'volume': WindowState(volume_window, volumes[-volume_window:])}
+        prev = {'close': closes[-1], 'macd': ema12 - ema26, 'signal': signal, 'rsi': rsi_value}
+        stamps = _ns_index(frame.index)
+        return cls({'rsi': rsi_window, 'volume': volume_window}, states,
+                   int(stamps[-2]), prev, int(stamps[0]))
+
+
+class TrendBundle(StateBundle):
+    """DENGELİ: 200 bar hareketli ortalama ve RSI(14)"""
+    kind = 'trend'
+
+    def step(self, bar):
+        s = self.states
+        close = bar['Close']
+        s['ma'].update(close)
+        return {'close': close, 'ma': s['ma'].mean(), 'rsi': s['rsi'].update(close)}
+
+    @classmethod
+    def seed(cls, frame, ma_window=200, rsi_window=14):
+        """Sonlu hafızalı durumlar: kesinleşmiş barlara kadar kuyruk yeniden oynatılır"""
+        closes = frame['Close'].to_numpy(dtype=np.float64)[:-1]
+        bundle = cls({'ma': ma_window, 'rsi': rsi_window},
+                     {'ma': WindowState(ma_window, closes[-ma_window:]), 'rsi': RSIState(rsi_window)})
+        for close in closes[-(rsi_window + 1):]:
+            bundle.prev = {'close': close, 'rsi': bundle.states['rsi'].update(close)}
+        bundle.prev['ma'] = bundle.states['ma'].mean()
+        bundle.committed_ts = int(_ns_index(frame.index)[-2])
+        return bundle
+
+
+class SuperTrendBundle(StateBundle):
+    """Haftalık SuperTrend taraması: bantlar, yön, ATR ve R-Score pencereleri"""
+    kind = 'supertrend'
+    anchored = True
+    slides = True       # '2y' haftalık pencere: başlangıcın etkisi sönmüş olur
+
+    def step(self, bar):
+        s = self.states
+        high, low, close = bar['High'], bar['Low'], bar['Close']
+        line, trend = s['supertrend'].update(high, low, close)
+        atr = s['atr'].update(high, low, close)
+        s['trend_window'].update(1.0 if trend == 1 else 0.0)
+        s['ma'].update(close)
+
+        # R-Score: trend gücü, SuperTrend'e yakınlık, momentum
+        trend_strength = s['trend_window'].mean()
+        pullback_score = NAN if math.isnan(line) else \
+            max(0.0, 1 - abs((close - line) / line) / self.params['pullback_band'])
+        if math.isnan(pullback_score):
+            pullback_score = 0.0
+        ma = s['ma'].mean()
+        momentum_score = 1.0 if (not math.isnan(ma) and close > ma) else 0.3
+        r_score = trend_strength * 0.4 + pullback_score * 0.4 + momentum_score * 0.2
+        return {'close': close, 'supertrend': line, 'direction': trend, 'atr': atr,
+                'r_score': r_score}
+
+    @staticmethod
+    def make_params(period, multiplier, atr_period, trend_window=10, ma_window=20,
+                    pullback_band=0.1):
+        return {'period': period, 'multiplier': multiplier, 'atr_period': atr_period,
+                'trend_window': trend_window, 'ma_window': ma_window,
+                'pullback_band': pullback_band}
+
+    @classmethod
+    def seed(cls, frame, result, column, params):
+        """
+        indicators.supertrend sonucunun (column) sondan bir önceki satırından
+        kurar. Sonuç dizilerinin yalnızca son trend_window + 2 satırı yeterlidir.
+        """
+        period, multiplier, atr_period = params['period'], params['multiplier'], params['atr_period']
+        trend_window, ma_window = params['trend_window'], params['ma_window']
+        n = len(frame)
+        high = frame['High'].to_numpy(dtype=np.float64)[:-1]
+        low = frame['Low'].to_numpy(dtype=np.float64)[:-1]
+        closes = frame['Close'].to_numpy(dtype=np.float64)[:-1]
+        row = -2
+        directions = result.direction[-n:, column][:-1]
+
+        band_atr = ATRState.from_history(period, high, low, closes, result.band_atr[row, column])
+        states = {
+            'supertrend': SuperTrendState(period, multiplier, band_atr,
+                                          result.upper[row, column], result.lower[row, column],
+                                          result.direction[row, column], closes[-1]),
+            'atr': ATRState.from_history(atr_period, high, low, closes, result.atr[row, column]),
+            'trend_window': WindowState(trend_window, (directions[-trend_window:] == 1).astype(float)),
+            'ma': WindowState(ma_window, closes[-ma_window:]),
+        }
+        prev = {'close': closes[-1], 'supertrend': result.supertrend[row, column],
+                'direction': result.direction[row, column], 'atr': result.atr[row, column],
+                'r_score': result.r_score[row, column]}
+        stamps = _ns_index(frame.index)
+        return cls(dict(params), states, int(stamps[-2]), prev, int(stamps[0]))
+
+
+_BUNDLE_TYPES = {cls.kind: cls for cls in (MomentumBundle, TrendBundle, SuperTrendBundle)}
+
+
+# -------------------- DEPO --------------------
+def params_hash(params):
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+class IndicatorStateStore:
+    """(tür, sembol, aralık, parametre özeti) anahtarlı durum deposu"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.bundles = {}
+        self.hits = 0
+        self.misses = 0
+        self._raw = self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"İndikatör durumu okunamadı, sıfırlanıyor: {e}")
+            return {}
+
+    @staticmethod
+    def _key(kind, symbol, interval, digest):
+        return f"{kind}|{symbol}|{interval}|{digest}"
+
+    def get(self, kind, symbol, interval, params, digest=None):
+        key = self._key(kind, symbol, interval, digest or params_hash(params))
+        if key not in self.bundles and key in self._raw:
+            try:
+                self.bundles[key] = _BUNDLE_TYPES[kind].from_dict(self._raw[key])
+            except (KeyError, TypeError, ValueError) as e:
+                logging.warning(f"{symbol} indikatör durumu bozuk, yeniden hesaplanacak: {e}")
+                self._raw.pop(key, None)
+        return self.bundles.get(key)
+
+    def put(self, symbol, interval, params, bundle):
+        self.bundles[self._key(bundle.kind, symbol, interval, params_hash(params))] = bundle
+
+    def merge(self, raw):
+        """Başka kaynaktaki (ör. sıcak anlık görüntü) durumları ekler; daha ileri olan kalır"""
+        for key, d in (raw or {}).items():
+            local = self._raw.get(key)
+            if local is None or (d.get('committed_ts') or 0) > (local.get('committed_ts') or 0):
+                self._raw[key] = d
+                self.bundles.pop(key, None)
+
+    def to_dict(self):
+        payload = dict(self._raw)
+        payload.update({key: b.to_dict() for key, b in self.bundles.items()})
+        return payload
+
+    def save(self):
+        if not self.path:
+            return
+        payload = self.to_dict()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(payload))
+        os.replace(tmp_path, self.path)
+        self._raw = payload
+
+    def advance_all(self, kind, frames, interval, params):
+        """
+        Sıcak semboller için {sembol: (önceki, son)} çıktıları ve durumu
+        kullanılamayan (soğuk) sembollerin listesini döndürür.
+        """
+        warm, cold = {}, []
+        digest = params_hash(params)
+        for ticker, frame in frames.items():
+            bundle = self.get(kind, ticker, interval, params, digest)
+            result = bundle.advance(frame) if bundle is not None else None
+            if result is None:
+                cold.append(ticker)
+                self.misses += 1
+            else:
+                warm[ticker] = result
+                self.hits += 1
+        return warm, cold
+
+
+_default_state_store = None
+
+
+def get_default_state_store():
+    """
+    Bar önbelleğinin yanında tutulan paylaşılan durum deposu; sıcak anlık
+    görüntü (BIST_WARM_SNAPSHOT) varsa durumları da eklenir
+    """
+    global _default_state_store
+    if _default_state_store is None:
+        from bar_cache import DEFAULT_CACHE_DIR
+        from warm_state import get_default_snapshot
+
+        cache_dir = os.environ.get('BIST_CACHE_DIR', DEFAULT_CACHE_DIR)
+        path = os.path.join(cache_dir, DEFAULT_STATE_FILE) if cache_dir else None
+        _default_state_store = IndicatorStateStore(path)
+        snapshot = get_default_snapshot()
+        if snapshot is not None:
+            _default_state_store.merge(snapshot.section('indicator_state'))
+    return _default_state_store
+
+
+def set_default_state_store(store):
+    """Paylaşılan durum deposunu değiştirir (test/benchmark için)"""
+    global _default_state_store
+    _default_state_store = store
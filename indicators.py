@@ -0,0 +1,361 @@
+"""
+Kesitsel (tarih × sembol) vektörel indikatör motoru.
+
+Kapanış ve hacimler her sembolün son barı son satıra gelecek şekilde
+sağa hizalanmış NumPy panellerinde tutulur; kısa geçmişli semboller üstten
+NaN ile doldurulur. Tüm indikatörler satırlar üzerinde tek geçişte, tüm
+sütunlar için aynı anda hesaplanır ve pandas'ın sembol bazlı sonuçlarıyla
+(ewm(adjust=False), rolling().mean()) birebir aynı tanımları kullanır.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+
+# -------------------- PANEL OLUŞTURMA --------------------
+def stack_right_aligned(series_list, length=None, out=None):
+    """
+    Serileri (uzunluk × sembol) panele sağa hizalı yerleştirir. out verilirse
+    (ör. paylaşımlı bellek) panel yeni dizi yerine onun içine yazılır.
+    """
+    arrays = [np.asarray(s, dtype=np.float64) for s in series_list]
+    if length is None:
+        length = max((len(a) for a in arrays), default=0)
+    if out is None:
+        panel = np.full((length, len(arrays)), np.nan)
+    else:
+        panel = out
+        panel.fill(np.nan)
+    for j, values in enumerate(arrays):
+        values = values[-length:] if length else values[:0]
+        if len(values):
+            panel[length - len(values):, j] = values
+    return panel
+
+
+def _columns(df, names):
+    values = df.to_numpy(dtype=np.float64)
+    return values[:, [df.columns.get_loc(name) for name in names]]
+
+
+def stack_frames(frames, tickers, fields, length=None, out=None):
+    """
+    {alan: sağa hizalı panel}; çerçeve başına tek to_numpy çağrısı yapılır.
+    out, (alan × uzunluk × sembol) biçiminde hazır bir dizi olabilir.
+    frames bir bar_store.BarStore ise paneller doğrudan dizilerinden yazılır.
+    """
+    if hasattr(frames, 'stack'):
+        return frames.stack(tickers, fields, length, out)
+    columns = [_columns(frames[t], fields) for t in tickers]
+    return {field: stack_right_aligned([c[:, k] for c in columns], length,
+                                       None if out is None else out[k])
+            for k, field in enumerate(fields)}
+
+
+# -------------------- ÇEKİRDEKLER --------------------
+def ema(x, span=None, alpha=None):
+    """
+    pandas ewm(span, adjust=False).mean() eşdeğeri. Baştaki NaN'lar ilk
+    geçerli değerde başlar; aradaki NaN'lar pandas'taki gibi ağırlığı azaltır.
+    """
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full_like(x, np.nan)
+    if x.shape[0] == 0:
+        return out
+    decay = 1.0 - alpha
+    weighted = x[0].copy()
+    old_wt = np.ones(x.shape[1:])
+    out[0] = weighted
+    for i in range(1, x.shape[0]):
+        cur = x[i]
+        is_obs = ~np.isnan(cur)
+        started = ~np.isnan(weighted)
+        old_wt = np.where(started, old_wt * decay, old_wt)
+        update = started & is_obs
+        blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        weighted = np.where(update & (weighted != cur), blended, weighted)
+        old_wt = np.where(update, 1.0, old_wt)
+        weighted = np.where(~started & is_obs, cur, weighted)
+        out[i] = weighted
+    return out
+
+
+def rolling_mean(x, window):
+    """pandas rolling(window).mean() eşdeğeri (pencerede 'window' geçerli değer şart)"""
+    x = np.asarray(x, dtype=np.float64)
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    ccount = np.cumsum(valid, axis=0)
+    sums = csum.copy()
+    counts = ccount.copy()
+    sums[window:] -= csum[:-window]
+    counts[window:] -= ccount[:-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = sums / counts
+    out[counts < window] = np.nan
+    return out
+
+
+def diff(x):
+    out = np.full_like(x, np.nan)
+    out[1:] = x[1:] - x[:-1]
+    return out
+
+
+def rsi(close, window):
+    """Basit hareketli ortalamalı RSI (DualStrategyScreener'ın tanımı)"""
+    delta = diff(close)
+    gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+    loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs = rolling_mean(gain, window) / rolling_mean(loss, window)
+        return 100 - (100 / (1 + rs))
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """(MACD, sinyal hattı)"""
+    line = ema(close, fast) - ema(close, slow)
+    return line, ema(line, signal)
+
+
+def volume_ratio(volume, lookback=20):
+    """Son bar hacmi / önceki 'lookback' barın ortalaması (sembol başına)"""
+    previous = volume[-(lookback + 1):-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return volume[-1] / _nanmean(previous)
+
+
+def rolling_volume_ratio(volume, lookback=20):
+    """
+    volume_ratio'nun her bar için değeri: hacim / önceki en çok 'lookback'
+    barın (geçerli olanların) ortalaması. Geriye dönük testte kullanılır.
+    """
+    previous = shift(np.asarray(volume, dtype=np.float64))
+    valid = ~np.isnan(previous)
+    sums = np.cumsum(np.where(valid, previous, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums[lookback:] -= sums[:-lookback].copy()
+    counts[lookback:] -= counts[:-lookback].copy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, volume / (sums / counts), np.nan)
+
+
+def _nanmean(x):
+    valid = ~np.isnan(x)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, np.where(valid, x, 0.0).sum(axis=0) / count, np.nan)
+
+
+def shift(x, periods=1):
+    out = np.full_like(x, np.nan)
+    out[periods:] = x[:-periods]
+    return out
+
+
+def true_range(high, low, close):
+    """max(H-L, |H-Ö.Kapanış|, |L-Ö.Kapanış|); ilk barda H-L"""
+    prev_close = shift(close)
+    with np.errstate(invalid='ignore'):
+        return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def wilder_atr(tr, window):
+    """
+    Wilder ATR (ta.volatility.AverageTrueRange tanımı): ilk değer ilk
+    'window' TR'nin ortalaması, sonrası (önceki*(n-1) + TR) / n. Isınma NaN.
+    """
+    seed = rolling_mean(tr, window)
+    counts = np.cumsum(~np.isnan(tr), axis=0)
+    out = np.full_like(tr, np.nan)
+    prev = np.full(tr.shape[1:], np.nan)
+    for i in range(tr.shape[0]):
+        prev = np.where(counts[i] == window, seed[i], (prev * (window - 1) + tr[i]) / window)
+        out[i] = prev
+    return out
+
+
+SuperTrendResult = namedtuple('SuperTrendResult', [
+    'supertrend', 'direction', 'atr', 'trend_strength',
+    'pullback_score', 'momentum_score', 'r_score',
+    'upper', 'lower', 'band_atr',
+])
+
+
+def supertrend(high, low, close, period=10, multiplier=3.0, atr_period=14,
+               trend_window=10, ma_window=20, pullback_band=0.1, band_atr=None, atr=None):
+    """
+    (bar × sembol) panellerinde SuperTrend, yön, ATR ve R-Score bileşenleri.
+    Bantlar TradingView tanımıyla tek O(n) geçişte, tüm sütunlar için aynı
+    anda hesaplanır. Yön: 1 yukarı, -1 aşağı, ısınmada NaN. band_atr/atr
+    önceden hesaplanmışsa (parametre taramasında çarpan başına) yeniden
+    hesaplanmaz.
+    """
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    if band_atr is None or atr is None:
+        tr = true_range(high, low, close)
+        if band_atr is None:
+            band_atr = wilder_atr(tr, period)
+        if atr is None:
+            atr = band_atr if atr_period == period else wilder_atr(tr, atr_period)
+
+    hl2 = (high + low) / 2
+    basic_upper = hl2 + multiplier * band_atr
+    basic_lower = hl2 - multiplier * band_atr
+
+    shape = close.shape[1:]
+    upper_prev = np.full(shape, np.nan)
+    lower_prev = np.full(shape, np.nan)
+    trend_prev = np.full(shape, np.nan)
+    close_prev = np.full(shape, np.nan)
+    line = np.full_like(close, np.nan)
+    direction = np.full_like(close, np.nan)
+    upper_band = np.full_like(close, np.nan)
+    lower_band = np.full_like(close, np.nan)
+
+    with np.errstate(invalid='ignore'):
+        for i in range(close.shape[0]):
+            ready = ~np.isnan(basic_upper[i])
+            started = ~np.isnan(upper_prev)
+            lower = np.where(started & (close_prev > lower_prev),
+                             np.fmax(basic_lower[i], lower_prev), basic_lower[i])
+            upper = np.where(started & (close_prev < upper_prev),
+                             np.fmin(basic_upper[i], upper_prev), basic_upper[i])
+            trend = np.where(~started, 1.0,
+                    np.where((trend_prev == -1) & (close[i] > upper_prev), 1.0,
+                    np.where((trend_prev == 1) & (close[i] < lower_prev), -1.0, trend_prev)))
+
+            upper_prev = np.where(ready, upper, np.nan)
+            lower_prev = np.where(ready, lower, np.nan)
+            trend_prev = np.where(ready, trend, np.nan)
+            close_prev = close[i]
+            direction[i] = trend_prev
+            upper_band[i] = upper_prev
+            lower_band[i] = lower_prev
+            line[i] = np.where(trend_prev == 1, lower_prev, upper_prev)
+
+        # R-Score bileşenleri: trend gücü, SuperTrend'e yakınlık, momentum
+        is_up = np.where(np.isnan(close), np.nan, (direction == 1).astype(np.float64))
+        trend_strength = rolling_mean(is_up, trend_window)
+        distance = (close - line) / line
+        pullback_score = np.fmax(0.0, 1 - np.abs(distance) / pullback_band)
+        momentum_score = np.where(close > rolling_mean(close, ma_window), 1.0, 0.3)
+        r_score = trend_strength * 0.4 + pullback_score * 0.4 + momentum_score * 0.2
+
+    return SuperTrendResult(line, direction, atr, trend_strength,
+                            pullback_score, momentum_score, r_score,
+                            upper_band, lower_band, band_atr)
+
+
+def supertrend_reference(high, low, close, period=10, multiplier=3.0):
+    """
+    Tek sembol için satır satır saf Python SuperTrend; vektörel çekirdeğin
+    doğrulanmasında referans olarak kullanılır. (çizgi, yön) listeleri döner.
+    """
+    n = len(close)
+    tr = [high[0] - low[0]] + [
+        max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        for i in range(1, n)
+    ]
+    atr = [float('nan')] * n
+    for i in range(period - 1, n):
+        if i == period - 1:
+            atr[i] = sum(tr[:period]) / period
+        else:
+            atr[i] = (atr[i - 1] * (period - 1) + tr[i]) / period
+
+    line, direction = [float('nan')] * n, [float('nan')] * n
+    upper_prev = lower_prev = trend = None
+    for i in range(period - 1, n):
+        hl2 = (high[i] + low[i]) / 2
+        upper, lower = hl2 + multiplier * atr[i], hl2 - multiplier * atr[i]
+        if upper_prev is None:
+            trend = 1
+        else:
+            if close[i - 1] > lower_prev:
+                lower = max(lower, lower_prev)
+            if close[i - 1] < upper_prev:
+                upper = min(upper, upper_prev)
+            if trend == -1 and close[i] > upper_prev:
+                trend = 1
+            elif trend == 1 and close[i] < lower_prev:
+                trend = -1
+        upper_prev, lower_prev = upper, lower
+        direction[i] = trend
+        line[i] = lower if trend == 1 else upper
+    return line, direction
+
+
+def at(x, row):
+    """Panelin bir satırı; satır yoksa NaN (kısa geçmiş)"""
+    if x.shape[0] >= abs(row):
+        return x[row]
+    return np.full(x.shape[1:], np.nan)
+
+
+# -------------------- MOTOR --------------------
+class IndicatorEngine:
+    """
+    Sembol çerçevelerinden kapanış/hacim panellerini kurar ve istenen
+    indikatörleri bir kez hesaplayıp önbelleğe alır. Ham veriyi değiştirmez.
+    """
+
+    def __init__(self, frames, tickers=None, out=None):
+        """out: (2 × uzunluk × sembol) kapanış/hacim karalama tamponu (yeniden kullanılabilir)"""
+        tickers = list(frames) if tickers is None else tickers
+        if hasattr(frames, 'stack'):
+            self.tickers = [t for t in tickers if t in frames]
+        else:
+            self.tickers = [t for t in tickers if frames.get(t) is not None]
+        panels = stack_frames(frames, self.tickers, ('Close', 'Volume'), out=out)
+        self.close = panels['Close']
+        self.volume = panels['Volume']
+        self._frames = frames
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def _cached(self, key, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def ema(self, span):
+        return self._cached(('ema', span), lambda: ema(self.close, span))
+
+    def macd(self, fast=12, slow=26, signal=9):
+        def compute():
+            line = self.ema(fast) - self.ema(slow)
+            return line, ema(line, signal)
+        return self._cached(('macd', fast, slow, signal), compute)
+
+    def sma(self, window):
+        return self._cached(('sma', window), lambda: rolling_mean(self.close, window))
+
+    def rsi(self, window):
+        return self._cached(('rsi', window), lambda: rsi(self.close, window))
+
+    def volume_ratio(self, lookback=20):
+        return self._cached(('volume_ratio', lookback), lambda: volume_ratio(self.volume, lookback))
+
+    def high_low(self):
+        """Yüksek/düşük panelleri (yalnızca istenirse kurulur)"""
+        def compute():
+            panels = stack_frames(self._frames, self.tickers, ('High', 'Low'), len(self.close))
+            return panels['High'], panels['Low']
+        return self._cached(('high_low',), compute)
+
+    def supertrend(self, period=10, multiplier=3.0, atr_period=14, **options):
+        """indicators.supertrend sonucu (SuperTrendResult)"""
+        def compute():
+            high, low = self.high_low()
+            return supertrend(high, low, self.close, period=period, multiplier=multiplier,
+                              atr_period=atr_period, **options)
+        key = ('supertrend', period, multiplier, atr_period) + tuple(sorted(options.items()))
+        return self._cached(key, compute)
+
+    def last_close(self):
+        return at(self.close, -1)
@@ -0,0 +1,517 @@
+"""
+Gün içi akış taraması (1m/5m barlar).
+
+Haftalık toplu taramada günler sonra görünen AGRESİF sinyalleri (MACD
+kesişimi, 3 kat hacim, RSI(7) 30-40 dönüşü) ve SuperTrend dönüş/geri
+çekilme koşulları, her bar kapanışında sembolün bellekteki durumundan
+değerlendirilir. Durumlar indicator_state paketleridir (MomentumBundle,
+SuperTrendBundle): her bar O(1) iş yapar, sembol başına birkaç KB tutar;
+birkaç bin sembol tek süreçte izlenebilir.
+
+Barlar bir akış kaynağından (BarFeed) gelir:
+    ReplayFeed  - {sembol: DataFrame} barlarını zaman sırasıyla (istenirse
+                  gerçek zamanın 'speed' katı hızında) yeniden oynatır
+    QueueFeed   - başka bir iş parçacığının (ör. websocket istemcisi)
+                  tamamlanmış barları koyduğu kuyruk
+    PollingFeed - sağlayıcıdan her bar aralığında son günün barlarını çeker
+
+Geçmişi olan semboller seed() ile tek vektörel geçişte kurulur; geçmişi
+olmayanlar akıştan WARMUP_BARS bar biriktirince kurulur. Uyarılar sıcak
+yoldan bir kuyruğa bırakılır; AlertDispatcher arka planda toplayıp
+Telegram'a gönderir. Bar başına gecikme (barın gelişinden uyarının
+kuyruğa bırakılmasına kadar) kesin yüzdeliklerle raporlanır ve metrik
+dizinine yazılır.
+
+    python intraday_stream.py replay [--tickers 3000] [--bars 400] [--speed 0]
+    python intraday_stream.py live AAPL MSFT ... [--interval 1m] [--telegram]
+"""
+import argparse
+import logging
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from bar_store import BarStore, _utc_ns
+from indicator_state import MomentumBundle, SuperTrendBundle
+from indicators import IndicatorEngine, stack_frames, supertrend
+from scan_settings import ATR_PERIOD, MAX_PULLBACK_ATR, SUPER_TREND_MULT, SUPER_TREND_PERIOD
+
+DEFAULT_INTERVAL = '5m'
+INTERVAL_SECONDS = {'1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 1800, '60m': 3600}
+WARMUP_BARS = 60           # EMA26 + sinyal(9) ve SuperTrend ATR'si için yeterli geçmiş
+VOLUME_SPIKE = 3.0         # AGRESİF: hacim / 20 bar ortalaması
+RSI_TURN_BAND = (30, 40)   # AGRESİF: RSI(7) bu aralıktan yukarı dönüş
+ALERT_COOLDOWN_BARS = 12   # Aynı sembol/kural bu kadar bar içinde tekrar bildirilmez
+FLUSH_INTERVAL = 1.0       # Uyarılar en fazla bu aralıkla (sn) topluca gönderilir
+REPORT_EVERY = 60.0        # Akış durumu log aralığı (sn)
+POLL_LAG = 5.0             # Bar kapanışından sonra sağlayıcıya tanınan süre (sn)
+
+
+# -------------------- AKIŞ KAYNAKLARI --------------------
+class BarFeed:
+    """
+    Tamamlanmış barları (sembol, zaman UTC ns, bar sözlüğü, geliş anı)
+    olarak verir; geliş anı time.perf_counter() değeridir.
+    """
+
+    def __iter__(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ReplayFeed(BarFeed):
+    """
+    Çerçevelerdeki barları zaman (eşitse sembol) sırasıyla oynatır. start
+    verilirse daha önceki barlar atlanır (seed geçmişi olarak kullanılır);
+    speed verilirse barlar gerçek zamanın speed katı hızında, verilmezse
+    beklemeden gelir.
+    """
+
+    def __init__(self, frames, start=None, speed=None, chunk=4096):
+        self.store = BarStore.from_frames(frames, dtype=np.float64)
+        self.speed = speed
+        self.chunk = chunk
+        lengths = self.store.ends - self.store.starts
+        owners = np.repeat(np.arange(len(self.store.tickers)), lengths)
+        order = np.lexsort((owners, self.store.times))
+        if start is not None:
+            start = int(_utc_ns(pd.DatetimeIndex([pd.Timestamp(start)]))[0])
+            order = order[self.store.times[order] >= start]
+        self.order = order
+        self.owners = owners
+        self._closed = False
+
+    def __len__(self):
+        return len(self.order)
+
+    def close(self):
+        self._closed = True
+
+    def __iter__(self):
+        store, fields = self.store, self.store.fields
+        first, wall = None, time.perf_counter()
+        for a in range(0, len(self.order), self.chunk):
+            idx = self.order[a:a + self.chunk]
+            rows = np.column_stack([row[idx] for row in store.values]).tolist()
+            for i, row in zip(idx.tolist(), rows):
+                if self._closed:
+                    return
+                ts = int(store.times[i])
+                if self.speed:
+                    first = ts if first is None else first
+                    delay = (ts - first) / 1e9 / self.speed - (time.perf_counter() - wall)
+                    if delay > 0:
+                        time.sleep(delay)
+                yield store.tickers[self.owners[i]], ts, dict(zip(fields, row)), time.perf_counter()
+
+
+class QueueFeed(BarFeed):
+    """Başka bir iş parçacığının put() ile beslediği akış; close() akışı bitirir"""
+    _END = object()
+
+    def __init__(self, maxsize=0):
+        self.queue = queue.Queue(maxsize)
+
+    def put(self, ticker, timestamp, bar):
+        ts = int(_utc_ns(pd.DatetimeIndex([pd.Timestamp(timestamp)]))[0]) \
+            if not isinstance(timestamp, (int, np.integer)) else int(timestamp)
+        self.queue.put((ticker, ts, bar, time.perf_counter()))
+
+    def close(self):
+        self.queue.put(self._END)
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is self._END:
+                return
+            yield item
+
+
+class PollingFeed(BarFeed):
+    """
+    Her bar aralığının kapanışından POLL_LAG sn sonra sağlayıcıdan son
+    günün barlarını çeker ve yalnızca tamamlanmış yeni barları verir.
+    Sağlayıcıların (Yahoo) itme akışı olmadığı için canlı mod budur.
+    """
+
+    def __init__(self, loader, tickers, interval=DEFAULT_INTERVAL, lag=POLL_LAG):
+        self.loader = loader
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.seconds = INTERVAL_SECONDS[interval]
+        self.lag = lag
+        self.seen = {}
+        self._stop = threading.Event()
+
+    def close(self):
+        self._stop.set()
+
+    def __iter__(self):
+        while not self._stop.is_set():
+            frames = self.loader.load_frames(self.tickers, period='1d', interval=self.interval)
+            now = time.time_ns()
+            batch = []
+            for ticker, df in frames.items():
+                if df is None or df.empty:
+                    continue
+                stamps = _utc_ns(df.index)
+                values = df[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(dtype=np.float64)
+                complete = (stamps + self.seconds * 10 ** 9 <= now) & \
+                    (stamps > self.seen.get(ticker, -1)) & ~np.isnan(values).any(axis=1)
+                for ts, row in zip(stamps[complete].tolist(), values[complete].tolist()):
+                    batch.append((ts, ticker, row))
+                if complete.any():
+                    self.seen[ticker] = int(stamps[complete][-1])
+            received = time.perf_counter()
+            for ts, ticker, row in sorted(batch):
+                yield ticker, ts, dict(zip(('Open', 'High', 'Low', 'Close', 'Volume'), row)), received
+            wait = self.seconds - (time.time() % self.seconds) + self.lag
+            self._stop.wait(wait)
+
+
+# -------------------- KOŞULLAR --------------------
+def momentum_signals(prev, cur):
+    """AGRESİF kuralları (kural, puan, gerekçe) listesi; DualStrategyScreener ile aynı"""
+    signals = []
+    volume_ratio = cur.get('volume_ratio', np.nan)
+    if volume_ratio >= VOLUME_SPIKE:
+        signals.append(('hacim', 4, f"Hacim Artışı: %{round(volume_ratio * 100)} (Katalizör Sinyali)"))
+    if prev.get('macd', np.nan) < prev.get('signal', np.nan) and cur['macd'] > cur['signal']:
+        signals.append(('macd', 3, "MACD Hattı, Sinyal Hattını Yukarı Kesti (Momentum Sinyali)"))
+    rsi_prev, rsi_current = prev.get('rsi', np.nan), cur['rsi']
+    if RSI_TURN_BAND[0] <= rsi_prev <= RSI_TURN_BAND[1] and rsi_current > rsi_prev:
+        signals.append(('rsi', 3, f"RSI(7) {round(rsi_prev)}-{round(rsi_current)} aralığından "
+                                  f"yukarı döndü (Tepki Sinyali)"))
+    return signals
+
+
+def supertrend_signals(prev, cur, max_pullback_atr=MAX_PULLBACK_ATR):
+    """SuperTrend dönüşleri ve geri çekilme bölgesine giriş (evaluate_entry koşulları)"""
+    def in_zone(v):
+        return v.get('direction') == 1 and v['close'] > v['supertrend'] and \
+            v['close'] - v['supertrend'] <= max_pullback_atr * v['atr']
+
+    signals = []
+    if prev.get('direction') == -1 and cur['direction'] == 1:
+        signals.append(('st_yukari', 3, f"SuperTrend yukarı döndü ({cur['supertrend']:.2f})"))
+    elif prev.get('direction') == 1 and cur['direction'] == -1:
+        signals.append(('st_asagi', 0, f"SuperTrend aşağı döndü ({cur['supertrend']:.2f}, çıkış)"))
+    if in_zone(cur) and not in_zone(prev):
+        signals.append(('st_pullback', 2, f"SuperTrend geri çekilme bölgesi "
+                                          f"({(cur['close'] - cur['supertrend']) / cur['atr']:.1f} ATR)"))
+    return signals
+
+
+# -------------------- TARAYICI --------------------
+class StreamScanner:
+    """
+    Sembol başına yuvarlanan indikatör durumu; on_bar her bar kapanışında
+    koşulları değerlendirir ve tetiklenen uyarıları on_alert'e verir.
+    """
+
+    def __init__(self, on_alert=None, params=None, warmup=WARMUP_BARS,
+                 cooldown=ALERT_COOLDOWN_BARS, max_pullback_atr=MAX_PULLBACK_ATR,
+                 latency=None, tz='UTC'):
+        self.on_alert = on_alert
+        self.params = params or SuperTrendBundle.make_params(
+            SUPER_TREND_PERIOD, SUPER_TREND_MULT, ATR_PERIOD)
+        self.warmup = max(warmup, 3)
+        self.cooldown = cooldown
+        self.max_pullback_atr = max_pullback_atr
+        self.latency = latency if latency is not None else metrics.LatencySample()
+        self.tz = tz
+        self.momentum = {}      # sembol -> MomentumBundle
+        self.trend = {}         # sembol -> SuperTrendBundle
+        self.last_ts = {}       # sembol -> son uygulanan bar (UTC ns)
+        self.seq = {}           # sembol -> uygulanan bar sayısı
+        self.pending = {}       # sembol -> ısınma barları [(ts, bar)]
+        self.last_alert = {}    # (sembol, kural) -> seq
+        self.bars = 0
+        self.alerts = 0
+        self.stale = 0
+        self.started = time.perf_counter()
+
+    def __len__(self):
+        return len(self.momentum)
+
+    # --- kurulum ---
+    def seed(self, frames):
+        """
+        Geçmiş çerçevelerden durumları tek vektörel geçişte kurar; geçmişi
+        kısa olanlar ısınma kuyruğuna alınır. Kurulan sembol sayısını döndürür.
+        """
+        ready = []
+        for ticker, df in frames.items():
+            if df is None or df.empty:
+                continue
+            df = df.dropna(subset=['Close'])
+            if len(df) >= self.warmup:
+                ready.append(ticker)
+            else:
+                stamps = _utc_ns(df.index).tolist()
+                self.pending[ticker] = list(zip(stamps, df[['Open', 'High', 'Low', 'Close', 'Volume']]
+                                                .to_dict('records')))
+            if getattr(df.index, 'tz', None) is not None:
+                self.tz = df.index.tz
+        if not ready:
+            return 0
+
+        frames = {t: frames[t].dropna(subset=['Close']) for t in ready}
+        engine = IndicatorEngine(frames, ready)
+        _, signal_line = engine.macd(12, 26, 9)
+        ema12, ema26 = engine.ema(12), engine.ema(26)
+        panels = stack_frames(frames, engine.tickers, ('High', 'Low', 'Close'))
+        st = supertrend(panels['High'], panels['Low'], panels['Close'], **self.params)
+        for j, ticker in enumerate(engine.tickers):
+            frame = frames[ticker]
+            momentum = MomentumBundle.seed(frame, ema12[-2, j], ema26[-2, j], signal_line[-2, j])
+            trend = SuperTrendBundle.seed(frame, st, j, self.params)
+            # Paketler sondan bir önceki bara kadar kurulur; son bar da uygulanır
+            last = frame.iloc[-1].to_dict()
+            momentum.prev, trend.prev = momentum.step(last), trend.step(last)
+            self.momentum[ticker], self.trend[ticker] = momentum, trend
+            self.last_ts[ticker] = int(_utc_ns(frame.index[-1:])[0])
+            self.seq[ticker] = 0
+            self.pending.pop(ticker, None)
+        return len(engine.tickers)
+
+    def _warm(self, ticker, ts, bar):
+        """Geçmişi olmayan sembolün barlarını biriktirir; yeterince olunca kurar"""
+        bars = self.pending.setdefault(ticker, [])
+        if bars and ts <= bars[-1][0]:
+            self.stale += 1
+            return
+        bars.append((ts, bar))
+        if len(bars) >= self.warmup:
+            index = pd.DatetimeIndex(np.array([t for t, _ in bars], dtype='datetime64[ns]'))
+            frame = pd.DataFrame([b for _, b in bars], index=index.tz_localize('UTC'))
+            self.seed({ticker: frame})
+
+    # --- sıcak yol ---
+    def on_bar(self, ticker, ts, bar, received=None):
+        """Tek bar kapanışı; tetiklenen uyarıları döndürür"""
+        received = time.perf_counter() if received is None else received
+        self.bars += 1
+        momentum = self.momentum.get(ticker)
+        if momentum is None:
+            self._warm(ticker, ts, bar)
+            return []
+        if ts <= self.last_ts[ticker]:
+            self.stale += 1   # Tekrarlanan ya da sırası bozuk bar
+            return []
+
+        trend = self.trend[ticker]
+        prev_momentum, prev_trend = momentum.prev, trend.prev
+        momentum.prev, trend.prev = momentum.step(bar), trend.step(bar)
+        self.last_ts[ticker] = ts
+        seq = self.seq[ticker] = self.seq[ticker] + 1
+
+        signals = momentum_signals(prev_momentum, momentum.prev) + \
+            supertrend_signals(prev_trend, trend.prev, self.max_pullback_atr)
+        fresh = []
+        for rule, score, reason in signals:
+            key = (ticker, rule)
+            last = self.last_alert.get(key)
+            if last is not None and seq - last <= self.cooldown:
+                continue
+            self.last_alert[key] = seq
+            fresh.append((rule, score, reason))
+
+        alerts = []
+        if fresh:
+            alert = {'ticker': ticker, 'time': ts, 'close': bar['Close'],
+                     'score': sum(score for _, score, _ in fresh),
+                     'rules': [rule for rule, _, _ in fresh],
+                     'reasons': [reason for _, _, reason in fresh]}
+            if 'st_pullback' in alert['rules'] or 'st_yukari' in alert['rules']:
+                alert['stop'] = trend.prev['supertrend']
+            alerts.append(alert)
+            self.alerts += 1
+            if self.on_alert is not None:
+                self.on_alert(alert)
+        self.latency.observe(time.perf_counter() - received)
+        return alerts
+
+    def run(self, feed, max_bars=None, report_every=REPORT_EVERY):
+        """Akış bitene (ya da max_bars bara) kadar barları işler"""
+        next_report = time.perf_counter() + report_every
+        processed = 0
+        try:
+            for ticker, ts, bar, received in feed:
+                self.on_bar(ticker, ts, bar, received)
+                processed += 1
+                if max_bars is not None and processed >= max_bars:
+                    break
+                if received > next_report:
+                    logging.info(self.status_line())
+                    next_report = received + report_every
+        finally:
+            feed.close()
+        return processed
+
+    # --- rapor ---
+    def status_line(self):
+        elapsed = time.perf_counter() - self.started
+        q = {p: v * 1000 for p, v in self.latency.quantiles((0.5, 0.99, 0.999)).items()}
+        text = (f"📡 {len(self.momentum)} sembol, {self.bars} bar "
+                f"({self.bars / elapsed:.0f} bar/sn), {self.alerts} uyarı")
+        if q:
+            text += (f" | gecikme p50 {q[0.5]:.3f} ms, p99 {q[0.99]:.3f} ms, "
+                     f"p99.9 {q[0.999]:.3f} ms, maks {self.latency.max * 1000:.3f} ms")
+        return text
+
+
+# -------------------- UYARI GÖNDERİMİ --------------------
+def format_alert(alert, tz='UTC'):
+    """Telegram için kısa Markdown uyarısı"""
+    when = pd.Timestamp(alert['time'], tz='UTC').tz_convert(tz)
+    text = f"🚨 *{alert['ticker']}* {when:%d.%m %H:%M} | {alert['close']:.2f} | Skor {alert['score']}"
+    if 'stop' in alert:
+        text += f" | Stop {alert['stop']:.2f}"
+    return text + "".join(f"\n  • {reason}" for reason in alert['reasons'])
+
+
+class AlertDispatcher:
+    """
+    Uyarıları sıcak yoldan ayırır: __call__ yalnızca kuyruğa koyar; arka
+    plan iş parçacığı en fazla flush_interval sn'de bir toplayıp tek mesaj
+    olarak gönderir (delivery yoksa log'a yazar).
+    """
+    _END = object()
+
+    def __init__(self, delivery=None, flush_interval=FLUSH_INTERVAL, tz='UTC'):
+        self.delivery = delivery
+        self.flush_interval = flush_interval
+        self.tz = tz
+        self.queue = queue.Queue()
+        self.sent = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __call__(self, alert):
+        self.queue.put_nowait(alert)
+
+    def _run(self):
+        done = False
+        while not done:
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + self.flush_interval
+            while batch[-1] is not self._END:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch[-1] is self._END:
+                batch.pop()
+                done = True
+            if batch:
+                self._send(batch)
+
+    def _send(self, alerts):
+        text = "\n\n".join(format_alert(a, self.tz) for a in alerts)
+        if self.delivery is None:
+            logging.info(text)
+            self.sent += len(alerts)
+            return
+        try:
+            report = self.delivery.send(text)
+        except Exception as e:
+            logging.error(f"Uyarı gönderilemedi: {e}")
+            self.failed += len(alerts)
+            return
+        if report.ok:
+            self.sent += len(alerts)
+        else:
+            logging.error(report.summary())
+            self.failed += len(alerts)
+
+    def close(self):
+        """Kuyruktaki uyarıları gönderip iş parçacığını bitirir"""
+        self.queue.put(self._END)
+        self._thread.join()
+
+
+# -------------------- KOMUT SATIRI --------------------
+def _finish(scanner, run):
+    """Gecikme/uyarı metriklerini çalıştırmaya aktarır ve yazar"""
+    run.count('stream_bars', '', scanner.bars)
+    run.count('stream_alerts', '', scanner.alerts)
+    run.count('stream_stale_bars', '', scanner.stale)
+    run.write()
+    print(scanner.status_line())
+    print("Gecikme (ms): " + ", ".join(f"{k} {v}" for k, v in scanner.latency.to_dict(1000).items()
+                                       if k not in ('count',)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gün içi akış taraması')
+    sub = parser.add_subparsers(dest='command', required=True)
+    replay = sub.add_parser('replay', help='Sentetik barları yeniden oynatır')
+    replay.add_argument('--tickers', type=int, default=1000)
+    replay.add_argument('--bars', type=int, default=400, help='Sembol başına toplam bar')
+    replay.add_argument('--history', type=int, default=200, help='Seed için kullanılan bar')
+    replay.add_argument('--speed', type=float, default=0, help='Gerçek zaman katı (0: beklemesiz)')
+    replay.add_argument('--seed', type=int, default=0)
+    live = sub.add_parser('live', help='Sağlayıcıyı her bar kapanışında yoklar')
+    live.add_argument('tickers', nargs='+')
+    for p in (replay, live):
+        p.add_argument('--interval', default=DEFAULT_INTERVAL, choices=sorted(INTERVAL_SECONDS))
+        p.add_argument('--telegram', action='store_true', help='Uyarıları Telegram ile gönderir')
+    args = parser.parse_args(argv)
+
+    delivery = None
+    if args.telegram:
+        from telegram_delivery import get_default_delivery
+        delivery = get_default_delivery()
+    run = metrics.start_run('intraday', interval=args.interval, mode=args.command)
+
+    if args.command == 'replay':
+        from synthetic_data import intraday_frames
+
+        frames = intraday_frames(args.tickers, args.bars, args.interval, seed=args.seed)
+        history = {t: df.iloc[:args.history] for t, df in frames.items()}
+        start = next(iter(frames.values())).index[args.history]
+        feed = ReplayFeed(frames, start=start, speed=args.speed or None)
+    else:
+        from data_provider import get_default_loader
+
+        loader = get_default_loader()
+        history = loader.load_frames(args.tickers, period='5d', interval=args.interval)
+        feed = PollingFeed(loader, args.tickers, args.interval)
+        for ticker, df in history.items():
+            if not df.empty:   # Son (yarım olabilecek) bar akıştan gelir
+                history[ticker] = df.iloc[:-1]
+                feed.seen[ticker] = int(_utc_ns(df.index[-2:-1])[0]) if len(df) > 1 else -1
+
+    dispatcher = AlertDispatcher(delivery)
+    scanner = StreamScanner(on_alert=dispatcher, latency=run.sample('stream_bar_latency_seconds'))
+    with run.stage('seed', tickers_in=len(history)) as stage:
+        stage.tickers_out = scanner.seed(history)
+    dispatcher.tz = scanner.tz
+    print(f"📡 {len(scanner)} sembol kuruldu, akış başlıyor ({args.interval})")
+    try:
+        with run.stage('stream', tickers_in=len(scanner)):
+            scanner.run(feed)
+    except KeyboardInterrupt:
+        print("⏹ Akış durduruldu")
+    finally:
+        dispatcher.close()
+        _finish(scanner, run)
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -1,270 +1,135 @@
-import yfinance as yf
-import pandas as pd
-import numpy as np
-import requests
-from datetime import datetime, date
 import logging
-from import yfinance as yf
-import pandas as pd
+import os
+import sys
+import warnings
+
 import numpy as np
-import requests # Yeni eklenen kütüphane
 
-# --- TELEGRAM SABİTLERİ (Lütfen Kendi Bilgilerinizle Değiştirin) ---
-# Botunuzdan aldığınız token. (Örn: '123456789:ABC-DEF123456...')
-TELEGRAM_TOKEN = "YOUR_TELEGRAM_BOT_TOKEN" 
-# Mesajı göndermek istediğiniz chat ID'si. (Örn: '-1001234567890' veya '@kullanici_adiniz')
-CHAT_ID = "YOUR_CHAT_ID" 
-# -------------------------------------------------------------------
+import data_quality
+import metrics
+from bar_store import _utc_ns
+from cassette import find_cassette
+from data_provider import clock_now, get_default_loader
+from fundamentals_store import DAY, get_default_store
+from indicators import stack_frames, supertrend
+from indicator_state import SuperTrendBundle, get_default_state_store
+from market_calendar import final_bars
+from prefilter import prefilter
+from result_cache import MISSING, get_default_result_cache, params_digest
+from portfolio import RiskModel, portfolio_risk, select_portfolio
+from position_ledger import DEFAULT_EXPORT_FILE, check_exit, get_default_ledger
+from scan_pipeline import ScanPipeline, TopCandidates
+from scan_settings import (ATR_PERIOD, MAX_PULLBACK_ATR, PREFILTER_MAX_AGE_DAYS,
+                           PREFILTER_MIN_DAILY_VOLUME, QUALITY_LIMITS, SUPER_TREND_MULT,
+                           SUPER_TREND_PERIOD, TARGET_R_MULTIPLE)
+from strategies import (AGRESİF_PİYASA_DEĞERİ_MAKS, DENGELİ_PİYASA_DEĞERİ_MİN, StrategyRunner,
+                        registered_strategies)
+from telegram_delivery import get_default_delivery
+warnings.filterwarnings('ignore')
+
+# -------------------- AYARLAR --------------------
+# Telegram: TELEGRAM_TOKEN ve CHAT_ID ortam değişkenleri bu değerlerin önündedir
+# (Örn: '123456789:ABC-DEF123456...' ve '-1001234567890' veya '@kullanici_adiniz')
+TELEGRAM_TOKEN = "YOUR_TELEGRAM_TOKEN"
+CHAT_ID = "YOUR_CHAT_ID"
+
+# Trading Ayarları
+PORTFOLIO_SIZE = 50_000  # USD (Colab için daha küçük)
+RISK_PER_TRADE = 0.01    # %1 risk
+MAX_POSITIONS = 3        # Colab için daha az pozisyon
+# SuperTrend, hacim, ön filtre ve veri kalitesi eşikleri scan_settings.py'de
+# (strategies.SuperTrendStrategy ile paylaşılır)
+
+# Portföy Kurulumu (portfolio.py)
+CANDIDATE_POOL = 20            # Korelasyonlu seçime giren en iyi aday sayısı
+MAX_CORRELATION = 0.7          # Seçilen iki hissenin haftalık getiri korelasyonu üst sınırı
+PORTFOLIO_RISK_BUDGET = 0.02   # Stop'ların birlikte tetiklenme riski (korelasyonlu, portföy oranı)
+RETURN_LOOKBACK = 52           # Kovaryans için haftalık getiri sayısı
+
+# Veri Çekme Ayarları (tam evren taramaları için)
+FETCH_CONCURRENCY = 8    # Aynı anda açık istek
+FETCH_RATE = 4.0         # Saniyedeki istek (token bucket)
+FETCH_RETRIES = 4        # Geçici hatalarda (429/5xx/zaman aşımı) yeniden deneme
+FETCH_TIMEOUT = 30       # İstek başına saniye
+SCAN_WORKERS = None      # Analiz süreç sayısı (None: çekirdek sayısı - 1, 1: süreç havuzu yok)
+
+# Strateji parametreleri, ön filtre kuralları ve veri ihtiyaçları strategies.py'deki eklentilerde
+# Bellek bütçesi (MB): verilirse evren bütçeye sığan parçalar halinde taranır
+MEMORY_BUDGET_MB = float(os.environ.get('BIST_MEMORY_BUDGET_MB') or 0) or None
 
-# Finansal sabitler ve parametreler
-AGRESİF_PİYASA_DEĞERİ_MAKS = 500_000_000 # $500 Milyon
-DENGELİ_PİYASA_DEĞERİ_MİN = 10_000_000_000 # $10 Milyar
+# Strateji taraması (screen) için örnek ABD hisse senetleri listesi
+SAMPLE_TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'TSLA', 'SPY', 'LUMN', 'PLTR', 'GME']
 
-class DualStrategyScreener:
+
+class DualStrategyScreener(StrategyRunner):
     """
     Belirtilen 'AGRESİF' ve 'DENGELİ' stratejilere göre ABD borsası 
     için hisse taraması ve öneri sunan modüler sınıf. Telegram entegrasyonu eklenmiştir.
+    strategy bir strateji adı ya da ad listesidir; liste verilirse tüm
+    stratejiler tek veri geçişinde değerlendirilir ve rapor birleşiktir.
     """
-    def __init__(self, tickers, strategy, telegram_token, chat_id):
-        self.tickers = tickers
-        self.strategy = strategy.upper()
-        self.raw_data = {}
-        self.fundamentals = {}
-        self.analysis_results = pd.DataFrame()
+    def __init__(self, tickers, strategy, telegram_token, chat_id, loader=None, store=None,
+                 state_store=None, memory_budget_mb=None, result_cache=None):
+        names = [strategy] if isinstance(strategy, str) else list(strategy)
+        super().__init__(tickers, names, loader=loader, store=store, state_store=state_store,
+                         memory_budget_mb=memory_budget_mb or MEMORY_BUDGET_MB,
+                         result_cache=result_cache)
+        self.strategy = ", ".join(s.name for s in self.strategies)
         self.telegram_token = telegram_token
         self.chat_id = chat_id
-
-        if self.strategy not in ['AGRESİF', 'DENGELİ']:
-            raise ValueError("Strateji 'AGRESİF' veya 'DENGELİ' olmalıdır.")
         
         print(f"✅ Strateji Seçildi: **{self.strategy}**")
-        
+
+    # Aşamalar (strategies.StrategyRunner): tek stratejide eski adlarıyla
+    @property
+    def raw_data(self):
+        return self._frames(self.strategies[0]) if self.stores else {}
+
+    @property
+    def analysis_results(self):
+        return self.results[self.strategies[0].name]
+
+    @analysis_results.setter
+    def analysis_results(self, results):
+        self.results[self.strategies[0].name] = results
+
+    # --- 0. Ön Filtre Modülü (Pre-filter Module) ---
+    def prefilter_universe(self):
+        """Fiyat geçmişi indirilmeden önce temel veri anlık görüntüsüne kuralları uygular"""
+        self.prefilter()
+
     # --- 1. Veri Çekme Modülü (Data Retrieval Module) ---
-    # (Önceki kod ile aynı)
     def fetch_data(self):
-        """
-        yfinance kullanarak fiyat/hacim ve temel verileri çeker.
-        """
-        print("⏳ Veri Çekme Başlatılıyor...")
-        
-        if self.strategy == 'AGRESİF':
-            period = '30d' 
-        else:
-            period = '1y' 
-
-        for ticker in self.tickers:
-            try:
-                hist = yf.download(ticker, period=period, interval='1d', progress=False)
-                info = yf.Ticker(ticker).info
-                
-                if not hist.empty and info:
-                    self.raw_data[ticker] = hist
-                    self.fundamentals[ticker] = info
-                else:
-                    print(f"⚠️ {ticker} için veri bulunamadı veya eksik.")
-                    
-            except Exception as e:
-                print(f"❌ {ticker} veri çekme hatası: {e}")
-        
-        print(f"✅ {len(self.raw_data)} hisse için veri çekimi tamamlandı.")
-        
+        """Fiyat/hacim (aralık başına tek istek) ve temel verileri çeker"""
+        self.fetch()
+
     # --- 2. Filtreleme Modülü (Filtering Module) ---
-    # (Önceki kod ile aynı)
     def filter_by_market_cap_and_fundamentals(self):
-        """
-        Seçilen stratejiye göre piyasa değeri ve temel kriterlere göre filtreleme yapar.
-        """
-        print("⏳ Hisse Listesi Filtreleme Başlatılıyor...")
-        
-        filtered_tickers = []
-        
-        for ticker, info in self.fundamentals.items():
-            market_cap = info.get('marketCap')
-            
-            if market_cap is None:
-                continue
-
-            if self.strategy == 'AGRESİF':
-                if market_cap <= AGRESİF_PİYASA_DEĞERİ_MAKS:
-                    filtered_tickers.append(ticker)
-                    
-            elif self.strategy == 'DENGELİ':
-                if market_cap >= DENGELİ_PİYASA_DEĞERİ_MİN:
-                    revenue_growth = info.get('revenueGrowth', 0.0) 
-                    if revenue_growth > 0.10: 
-                        filtered_tickers.append(ticker)
-                        
-        print(f"✅ {len(filtered_tickers)} hisse filtrelemeden geçti.")
-        self.tickers = filtered_tickers
-        
+        """Stratejilerin piyasa değeri ve temel kriterlerine göre filtreleme yapar"""
+        self.filter()
+
     # --- 3. Analiz Modülü (Analysis Module) ---
-    # (Önceki kod ile aynı, MACD ve RSI hesaplama dahil)
     def calculate_indicators_and_score(self):
-        """
-        Her hisse için teknik/temel indikatörleri hesaplar ve skor verir.
-        """
-        print("⏳ Teknik ve Temel Analizler Başlatılıyor...")
-        
-        results = []
-        
-        for ticker in self.tickers:
-            data = self.raw_data.get(ticker)
-            info = self.fundamentals.get(ticker)
-            
-            if data is None or info is None:
-                continue
-            
-            score = 0
-            justification = []
-            
-            if self.strategy == 'AGRESİF':
-                # --------------------- AGRESİF KRİTERLER ---------------------
-                
-                # 1. Hacim Artışı
-                avg_volume_20d = data['Volume'].iloc[-21:-1].mean()
-                current_volume = data['Volume'].iloc[-1]
-                volume_ratio = current_volume / avg_volume_20d
-                
-                if volume_ratio >= 3.0:
-                    score += 4
-                    justification.append(f"Hacim Artışı: %{round(volume_ratio * 100)} (Katalizör Sinyali)")
-                    
-                # 2. MACD Al Sinyali
-                data['EMA12'] = data['Close'].ewm(span=12, adjust=False).mean()
-                data['EMA26'] = data['Close'].ewm(span=26, adjust=False).mean()
-                data['MACD'] = data['EMA12'] - data['EMA26']
-                data['Signal_Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
-
-                if (data['MACD'].iloc[-2] < data['Signal_Line'].iloc[-2]) and \
-                   (data['MACD'].iloc[-1] > data['Signal_Line'].iloc[-1]):
-                    score += 3
-                    justification.append("MACD Hattı, Sinyal Hattını Yukarı Kesti (Momentum Sinyali)")
-
-                # 3. RSI (7 Günlük) Geri Dönüş
-                data['RSI_7'] = self._calculate_rsi(data['Close'], window=7)
-                rsi_prev = data['RSI_7'].iloc[-2]
-                rsi_current = data['RSI_7'].iloc[-1]
-                
-                if (30 <= rsi_prev <= 40) and (rsi_current > rsi_prev):
-                    score += 3
-                    justification.append(f"RSI(7) {round(rsi_prev)}-{round(rsi_current)} aralığından yukarı döndü (Tepki Sinyali)")
-                    
-            elif self.strategy == 'DENGELİ':
-                # --------------------- DENGELİ KRİTERLER ---------------------
-                
-                # 1. Gelir/Kâr Büyümesi
-                revenue_growth = info.get('revenueGrowth', 0.0) 
-                if revenue_growth > 0.10:
-                    score += 3
-                    justification.append(f"Yıllık Gelir Büyümesi: %{round(revenue_growth * 100)} > %10")
-                    
-                # 2. Debt/Equity
-                debt_to_equity = info.get('debtToEquity')
-                if debt_to_equity is not None and debt_to_equity < 0.5:
-                    score += 2
-                    justification.append(f"D/E Oranı: {round(debt_to_equity, 2)} (Düşük Borçluluk)")
-                    
-                # 3. ROE/ROI
-                return_on_equity = info.get('returnOnEquity')
-                if return_on_equity is not None and return_on_equity > 0.15:
-                    score += 2
-                    justification.append(f"ROE: %{round(return_on_equity * 100)} (Yüksek Karlılık)")
-                
-                # 4. 200 Günlük MA
-                data['MA_200'] = data['Close'].rolling(window=200).mean()
-                
-                if data['Close'].iloc[-1] > data['MA_200'].iloc[-1]:
-                    score += 3
-                    justification.append("Fiyat, 200 Günlük Ortalamanın Üzerinde (Uzun Vadeli Trend)")
-
-                # 5. RSI (14 Günlük) Sağlıklı Trend
-                data['RSI_14'] = self._calculate_rsi(data['Close'], window=14)
-                rsi_current = data['RSI_14'].iloc[-1]
-                
-                if 40 <= rsi_current <= 65:
-                    score += 2
-                    justification.append(f"RSI(14): {round(rsi_current, 1)} (Sağlıklı Trend)")
-
-            entry_price = data['Close'].iloc[-1]
-            
-            results.append({
-                'Hisse': ticker,
-                'Skor': score,
-                'Gerekçe': " | ".join(justification),
-                'Son Kapanış': entry_price,
-                'RSI_Son': data.get('RSI_7', data.get('RSI_14', np.nan)).iloc[-1]
-            })
-
-        self.analysis_results = pd.DataFrame(results)
-        self.analysis_results = self.analysis_results[self.analysis_results['Skor'] > 0]
-        
-        if self.analysis_results.empty:
-            print("❌ Analiz kriterlerine uyan hisse bulunamadı.")
-            return
-
-        print(f"✅ Analiz tamamlandı. {len(self.analysis_results)} hisse skor aldı.")
-
-    # RSI Hesaplama Yardımcı Fonksiyonu
-    def _calculate_rsi(self, series, window):
-        diff = series.diff(1).dropna()
-        gain = (diff.where(diff > 0, 0)).rolling(window=window).mean()
-        loss = (-diff.where(diff < 0, 0)).rolling(window=window).mean()
-        RS = gain / loss
-        return 100 - (100 / (1 + RS))
-    
+        """İndikatörleri (paylaşılan motorda) hesaplar ve kurallarla skor verir"""
+        self.score()
+
     # --- 4. Risk Yönetimi Modülü (Risk Management Module) ---
-    # (Önceki kod ile aynı)
     def calculate_risk_levels(self):
-        """
-        Giriş fiyatına göre Stop-Loss ve Hedef Fiyat seviyelerini hesaplar.
-        """
-        if self.analysis_results.empty:
-            return
-
+        """Giriş fiyatına göre Stop-Loss ve Hedef Fiyat seviyelerini hesaplar"""
         print("⏳ Risk Yönetimi Seviyeleri Hesaplanıyor...")
-        
-        if self.strategy == 'AGRESİF':
-            stop_loss_pct = 0.05
-            target_pct = 0.15
-        else:
-            stop_loss_pct = 0.10
-            target_pct = 0.30 
-            
-        self.analysis_results['Stop-Loss (%)'] = -stop_loss_pct * 100
-        self.analysis_results['Hedef Fiyat (%)'] = target_pct * 100
-        
-        self.analysis_results['Stop-Loss Fiyatı'] = \
-            self.analysis_results['Son Kapanış'] * (1 - stop_loss_pct)
-            
-        self.analysis_results['Hedef Fiyatı'] = \
-            self.analysis_results['Son Kapanış'] * (1 + target_pct)
-
-        cols_to_round = ['Son Kapanış', 'Stop-Loss Fiyatı', 'Hedef Fiyatı', 'RSI_Son']
-        self.analysis_results[cols_to_round] = self.analysis_results[cols_to_round].round(2)
-        
+        self.risk()
         print("✅ Risk seviyeleri hesaplandı.")
 
     # --- 5. Raporlama Modülü (Reporting Module) ---
-    # (Önceki kod ile aynı)
     def generate_report(self, top_n=5):
-        """
-        En yüksek skorlu hisseleri içeren temiz bir DataFrame döndürür.
-        """
-        if self.analysis_results.empty:
-            return "Analiz kriterlerine uyan hisse bulunamadı.", None
-        
-        report = self.analysis_results.sort_values(by='Skor', ascending=False).head(top_n)
-        
-        final_report = report[['Hisse', 'Skor', 'Gerekçe', 'Son Kapanış', 'Stop-Loss Fiyatı', 'Hedef Fiyatı', 'Stop-Loss (%)', 'Hedef Fiyat (%)']]
-        
-        title = f"🌟 En İyi {top_n} Hisse Önerisi ({self.strategy} Stratejisi)"
-        
-        return title, final_report
+        """En yüksek skorlu hisseleri içeren temiz bir DataFrame döndürür"""
+        return self.report(top_n)
         
     # --- 6. Telegram Raporlama Modülü (Telegram Reporting Module) ---
-    def send_telegram_message(self, title, report_df):
+    def send_telegram_message(self, title, report_df, footer=None):
         """
         Analiz sonuçlarını Telegram'a Markdown formatında gönderir.
+        footer verilirse (ör. çalıştırma metrikleri özeti) mesajın sonuna eklenir.
         """
         if report_df is None or report_df.empty:
             message = f"🚨 {title}\nAnaliz kriterlerine uyan hisse bulunamadı."
@@ -274,101 +139,60 @@ class DualStrategyScreener:
             
             message = (
                 f"**{title}**\n\n"
-                f"Tarih: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')}\n\n"
+                f"Tarih: {clock_now().strftime('%Y-%m-%d %H:%M')}\n\n"
                 f"```{table_markdown}```\n\n"
                 f"*Not: Fiyatlar $USD cinsindendir. Sadece eğitim amaçlıdır.*"
             )
+        if footer:
+            message += f"\n\n{footer}"
 
-        url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-        payload = {
-            'chat_id': self.chat_id,
-            'text': message,
-            'parse_mode': 'Markdown'
-        }
-        
-        try:
-            response = requests.post(url, data=payload)
-            response.raise_for_status() # HTTP hatalarını yakala
+        # Ortak gönderici: havuzlu oturum, 4096 karakter bölme, 429/5xx yeniden deneme
+        report = get_default_delivery(self.telegram_token, self.chat_id).send(message)
+        if report.ok:
             print("✅ Telegram mesajı başarıyla gönderildi.")
-        except requests.exceptions.HTTPError as err:
-            print(f"❌ Telegram API Hatası: {err}")
+        else:
+            print(f"❌ {report.summary()}")
             print("Lütfen TELEGRAM_TOKEN ve CHAT_ID ayarlarınızı kontrol edin.")
-        except Exception as e:
-            print(f"❌ Telegram Gönderme Hatası: {e}")
 
     # Ana Çalıştırıcı Fonksiyon (Güncellendi)
     def run_screener(self):
-        """Tüm modülleri sırayla çalıştırır ve Telegram'a rapor gönderir."""
-        self.fetch_data()
-        self.filter_by_market_cap_and_fundamentals()
-        self.calculate_indicators_and_score()
-        self.calculate_risk_levels()
-        
-        title, report_df = self.generate_report()
+        """Tüm modülleri tek veri geçişinde çalıştırır ve Telegram'a rapor gönderir."""
+        # Her aşama ölçülür (süre, CPU, bellek, giren/çıkan hisse; metrics.py)
+        if len(self.strategies) == 1:
+            name = f"screener_{self.strategy.replace('İ', 'I').lower()}"
+        else:
+            name = 'screener'
+        run = metrics.start_run(name, strategy=self.strategy)
+        title, report_df = self.run(run)
         
         # Telegram'a rapor gönderme adımı
-        self.send_telegram_message(title, report_df)
+        self.send_telegram_message(title, report_df, footer=run.summary_line())
+        for path in run.write():
+            print(f"📊 Metrikler kaydedildi: {path}")
         
         return title, report_df
 
-# --- Programı Çalıştırma Örneği ---
-if __name__ == '__main__':
-    # Örnek ABD Hisse Senetleri Listesi
-    SAMPLE_TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'TSLA', 'SPY', 'LUMN', 'PLTR', 'GME'] 
-
-    # UYARI: Botunuzun token'ını ve chat ID'nizi buraya girmeyi unutmayın!
-    # Aksi takdirde, Telegram gönderme kısmı hata verecektir.
-    
-    # --- AGRESİF STRATEJİ Testi ---
+# -------------------- STRATEJİ TARAMASI --------------------
+def run_strategy_screen(tickers=SAMPLE_TICKERS, strategies=None):
+    """Kayıtlı tüm stratejiler (ya da verilenler) tek veri geçişinde"""
     print("\n" + "="*50)
-    print(">>> AGRESİF STRATEJİ TARAMASI BAŞLATILIYOR <<<")
+    print(">>> STRATEJİ TARAMASI BAŞLATILIYOR <<<")
     print("="*50)
     
-    screener_aggressive = DualStrategyScreener(
-        tickers=SAMPLE_TICKERS, 
-        strategy='AGRESİF',
+    screener = DualStrategyScreener(
+        tickers=tickers, 
+        strategy=strategies or registered_strategies(),
         telegram_token=TELEGRAM_TOKEN,
         chat_id=CHAT_ID
     )
-    title_agressive, report_agressive = screener_aggressive.run_screener()
+    title, report_df = screener.run_screener()
     
-    if report_agressive is not None:
-        print("\n" + title_agressive)
-        print("-" * len(title_agressive))
-        print(report_agressive.to_markdown(index=False))
-
-    # --- DENGELİ STRATEJİ Testi ---
-    print("\n" + "="*50)
-    print(">>> DENGELİ STRATEJİ TARAMASI BAŞLATILIYOR <<<")
-    print("="*50)
-
-    screener_balanced = DualStrategyScreener(
-        tickers=SAMPLE_TICKERS, 
-        strategy='DENGELİ',
-        telegram_token=TELEGRAM_TOKEN,
-        chat_id=CHAT_ID
-    )
-    title_balanced, report_balanced = screener_balanced.run_screener()
-    
-    if report_balanced is not None:
-        print("\n" + title_balanced)
-        print("-" * len(title_balanced))
-        print(report_balanced.to_markdown(index=False)).futures import ThreadPoolExecutor, as_completed
-import warnings
-warnings.filterwarnings('ignore')
+    if report_df is not None:
+        print("\n" + title)
+        print("-" * len(title))
+        print(report_df.to_markdown(index=False))
+    return title, report_df
 
-# -------------------- AYARLAR --------------------
-TELEGRAM_TOKEN = "YOUR_TELEGRAM_TOKEN"  # Colab'da environment variable yerine direkt
-CHAT_ID = "YOUR_CHAT_ID"
-
-# Trading Ayarları
-PORTFOLIO_SIZE = 50_000  # USD (Colab için daha küçük)
-RISK_PER_TRADE = 0.01    # %1 risk
-MAX_POSITIONS = 3        # Colab için daha az pozisyon
-SUPER_TREND_PERIOD = 10
-SUPER_TREND_MULT = 3.0
-ATR_PERIOD = 14
-MAX_PULLBACK_ATR = 2.0
 
 # -------------------- OPTIMIZE HİSSE LİSTESİ --------------------
 def get_optimized_tickers():
@@ -394,72 +218,31 @@ def get_optimized_tickers():
     return premium_tickers
 
 # -------------------- VERİ DOĞRULAMA --------------------
-def validate_data(df, symbol):
-    """Veri kalitesi kontrolü"""
-    if df is None or len(df) < 50:
-        logging.warning(f"{symbol}: Yetersiz veri")
-        return False
-    
-    # Volume kontrolü (en son 10 hafta ortalaması)
-    if 'Volume' in df.columns:
-        avg_volume = df['Volume'].tail(10).mean()
-        if avg_volume < 1000000:  # 1M hacim filtresi
-            logging.warning(f"{symbol}: Düşük hacim ({avg_volume:,.0f})")
-            return False
-    
-    # Eksik veri kontrolü
-    if df.isnull().any().any():
-        logging.warning(f"{symbol}: Eksik veri var")
-        return False
-    
-    # Son veri güncelliği
-    last_date = df.index[-1]
-    days_since_update = (datetime.now().date() - last_date.date()).days
-    if days_since_update > 14:
-        logging.warning(f"{symbol}: Güncel olmayan veri ({days_since_update} gün)")
-        return False
-    
-    return True
+def validate_universe(frames, interval='1wk'):
+    """
+    Veri kalitesi kontrolü (tüm parça tek vektörel geçişte, data_quality.py).
+    Geçerli hisseler için {sembol: çerçeve} döndürür; kısa boşluklar ve
+    hatalı tek bar sıçramaları onarılmış, diğerleri gelen çerçevenin kendisi.
+    """
+    return data_quality.validate(frames, interval, **QUALITY_LIMITS)
+
+def validate_data(df, symbol, interval='1wk'):
+    """Tek hisse için veri kalitesi kontrolü"""
+    return symbol in validate_universe({symbol: df}, interval)
 
 # -------------------- GELİŞMİŞ SUPER TREND --------------------
-def calculate_supertrend(df):
-    """SuperTrend + ATR + R-Score hesaplama"""
+def calculate_supertrend(df, period=SUPER_TREND_PERIOD, multiplier=SUPER_TREND_MULT,
+                         atr_period=ATR_PERIOD):
+    """SuperTrend + ATR + R-Score hesaplama (yerleşik NumPy çekirdeği)"""
     try:
-        # SuperTrend
-        st = ta.trend.SuperTrendIndicator(
-            high=df['High'], 
-            low=df['Low'], 
-            close=df['Close'],
-            period=SUPER_TREND_PERIOD,
-            multiplier=SUPER_TREND_MULT
-        )
-        df['SuperTrend'] = st.supertrend()
-        df['SuperTrend_Direction'] = st.supertrend_trend()
-        
-        # ATR
-        df['ATR'] = ta.volatility.AverageTrueRange(
-            high=df['High'], 
-            low=df['Low'], 
-            close=df['Close'], 
-            window=ATR_PERIOD
-        ).average_true_range()
-        
-        # R-Score geliştirilmiş
-        trend_strength = (df['SuperTrend_Direction'] == 1).rolling(10).mean().iloc[-1]
-        
-        # Pullback score: SuperTrend'a ne kadar yakın
-        current_price = df['Close'].iloc[-1]
-        current_st = df['SuperTrend'].iloc[-1]
-        distance_ratio = (current_price - current_st) / current_st
-        pullback_score = max(0, 1 - abs(distance_ratio) / 0.1)  # %10'den fazla uzaklaşmada düşük score
-        
-        # Momentum score
-        price_above_ma = (current_price > df['Close'].rolling(20).mean().iloc[-1])
-        momentum_score = 1 if price_above_ma else 0.3
+        values = df[['High', 'Low', 'Close']].to_numpy(dtype=np.float64)
+        st = supertrend(values[:, [0]], values[:, [1]], values[:, [2]],
+                        period=period, multiplier=multiplier, atr_period=atr_period)
         
-        df['R_Score'] = (trend_strength * 0.4 + 
-                        pullback_score * 0.4 + 
-                        momentum_score * 0.2)
+        df['SuperTrend'] = st.supertrend[:, 0]
+        df['SuperTrend_Direction'] = st.direction[:, 0]
+        df['ATR'] = st.atr[:, 0]
+        df['R_Score'] = st.r_score[:, 0]
         
         return df
         
@@ -467,78 +250,141 @@ def calculate_supertrend(df):
         logging.error(f"SuperTrend hesaplama hatası: {e}")
         return None
 
-# -------------------- PARALEL HİSSE ANALİZİ --------------------
-def analyze_single_stock(ticker):
-    """Tek hisse analizi - paralel işlem için"""
-    try:
-        # Haftalık veri çek (2 yıl yeterli)
-        df = yf.download(ticker, period="2y", interval="1wk", progress=False)
+# -------------------- ALIM KOŞULLARI --------------------
+def evaluate_entry(ticker, price, supertrend_value, direction, atr, r_score):
+    """Son bar değerleriyle alım koşullarını ve pozisyon büyüklüğünü değerlendirir"""
+    # 1. Yukarı trend
+    if direction != 1:
+        return None
         
-        if not validate_data(df, ticker):
-            return None
+    # 2. Fiyat SuperTrend üstünde
+    if not price > supertrend_value:
+        return None
         
-        # Teknik analiz
-        df = calculate_supertrend(df)
-        if df is None:
-            return None
-            
-        current = df.iloc[-1]
-        prev = df.iloc[-2]
+    # 3. Pullback kontrolü
+    pullback_distance = price - supertrend_value
+    if pullback_distance > (MAX_PULLBACK_ATR * atr):
+        return None
         
-        # ALIM KOŞULLARI
-        # 1. Yukarı trend
-        if current['SuperTrend_Direction'] != 1:
-            return None
-            
-        # 2. Fiyat SuperTrend üstünde
-        if current['Close'] <= current['SuperTrend']:
-            return None
-            
-        # 3. Pullback kontrolü
-        pullback_distance = current['Close'] - current['SuperTrend']
-        if pullback_distance > (MAX_PULLBACK_ATR * current['ATR']):
-            return None
-            
-        # 4. Stop loss ve risk hesaplama
-        stop_price = current['SuperTrend']
-        risk_per_share = current['Close'] - stop_price
+    # 4. Stop loss ve risk hesaplama
+    stop_price = supertrend_value
+    risk_per_share = price - stop_price
+    
+    if risk_per_share <= 0:
+        return None
         
-        if risk_per_share <= 0:
-            return None
-            
-        # Pozisyon büyüklüğü
-        max_risk_usd = PORTFOLIO_SIZE * RISK_PER_TRADE
-        shares = max_risk_usd / risk_per_share
-        shares = int(shares)  # Tam sayı hisse
+    # Pozisyon büyüklüğü
+    max_risk_usd = PORTFOLIO_SIZE * RISK_PER_TRADE
+    shares = max_risk_usd / risk_per_share
+    shares = int(shares)  # Tam sayı hisse
+    
+    if shares < 1:
+        return None
         
-        if shares < 1:
-            return None
-            
-        position_value = shares * current['Close']
-        actual_risk = shares * risk_per_share
+    position_value = shares * price
+    actual_risk = shares * risk_per_share
+    
+    return {
+        'ticker': ticker,
+        'price': price,
+        'stop': stop_price,
+        'target': price + TARGET_R_MULTIPLE * risk_per_share,
+        'shares': shares,
+        'position_value': position_value,
+        'actual_risk': actual_risk,
+        'r_score': r_score,
+        'atr_ratio': pullback_distance / atr,
+        'risk_reward': (price - stop_price) / stop_price
+    }
+
+# -------------------- PARALEL HİSSE ANALİZİ --------------------
+def analyze_single_stock(ticker, df=None):
+    """Tek hisse analizi (df verilirse indirme yapılmaz)"""
+    try:
+        # Haftalık veri çek (2 yıl yeterli)
+        if df is None:
+            df = get_default_loader().load_one(ticker, period="2y", interval="1wk")
         
-        return {
-            'ticker': ticker,
-            'price': current['Close'],
-            'stop': stop_price,
-            'shares': shares,
-            'position_value': position_value,
-            'actual_risk': actual_risk,
-            'r_score': current['R_Score'],
-            'atr_ratio': pullback_distance / current['ATR'],
-            'risk_reward': (current['Close'] - stop_price) / stop_price
-        }
+        candidates = analyze_universe({ticker: df})
+        return candidates[0] if candidates else None
         
     except Exception as e:
         logging.error(f"{ticker} analiz hatası: {e}")
         return None
 
+def latest_supertrend(frames, state_store, params, interval='1wk'):
+    """
+    {sembol: son bar SuperTrend değerleri}. Kayıtlı durumu taze olan hisseler
+    yalnızca yeni barlarla güncellenir; soğuk olanlar tek vektörel çağrıda
+    tam hesaplanır ve durumları kaydedilir.
+    """
+    warm, cold = state_store.advance_all(SuperTrendBundle.kind, frames, interval, params)
+    latest = {t: current for t, (_, current) in warm.items()}
+    
+    if cold:
+        panels = stack_frames(frames, cold, ('High', 'Low', 'Close'))
+        st = supertrend(panels['High'], panels['Low'], panels['Close'], period=params['period'],
+                        multiplier=params['multiplier'], atr_period=params['atr_period'])
+        for j, ticker in enumerate(cold):
+            latest[ticker] = {'close': panels['Close'][-1, j], 'supertrend': st.supertrend[-1, j],
+                              'direction': st.direction[-1, j], 'atr': st.atr[-1, j],
+                              'r_score': st.r_score[-1, j]}
+            state_store.put(ticker, interval, params,
+                            SuperTrendBundle.seed(frames[ticker], st, j, params))
+    state_store.save()
+    return latest
+
+def entry_digest(params):
+    """SuperTrend parametreleri ve giriş kurallarının sonuç önbelleği özeti"""
+    return params_digest({'supertrend': params, 'entry': {
+        'max_pullback_atr': MAX_PULLBACK_ATR, 'portfolio_size': PORTFOLIO_SIZE,
+        'risk_per_trade': RISK_PER_TRADE, 'target_r_multiple': TARGET_R_MULTIPLE}})
+
+def analyze_universe(frames, period=SUPER_TREND_PERIOD, multiplier=SUPER_TREND_MULT,
+                     atr_period=ATR_PERIOD, interval='1wk', state_store=None, result_cache=None):
+    """
+    Tüm evren için SuperTrend/ATR/R-Score değerlerini bulup alım adaylarını
+    döndürür. Son barı ve parametreleri değişmemiş hisselerin sonucu
+    (aday ya da sinyal yok) sonuç önbelleğinden gelir; son barı henüz
+    kapanmamış hisseler önbelleğe girmez, her çalıştırmada hesaplanır.
+    Kayıtlı durumu taze olanlar yalnızca yeni barlarla güncellenir, soğuk
+    olanlar tek vektörel çağrıda tam hesaplanır.
+    """
+    frames = validate_universe(frames, interval)
+    tickers = list(frames)
+    if not tickers:
+        return []
+    
+    state_store = state_store or get_default_state_store()
+    result_cache = get_default_result_cache() if result_cache is None else result_cache
+    params = SuperTrendBundle.make_params(period, multiplier, atr_period)
+    digest = entry_digest(params)
+    last_ts = {t: int(_utc_ns(frames[t].index[-1:])[0]) for t in tickers}
+    closed = final_bars(tickers, interval, [last_ts[t] for t in tickers],
+                        [frames[t].index.tz for t in tickers])
+    final = {t for t, ok in zip(tickers, closed) if ok}
+    results = {t: result_cache.get('supertrend', t, interval, last_ts[t], digest)
+               if t in final else MISSING for t in tickers}
+    pending = [t for t in tickers if results[t] is MISSING]
+    
+    if pending:
+        latest = latest_supertrend({t: frames[t] for t in pending}, state_store, params, interval)
+        for ticker in pending:
+            v = latest[ticker]
+            results[ticker] = evaluate_entry(ticker, v['close'], v['supertrend'], v['direction'],
+                                             v['atr'], v['r_score'])
+            if ticker in final:
+                result_cache.put('supertrend', ticker, interval, last_ts[ticker], digest,
+                                 results[ticker])
+        result_cache.save()
+    return [results[t] for t in tickers if results[t]]
+
 # -------------------- PİYASA DURUMU KONTROLÜ --------------------
 def check_market_condition():
     """Genel piyasa trendi kontrolü"""
     try:
-        spy_data = yf.download('SPY', period='6mo', interval='1wk', progress=False)
-        if len(spy_data) < 10:
+        spy_data = get_default_loader().load_one('SPY', period='6mo', interval='1wk')
+        if spy_data is None or len(spy_data) < 10:
             return True  # Güvenli mod
             
         # SPY 50 günlük MA üstünde mi?
@@ -557,84 +403,205 @@ def check_market_condition():
 
 # -------------------- TELEGRAM BİLDİRİMİ --------------------
 def send_telegram_message(message):
-    """Telegram'a mesaj gönder"""
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": CHAT_ID,
-        "text": message,
-        "parse_mode": "Markdown"
-    }
-    try:
-        response = requests.post(url, json=payload, timeout=10)
-        return response.status_code == 200
-    except Exception as e:
-        logging.error(f"Telegram gönderim hatası: {e}")
-        return False
+    """Telegram'a mesaj gönder (uzun mesajlar bölünür, tüm sohbetlere gider)"""
+    report = get_default_delivery(TELEGRAM_TOKEN, CHAT_ID).send(message)
+    if not report.ok:
+        logging.error(f"Telegram gönderim hatası: {report.summary()}")
+    return report.ok
 
 # -------------------- ANA TARAMA FONKSİYONU --------------------
 def run_weekly_scan():
     """Ana tarama fonksiyonu - Colab için optimize"""
     
     print("🔍 Haftalık tarama başlatılıyor...")
+    run = metrics.start_run('weekly_scan')
+    loader, state_store = get_default_loader(), get_default_state_store()
+    run.track_cache('bars', getattr(loader, 'provider', None))
+    run.track_cache('cassette', find_cassette(getattr(loader, 'provider', None)))
+    run.track_cache('indicator_state', state_store)
+    result_cache = get_default_result_cache()
+    run.track_cache('analysis_results', result_cache)
     
     # Piyasa kontrolü
-    if not check_market_condition():
+    with run.stage('market'):
+        market_ok = check_market_condition()
+    if not market_ok:
         message = "🚫 *PİYASA UYARI*: SPY 50 günlük MA altında. Bu hafta tarama atlanıyor."
         send_telegram_message(message)
         print(message)
+        run.write()
         return
     
-    # Hisse listesi
+    # Hisse listesi; hacmi açıkça yetersiz olanlar geçmiş indirilmeden elenir
+    # (hacmi bilinmeyenler tutulur, kesin kontrol validate_universe'de)
     tickers = get_optimized_tickers()
+    with run.stage('prefilter', len(tickers)) as stage:
+        tickers, rejected = prefilter(get_default_store(), tickers,
+                                      {'min_avg_volume': PREFILTER_MIN_DAILY_VOLUME},
+                                      missing={'min_avg_volume': True},
+                                      max_age=PREFILTER_MAX_AGE_DAYS * DAY)
+        stage.tickers_out = len(tickers)
+    for rule, count in rejected.items():
+        run.count('prefilter_rejections', rule, count)
     print(f"📊 {len(tickers)} hisse analiz ediliyor...")
     
-    # Paralel analiz
-    candidates = []
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_ticker = {executor.submit(analyze_single_stock, ticker): ticker for ticker in tickers}
-        
-        for future in as_completed(future_to_ticker):
-            result = future.result()
-            if result:
-                candidates.append(result)
+    # Çekme (sınırlı eşzamanlılık, hız sınırı, yeniden deneme) ile analiz
+    # (süreç havuzu, paylaşımlı bellek) akış halinde; en iyi adaylar ve
+    # kovaryans için son kapanışlar tutulur
+    params = SuperTrendBundle.make_params(SUPER_TREND_PERIOD, SUPER_TREND_MULT, ATR_PERIOD)
+    pipeline = ScanPipeline(
+        loader, validate_universe, evaluate_entry, state_store, params,
+        ranker=TopCandidates(CANDIDATE_POOL), workers=SCAN_WORKERS,
+        fetch_options={'concurrency': FETCH_CONCURRENCY, 'rate': FETCH_RATE,
+                       'retries': FETCH_RETRIES, 'timeout': FETCH_TIMEOUT},
+        history=RETURN_LOOKBACK + 1, result_cache=result_cache, cache_key=entry_digest(params)
+    )
+    # Çekme ve analiz iç içe akar; tek aşama olarak ölçülür
+    with run.stage('scan', len(tickers), profile=True) as stage:
+        pool, fetch_report = pipeline.run(tickers, period="2y", interval="1wk")
+        stage.tickers_out = len(pool)
+    run.record_fetch(fetch_report)
+    
+    # Portföy: korelasyon sınırı ve korelasyonlu risk bütçesiyle seçim/boyutlandırma
+    with run.stage('portfolio', len(pool)) as stage:
+        model = RiskModel.from_closes(pipeline.closes, interval="1wk", lookback=RETURN_LOOKBACK)
+        best_candidates, skipped = select_portfolio(
+            pool, model, MAX_POSITIONS, PORTFOLIO_SIZE * PORTFOLIO_RISK_BUDGET, MAX_CORRELATION)
+        stage.tickers_out = len(best_candidates)
+    for reason, count in skipped.items():
+        run.count('portfolio_skipped', reason, count)
+    print(f"🧮 Kovaryans: {len(model.tickers)} hisse, daralma {model.shrinkage:.2f}, "
+          f"ortalama korelasyon {model.mean_correlation:.2f}")
+    for name in ('cached', 'warm', 'cold', 'invalid', 'batches'):
+        run.count(f'pipeline_{name}', '', pipeline.stats[name])
+    print(f"📥 {fetch_report.summary()}")
+    print(f"⚙️ {pipeline.summary()}")
+    for ticker, reason in sorted(fetch_report.failed.items()):
+        logging.warning(f"{ticker}: veri alınamadı ({reason})")
     
-    # Sırala ve filtrele
-    candidates.sort(key=lambda x: x['r_score'], reverse=True)
-    best_candidates = candidates[:MAX_POSITIONS]
+    # Adaylar defterde açık pozisyon olur (Perşembe satış kontrolü için)
+    with run.stage('ledger', len(best_candidates)) as stage, get_default_ledger() as ledger:
+        stage.tickers_out = ledger.record(best_candidates, clock_now().date())
+        ledger.export_json(DEFAULT_EXPORT_FILE)
     
     # Rapor oluştur
     if best_candidates:
         total_risk = sum(c['actual_risk'] for c in best_candidates)
         total_investment = sum(c['position_value'] for c in best_candidates)
         
-        message = f"🎯 *HAFTALIK ALIM SİNYALLERİ* ({date.today().strftime('%d.%m.%Y')})\n\n"
+        message = f"🎯 *HAFTALIK ALIM SİNYALLERİ* ({clock_now().strftime('%d.%m.%Y')})\n\n"
         message += f"Portföy: ${PORTFOLIO_SIZE:,} | Risk: %{RISK_PER_TRADE*100}\n"
         message += f"Toplam Yatırım: ${total_investment:,.0f}\n"
-        message += f"Toplam Risk: ${total_risk:,.0f} (%{total_risk/PORTFOLIO_SIZE:.1f})\n\n"
+        message += f"Toplam Risk: ${total_risk:,.0f} (%{total_risk/PORTFOLIO_SIZE:.1f})\n"
+        message += f"Korelasyonlu Risk: ${portfolio_risk(best_candidates, model):,.0f}\n\n"
         
         for candidate in best_candidates:
             message += (
                 f"✅ *{candidate['ticker']}*\n"
                 f"Fiyat: ${candidate['price']:.2f} | Stop: ${candidate['stop']:.2f}\n"
                 f"Hisse: {candidate['shares']:,} | Pozisyon: ${candidate['position_value']:,.0f}\n"
-                f"Risk: ${candidate['actual_risk']:,.0f} | R-Score: {candidate['r_score']:.2f}\n\n"
+                f"Risk: ${candidate['actual_risk']:,.0f} | R-Score: {candidate['r_score']:.2f} | "
+                f"Maks. Korelasyon: {candidate['max_correlation']:.2f}\n\n"
             )
     else:
-        message = f"📭 *SONUÇ*: {date.today().strftime('%d.%m.%Y')} tarihi için uygun alım sinyali bulunamadı.\n\n"
+        message = f"📭 *SONUÇ*: {clock_now().strftime('%d.%m.%Y')} tarihi için uygun alım sinyali bulunamadı.\n\n"
         message += "Nakitte kalmak en güvenli seçenek olabilir."
     
     message += "\n---\n"
-    message += "⚠️ _Eğitim amaçlıdır. Yatırım tavsiyesi değildir._"
+    message += "⚠️ _Eğitim amaçlıdır. Yatırım tavsiyesi değildir._\n"
+    message += run.summary_line()
     
     # Gönder
-    if send_telegram_message(message):
+    with run.stage('notify'):
+        sent = send_telegram_message(message)
+    if sent:
         print("✅ Telegram bildirimi gönderildi")
     else:
         print("❌ Telegram gönderilemedi")
+        run.count('telegram_failures')
+    for path in run.write():
+        print(f"📊 Metrikler kaydedildi: {path}")
     
     print(f"📈 {len(best_candidates)} sinyal bulundu")
     return best_candidates
 
+# -------------------- SATIŞ KONTROLÜ --------------------
+def run_sell_check():
+    """
+    Perşembe satış kontrolü: yalnızca defterdeki açık pozisyonların yeni
+    barları (önbellekten artımlı) çekilir; stop, hedef ve SuperTrend dönüşü
+    kontrol edilir, kapananlar tek işlemde deftere yazılır.
+    """
+    print("🔎 Satış kontrolü başlatılıyor...")
+    run = metrics.start_run('sell_check')
+    loader, state_store = get_default_loader(), get_default_state_store()
+    run.track_cache('bars', getattr(loader, 'provider', None))
+    run.track_cache('cassette', find_cassette(getattr(loader, 'provider', None)))
+    run.track_cache('indicator_state', state_store)
+    
+    with get_default_ledger() as ledger:
+        if not len(ledger) and os.path.exists(DEFAULT_EXPORT_FILE):
+            ledger.import_json(DEFAULT_EXPORT_FILE)
+        positions = ledger.open_positions()
+        tickers = list(dict.fromkeys(p['ticker'] for p in positions))
+        print(f"📂 {len(positions)} açık pozisyon")
+        
+        with run.stage('fetch', len(tickers)) as stage:
+            frames = loader.load(tickers, period="2y", interval="1wk").frames if tickers else {}
+            stage.tickers_out = len(frames)
+        with run.stage('evaluate', len(positions)) as stage:
+            params = SuperTrendBundle.make_params(SUPER_TREND_PERIOD, SUPER_TREND_MULT, ATR_PERIOD)
+            latest = latest_supertrend(frames, state_store, params) if frames else {}
+            exits, checked = [], {}
+            for position in positions:
+                frame = frames.get(position['ticker'])
+                if frame is None:
+                    run.count('sell_check_missing')
+                    continue
+                direction = latest.get(position['ticker'], {}).get('direction')
+                exit_, last_checked = check_exit(position, frame, direction)
+                if exit_:
+                    exits.append(exit_)
+                elif last_checked != position['last_checked']:
+                    checked[position['id']] = last_checked
+            stage.tickers_out = len(exits)
+        metrics.mark('first_result')
+        with run.stage('ledger', len(exits)):
+            ledger.close_many(exits, checked)
+            ledger.export_json(DEFAULT_EXPORT_FILE)
+    for exit_ in exits:
+        run.count('positions_closed', exit_['exit_reason'])
+    
+    today = clock_now().strftime('%d.%m.%Y')
+    if exits:
+        total_pnl = sum(e['pnl'] for e in exits)
+        message = f"🔔 *HAFTALIK SATIŞ SİNYALLERİ* ({today})\n\n"
+        message += f"Kapanan: {len(exits)} | Toplam K/Z: ${total_pnl:,.0f}\n\n"
+        for exit_ in exits:
+            message += (
+                f"🔻 *{exit_['ticker']}* ({exit_['exit_reason']})\n"
+                f"Çıkış: ${exit_['exit_price']:.2f} | K/Z: ${exit_['pnl']:,.0f} "
+                f"(%{exit_['return'] * 100:.1f})\n\n"
+            )
+    else:
+        message = f"📭 *SATIŞ KONTROLÜ*: {today} için satış sinyali yok.\n\n"
+    message += f"Açık pozisyon: {len(positions) - len(exits)}\n"
+    message += "\n---\n"
+    message += "⚠️ _Eğitim amaçlıdır. Yatırım tavsiyesi değildir._\n"
+    message += run.summary_line()
+    
+    with run.stage('notify'):
+        sent = send_telegram_message(message)
+    if sent:
+        print("✅ Telegram bildirimi gönderildi")
+    else:
+        print("❌ Telegram gönderilemedi")
+        run.count('telegram_failures')
+    run.write()
+    
+    print(f"📉 {len(exits)} pozisyon kapandı")
+    return exits
+
 # -------------------- COLAB TEST FONKSİYONU --------------------
 def test_single_stock(ticker="AAPL"):
     """Tek hisse testi - Colab'da hızlı kontrol"""
@@ -650,24 +617,8 @@ def test_single_stock(ticker="AAPL"):
 
 # -------------------- ÇALIŞTIRMA --------------------
 if __name__ == "__main__":
-    # Colab'da çalıştırılacak kısım
-    print("🚀 S&P 500 SuperTrend Scanner - Colab Optimize")
-    print("=" * 50)
-    
-    # Hızlı test
-    test_single_stock("AAPL")
-    test_single_stock("MSFT")
-    
-    print("\n" + "=" * 50)
-    
-    # Tam tarama (isteğe bağlı - zaman alır)
-    run_full_scan = False  # True yaparak tam taramayı aç
-    
-    if run_full_scan:
-        signals = run_weekly_scan()
-        if signals:
-            print(f"🎉 Tarama tamamlandı: {len(signals)} sinyal")
-        else:
-            print("ℹ️ Sinyal bulunamadı")
-    else:
-        print("ℹ️ Tam tarama kapalı. 'run_full_scan = True' yaparak açabilirsiniz.")
+    # Alt komutlar cli.py'de (scan, sell-check, screen, backtest, bench...);
+    # argümansız çalıştırma eskisi gibi hızlı tek hisse testidir
+    from cli import main as cli_main
+
+    sys.exit(cli_main(sys.argv[1:] or ['test', 'AAPL', 'MSFT']))
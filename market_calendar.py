@@ -0,0 +1,293 @@
+"""
+BIST ve ABD borsaları için işlem günü takvimi.
+
+Her borsanın yerel saat dilimi, seans kapanışı, yarım günleri ve tatilleri
+tanımlıdır; işlem günü aritmetiği np.busday_* ile (tatiller hariç,
+Pazartesi-Cuma) vektörel yapılır. Sembolün borsası sonekinden bulunur
+('.IS' ve '^XU...' BIST, diğerleri ABD); aynı evrende TRY ve USD
+işlem gören semboller böylece kendi takvimleriyle değerlendirilir.
+
+Beklenen son bar, kapanışı (veri gecikmesi SETTLE_DELAY eklenerek) asof
+anından önce olan son seansın tarihidir. Günlük ve günlükten türetilen
+haftalık/aylık barlar için aynıdır: timeframes grup etiketini grubun son
+işlem günü yapar. Bu sayede:
+
+- Pazar ya da bayram günü çalışan tarama, önbellekteki seri son seanstan
+  sonra kontrol edilmişse hiç istek atmaz (bkz. bar_cache.CachingProvider),
+- 'guncel_degil' kontrolü takvim günü yerine kaçırılan seans sayısıyla
+  yapılır (bkz. data_quality),
+- henüz kapanmamış (süren) barın sonucu önbelleğe alınmaz (final_bars;
+  bkz. result_cache).
+
+ABD tatilleri NYSE kurallarından hesaplanır. BIST'in dini bayramları ay
+takvimine bağlı olduğundan BIST_RELIGIOUS_HOLIDAYS tablosunda yıllık
+tutulur (tablo dışındaki yıllarda yalnızca sabit tatiller uygulanır);
+hükümet kararıyla uzatılan tatiller tabloya ayrıca eklenmelidir.
+"""
+import datetime as dt
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data_provider import clock_now
+from timeframes import _local_days, period_keys
+
+SETTLE_DELAY = pd.Timedelta(minutes=30)   # Kapanıştan sonra son barın sağlayıcıya düşme süresi
+FIRST_YEAR, LAST_YEAR = 2000, 2035
+DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+
+# (Ramazan Bayramı, Kurban Bayramı) ilk günleri
+BIST_RELIGIOUS_HOLIDAYS = {
+    2015: ('2015-07-17', '2015-09-24'),
+    2016: ('2016-07-05', '2016-09-12'),
+    2017: ('2017-06-25', '2017-09-01'),
+    2018: ('2018-06-15', '2018-08-21'),
+    2019: ('2019-06-04', '2019-08-11'),
+    2020: ('2020-05-24', '2020-07-31'),
+    2021: ('2021-05-13', '2021-07-20'),
+    2022: ('2022-05-02', '2022-07-09'),
+    2023: ('2023-04-21', '2023-06-28'),
+    2024: ('2024-04-10', '2024-06-16'),
+    2025: ('2025-03-30', '2025-06-06'),
+    2026: ('2026-03-20', '2026-05-27'),
+    2027: ('2027-03-09', '2027-05-16'),
+}
+US_SPECIAL_CLOSURES = ('2001-09-11', '2001-09-12', '2001-09-13', '2001-09-14', '2004-06-11',
+                       '2007-01-02', '2012-10-29', '2012-10-30', '2018-12-05', '2025-01-09')
+
+
+# -------------------- TATİL KURALLARI --------------------
+def _easter(year):
+    """Batı Paskalyası (Anonim Gregoryen algoritması)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    r = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * r) // 451
+    month = (h + r - 7 * m + 114) // 31
+    return dt.date(year, month, (h + r - 7 * m + 114) % 31 + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """Ayın n. 'weekday' günü (n=-1: son)"""
+    if n > 0:
+        first = dt.date(year, month, 1)
+        return first + dt.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = dt.date(year + month // 12, month % 12 + 1, 1) - dt.timedelta(days=1)
+    return last - dt.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Cumartesiye denk gelen tatil Cuma, Pazara denk gelen Pazartesi yapılır"""
+    if day.weekday() == 5:
+        return day - dt.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + dt.timedelta(days=1)
+    return day
+
+
+def us_holidays(year):
+    """NYSE tam gün tatilleri ve yarım günleri: (tatiller, yarım günler)"""
+    new_year = dt.date(year, 1, 1)
+    days = [new_year + dt.timedelta(days=1)] if new_year.weekday() == 6 else \
+        [new_year] if new_year.weekday() < 5 else []   # Cumartesi ise önceki Cuma açıktır
+    days += [_nth_weekday(year, 1, 0, 3), _nth_weekday(year, 2, 0, 3),
+             _easter(year) - dt.timedelta(days=2), _nth_weekday(year, 5, 0, -1),
+             _observed(dt.date(year, 7, 4)), _nth_weekday(year, 9, 0, 1),
+             _nth_weekday(year, 11, 3, 4), _observed(dt.date(year, 12, 25))]
+    if year >= 2022:
+        days.append(_observed(dt.date(year, 6, 19)))
+    thanksgiving = _nth_weekday(year, 11, 3, 4)
+    half = [thanksgiving + dt.timedelta(days=1), dt.date(year, 7, 3), dt.date(year, 12, 24)]
+    return days, [d for d in half if d.weekday() < 5 and d not in days]
+
+
+def bist_holidays(year):
+    """BIST tam gün tatilleri ve yarım günleri (arifeler, 28 Ekim)"""
+    days = [dt.date(year, m, d) for m, d in ((1, 1), (4, 23), (5, 1), (5, 19), (8, 30), (10, 29))]
+    if year >= 2017:
+        days.append(dt.date(year, 7, 15))
+    half = [dt.date(year, 10, 28)]
+    if year in BIST_RELIGIOUS_HOLIDAYS:
+        for first, length in zip(BIST_RELIGIOUS_HOLIDAYS[year], (3, 4)):
+            start = dt.date.fromisoformat(first)
+            days += [start + dt.timedelta(days=i) for i in range(length)]
+            half.append(start - dt.timedelta(days=1))
+    return days, [d for d in half if d.weekday() < 5 and d not in days]
+
+
+# -------------------- BORSA --------------------
+class Exchange:
+    """Tek borsanın seans saatleri ve işlem günleri"""
+
+    def __init__(self, name, tz, open_time, close_time, early_close, currency, rules,
+                 special_closures=()):
+        self.name = name
+        self.tz = tz
+        self.open_time = pd.Timedelta(open_time)
+        self.close_time = pd.Timedelta(close_time)
+        self.early_close = pd.Timedelta(early_close)
+        self.currency = currency
+        holidays, half_days = set(), set()
+        for year in range(FIRST_YEAR, LAST_YEAR + 1):
+            full, half = rules(year)
+            holidays.update(full)
+            half_days.update(half)
+        holidays.update(dt.date.fromisoformat(d) for d in special_closures)
+        self.holidays = np.array(sorted(d for d in holidays if d.weekday() < 5), dtype='datetime64[D]')
+        self.half_days = np.array(sorted(half_days - holidays), dtype='datetime64[D]')
+        self._calendar = np.busdaycalendar(holidays=self.holidays)
+
+    def __repr__(self):
+        return f"Exchange({self.name})"
+
+    # --- işlem günleri ---
+    def is_session(self, days):
+        """Gün(ler) işlem günü mü (datetime64[D] ya da tarih)"""
+        return np.is_busday(np.asarray(days, dtype='datetime64[D]'), busdaycal=self._calendar)
+
+    def sessions(self, start, end):
+        """[start, end] aralığındaki işlem günleri (datetime64[D] dizisi)"""
+        days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+        return days[self.is_session(days)]
+
+    def sessions_between(self, after, until):
+        """(after, until] aralığındaki işlem günü sayısı (vektörel; negatif olmaz)"""
+        after = np.asarray(after, dtype='datetime64[D]')
+        until = np.asarray(until, dtype='datetime64[D]')
+        count = np.busday_count(after + 1, until + 1, busdaycal=self._calendar)
+        return np.maximum(count, 0)
+
+    def previous_session(self, day):
+        """'day'den önceki son işlem günü"""
+        return np.busday_offset(np.datetime64(day, 'D') - 1, 0, roll='backward',
+                                busdaycal=self._calendar)
+
+    def next_session(self, day):
+        """'day'den sonraki ilk işlem günü"""
+        return np.busday_offset(np.datetime64(day, 'D') + 1, 0, roll='forward',
+                                busdaycal=self._calendar)
+
+    # --- seans saatleri ---
+    def local(self, when=None):
+        """Zaman damgasını borsa yerel saatine çevirir (None: şimdi)"""
+        when = clock_now(tz='UTC') if when is None else pd.Timestamp(when)
+        return when.tz_localize(self.tz) if when.tz is None else when.tz_convert(self.tz)
+
+    def session_close(self, day):
+        """İşlem gününün kapanış anı (yerel saat)"""
+        day = np.datetime64(day, 'D')
+        close = self.early_close if day in self.half_days else self.close_time
+        return pd.Timestamp(day).tz_localize(self.tz) + close
+
+    def is_open(self, when=None):
+        """Seans (kapanış sonrası veri gecikmesi dahil) sürüyor mu"""
+        now = self.local(when)
+        day = np.datetime64(now.date(), 'D')
+        if not self.is_session(day):
+            return False
+        start = pd.Timestamp(day).tz_localize(self.tz) + self.open_time
+        return start <= now < self.session_close(day) + SETTLE_DELAY
+
+    def last_session(self, when=None):
+        """'when' anında barı tamamlanmış son işlem günü"""
+        now = self.local(when)
+        return _last_session(self.name, now.value)
+
+
+EXCHANGES = {
+    'BIST': Exchange('BIST', 'Europe/Istanbul', '10:00:00', '18:00:00', '12:30:00', 'TRY', bist_holidays),
+    'US': Exchange('US', 'America/New_York', '09:30:00', '16:00:00', '13:00:00', 'USD', us_holidays,
+                   US_SPECIAL_CLOSURES),
+}
+
+
+@lru_cache(maxsize=4096)
+def _last_session(name, ns):
+    # Aynı toplu istekteki semboller aynı anları sorar; sonuç önbelleklenir
+    exchange = EXCHANGES[name]
+    now = pd.Timestamp(ns, tz='UTC').tz_convert(exchange.tz)
+    day = np.datetime64(now.date(), 'D')
+    if exchange.is_session(day) and now >= exchange.session_close(day) + SETTLE_DELAY:
+        return day
+    return exchange.previous_session(day)
+
+
+def exchange_for(symbol):
+    """Sembolün işlem gördüğü borsa"""
+    if symbol.endswith('.IS') or symbol.startswith('^XU'):
+        return EXCHANGES['BIST']
+    return EXCHANGES['US']
+
+
+def group_by_exchange(tickers):
+    """{Exchange: [sembol, ...]} (sıra korunur)"""
+    groups = {}
+    for ticker in tickers:
+        groups.setdefault(exchange_for(ticker), []).append(ticker)
+    return groups
+
+
+# -------------------- BEKLENEN SON BAR --------------------
+def expected_last_bar(symbol, interval='1d', asof=None):
+    """
+    (sembol, aralık) için asof anında var olması beklenen son tamamlanmış
+    barın tarihi (borsa yerel günü, pd.Timestamp); gün içi aralıklarda None
+    """
+    if interval not in DAILY_INTERVALS:
+        return None
+    return pd.Timestamp(exchange_for(symbol).last_session(asof))
+
+
+def is_current(symbol, interval, checked, now=None):
+    """
+    'checked' (epoch sn) anında sağlayıcıya sorulmuş seri 'now' anında hâlâ
+    güncel mi: o zamandan beri hiç seans kapanmamış ve seans şu an açık
+    değilse yeni bar oluşamaz, istek atlanabilir
+    """
+    if checked is None or interval not in DAILY_INTERVALS:
+        return False
+    exchange = exchange_for(symbol)
+    now = exchange.local(now)
+    if exchange.is_open(now):
+        return False
+    return exchange.last_session(pd.Timestamp(checked, unit='s', tz='UTC')) >= \
+        exchange.last_session(now)
+
+
+def final_bars(symbols, interval, last_ts, tz=None, asof=None):
+    """
+    Sembollerin last_ts (UTC ns; tz verilmezse yerel saat) etiketli son
+    barları asof anında kesinleşmiş mi (bool dizisi). tz tek değer ya da
+    sembol başına liste olabilir. Günlükte seansı,
+    haftalık/aylıkta dönemin son seansı kapanmış olmalı. Süren barın
+    değerleri kapanışa kadar değişir; ondan türetilen sonuç saklanmamalıdır.
+    Diğer aralıklarda hepsi False.
+    """
+    symbols = list(symbols)
+    final = np.zeros(len(symbols), dtype=bool)
+    if interval not in ('1d', '1wk', '1mo') or not symbols:
+        return final
+    last_ts = np.asarray(last_ts, dtype=np.int64)
+    tzs = list(tz) if isinstance(tz, (list, tuple)) else [tz] * len(symbols)
+    days = np.empty(len(symbols), dtype=np.int64)
+    for zone in {str(z): z for z in tzs}.values():
+        mask = np.array([str(z) == str(zone) for z in tzs])
+        days[mask] = _local_days(last_ts[mask], zone)
+    groups = {}
+    for j, symbol in enumerate(symbols):
+        groups.setdefault(exchange_for(symbol), []).append(j)
+    for exchange, idx in groups.items():
+        last = exchange.last_session(asof)
+        if interval == '1d':
+            final[idx] = days[idx] <= last.astype(np.int64)
+        else:
+            # Dönem, son kapanan seanstan sonraki ilk seans başka bir döneme düşüyorsa bitmiştir
+            following = period_keys(np.array([exchange.next_session(last)], dtype='datetime64[D]')
+                                    .astype(np.int64), interval)
+            final[idx] = period_keys(days[idx], interval) < following
+    return final
@@ -0,0 +1,432 @@
+"""
+Tarama çalıştırmaları için aşama ölçümleri ve metrikler.
+
+Her aşama (veri çekme, filtre, analiz, rapor...) için duvar/CPU süresi,
+aşama boyunca en yüksek RSS ve giren/çıkan hisse sayısı tutulur. Bunlara
+ek olarak adlandırılmış sayaçlar (ör. doğrulama ret nedenleri, çekme
+hataları), histogramlar (çekme gecikmesi), kesin yüzdelikli gecikme
+örnekleri (gün içi akışta bar başına) ve önbellek isabet oranları toplanır. Çalıştırma sonunda JSON ve Prometheus metin biçiminde
+BIST_METRICS_DIR dizinine (varsayılan 'metrics', boş bırakılırsa kapalı)
+yazılır; Telegram mesajına eklenecek tek satırlık özet üretilir.
+
+Başlangıç süreleri (süreç başlangıcından içe aktarma, anlık görüntü
+yükleme ve ilk sonuca kadar geçen süre) süreç genelinde mark() ile bir kez
+kaydedilir ve her çalıştırmanın çıktısına eklenir.
+
+BIST_PROFILE=1 iken profile=True ile açılan aşamalar cProfile ile
+ölçülür; .prof dosyası metrik dizinine yazılır, en pahalı fonksiyonlar
+log'a basılır.
+"""
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_METRICS_DIR = 'metrics'
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROFILE_TOP = 15
+SAMPLE_CAPACITY = 1 << 16                 # LatencySample halkası (son gözlemler)
+SAMPLE_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+# -------------------- BAŞLANGIÇ --------------------
+_IMPORTED = time.time()
+_timings = {}   # aşama -> süreç başlangıcından saniye
+
+
+def process_start_time():
+    """Sürecin başladığı an (epoch sn); /proc yoksa bu modülün yüklendiği an"""
+    try:
+        with open('/proc/self/stat') as f:
+            started_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - started_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return _IMPORTED
+
+
+_started = process_start_time()
+
+
+def mark(name):
+    """Süreç başlangıcından bu ana kadarki süreyi bir kez kaydeder; saniyeyi döndürür"""
+    if name not in _timings:
+        _timings[name] = max(0.0, time.time() - _started)
+    return _timings[name]
+
+
+def timings():
+    return dict(_timings)
+
+
+# -------------------- BELLEK --------------------
+def current_rss():
+    """Anlık RSS (bayt); /proc yoksa süreç boyunca en yüksek değer"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class PeakRSS:
+    """Blok süresince RSS'i arka planda örnekleyip en yüksek değeri tutar"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+# -------------------- KAYITLAR --------------------
+class Histogram:
+    """Prometheus tarzı kümülatif kovalı histogram"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # son kova +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, q):
+        """Kova sınırlarından yaklaşık yüzdelik (üst sınır)"""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+    def to_dict(self):
+        cumulative, seen = {}, 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            cumulative['+Inf' if bound == float('inf') else str(bound)] = seen
+        return {'buckets': cumulative, 'sum': round(self.sum, 6), 'count': self.count}
+
+
+class LatencySample:
+    """
+    Son 'capacity' gözlemin halkası; kovalardan değil gözlemlerden kesin
+    yüzdelik verir (milisaniye altı gecikmeler için). Gözlem O(1).
+    """
+
+    def __init__(self, capacity=SAMPLE_CAPACITY):
+        self.values = np.zeros(capacity)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantiles(self, qs=SAMPLE_QUANTILES):
+        """{q: değer}; gözlem yoksa boş"""
+        if not self.count:
+            return {}
+        data = self.values[:min(self.count, len(self.values))]
+        return dict(zip(qs, np.quantile(data, qs).tolist()))
+
+    def to_dict(self, scale=1.0):
+        """Yüzdelikler p50/p99... anahtarlarıyla (scale=1000: ms)"""
+        out = {f"p{q * 100:g}": round(v * scale, 6) for q, v in self.quantiles().items()}
+        out.update({'max': round(self.max * scale, 6), 'count': self.count,
+                    'mean': round(self.sum / self.count * scale, 6) if self.count else None})
+        return out
+
+
+class StageRecord:
+    """Tek aşamanın ölçümü; tickers_out aşama içinde atanır"""
+
+    def __init__(self, name, tickers_in=None):
+        self.name = name
+        self.tickers_in = tickers_in
+        self.tickers_out = None
+        self.seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss = 0
+        self.error = None
+
+    def merge(self, other):
+        """Aynı adlı aşamanın tekrarını (ör. parça parça tarama) ekler"""
+        def add(a, b):
+            return b if a is None else a if b is None else a + b
+        self.tickers_in = add(self.tickers_in, other.tickers_in)
+        self.tickers_out = add(self.tickers_out, other.tickers_out)
+        self.seconds += other.seconds
+        self.cpu_seconds += other.cpu_seconds
+        self.peak_rss = max(self.peak_rss, other.peak_rss)
+        self.error = self.error or other.error
+        return self
+
+    def to_dict(self):
+        return {'seconds': round(self.seconds, 6), 'cpu_seconds': round(self.cpu_seconds, 6),
+                'peak_rss_mb': round(self.peak_rss / 2 ** 20, 1),
+                'tickers_in': self.tickers_in, 'tickers_out': self.tickers_out,
+                'error': self.error}
+
+
+# -------------------- ÇALIŞTIRMA --------------------
+class RunMetrics:
+    """Bir tarama çalıştırmasının tüm metrikleri"""
+
+    def __init__(self, name, directory=None, profile=None):
+        self.name = name
+        self.directory = directory
+        self.profile = profile
+        self.labels = {}
+        self.stages = {}
+        self.counters = {}      # ad -> {etiket: sayı}
+        self.histograms = {}    # ad -> Histogram
+        self.samples = {}       # ad -> LatencySample
+        self.caches = {}        # ad -> [nesne, başlangıç isabet, başlangıç ıska] ya da (isabet, ıska)
+        self.started = time.time()
+        self._wall = time.perf_counter()
+
+    # --- aşamalar ---
+    @contextlib.contextmanager
+    def stage(self, name, tickers_in=None, profile=False):
+        """Aşamayı ölçer; aynı ad tekrar kullanılırsa ölçümler toplanır"""
+        record = StageRecord(name, tickers_in)
+        previous = self.stages.setdefault(name, record)
+        profiler = cProfile.Profile() if profile and self.profile else None
+        with PeakRSS() as rss:
+            wall, cpu = time.perf_counter(), time.process_time()
+            if profiler:
+                profiler.enable()
+            try:
+                yield record
+            except BaseException as e:
+                record.error = type(e).__name__
+                raise
+            finally:
+                if profiler:
+                    profiler.disable()
+                record.seconds = time.perf_counter() - wall
+                record.cpu_seconds = time.process_time() - cpu
+        record.peak_rss = rss.peak
+        if previous is not record:
+            previous.merge(record)
+        if profiler:
+            self._dump_profile(name, profiler)
+
+    def _dump_profile(self, name, profiler):
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{self.name}_{name}.prof")
+            profiler.dump_stats(path)
+            logging.info(f"Profil kaydedildi: {path}")
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        logging.info(f"{name} profili:\n{out.getvalue()}")
+
+    # --- sayaçlar / histogramlar / önbellekler ---
+    def count(self, name, label='', n=1):
+        counter = self.counters.setdefault(name, {})
+        counter[label] = counter.get(label, 0) + n
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS):
+        self.histograms.setdefault(name, Histogram(buckets)).observe(value)
+
+    def sample(self, name, capacity=SAMPLE_CAPACITY):
+        """Kesin yüzdelikli gözlem halkası (aynı adla çağrılırsa aynısı)"""
+        return self.samples.setdefault(name, LatencySample(capacity))
+
+    def track_cache(self, name, obj):
+        """hits/misses sayaçları olan nesnenin bu çalıştırmadaki farkını izler"""
+        if obj is not None and hasattr(obj, 'hits') and hasattr(obj, 'misses'):
+            self.caches[name] = [obj, obj.hits, obj.misses]
+
+    def cache_counts(self):
+        counts = {}
+        for name, (obj, hits, misses) in self.caches.items():
+            counts[name] = (obj.hits - hits, obj.misses - misses)
+        return counts
+
+    def record_fetch(self, report, prefix='fetch'):
+        """async_fetch.FetchReport'u gecikme histogramı ve hata sayaçlarına aktarır"""
+        for latency in report.latencies:
+            self.observe(f'{prefix}_latency_seconds', latency)
+        for reason, count in report.failure_counts().items():
+            self.count(f'{prefix}_failures', reason, count)
+        self.count(f'{prefix}_requests', '', report.requests)
+        self.count(f'{prefix}_retries', '', report.retries)
+
+    # --- çıktı ---
+    def elapsed(self):
+        return time.perf_counter() - self._wall
+
+    def to_dict(self):
+        caches = {}
+        for name, (hits, misses) in self.cache_counts().items():
+            total = hits + misses
+            caches[name] = {'hits': hits, 'misses': misses,
+                            'hit_rate': round(hits / total, 4) if total else None}
+        return {
+            'run': self.name,
+            'labels': self.labels,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'seconds': round(self.elapsed(), 6),
+            'stages': {name: record.to_dict() for name, record in self.stages.items()},
+            'counters': self.counters,
+            'histograms': {name: h.to_dict() for name, h in self.histograms.items()},
+            'samples': {name: s.to_dict() for name, s in self.samples.items()},
+            'caches': caches,
+            'startup': {name: round(v, 6) for name, v in _timings.items()},
+        }
+
+    def to_prometheus(self):
+        """Prometheus metin biçimi (textfile collector ile okunabilir)"""
+        base = {'run': self.name, **self.labels}
+        lines = []
+
+        def emit(metric, kind, samples):
+            lines.append(f"# TYPE bist_{metric} {kind}")
+            for labels, value in samples:
+                lines.append(f"bist_{metric}{_labels({**base, **labels})} {_number(value)}")
+
+        stages = self.stages.items()
+        emit('run_seconds', 'gauge', [({}, self.elapsed())])
+        emit('startup_seconds', 'gauge', [({'phase': n}, v) for n, v in _timings.items()])
+        emit('stage_seconds', 'gauge', [({'stage': n}, r.seconds) for n, r in stages])
+        emit('stage_cpu_seconds', 'gauge', [({'stage': n}, r.cpu_seconds) for n, r in stages])
+        emit('stage_peak_rss_bytes', 'gauge', [({'stage': n}, r.peak_rss) for n, r in stages])
+        emit('stage_tickers_in', 'gauge',
+             [({'stage': n}, r.tickers_in) for n, r in stages if r.tickers_in is not None])
+        emit('stage_tickers_out', 'gauge',
+             [({'stage': n}, r.tickers_out) for n, r in stages if r.tickers_out is not None])
+        for name, counter in self.counters.items():
+            emit(f'{name}_total', 'counter',
+                 [({'reason': label} if label else {}, value) for label, value in counter.items()])
+        for name, hist in self.histograms.items():
+            lines.append(f"# TYPE bist_{name} histogram")
+            for bound, value in hist.to_dict()['buckets'].items():
+                lines.append(f"bist_{name}_bucket{_labels({**base, 'le': bound})} {value}")
+            lines.append(f"bist_{name}_sum{_labels(base)} {_number(hist.sum)}")
+            lines.append(f"bist_{name}_count{_labels(base)} {hist.count}")
+        for name, sample in self.samples.items():
+            lines.append(f"# TYPE bist_{name} summary")
+            for q, value in sample.quantiles().items():
+                lines.append(f"bist_{name}{_labels({**base, 'quantile': f'{q:g}'})} {_number(value)}")
+            lines.append(f"bist_{name}_sum{_labels(base)} {_number(sample.sum)}")
+            lines.append(f"bist_{name}_count{_labels(base)} {sample.count}")
+        caches = self.cache_counts()
+        emit('cache_hits_total', 'counter', [({'cache': n}, h) for n, (h, _) in caches.items()])
+        emit('cache_misses_total', 'counter', [({'cache': n}, m) for n, (_, m) in caches.items()])
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self):
+        """Telegram mesajı için tek satır (Markdown özel karakteri içermez)"""
+        parts = [f"⏱ {self.elapsed():.1f} sn"]
+        if 'first_result' in _timings:
+            parts.append(f"ilk sonuç {_timings['first_result']:.1f} sn")
+        flow = [r.tickers_out for r in self.stages.values() if r.tickers_out is not None]
+        first = next((r.tickers_in for r in self.stages.values() if r.tickers_in is not None), None)
+        if first is not None and flow:
+            parts.append("hisse " + "→".join(str(n) for n in [first] + flow))
+        caches = self.cache_counts()
+        hits = sum(h for h, _ in caches.values())
+        total = hits + sum(m for _, m in caches.values())
+        if total:
+            parts.append(f"önbellek %{hits / total * 100:.0f}")
+        failures = sum(self.counters.get('fetch_failures', {}).values())
+        rejected = sum(self.counters.get('validation_rejections', {}).values())
+        if failures or rejected:
+            parts.append(f"hata {failures} / ret {rejected}")
+        return " | ".join(parts)
+
+    def write(self):
+        """JSON ve .prom dosyalarını yazar; yazılan yolları döndürür"""
+        if not self.directory:
+            return []
+        os.makedirs(self.directory, exist_ok=True)
+        paths = []
+        for suffix, content in (('json', json.dumps(self.to_dict(), indent=2, ensure_ascii=False)),
+                                ('prom', self.to_prometheus())):
+            path = os.path.join(self.directory, f"{self.name}.{suffix}")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            paths.append(path)
+        return paths
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
+
+
+# -------------------- ETKİN ÇALIŞTIRMA --------------------
+_active = None
+
+
+def start_run(name, **labels):
+    """Yeni çalıştırma başlatır ve onu etkin yapar (ortam değişkenleri okunur)"""
+    global _active
+    directory = os.environ.get('BIST_METRICS_DIR', DEFAULT_METRICS_DIR)
+    profile = os.environ.get('BIST_PROFILE', '') not in ('', '0')
+    _active = RunMetrics(name, directory or None, profile)
+    _active.labels.update(labels)
+    return _active
+
+
+def active():
+    """Etkin çalıştırma; yoksa atılacak geçici bir kayıt (çağrılar her zaman güvenli)"""
+    return _active if _active is not None else RunMetrics('adhoc')
+
+
+def count(name, label='', n=1):
+    active().count(name, label, n)
@@ -0,0 +1,285 @@
+"""
+Strateji parametreleri için paralel tarama (grid / rastgele örnek).
+
+Hizalanmış fiyat paneli bir kez geçici dizine .npy olarak yazılır ve
+işçi süreçler onu salt okunur bellek eşlemesiyle (mmap) paylaşır; panel
+işçilere kopyalanmaz. Kombinasyonlar indikatör parametrelerine göre
+gruplanır: aynı gruptaki çarpan/pullback/risk değişimleri SuperTrend'i
+bir kez, true range ve ATR'yi işçi başına pencere başına bir kez hesaplar.
+
+Her kombinasyon tüm dönem boyunca bir kez simüle edilir; özsermaye eğrisi
+çapalı ileri yürüyen (walk-forward) pencerelere bölünerek örneklem içi
+(IS) ve örneklem dışı (OOS) skorlar çıkarılır.
+"""
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from backtest import (ATR_PERIOD, MAX_PULLBACK_ATR, RISK_PER_TRADE, SUPER_TREND_MULT,
+                      SUPER_TREND_PERIOD, DatePanel, aggressive_signals, align_frames,
+                      balanced_signals, simulate, supertrend_signals)
+from indicators import supertrend, true_range, wilder_atr
+
+# Strateji -> parametre -> denenecek değerler
+DEFAULT_SPACES = {
+    'SUPERTREND': {
+        'period': [7, SUPER_TREND_PERIOD, 14],
+        'multiplier': [2.0, 2.5, SUPER_TREND_MULT, 3.5],
+        'atr_period': [10, ATR_PERIOD, 20],
+        'max_pullback_atr': [1.0, 1.5, MAX_PULLBACK_ATR, 3.0],
+        'risk_per_trade': [0.005, RISK_PER_TRADE, 0.02],
+    },
+    'AGRESİF': {'rsi_window': [5, 7, 9, 14], 'risk_per_trade': [0.005, RISK_PER_TRADE, 0.02]},
+    'DENGELİ': {'rsi_window': [10, 14, 21], 'ma_window': [100, 150, 200],
+                'risk_per_trade': [0.005, RISK_PER_TRADE, 0.02]},
+}
+# Aynı indikatör hesabını paylaşan parametreler (iş birimi)
+GROUP_KEYS = {
+    'SUPERTREND': ('period', 'multiplier', 'atr_period'),
+    'AGRESİF': ('rsi_window',),
+    'DENGELİ': ('rsi_window', 'ma_window'),
+}
+SIMULATION_KEYS = ('risk_per_trade', 'max_positions', 'portfolio_size')
+METRICS = ('sharpe', 'return', 'calmar')
+SUMMARY_COLUMNS = ('is_score', 'oos_score', 'total_return', 'max_drawdown', 'trades', 'hit_rate')
+DEFAULT_FOLDS = 4
+
+
+# -------------------- PARAMETRE UZAYI --------------------
+def grid(space):
+    """Tüm kombinasyonlar (sözlük listesi)"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_sample(space, count, seed=0):
+    """Grid'den tekrarsız 'count' rastgele kombinasyon"""
+    combos = grid(space)
+    if count >= len(combos):
+        return combos
+    return random.Random(seed).sample(combos, count)
+
+
+# -------------------- PAYLAŞIMLI PANEL --------------------
+def save_panel(panel, directory):
+    """DatePanel'i alan başına bir .npy dosyası olarak yazar"""
+    os.makedirs(directory, exist_ok=True)
+    for field, values in panel.fields.items():
+        np.save(os.path.join(directory, f"{field}.npy"), np.ascontiguousarray(values))
+    np.save(os.path.join(directory, 'index.npy'), panel.index.asi8)
+    with open(os.path.join(directory, 'panel.json'), 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'tickers': panel.tickers, 'fields': list(panel.fields)}))
+
+
+def load_panel(directory, mmap_mode='r'):
+    """save_panel çıktısını (varsayılan: salt okunur mmap) yükler"""
+    with open(os.path.join(directory, 'panel.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    # np.memmap alt sınıfı satır erişiminde yavaş; aynı belleğe düz ndarray görünümü
+    fields = {field: np.asarray(np.load(os.path.join(directory, f"{field}.npy"),
+                                        mmap_mode=mmap_mode))
+              for field in meta['fields']}
+    index = pd.DatetimeIndex(np.load(os.path.join(directory, 'index.npy')))
+    return DatePanel(index, meta['tickers'], fields)
+
+
+# -------------------- İŞÇİ --------------------
+_panel = None
+_cache = {}
+
+
+def _init_worker(directory):
+    global _panel
+    _panel = load_panel(directory)
+    _cache.clear()
+
+
+def _release_worker():
+    global _panel
+    _panel = None
+    _cache.clear()
+
+
+def _cached(key, compute):
+    if key not in _cache:
+        _cache[key] = compute()
+    return _cache[key]
+
+
+def _atr(window):
+    fields = _panel.fields
+    tr = _cached('tr', lambda: true_range(fields['High'], fields['Low'], fields['Close']))
+    return _cached(('atr', window), lambda: wilder_atr(tr, window))
+
+
+def _signal_builder(strategy, group):
+    """Grup parametreleriyle, kalan parametreleri alan sinyal fonksiyonu"""
+    panel = _panel
+    if strategy == 'SUPERTREND':
+        fields = panel.fields
+        result = supertrend(fields['High'], fields['Low'], fields['Close'],
+                            period=group['period'], multiplier=group['multiplier'],
+                            atr_period=group['atr_period'], band_atr=_atr(group['period']),
+                            atr=_atr(group['atr_period']))
+        return lambda **options: supertrend_signals(panel, result=result, **options)
+    build = aggressive_signals if strategy == 'AGRESİF' else balanced_signals
+    return lambda **options: build(panel, **group, **options)
+
+
+def _evaluate_group(strategy, group, combos, folds, metric):
+    builder = _signal_builder(strategy, group)
+    signals_cache = {}
+    rows = []
+    for combo in combos:
+        signal_options = {k: v for k, v in combo.items()
+                          if k not in group and k not in SIMULATION_KEYS}
+        key = tuple(sorted(signal_options.items()))
+        if key not in signals_cache:
+            signals_cache[key] = builder(**signal_options)
+        sim_options = {k: combo[k] for k in SIMULATION_KEYS if k in combo}
+        result = simulate(_panel, signals_cache[key], **sim_options)
+        rows.append({**combo, **fold_scores(result, folds, metric)})
+    return rows
+
+
+# -------------------- SKOR --------------------
+def score(equity, ppy, metric='sharpe'):
+    """Özsermaye dilimi için skor (sharpe, return veya calmar)"""
+    if len(equity) < 2 or not equity[0] > 0:
+        return math.nan
+    total = equity[-1] / equity[0] - 1
+    if metric == 'return':
+        return total
+    if metric == 'calmar':
+        drawdown = -(equity / np.maximum.accumulate(equity) - 1).min()
+        years = (len(equity) - 1) / ppy
+        cagr = (1 + total) ** (1 / years) - 1 if total > -1 else -1.0
+        return cagr / drawdown if drawdown > 0 else math.nan
+    returns = np.diff(equity) / equity[:-1]
+    std = returns.std()
+    return returns.mean() / std * math.sqrt(ppy) if std > 0 else math.nan
+
+
+def fold_bounds(n_bars, folds):
+    """Çapalı walk-forward: k. katmanda IS [0, b_k), OOS [b_k, b_k+1)"""
+    edges = np.linspace(0, n_bars, folds + 2).astype(int)
+    return [(edges[k], edges[k + 1]) for k in range(1, folds + 1)]
+
+
+def fold_scores(result, folds, metric):
+    equity = result.equity.to_numpy()
+    ppy = result.periods_per_year
+    row = {}
+    for k, (split, end) in enumerate(fold_bounds(len(equity), folds), start=1):
+        row[f'is_{k}'] = score(equity[:split], ppy, metric)
+        # OOS getirisi bölünme barındaki kapanıştan başlar
+        row[f'oos_{k}'] = score(equity[max(0, split - 1):end], ppy, metric)
+    stats = result.stats
+    row.update({
+        'is_score': _mean(row[f'is_{k}'] for k in range(1, folds + 1)),
+        'oos_score': _mean(row[f'oos_{k}'] for k in range(1, folds + 1)),
+        'total_return': stats.get('total_return', math.nan),
+        'max_drawdown': stats.get('max_drawdown', math.nan),
+        'trades': stats.get('trades', 0),
+        'hit_rate': stats.get('hit_rate', math.nan),
+    })
+    return row
+
+
+def _mean(values):
+    values = [v for v in values if not math.isnan(v)]
+    return sum(values) / len(values) if values else math.nan
+
+
+def walk_forward(table, folds):
+    """Her katmanda IS skoru en iyi kombinasyonun OOS skoru (gerçek WFO tahmini)"""
+    rows = []
+    params = [c for c in table.columns
+              if c not in SUMMARY_COLUMNS and not c.startswith(('is_', 'oos_'))]
+    for k in range(1, folds + 1):
+        if f'is_{k}' not in table:
+            continue
+        ranked = table.dropna(subset=[f'is_{k}'])
+        if ranked.empty:
+            continue
+        best = ranked.loc[ranked[f'is_{k}'].idxmax()]
+        rows.append({'fold': k, 'is': best[f'is_{k}'], 'oos': best[f'oos_{k}'],
+                     'params': {c: best[c] for c in params}})
+    return pd.DataFrame(rows, columns=['fold', 'is', 'oos', 'params'])
+
+
+# -------------------- TARAMA --------------------
+def run_sweep(frames, strategy, space=None, samples=None, folds=DEFAULT_FOLDS, metric='sharpe',
+              workers=None, seed=0, workdir=None):
+    """
+    (OOS skoruna göre sıralı sonuç tablosu, walk-forward özeti) döndürür.
+    samples verilirse grid yerine o kadar rastgele kombinasyon denenir.
+    """
+    strategy = strategy.upper()
+    if strategy not in GROUP_KEYS:
+        raise ValueError(f"Strateji {', '.join(GROUP_KEYS)} olmalıdır.")
+    if metric not in METRICS:
+        raise ValueError(f"Metrik {', '.join(METRICS)} olmalıdır.")
+    space = space or DEFAULT_SPACES[strategy]
+    combos = random_sample(space, samples, seed) if samples else grid(space)
+
+    groups = {}
+    for combo in combos:
+        key = tuple((k, combo[k]) for k in GROUP_KEYS[strategy] if k in combo)
+        groups.setdefault(key, []).append(combo)
+    workers = min(workers or os.cpu_count() or 1, len(groups)) or 1
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix='sweep_', dir=workdir) as directory:
+        save_panel(frames if isinstance(frames, DatePanel) else align_frames(frames), directory)
+        if workers > 1:
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(directory,)) as executor:
+                futures = [executor.submit(_evaluate_group, strategy, dict(key), members,
+                                           folds, metric) for key, members in groups.items()]
+                for future in as_completed(futures):
+                    rows.extend(future.result())
+        else:
+            _init_worker(directory)
+            try:
+                for key, members in groups.items():
+                    rows.extend(_evaluate_group(strategy, dict(key), members, folds, metric))
+            finally:
+                _release_worker()
+
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table, walk_forward(table, folds)
+    table = table.sort_values('oos_score', ascending=False, na_position='last',
+                              kind='stable').reset_index(drop=True)
+    return table, walk_forward(table, folds)
+
+
+# -------------------- KOMUT SATIRI --------------------
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2 or argv[0].upper() not in GROUP_KEYS:
+        print("Kullanım: python param_sweep.py AGRESİF|DENGELİ|SUPERTREND <sembol> [<sembol> ...]")
+        return 2
+    from data_provider import get_default_loader
+
+    strategy, tickers = argv[0].upper(), argv[1:]
+    interval = '1wk' if strategy == 'SUPERTREND' else '1d'
+    panel = get_default_loader().load(tickers, period='10y', interval=interval)
+    table, summary = run_sweep(panel.frames, strategy)
+    print(f"🔧 {strategy}: {len(table)} kombinasyon, {len(panel.tickers)} hisse")
+    print(table.head(20).to_string(index=False))
+    print(summary.to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
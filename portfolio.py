@@ -0,0 +1,169 @@
+"""
+Korelasyona duyarlı portföy kurulumu.
+
+Tarama en yüksek R-Score'lu adayları verir; birbirine çok benzeyen üç
+büyük şirketin birlikte seçilmesi işlem başı riski fiilen üçe katlar.
+Burada taranan tüm evrenin (önbellekten gelen) kapanışlarından getiri
+matrisi tek adımda kurulur (barlar tarihe göre, haftalıkta takvim
+haftasına göre hizalanır) ve Ledoit-Wolf daralmalı kovaryans (hedef: sabit
+korelasyon) hesaplanır. Adaylar R-Score sırasıyla açgözlü seçilir:
+
+- seçilmiş bir hisseyle korelasyonu üst sınırı aşan aday atlanır,
+- stop'ların birlikte tetiklenme riski sqrt(L' C L) (L: pozisyon başına
+  dolar risk, C: korelasyon) risk bütçesini aşacaksa aday bütçeye sığacak
+  kadar küçültülür; sığmıyorsa atlanır.
+
+Geçmişi yetersiz hisselerin korelasyonu evren ortalaması kabul edilir.
+"""
+import numpy as np
+
+from timeframes import DERIVED_INTERVALS, period_keys
+
+DEFAULT_LOOKBACK = 52       # Getiri sayısı (haftalıkta ~1 yıl)
+MIN_PERIODS_RATIO = 0.5     # Kovaryansa girmek için gereken gözlem oranı
+
+
+# -------------------- GETİRİLER --------------------
+def return_matrix(closes, interval='1wk', lookback=DEFAULT_LOOKBACK):
+    """
+    {sembol: kapanış Series} -> (semboller, (lookback × sembol) log getiri).
+    Satırlar son 'lookback' dönemdir; eksik barlar NaN kalır.
+    """
+    tickers = [t for t, s in closes.items() if s is not None and len(s) > 1]
+    if not tickers:
+        return [], np.zeros((0, 0))
+    keys, columns, values = [], [], []
+    for j, ticker in enumerate(tickers):
+        series = closes[ticker]
+        index = series.index
+        if getattr(index, 'tz', None) is not None:
+            index = index.tz_localize(None)     # Borsa yerel tarihi
+        days = index.values.astype('datetime64[D]').astype(np.int64)
+        keys.append(period_keys(days, interval) if interval in DERIVED_INTERVALS else days)
+        columns.append(np.full(len(days), j))
+        values.append(series.to_numpy(dtype=np.float64))
+    keys, columns, values = np.concatenate(keys), np.concatenate(columns), np.concatenate(values)
+
+    periods, rows = np.unique(keys, return_inverse=True)   # Hiç barı olmayan günler satır olmaz
+    prices = np.full((len(periods), len(tickers)), np.nan)
+    prices[rows, columns] = values
+    prices = prices[-(lookback + 1):]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(np.where(prices > 0, prices, np.nan)), axis=0)
+    return tickers, returns
+
+
+# -------------------- KOVARYANS --------------------
+def shrinkage_covariance(returns):
+    """
+    Ledoit-Wolf (2003) sabit korelasyon hedefine daraltılmış kovaryans.
+    NaN getiriler sütun ortalamasıyla (sıfır sapma) doldurulur.
+    (kovaryans, daralma katsayısı, ortalama korelasyon) döndürür.
+    """
+    T, n = returns.shape
+    x = returns - np.nanmean(returns, axis=0)
+    x = np.where(np.isnan(x), 0.0, x)
+    sample = x.T @ x / T
+    var = np.diag(sample).copy()
+    sd = np.sqrt(var)
+    if n < 2 or T < 2:
+        return sample, 0.0, 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_sd = np.where(sd > 0, 1.0 / sd, 0.0)
+    corr = sample * np.outer(inv_sd, inv_sd)
+    mean_corr = (corr.sum() - np.trace(corr)) / (n * (n - 1))
+    target = mean_corr * np.outer(sd, sd)
+    np.fill_diagonal(target, var)
+
+    x2 = x ** 2
+    pi_mat = x2.T @ x2 / T - sample ** 2
+    pi = pi_mat.sum()
+    theta = (x ** 3).T @ x / T - var[:, None] * sample
+    ratio = np.outer(inv_sd, sd)                     # sd_j / sd_i
+    off = ratio * theta
+    rho = np.trace(pi_mat) + mean_corr * (off.sum() - np.trace(off))
+    gamma = ((target - sample) ** 2).sum()
+    shrinkage = 0.0 if gamma <= 0 else float(np.clip((pi - rho) / gamma / T, 0.0, 1.0))
+    return shrinkage * target + (1 - shrinkage) * sample, shrinkage, float(mean_corr)
+
+
+class RiskModel:
+    """Evren genelinde daraltılmış korelasyon matrisi"""
+
+    def __init__(self, tickers, cov, shrinkage=0.0, mean_correlation=0.0):
+        self.tickers = list(tickers)
+        self.cov = cov
+        self.shrinkage = shrinkage
+        self.mean_correlation = mean_correlation
+        sd = np.sqrt(np.diag(cov)) if len(self.tickers) else np.zeros(0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_sd = np.where(sd > 0, 1.0 / sd, 0.0)
+        self.corr = cov * np.outer(inv_sd, inv_sd)
+        np.fill_diagonal(self.corr, 1.0)
+        self._index = {t: j for j, t in enumerate(self.tickers)}
+
+    @classmethod
+    def from_closes(cls, closes, interval='1wk', lookback=DEFAULT_LOOKBACK):
+        tickers, returns = return_matrix(closes, interval, lookback)
+        enough = np.sum(~np.isnan(returns), axis=0) >= max(2, int(len(returns) * MIN_PERIODS_RATIO))
+        tickers = [t for t, ok in zip(tickers, enough) if ok]
+        cov, shrinkage, mean_corr = shrinkage_covariance(returns[:, enough])
+        return cls(tickers, cov, shrinkage, mean_corr)
+
+    def correlation_matrix(self, tickers):
+        """Verilen semboller arası korelasyon; modelde olmayanlar ortalama korelasyonla"""
+        idx = np.array([self._index.get(t, -1) for t in tickers], dtype=np.int64)
+        known = idx >= 0
+        out = np.full((len(tickers), len(tickers)), self.mean_correlation)
+        out[np.ix_(known, known)] = self.corr[np.ix_(idx[known], idx[known])]
+        np.fill_diagonal(out, 1.0)
+        return out
+
+
+# -------------------- SEÇİM --------------------
+def select_portfolio(candidates, model, max_positions, risk_budget, max_correlation):
+    """
+    R-Score sırasındaki adaylardan açgözlü seçim. risk_budget dolar
+    cinsinden korelasyonlu toplam stop riskidir. Adaylar 'shares',
+    'price', 'stop' taşır; küçültülen adayların hisse, pozisyon ve risk
+    değerleri güncellenir. (seçilenler, {atlama nedeni: sayı}) döndürür.
+    """
+    candidates = list(candidates)
+    corr = model.correlation_matrix([c['ticker'] for c in candidates])
+    chosen, risks, skipped = [], [], {}
+    for i, candidate in enumerate(candidates):
+        if len(chosen) >= max_positions:
+            break
+        c = corr[i, chosen] if chosen else np.zeros(0)
+        if len(c) and c.max() > max_correlation:
+            skipped['korelasyon'] = skipped.get('korelasyon', 0) + 1
+            continue
+        L = np.array(risks)
+        current = float(L @ corr[np.ix_(chosen, chosen)] @ L) if chosen else 0.0
+        risk = candidate['actual_risk']
+        # (s·risk) eklenince toplam varyans bütçeye eşit olacak en büyük s (en fazla 1)
+        b = risk * float(c @ L) if chosen else 0.0
+        disc = b * b - risk * risk * (current - risk_budget ** 2)
+        scale = min(1.0, (-b + np.sqrt(disc)) / (risk * risk)) if disc >= 0 and risk > 0 else 0.0
+        shares = int(candidate['shares'] * scale)
+        if shares < 1:
+            skipped['risk_bütçesi'] = skipped.get('risk_bütçesi', 0) + 1
+            continue
+        if shares != candidate['shares']:
+            risk_per_share = candidate['price'] - candidate['stop']
+            candidate = dict(candidate, shares=shares, position_value=shares * candidate['price'],
+                             actual_risk=shares * risk_per_share)
+        candidate['max_correlation'] = float(c.max()) if len(c) else 0.0
+        chosen.append(i)
+        risks.append(candidate['actual_risk'])
+        candidates[i] = candidate
+    return [candidates[i] for i in chosen], skipped
+
+
+def portfolio_risk(candidates, model):
+    """Seçilen pozisyonların korelasyonlu toplam stop riski (dolar)"""
+    if not candidates:
+        return 0.0
+    L = np.array([c['actual_risk'] for c in candidates])
+    corr = model.correlation_matrix([c['ticker'] for c in candidates])
+    return float(np.sqrt(L @ corr @ L))
@@ -0,0 +1,222 @@
+"""
+Açık/kapalı pozisyon defteri (SQLite).
+
+Haftalık tarama (Pazar) her alım adayını giriş fiyatı, hisse adedi, stop,
+hedef ve R-Score ile deftere yazar. Perşembe satış kontrolü yalnızca açık
+pozisyonları okur, son kontrolden sonraki barlarda stop/hedef ve SuperTrend
+dönüşünü arar ve kapanan pozisyonları tek işlemde (transaction) günceller.
+
+Sembol, durum ve giriş tarihi indekslidir; bir sembolün aynı anda en fazla
+bir açık pozisyonu olabilir. JSON dışa aktarımı (haftalik_pozisyonlar.json)
+iş akışının artifact adımı için tutulur ve geri yüklenebilir.
+
+    python position_ledger.py export|import <dosya.json>
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+DEFAULT_LEDGER_FILE = 'positions.db'
+DEFAULT_EXPORT_FILE = 'haftalik_pozisyonlar.json'
+
+COLUMNS = ('id', 'ticker', 'status', 'entry_date', 'entry_price', 'shares', 'stop', 'target',
+           'r_score', 'position_value', 'actual_risk', 'last_checked', 'exit_date',
+           'exit_price', 'exit_reason')
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    id INTEGER PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'open',
+    entry_date TEXT NOT NULL,
+    entry_price REAL NOT NULL,
+    shares INTEGER NOT NULL,
+    stop REAL NOT NULL,
+    target REAL,
+    r_score REAL,
+    position_value REAL,
+    actual_risk REAL,
+    last_checked TEXT,
+    exit_date TEXT,
+    exit_price REAL,
+    exit_reason TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_positions_ticker ON positions (ticker);
+CREATE INDEX IF NOT EXISTS idx_positions_status ON positions (status);
+CREATE INDEX IF NOT EXISTS idx_positions_entry_date ON positions (entry_date);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_positions_open_ticker
+    ON positions (ticker) WHERE status = 'open';
+"""
+
+
+class PositionLedger:
+    """SQLite pozisyon defteri; path verilmezse bellekte tutulur"""
+
+    def __init__(self, path=None):
+        self.path = path
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path or ':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- yazma ---
+    def record(self, candidates, entry_date):
+        """
+        Tarama adaylarını açık pozisyon olarak ekler; zaten açık pozisyonu
+        olan semboller atlanır. Eklenen pozisyon sayısını döndürür.
+        """
+        entry_date = str(pd.Timestamp(entry_date).date())
+        rows = [(c['ticker'], entry_date, float(c['price']), int(c['shares']), float(c['stop']),
+                 _optional(c.get('target')), _optional(c.get('r_score')),
+                 _optional(c.get('position_value')), _optional(c.get('actual_risk')), entry_date)
+                for c in candidates]
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO positions (ticker, entry_date, entry_price, shares, stop, "
+                "target, r_score, position_value, actual_risk, last_checked) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return self.conn.total_changes - before
+
+    def close_many(self, exits, checked=None):
+        """
+        exits: [{'id', 'exit_date', 'exit_price', 'exit_reason'}] pozisyonları
+        kapatır; checked: {id: son kontrol edilen bar tarihi} açık kalanları
+        günceller. Hepsi tek işlemde yapılır.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE positions SET status = 'closed', exit_date = ?, exit_price = ?, "
+                "exit_reason = ?, last_checked = ? WHERE id = ? AND status = 'open'",
+                [(e['exit_date'], float(e['exit_price']), e['exit_reason'], e['exit_date'], e['id'])
+                 for e in exits])
+            if checked:
+                self.conn.executemany(
+                    "UPDATE positions SET last_checked = ? WHERE id = ? AND status = 'open'",
+                    [(day, position_id) for position_id, day in checked.items()])
+
+    # --- okuma ---
+    def open_positions(self):
+        rows = self.conn.execute(
+            "SELECT * FROM positions WHERE status = 'open' ORDER BY entry_date, id")
+        return [dict(row) for row in rows]
+
+    def positions(self, status=None, since=None):
+        """Duruma ve/veya giriş tarihine (>= since) göre pozisyonlar"""
+        query, args = "SELECT * FROM positions WHERE 1 = 1", []
+        if status:
+            query += " AND status = ?"
+            args.append(status)
+        if since:
+            query += " AND entry_date >= ?"
+            args.append(str(pd.Timestamp(since).date()))
+        return [dict(row) for row in self.conn.execute(query + " ORDER BY entry_date, id", args)]
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    # --- JSON ---
+    def export_json(self, path=DEFAULT_EXPORT_FILE):
+        """Tüm defteri JSON olarak atomik yazar"""
+        payload = {'exported': time.strftime('%Y-%m-%dT%H:%M:%S'), 'positions': self.positions()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(payload, indent=2, ensure_ascii=False))
+        os.replace(tmp_path, path)
+        return len(payload['positions'])
+
+    def import_json(self, path=DEFAULT_EXPORT_FILE):
+        """export_json çıktısını (id'ye göre üzerine yazarak) yükler"""
+        with open(path, encoding='utf-8') as f:
+            positions = json.load(f).get('positions', [])
+        rows = [tuple(p.get(c) for c in COLUMNS) for p in positions]
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO positions ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+        return len(rows)
+
+
+def _optional(value):
+    return None if value is None else float(value)
+
+
+# -------------------- ÇIKIŞ KONTROLÜ --------------------
+def check_exit(position, frame, direction=None):
+    """
+    Pozisyonun son kontrolünden (o gün dahil; bar sonradan tamamlanmış
+    olabilir) sonraki barlarda sırayla stop ve hedefi arar; boşlukla
+    açılışta geçilen seviyede açılış fiyatından çıkılır. Aynı barda ikisi
+    de görülürse stop varsayılır. Seviye görülmediyse ve son bardaki
+    SuperTrend yönü (direction) -1 ise son kapanıştan çıkılır.
+    (çıkış sözlüğü ya da None, son kontrol edilen bar tarihi) döndürür.
+    """
+    dates = frame.index.strftime('%Y-%m-%d')
+    since = position['last_checked'] or position['entry_date']
+    new = dates >= since
+    if since == position['entry_date']:
+        new = dates > since   # Giriş barı çıkış için sayılmaz
+    if not new.any():
+        return None, position['last_checked']
+
+    bars = frame[new]
+    stop, target = position['stop'], position['target']
+    for day, bar in zip(dates[new], bars.itertuples()):
+        if bar.Low <= stop:
+            return _exit(position, day, min(bar.Open, stop), 'stop'), day
+        if target is not None and bar.High >= target:
+            return _exit(position, day, max(bar.Open, target), 'hedef'), day
+    last_day = dates[new][-1]
+    if direction == -1:
+        return _exit(position, last_day, bars['Close'].iloc[-1], 'trend'), last_day
+    return None, last_day
+
+
+def _exit(position, day, price, reason):
+    price = float(price)
+    return {'id': position['id'], 'ticker': position['ticker'], 'exit_date': day,
+            'exit_price': price, 'exit_reason': reason,
+            'pnl': (price - position['entry_price']) * position['shares'],
+            'return': price / position['entry_price'] - 1}
+
+
+def get_default_ledger():
+    """BIST_LEDGER_PATH (varsayılan 'positions.db') dosyasındaki defter"""
+    return PositionLedger(os.environ.get('BIST_LEDGER_PATH', DEFAULT_LEDGER_FILE))
+
+
+# -------------------- KOMUT SATIRI --------------------
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] not in ('export', 'import'):
+        print("Kullanım: python position_ledger.py export|import <dosya.json>")
+        return 2
+    command, path = argv
+    with get_default_ledger() as ledger:
+        if command == 'export':
+            count = ledger.export_json(path)
+            print(f"💾 {count} pozisyon dışa aktarıldı: {path}")
+        elif not os.path.exists(path):
+            logging.warning(f"Pozisyon dosyası yok, atlanıyor: {path}")
+        else:
+            count = ledger.import_json(path)
+            print(f"📂 {count} pozisyon yüklendi: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
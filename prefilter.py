@@ -0,0 +1,112 @@
+"""
+Fiyat geçmişi indirilmeden önce evreni daraltan ucuz ön filtre.
+
+Temel veri deposundaki (TTL önbellekli) piyasa değeri, ortalama günlük
+hacim, son fiyat, sektör ve gelir büyümesi sembol indeksli bir anlık
+görüntü tablosuna dönüştürülür; kurallar sütun üzerinde vektörel maske
+olarak uygulanır. Geçmiş yalnızca kalan semboller için çekilir.
+
+Eksik değer, kural tanımlı bir sütunda 'missing' ayarına göre elenir ya
+da tutulur: piyasa değeri olmayan hisseler zaten strateji filtresinden
+geçemez, hacmi bilinmeyenlerin kararı ise kesin kontrole bırakılır.
+
+prefilter() yalnızca kuralların kullandığı alanları ister ve max_age ile
+alanların TTL'inden eski değerleri kabul edebilir: haftalık taramanın
+gevşetilmiş hacim eşiği için bir aylık ortalama hacim yeterlidir, her
+çalıştırmada sembol başına Ticker.info isteği atılmaz.
+"""
+import numpy as np
+import pandas as pd
+
+# Anlık görüntü sütunu -> temel veri alanı
+SNAPSHOT_FIELDS = {
+    'market_cap': 'marketCap',
+    'avg_volume': 'averageVolume',
+    'last_price': 'regularMarketPrice',
+    'revenue_growth': 'revenueGrowth',
+    'sector': 'sector',
+}
+# Kural -> (sütun, karşılaştırma)
+RULES = {
+    'min_market_cap': ('market_cap', np.greater_equal),
+    'max_market_cap': ('market_cap', np.less_equal),
+    'min_revenue_growth': ('revenue_growth', np.greater),
+    'min_avg_volume': ('avg_volume', np.greater_equal),
+    'min_price': ('last_price', np.greater_equal),
+}
+
+
+def rule_columns(rules):
+    """Kuralların kullandığı anlık görüntü sütunları"""
+    columns = []
+    for rule, threshold in rules.items():
+        if threshold is None:
+            continue
+        if rule in ('sectors', 'exclude_sectors'):
+            columns.append('sector')
+        elif rule in RULES:
+            columns.append(RULES[rule][0])
+        else:
+            raise ValueError(f"Bilinmeyen ön filtre kuralı: {rule}")
+    return list(dict.fromkeys(columns))
+
+
+def build_snapshot(store, tickers, columns=None, max_age=None):
+    """
+    Sembol indeksli anlık görüntü (eksik alanlar NaN/None). columns verilirse
+    depodan yalnızca o sütunların alanları istenir; diğer sütunlar boş kalır.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    fields = [SNAPSHOT_FIELDS[c] for c in (SNAPSHOT_FIELDS if columns is None else columns)]
+    data = store.get_many(tickers, fields, max_age=max_age) if fields else {}
+    rows = {t: {column: data.get(t, {}).get(field) for column, field in SNAPSHOT_FIELDS.items()}
+            for t in tickers}
+    snapshot = pd.DataFrame.from_dict(rows, orient='index', columns=list(SNAPSHOT_FIELDS))
+    numeric = [c for c in SNAPSHOT_FIELDS if c != 'sector']
+    snapshot[numeric] = snapshot[numeric].apply(pd.to_numeric, errors='coerce')
+    return snapshot.reindex(tickers)
+
+
+def apply_rules(snapshot, rules, missing=None, defaults=None):
+    """
+    (geçen semboller, {kural: elenen sayı}) döndürür.
+    rules: {'min_market_cap': 1e10, 'sectors': [...], 'exclude_sectors': [...], ...}
+    missing: {kural: True} ise o kuralın sütunu eksik olan sembol tutulur
+    (varsayılan: elenir). defaults: {sütun: değer} eksik değerin yerine
+    kullanılır (ör. gelir büyümesi için 0.0, filter_by_... ile aynı).
+    """
+    missing, defaults = missing or {}, defaults or {}
+    keep = np.ones(len(snapshot), dtype=bool)
+    rejected = {}
+    for rule, threshold in rules.items():
+        if threshold is None:
+            continue
+        if rule in ('sectors', 'exclude_sectors'):
+            column = snapshot['sector']
+            known = column.notna().to_numpy()
+            inside = column.isin(list(threshold)).to_numpy()
+            passed = inside if rule == 'sectors' else ~inside
+        elif rule in RULES:
+            name, compare = RULES[rule]
+            values = snapshot[name]
+            if name in defaults:
+                values = values.fillna(defaults[name])
+            values = values.to_numpy(dtype=np.float64)
+            known = ~np.isnan(values)
+            with np.errstate(invalid='ignore'):
+                passed = compare(values, threshold)
+        else:
+            raise ValueError(f"Bilinmeyen ön filtre kuralı: {rule}")
+        passed = np.where(known, passed, bool(missing.get(rule)))
+        rejected[rule] = int((keep & ~passed).sum())
+        keep &= passed
+    return snapshot.index[keep].tolist(), rejected
+
+
+def prefilter(store, tickers, rules, missing=None, defaults=None, max_age=None):
+    """
+    Depodan yalnızca kuralların alanlarıyla anlık görüntüyü kurup kuralları
+    uygular (apply_rules çıktısı); max_age için bkz. FundamentalsStore.get_many
+    """
+    snapshot = build_snapshot(store, tickers, rule_columns(rules), max_age)
+    return apply_rules(snapshot, rules, missing, defaults)
@@ -0,0 +1,154 @@
+"""
+Analiz sonuçları için kalıcı LRU önbellek.
+
+Aynı gün yeniden çalıştırma (workflow_dispatch, Telegram hatası sonrası
+tekrar, iki stratejinin ayrı çalıştırılması) barları değişmemiş hisseler
+için indikatör ve skor hesabını baştan yapar. Burada sonuçlar (aday
+sözlüğü ya da skor satırı; sinyal yoksa None) şu anahtarla saklanır:
+
+    ad alanı | sembol | aralık | son bar zamanı (UTC ns) | parametre özeti
+
+Son bar değişince anahtar da değişir; eski kayıtlar erişilmedikçe LRU
+sırasıyla düşer. Son barı henüz kapanmamış (market_calendar.final_bars)
+hisselerin sonucu saklanmaz: seans sürerken bar aynı zaman damgasıyla
+değişmeye devam eder ve anahtar bunu ayırt edemez. Parametre özeti RESULT_VERSION'ı da içerir; kuralların
+kodu değiştiğinde sürüm artırılarak tüm kayıtlar geçersiz kılınır.
+
+Kayıtlar bar önbelleği dizininde JSON olarak (en son kullanılan sonda)
+tutulur; sıcak anlık görüntü (warm_state) varsa 'analysis_results'
+bölümü eklenir. BIST_RESULT_CACHE_SIZE kayıt üst sınırıdır (0: kapalı).
+"""
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_RESULT_FILE = 'analysis_results.json'
+DEFAULT_CAPACITY = 20_000
+RESULT_VERSION = 1
+
+MISSING = object()   # get(): kayıt yok (None geçerli bir sonuçtur: sinyal yok)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def params_digest(params, extra=None):
+    """Parametrelerin (ve varsa sembole özgü ek değerlerin) kısa özeti"""
+    payload = json.dumps({'version': RESULT_VERSION, 'params': params}, sort_keys=True,
+                         default=_json_default).encode('utf-8')
+    h = hashlib.sha1(payload)
+    if extra is not None:
+        h.update(extra)
+    return h.hexdigest()[:16]
+
+
+class ResultCache:
+    """(ad alanı, sembol, aralık, son bar, parametre özeti) anahtarlı LRU sonuç deposu"""
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self.merge(self._load())
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Sonuç önbelleği okunamadı, sıfırlanıyor: {e}")
+            return {}
+
+    @staticmethod
+    def key(namespace, symbol, interval, last_ts, digest):
+        return f"{namespace}|{symbol}|{interval}|{int(last_ts)}|{digest}"
+
+    def get(self, namespace, symbol, interval, last_ts, digest):
+        """Kayıtlı sonuç ya da MISSING; isabetler LRU sırasında sona taşınır"""
+        key = self.key(namespace, symbol, interval, last_ts, digest)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return MISSING
+
+    def put(self, namespace, symbol, interval, last_ts, digest, value):
+        if not self.capacity:
+            return
+        # JSON gidiş-dönüşü: isabetle dönen değer diskten okunanla aynı türde olsun
+        value = json.loads(json.dumps(value, default=_json_default))
+        key = self.key(namespace, symbol, interval, last_ts, digest)
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        self._dirty = True
+
+    def merge(self, raw):
+        """Başka kaynaktaki (ör. sıcak anlık görüntü) kayıtları ekler; yereldekiler korunur"""
+        added = [(k, v) for k, v in (raw or {}).items() if k not in self.entries]
+        if not added:
+            return
+        # Eklenenler yerel kayıtlardan daha eski sayılır (LRU sırasında öne)
+        local = list(self.entries.items())
+        self.entries = OrderedDict(added + local)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def to_dict(self):
+        return dict(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict(), default=_json_default))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+_default_result_cache = None
+
+
+def get_default_result_cache():
+    """
+    Bar önbelleğinin yanında tutulan paylaşılan sonuç önbelleği; sıcak anlık
+    görüntü (BIST_WARM_SNAPSHOT) varsa kayıtları da eklenir
+    """
+    global _default_result_cache
+    if _default_result_cache is None:
+        from bar_cache import DEFAULT_CACHE_DIR
+        from warm_state import get_default_snapshot
+
+        cache_dir = os.environ.get('BIST_CACHE_DIR', DEFAULT_CACHE_DIR)
+        path = os.path.join(cache_dir, DEFAULT_RESULT_FILE) if cache_dir else None
+        capacity = int(os.environ.get('BIST_RESULT_CACHE_SIZE') or DEFAULT_CAPACITY)
+        _default_result_cache = ResultCache(path, capacity)
+        snapshot = get_default_snapshot()
+        if snapshot is not None:
+            _default_result_cache.merge(snapshot.section('analysis_results'))
+    return _default_result_cache
+
+
+def set_default_result_cache(cache):
+    """Paylaşılan sonuç önbelleğini değiştirir (test/benchmark için)"""
+    global _default_result_cache
+    _default_result_cache = cache
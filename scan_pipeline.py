@@ -0,0 +1,347 @@
+"""
+Tarama için iki aşamalı üretici/tüketici hattı.
+
+G/Ç aşaması (AsyncFetcher) ayrı bir iş parçacığında çalışır ve gelen her
+parçayı sınırlı bir kuyruğa koyar; kuyruk doluysa çekme bekler. Tüketici
+parçaları (parça başına tek vektörel geçişte) doğrular, durumu taze hisseleri yerinde günceller, soğuk olanları
+toplu halde paylaşımlı belleğe (alan × bar × sembol) yazıp süreç havuzuna
+gönderir. Çerçeveler süreçler arasında pickle edilmez; işçiye yalnızca
+bellek bloğunun adı gider, geriye son birkaç satırlık sonuç döner.
+Son barı kesinleşmiş ve sonucu önbellekte olan hisseler (result_cache
+verilirse; anahtar analyze_universe ile aynı) hiç hesaplanmaz, kayıtlı
+aday doğrudan sıralayıcıya gider. Adaylar hesaplandıkça sınırlı bir
+sıralayıcıya akar. history verilirse
+geçerli her hissenin son kapanışları (portföy kurulumundaki kovaryans
+için) closes'ta toplanır.
+"""
+import asyncio
+import heapq
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import metrics
+from bar_store import _utc_ns
+from indicators import SuperTrendResult, stack_frames, supertrend
+from indicator_state import SuperTrendBundle
+from market_calendar import final_bars
+from result_cache import MISSING
+
+DEFAULT_QUEUE_SIZE = 4      # Bekleyen çekme parçası
+DEFAULT_BATCH_SIZE = 256    # İşçiye gönderilen soğuk sembol sayısı
+FIELDS = ('High', 'Low', 'Close')
+
+_DONE = object()
+
+
+class _Stopped(Exception):
+    """Tüketici durduğunda çekmeyi sonlandırmak için"""
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def _ready(_):
+    return os.getpid()
+
+
+def start_pool(workers):
+    """
+    Süreç havuzunu üretici iş parçacığı başlamadan açar: fork kullanan
+    platformlarda işçiler tek iş parçacıklı süreçten kopyalanmış olur.
+    İşçiler ana sürecin kaynak izleyicisini paylaşır; paylaşımlı bellek
+    blokları yalnızca sahibi tarafından silinir.
+    """
+    resource_tracker.ensure_running()
+    executor = ProcessPoolExecutor(workers)
+    list(executor.map(_ready, range(workers)))
+    return executor
+
+
+# -------------------- PAYLAŞIMLI BELLEK --------------------
+class SharedPanel:
+    """Süreçler arasında adla paylaşılan float64 dizi"""
+
+    def __init__(self, shape, name=None):
+        self.shape = tuple(shape)
+        size = max(1, int(np.prod(self.shape)) * 8)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.array = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _supertrend(high, low, close, params):
+    return supertrend(high, low, close, period=params['period'],
+                      multiplier=params['multiplier'], atr_period=params['atr_period'],
+                      trend_window=params['trend_window'], ma_window=params['ma_window'],
+                      pullback_band=params['pullback_band'])
+
+
+def _analyze_shared(name, shape, params, tail):
+    """İşçi: paylaşımlı (High, Low, Close) panelinde SuperTrend, son 'tail' satır"""
+    panel = SharedPanel(shape, name)
+    try:
+        high, low, close = panel.array
+        result = _supertrend(high, low, close, params)
+        return SuperTrendResult(*(np.array(a[-tail:]) for a in result)), close[-1].copy()
+    finally:
+        panel.close()
+
+
+# -------------------- SIRALAYICI --------------------
+class TopCandidates:
+    """Anahtara göre en iyi 'limit' adayı tutan yığın (limit None ise hepsi)"""
+
+    def __init__(self, limit=None, key='r_score'):
+        self.limit = limit
+        self.key = key
+        self.seen = 0
+        self._heap = []
+
+    def push(self, candidate, order=None):
+        """
+        order eşit anahtarlarda sırayı belirler (küçük olan önde); verilmezse
+        geliş sırası kullanılır. Yığının tepesi en kötü ve en sondaki adaydır.
+        """
+        self.seen += 1
+        item = (candidate[self.key], -(self.seen if order is None else order), candidate)
+        if self.limit is None or len(self._heap) < self.limit:
+            heapq.heappush(self._heap, item)
+        elif item[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, item)
+
+    def results(self):
+        """Anahtara göre azalan sırada (eşitlikte geliş sırası korunur)"""
+        return [c for _, _, c in sorted(self._heap, key=lambda x: (-x[0], -x[1]))]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+# -------------------- HAT --------------------
+class ScanPipeline:
+    """
+    Çekme -> sınırlı kuyruk -> süreç havuzu -> sıralayıcı. validate(çerçeveler,
+    aralık) -> {sembol: (onarılmış) çerçeve} ve evaluate(sembol, fiyat,
+    supertrend, yön, atr, r_score) çağıranın kurallarıdır; işçiler yalnızca
+    indicators modülünü içe aktarır. result_cache verilirse evaluate
+    sonuçları (aday ya da None) 'supertrend' ad alanında cache_key
+    (parametre ve giriş kurallarının özeti) ile saklanır.
+    """
+
+    def __init__(self, loader, validate, evaluate, state_store, params, ranker=None,
+                 workers=None, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 fetch_options=None, history=None, result_cache=None, cache_key=None):
+        self.loader = loader
+        self.validate = validate
+        self.evaluate = evaluate
+        self.state_store = state_store
+        self.params = params
+        self.ranker = TopCandidates() if ranker is None else ranker
+        self.workers = default_workers() if workers is None else workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.fetch_options = dict(fetch_options or {})
+        self.history = history
+        self.result_cache = result_cache
+        self.cache_key = cache_key
+        self.final = {}   # {sembol: son bar zamanı}; yalnızca kesinleşmiş barlar saklanır
+        self.closes = {}
+        self.tail = params['trend_window'] + 2   # SuperTrendBundle.seed için yeterli
+        self.interval = None
+        self.order = {}
+        self.stats = {'chunks': 0, 'invalid': 0, 'warm': 0, 'cold': 0, 'batches': 0,
+                      'max_in_flight': 0, 'emitted': 0, 'cached': 0}
+
+    # --- üretici ---
+    def _produce(self, tickers, period, interval, chunks, stop, outcome):
+        from async_fetch import AsyncFetcher
+
+        async def put(frames):
+            while not stop.is_set():
+                try:
+                    return await asyncio.to_thread(chunks.put, frames, True, 0.5)
+                except queue.Full:
+                    continue
+            raise _Stopped()
+
+        try:
+            fetcher = AsyncFetcher(self.loader.provider, chunk_size=self.loader.chunk_size,
+                                   **self.fetch_options)
+            _, outcome['report'] = fetcher.run(tickers, period=period, interval=interval,
+                                               on_chunk=put)
+        except _Stopped:
+            pass
+        except Exception as e:
+            outcome['error'] = e
+        finally:
+            chunks.put(_DONE)
+
+    # --- tüketici ---
+    def _push(self, ticker, candidate):
+        if not self.stats['emitted']:
+            metrics.mark('first_result')
+        self.stats['emitted'] += 1
+        if candidate:
+            # Paralel bitiş sırasından bağımsız, giriş listesine göre kararlı sıralama
+            self.ranker.push(candidate, self.order.get(ticker))
+
+    def _emit(self, ticker, values):
+        candidate = self.evaluate(ticker, values['close'], values['supertrend'],
+                                  values['direction'], values['atr'], values['r_score'])
+        if ticker in self.final:
+            self.result_cache.put('supertrend', ticker, self.interval, self.final[ticker],
+                                  self.cache_key, candidate)
+        self._push(ticker, candidate)
+
+    def _cached(self, valid):
+        """Sonucu önbellekten gelen hisseleri sıralayıcıya verip kalanları döndürür"""
+        if self.result_cache is None or not valid:
+            return valid
+        tickers = list(valid)
+        last = [int(_utc_ns(valid[t].index[-1:])[0]) for t in tickers]
+        closed = final_bars(tickers, self.interval, last, [valid[t].index.tz for t in tickers])
+        rest = {}
+        for ticker, ts, ok in zip(tickers, last, closed):
+            if ok:
+                self.final[ticker] = ts
+                candidate = self.result_cache.get('supertrend', ticker, self.interval, ts,
+                                                  self.cache_key)
+                if candidate is not MISSING:
+                    self.stats['cached'] += 1
+                    self._push(ticker, candidate)
+                    continue
+            rest[ticker] = valid[ticker]
+        return rest
+
+    def _finish(self, frames, tickers, result, closes):
+        for j, ticker in enumerate(tickers):
+            self.state_store.put(ticker, self.interval, self.params,
+                                 SuperTrendBundle.seed(frames[ticker], result, j, self.params))
+            self._emit(ticker, {'close': closes[j], 'supertrend': result.supertrend[-1, j],
+                                'direction': result.direction[-1, j], 'atr': result.atr[-1, j],
+                                'r_score': result.r_score[-1, j]})
+
+    def _analyze_inline(self, frames, tickers):
+        panels = stack_frames(frames, tickers, FIELDS)
+        result = _supertrend(panels['High'], panels['Low'], panels['Close'], self.params)
+        self._finish(frames, tickers, result, panels['Close'][-1])
+
+    def _submit(self, executor, pending, frames, tickers):
+        length = max(len(frames[t]) for t in tickers)
+        panel = SharedPanel((len(FIELDS), length, len(tickers)))
+        stack_frames(frames, tickers, FIELDS, length, out=panel.array)
+        future = executor.submit(_analyze_shared, panel.name, panel.shape, self.params, self.tail)
+        pending[future] = (panel, frames, tickers)
+        self.stats['batches'] += 1
+        self.stats['max_in_flight'] = max(self.stats['max_in_flight'], len(pending))
+
+    def _collect(self, pending, block):
+        if not pending:
+            return
+        done, _ = wait(list(pending), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            panel, frames, tickers = pending.pop(future)
+            panel.close()
+            result, closes = future.result()
+            self._finish(frames, tickers, result, closes)
+
+    def _dispatch(self, executor, pending, frames, tickers):
+        if executor is None:
+            self._analyze_inline(frames, tickers)
+            return
+        # En fazla işçi sayısının iki katı parti bellekte bekler
+        while len(pending) >= 2 * self.workers:
+            self._collect(pending, block=True)
+        self._submit(executor, pending, frames, tickers)
+
+    def _consume(self, chunk, executor, pending, cold_frames):
+        self.stats['chunks'] += 1
+        valid = self.validate(chunk, self.interval)
+        self.stats['invalid'] += len(chunk) - len(valid)
+        if self.history:
+            for ticker, df in valid.items():
+                self.closes[ticker] = df['Close'].iloc[-self.history:]
+        valid = self._cached(valid)
+        warm, cold = self.state_store.advance_all(SuperTrendBundle.kind, valid,
+                                                  self.interval, self.params)
+        self.stats['warm'] += len(warm)
+        self.stats['cold'] += len(cold)
+        for ticker, (_, current) in warm.items():
+            self._emit(ticker, current)
+        for ticker in cold:
+            cold_frames[ticker] = valid[ticker]
+        if len(cold_frames) >= self.batch_size:
+            self._dispatch(executor, pending, dict(cold_frames), list(cold_frames))
+            cold_frames.clear()
+        if executor is not None:
+            self._collect(pending, block=False)
+
+    def run(self, tickers, period, interval):
+        """(sıralı adaylar, FetchReport) döndürür"""
+        self.interval = interval
+        self.order = {t: i for i, t in enumerate(dict.fromkeys(tickers))}
+        self.final = {}
+        started = time.perf_counter()
+        chunks = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        outcome = {}
+        producer = threading.Thread(target=self._produce, name='scan-fetch', daemon=True,
+                                    args=(tickers, period, interval, chunks, stop, outcome))
+        executor = start_pool(self.workers) if self.workers > 1 else None
+        pending, cold_frames = {}, {}
+        producer.start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is _DONE:
+                    break
+                self._consume(chunk, executor, pending, cold_frames)
+            if cold_frames:
+                self._dispatch(executor, pending, dict(cold_frames), list(cold_frames))
+            while pending:
+                self._collect(pending, block=True)
+        finally:
+            # Hata durumunda üreticiyi durdur ve kuyrukta bekleyenleri boşalt
+            stop.set()
+            while producer.is_alive():
+                try:
+                    chunks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            for panel, _, _ in pending.values():
+                panel.close()
+            self.state_store.save()
+            if self.result_cache is not None:
+                self.result_cache.save()
+
+        if 'error' in outcome:
+            raise outcome['error']
+        self.stats['elapsed'] = time.perf_counter() - started
+        return self.ranker.results(), outcome['report']
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['chunks']} parça, {s['cached']} önbellekten, "
+                f"{s['warm']} sıcak / {s['cold']} soğuk hisse, "
+                f"{s['batches']} süreç partisi ({self.workers} işçi), "
+                f"{s.get('elapsed', 0.0):.1f} sn")
+
@@ -0,0 +1,29 @@
+"""
+Haftalık SuperTrend taramasının paylaşılan ayarları.
+
+main.py (run_weekly_scan, analyze_universe, validate_universe),
+strategies.SuperTrendStrategy, backtest ve intraday_stream aynı değerleri
+buradan alır; bir eşik değiştirildiğinde tarama, strateji ekranı ve
+geriye dönük test birlikte değişir.
+"""
+# SuperTrend ve giriş kuralı
+SUPER_TREND_PERIOD = 10
+SUPER_TREND_MULT = 3.0
+ATR_PERIOD = 14
+MAX_PULLBACK_ATR = 2.0   # Kapanışın SuperTrend çizgisine en fazla ATR uzaklığı
+TARGET_R_MULTIPLE = 3.0  # Hedef = giriş + 3 × (giriş - stop)
+
+# Hacim ve ön filtre (prefilter.py)
+MIN_WEEKLY_VOLUME = 1_000_000  # Son 10 haftanın ortalama hacmi (validate_universe)
+PREFILTER_VOLUME_SLACK = 0.5   # Ön filtre: günlük ortalama × 5 bu oranla gevşetilir
+PREFILTER_MAX_AGE_DAYS = 30    # Ön filtre hacmi bu kadar eski olabilir (tarama aralığından uzun)
+PREFILTER_MIN_DAILY_VOLUME = MIN_WEEKLY_VOLUME / 5 * PREFILTER_VOLUME_SLACK
+
+# Veri Kalitesi (data_quality.py)
+MIN_BARS = 50            # Analiz için gereken en az bar
+MAX_FILL_BARS = 2        # Önceki kapanışla doldurulan en uzun boşluk (bar)
+MAX_STALE_SESSIONS = 10  # Son bardan sonra en fazla kaçırılan seans (borsa takvimiyle)
+
+# data_quality.validate sınırları
+QUALITY_LIMITS = {'min_bars': MIN_BARS, 'min_volume': MIN_WEEKLY_VOLUME,
+                  'max_fill': MAX_FILL_BARS, 'max_stale_sessions': MAX_STALE_SESSIONS}
@@ -0,0 +1,646 @@
+"""
+Strateji eklentileri ve tek geçişli çalıştırıcı.
+
+Her strateji (Strategy alt sınıfı) ihtiyaç duyduğu veriyi (bar aralığı,
+geçmiş dönemi, temel veri alanları), ön filtre kurallarını, indikatörlerini
+ve skor kurallarını bildirir; @register ile kayda girer. StrategyRunner
+seçilen stratejilerin ihtiyaçlarının birleşimini bir kez karşılar:
+
+  - ön filtre: her stratejinin kuralları aynı anlık görüntüye uygulanır;
+    geçmiş yalnızca en az bir stratejide kalan semboller için çekilir
+  - çekme: her bar aralığı için en uzun dönemle tek istek; daha kısa
+    dönemli stratejiler aynı barların kuyruğunu kullanır (BarStore.tail)
+  - temel veriler: alanların birleşimi tek get_many çağrısıyla
+  - indikatörler: aynı (aralık, dönem) barlarını kullanan stratejiler tek
+    IndicatorEngine paylaşır; aynı indikatör bir kez hesaplanır. Kayıtlı
+    durumu taze olan semboller artımlı güncellenir (indicator_state)
+  - skor: her strateji kendi hisse vektöründe kuralları maske olarak uygular;
+    son barı, parametreleri (ve kullandığı temel verileri) değişmemiş
+    hisselerin skor satırı sonuç önbelleğinden (result_cache) gelir
+
+Sonuç strateji başına en iyi N hisseden oluşan tek bir birleşik rapordur.
+"""
+import numpy as np
+import pandas as pd
+
+import data_quality
+import metrics
+from bar_store import BarStore, FieldTable, chunk_size
+from cassette import find_cassette
+from indicator_state import SuperTrendBundle, TrendBundle
+from indicators import IndicatorEngine, at
+from market_calendar import final_bars
+from prefilter import apply_rules, build_snapshot, rule_columns
+from result_cache import MISSING, params_digest
+from scan_settings import (ATR_PERIOD, MAX_PULLBACK_ATR, MIN_BARS, PREFILTER_MIN_DAILY_VOLUME,
+                           QUALITY_LIMITS, SUPER_TREND_MULT, SUPER_TREND_PERIOD, TARGET_R_MULTIPLE)
+
+# Finansal sabitler ve parametreler
+AGRESİF_PİYASA_DEĞERİ_MAKS = 500_000_000 # $500 Milyon
+DENGELİ_PİYASA_DEĞERİ_MİN = 10_000_000_000 # $10 Milyar
+
+RESULT_COLUMNS = ['Hisse', 'Skor', 'Gerekçe', 'Son Kapanış', 'RSI_Son']
+REPORT_COLUMNS = ['Hisse', 'Skor', 'Gerekçe', 'Son Kapanış', 'Stop-Loss Fiyatı', 'Hedef Fiyatı',
+                  'Stop-Loss (%)', 'Hedef Fiyat (%)']
+DEFAULT_TOP_N = 5
+
+
+# -------------------- EKLENTİ ARAYÜZÜ --------------------
+class Strategy:
+    """
+    Strateji eklentisi. Alt sınıflar sınıf nitelikleriyle veri ihtiyacını
+    bildirir, indicators() ve rules() ile skoru tanımlar.
+    """
+    name = None
+    interval = '1d'             # bar aralığı
+    period = '1y'               # geçmiş dönemi (yfinance periyodu)
+    max_bars = 260              # dönemdeki en fazla bar (bellek bütçesi için)
+    min_bars = 1                # daha kısa geçmişli semboller skorlanmaz
+    fundamentals = ()           # kullanılan temel veri alanları (boşsa temel veri gerekmez)
+    prefilter_rules = {}        # prefilter.apply_rules kuralları
+    prefilter_missing = {}
+    prefilter_defaults = {}
+    quality = None              # data_quality.validate sınırları (None: denetim yok)
+    state_kind = None           # artımlı durum paketi (indicator_state) türü; toplu yolla aynı
+                                # çıktıyı vermeli (bkz. StateBundle.anchored)
+    state_params = None
+    stop_loss_pct = 0.05
+    target_pct = 0.15
+    extra_columns = {}          # sonuç sütunu -> son bar indikatörü (risk hesabı için)
+
+    def accepts(self, info):
+        """Temel veri filtresi (çekmeden sonra, kesin değerlerle)"""
+        return True
+
+    def indicators(self, engine):
+        """{ad: (bar × sembol) panel ya da son bar vektörü}; engine paylaşılır"""
+        raise NotImplementedError
+
+    def seed(self, frame, engine, j):
+        """Tam hesaplamadan artımlı durum paketi kurar (state_kind varsa)"""
+        return None
+
+    def rules(self, ctx):
+        """[(maske, puan, gerekçe üretici)]; puan sabit ya da sembol vektörü olabilir"""
+        raise NotImplementedError
+
+    def risk_levels(self, results):
+        """Sonuç satırları için (stop oranı, hedef oranı); sabit ya da satır vektörü"""
+        return self.stop_loss_pct, self.target_pct
+
+    def report_title(self, top_n):
+        return f"🌟 En İyi {top_n} Hisse Önerisi ({self.name} Stratejisi)"
+
+    def cache_params(self):
+        """Sonuç önbelleği anahtarı için parametreler: tüm veri (metot olmayan) nitelikleri"""
+        params = {}
+        for cls in reversed(type(self).__mro__):
+            params.update({k: v for k, v in vars(cls).items()
+                           if not k.startswith('_') and not callable(v)
+                           and not isinstance(v, (property, staticmethod, classmethod))})
+        params.update({k: v for k, v in vars(self).items() if not k.startswith('_')})
+        return params
+
+
+class ScoringContext:
+    """Bir stratejinin hisse vektörü: (önceki, son) indikatör değerleri ve temel veriler"""
+
+    def __init__(self, tickers, snapshot, fundamentals=None):
+        self.tickers = tickers
+        self.snapshot = snapshot
+        self.fundamentals = fundamentals
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def prev(self, name):
+        return np.array([self.snapshot[t][0].get(name, np.nan) for t in self.tickers],
+                        dtype=np.float64)
+
+    def last(self, name):
+        return np.array([self.snapshot[t][1].get(name, np.nan) for t in self.tickers],
+                        dtype=np.float64)
+
+    def field(self, name, default=np.nan):
+        return self.fundamentals.column(name, self.tickers, default)
+
+
+_REGISTRY = {}
+
+
+def register(cls):
+    """Strateji sınıfını adıyla kaydeder (dekoratör)"""
+    _REGISTRY[cls.name] = cls
+    return cls
+
+
+def get_strategy(name):
+    """Kayıtlı stratejinin yeni örneği; büyük/küçük harf duyarsız"""
+    key = name.upper()
+    if key not in _REGISTRY:
+        raise ValueError(f"Strateji {', '.join(repr(n) for n in _REGISTRY)} olmalıdır.")
+    return _REGISTRY[key]()
+
+
+def registered_strategies():
+    return list(_REGISTRY)
+
+
+# -------------------- YERLEŞİK STRATEJİLER --------------------
+@register
+class AggressiveStrategy(Strategy):
+    """Küçük şirketler: hacim patlaması, MACD kesişimi, RSI(7) dönüşü"""
+    name = 'AGRESİF'
+    period, max_bars = '30d', 30
+    fundamentals = ('marketCap',)
+    prefilter_rules = {'max_market_cap': AGRESİF_PİYASA_DEĞERİ_MAKS}
+    prefilter_defaults = {'revenue_growth': 0.0}
+    # Artımlı durum yok: EMA'lar kayan '30d' penceresinin başından hesaplanır,
+    # pencere her gün kaydığından taşınan durum toplu sonuçla uyuşmaz
+    stop_loss_pct, target_pct = 0.05, 0.15
+
+    def accepts(self, info):
+        market_cap = info.get('marketCap')
+        return market_cap is not None and market_cap <= AGRESİF_PİYASA_DEĞERİ_MAKS
+
+    def indicators(self, engine):
+        macd, signal_line = engine.macd(12, 26, 9)
+        return {'close': engine.close, 'macd': macd, 'signal': signal_line,
+                'rsi': engine.rsi(7), 'volume_ratio': engine.volume_ratio(20)}
+
+    def rules(self, ctx):
+        # 1. Hacim Artışı
+        volume_ratio = ctx.last('volume_ratio')
+        # 2. MACD Al Sinyali
+        macd_cross = (ctx.prev('macd') < ctx.prev('signal')) & (ctx.last('macd') > ctx.last('signal'))
+        # 3. RSI (7 Günlük) Geri Dönüş
+        rsi_prev, rsi_current = ctx.prev('rsi'), ctx.last('rsi')
+        return [
+            (volume_ratio >= 3.0, 4,
+             lambda j: f"Hacim Artışı: %{round(volume_ratio[j] * 100)} (Katalizör Sinyali)"),
+            (macd_cross, 3,
+             lambda j: "MACD Hattı, Sinyal Hattını Yukarı Kesti (Momentum Sinyali)"),
+            ((rsi_prev >= 30) & (rsi_prev <= 40) & (rsi_current > rsi_prev), 3,
+             lambda j: f"RSI(7) {round(rsi_prev[j])}-{round(rsi_current[j])} aralığından yukarı döndü (Tepki Sinyali)"),
+        ]
+
+
+@register
+class BalancedStrategy(Strategy):
+    """Büyük şirketler: büyüme, düşük borç, kârlılık ve uzun vadeli trend"""
+    name = 'DENGELİ'
+    period, max_bars = '1y', 260
+    fundamentals = ('marketCap', 'revenueGrowth', 'debtToEquity', 'returnOnEquity')
+    prefilter_rules = {'min_market_cap': DENGELİ_PİYASA_DEĞERİ_MİN, 'min_revenue_growth': 0.10}
+    prefilter_defaults = {'revenue_growth': 0.0}
+    state_kind, state_params = TrendBundle.kind, {'ma': 200, 'rsi': 14}
+    stop_loss_pct, target_pct = 0.10, 0.30
+
+    def accepts(self, info):
+        market_cap = info.get('marketCap')
+        return market_cap is not None and market_cap >= DENGELİ_PİYASA_DEĞERİ_MİN \
+            and info.get('revenueGrowth', 0.0) > 0.10
+
+    def indicators(self, engine):
+        return {'close': engine.close, 'ma': engine.sma(200), 'rsi': engine.rsi(14)}
+
+    def seed(self, frame, engine, j):
+        return TrendBundle.seed(frame)
+
+    def rules(self, ctx):
+        # 1. Gelir/Kâr Büyümesi
+        revenue_growth = ctx.field('revenueGrowth', 0.0)
+        # 2. Debt/Equity
+        debt_to_equity = ctx.field('debtToEquity')
+        # 3. ROE/ROI
+        return_on_equity = ctx.field('returnOnEquity')
+        # 5. RSI (14 Günlük) Sağlıklı Trend
+        rsi_current = ctx.last('rsi')
+        return [
+            (revenue_growth > 0.10, 3,
+             lambda j: f"Yıllık Gelir Büyümesi: %{round(revenue_growth[j] * 100)} > %10"),
+            (debt_to_equity < 0.5, 2,
+             lambda j: f"D/E Oranı: {round(debt_to_equity[j], 2)} (Düşük Borçluluk)"),
+            (return_on_equity > 0.15, 2,
+             lambda j: f"ROE: %{round(return_on_equity[j] * 100)} (Yüksek Karlılık)"),
+            # 4. 200 Günlük MA
+            (ctx.last('close') > ctx.last('ma'), 3,
+             lambda j: "Fiyat, 200 Günlük Ortalamanın Üzerinde (Uzun Vadeli Trend)"),
+            ((rsi_current >= 40) & (rsi_current <= 65), 2,
+             lambda j: f"RSI(14): {round(rsi_current[j], 1)} (Sağlıklı Trend)"),
+        ]
+
+
+@register
+class SuperTrendStrategy(Strategy):
+    """
+    Haftalık SuperTrend geri çekilmesi (evaluate_entry koşulları):
+    yükseliş trendi, fiyat çizginin üstünde ve en fazla max_pullback_atr
+    ATR uzakta. Skor R-Score × 10; stop SuperTrend çizgisi, hedef
+    target_r kat risk. Eşikler haftalık taramayla aynıdır (scan_settings):
+    hacim ön filtrede, veri kalitesi çekmeden sonra validate_universe'deki
+    sınırlarla denetlenir.
+    """
+    name = 'SUPERTREND'
+    interval, period, max_bars, min_bars = '1wk', '2y', 105, MIN_BARS
+    prefilter_rules = {'min_avg_volume': PREFILTER_MIN_DAILY_VOLUME}
+    prefilter_missing = {'min_avg_volume': True}
+    quality = QUALITY_LIMITS
+    state_kind = SuperTrendBundle.kind
+    state_params = SuperTrendBundle.make_params(SUPER_TREND_PERIOD, SUPER_TREND_MULT, ATR_PERIOD)
+    extra_columns = {'SuperTrend': 'supertrend'}
+    max_pullback_atr = MAX_PULLBACK_ATR
+    target_r = TARGET_R_MULTIPLE
+
+    def indicators(self, engine):
+        st = engine.supertrend(**self.state_params)
+        return {'close': engine.close, 'supertrend': st.supertrend, 'direction': st.direction,
+                'atr': st.atr, 'r_score': st.r_score}
+
+    def seed(self, frame, engine, j):
+        return SuperTrendBundle.seed(frame, engine.supertrend(**self.state_params), j,
+                                     self.state_params)
+
+    def rules(self, ctx):
+        close, line, atr = ctx.last('close'), ctx.last('supertrend'), ctx.last('atr')
+        r_score = ctx.last('r_score')
+        pullback = (close - line) / atr
+        entry = (ctx.last('direction') == 1) & (close > line) & (pullback <= self.max_pullback_atr)
+        points = np.where(np.isnan(r_score), 0, np.round(r_score * 10)).astype(int)
+        return [
+            (entry, points,
+             lambda j: f"SuperTrend Yükseliş Trendi, Geri Çekilme {pullback[j]:.1f} ATR "
+                       f"(R-Score {r_score[j]:.2f})"),
+        ]
+
+    def risk_levels(self, results):
+        stop_pct = 1 - results['SuperTrend'].to_numpy() / results['Son Kapanış'].to_numpy()
+        return stop_pct, stop_pct * self.target_r
+
+
+# -------------------- ÇALIŞTIRICI --------------------
+class StrategyRunner:
+    """
+    Stratejileri tek veri geçişinde çalıştırır. Aşamalar (prefilter, fetch,
+    filter, score, risk, report) ayrı ayrı da çağrılabilir.
+    """
+
+    def __init__(self, tickers, strategies=None, loader=None, store=None, state_store=None,
+                 memory_budget_mb=None, result_cache=None):
+        from data_provider import get_default_loader
+        from fundamentals_store import get_default_store
+        from indicator_state import get_default_state_store
+        from result_cache import get_default_result_cache
+
+        self.strategies = [get_strategy(s) if isinstance(s, str) else s
+                           for s in (strategies or registered_strategies())]
+        self.tickers = list(tickers)
+        self.loader = loader or get_default_loader()
+        self.fundamentals_store = store or get_default_store()
+        self.state_store = state_store or get_default_state_store()
+        self.result_cache = get_default_result_cache() if result_cache is None else result_cache
+        self.memory_budget_mb = memory_budget_mb
+        self.selected = {s.name: list(self.tickers) for s in self.strategies}
+        self.stores = {}                # aralık -> BarStore
+        self.fundamentals = {}          # FieldTable
+        self.results = {s.name: pd.DataFrame(columns=RESULT_COLUMNS) for s in self.strategies}
+        self._scratch = {}
+
+    # --- ihtiyaçlar ---
+    def intervals(self):
+        """{aralık: en uzun dönem}"""
+        longest = {}
+        for s in self.strategies:
+            current = longest.get(s.interval)
+            if current is None or s.max_bars > current.max_bars:
+                longest[s.interval] = s
+        return {interval: s.period for interval, s in longest.items()}
+
+    def fundamental_fields(self):
+        return tuple(dict.fromkeys(f for s in self.strategies for f in s.fundamentals))
+
+    def bars_per_ticker(self):
+        """Bellek bütçesi için sembol başına bar (aralık başına en uzun dönem)"""
+        longest = {}
+        for s in self.strategies:
+            longest[s.interval] = max(longest.get(s.interval, 0), s.max_bars)
+        return sum(longest.values())
+
+    def _union(self):
+        return list(dict.fromkeys(t for s in self.strategies for t in self.selected[s.name]))
+
+    # --- 0. ön filtre ---
+    def prefilter(self):
+        """Her stratejinin kuralları tek anlık görüntüye uygulanır"""
+        print("⏳ Ön Filtre Uygulanıyor...")
+        # Yalnızca kuralların kullandığı alanlar istenir (diğerleri için info yenilenmez)
+        columns = dict.fromkeys(c for s in self.strategies for c in rule_columns(s.prefilter_rules))
+        snapshot = build_snapshot(self.fundamentals_store, self.tickers, list(columns))
+        for s in self.strategies:
+            survivors, rejected = apply_rules(snapshot, s.prefilter_rules, s.prefilter_missing,
+                                              s.prefilter_defaults)
+            for rule, count in rejected.items():
+                metrics.count('prefilter_rejections', rule, count)
+            self.selected[s.name] = survivors
+            print(f"✅ {s.name}: {len(survivors)}/{len(self.tickers)} hisse ön filtreden geçti.")
+        self.tickers = self._union()
+
+    # --- 1. veri çekme ---
+    def fetch(self):
+        """Her aralık için en uzun dönemle tek toplu istek; temel verilerin birleşimi"""
+        print("⏳ Veri Çekme Başlatılıyor...")
+        fields = self.fundamental_fields()
+        accepted = set()
+        fundamentals = {}
+        for interval, period in self.intervals().items():
+            repaired = {}
+            users = [s for s in self.strategies if s.interval == interval]
+            tickers = list(dict.fromkeys(t for s in users for t in self.selected[s.name]))
+            panel = self.loader.load(tickers, period=period, interval=interval)
+            needs = [t for t in panel.tickers
+                     if any(s.fundamentals and t in self.selected[s.name] for s in users)]
+            missing = [t for t in needs if t not in fundamentals]
+            if fields and missing:
+                # Temel veriler paylaşılan TTL deposundan (sıcak önbellekte ağ çağrısı yok)
+                fundamentals.update(self.fundamentals_store.get_many(missing, fields))
+            for s in users:
+                kept = []
+                for ticker in self.selected[s.name]:
+                    if panel.frame(ticker) is not None and \
+                            (not s.fundamentals or fundamentals.get(ticker)):
+                        kept.append(ticker)
+                    else:
+                        print(f"⚠️ {ticker} için veri bulunamadı veya eksik.")
+                if s.quality is not None and kept:
+                    # Onarılan çerçeveler aralığı paylaşan stratejilerce de kullanılır
+                    valid = data_quality.validate({t: panel.frame(t) for t in kept}, interval,
+                                                  **s.quality)
+                    kept = [t for t in kept if t in valid]
+                    repaired.update(valid)
+                self.selected[s.name] = kept
+                accepted.update(kept)
+            # Sıkıştırılmış depo: alan başına bitişik float32 diziler
+            self.stores[interval] = BarStore.from_frames(
+                {**panel.frames, **repaired}, [t for t in tickers if t in accepted])
+        if fields:
+            self.fundamentals_store.save()
+        self.fundamentals = FieldTable(fundamentals, fields,
+                                       [t for t in self._union() if t in fundamentals])
+        self.tickers = self._union()
+        print(f"✅ {len(self.tickers)} hisse için veri çekimi tamamlandı.")
+
+    # --- 2. filtreleme ---
+    def filter(self):
+        """Stratejilerin temel veri filtreleri (kesin değerlerle)"""
+        print("⏳ Hisse Listesi Filtreleme Başlatılıyor...")
+        infos = self.fundamentals_store.get_many(list(self.fundamentals),
+                                                 self.fundamental_fields())
+        for s in self.strategies:
+            if s.fundamentals:
+                self.selected[s.name] = [t for t in self.selected[s.name]
+                                         if t in infos and s.accepts(infos[t])]
+            print(f"✅ {s.name}: {len(self.selected[s.name])} hisse filtrelemeden geçti.")
+        self.tickers = self._union()
+
+    # --- 3. analiz ---
+    def _frames(self, s):
+        store = self.stores[s.interval]
+        return store if s.period == self.intervals()[s.interval] else store.tail(s.period)
+
+    def snapshots(self, selected=None):
+        """
+        {strateji: {sembol: (önceki bar, son bar)}}. Kayıtlı durumu taze
+        olan semboller artımlı güncellenir; soğuklar aynı barları kullanan
+        stratejilerin paylaştığı tek motorda tam hesaplanır. selected
+        verilirse yalnızca o semboller ({strateji: [sembol]}) hesaplanır.
+        """
+        selected = self.selected if selected is None else selected
+        groups = {}
+        for s in self.strategies:
+            groups.setdefault((s.interval, s.period), []).append(s)
+
+        snapshots = {}
+        for (interval, period), users in groups.items():
+            frames = self._frames(users[0])
+            colds = {}
+            for s in users:
+                tickers = [t for t in selected[s.name]
+                           if t in frames and frames.length(t) >= s.min_bars]
+                if s.state_kind:
+                    warm, cold = self.state_store.advance_all(
+                        s.state_kind, frames.select(tickers), interval, s.state_params)
+                else:
+                    warm, cold = {}, tickers
+                snapshots[s.name], colds[s.name] = warm, cold
+            union = list(dict.fromkeys(t for cold in colds.values() for t in cold))
+            if not union:
+                continue
+
+            engine = IndicatorEngine(frames, union,
+                                     out=self._scratch_panels((interval, period), frames, union))
+            column = {t: j for j, t in enumerate(engine.tickers)}
+            for s in users:
+                values = s.indicators(engine)
+                previous = {k: at(v, -2) for k, v in values.items() if v.ndim == 2}
+                current = {k: at(v, -1) if v.ndim == 2 else v for k, v in values.items()}
+                for ticker in colds[s.name]:
+                    j = column[ticker]
+                    snapshots[s.name][ticker] = ({k: v[j] for k, v in previous.items()},
+                                                 {k: v[j] for k, v in current.items()})
+                    if s.state_kind is None or frames.length(ticker) < 2:
+                        continue
+                    self.state_store.put(ticker, interval, s.state_params,
+                                         s.seed(frames[ticker], engine, j))
+        self.state_store.save()
+        return snapshots
+
+    def _scratch_panels(self, key, frames, tickers):
+        """Kapanış/hacim panelleri için parçalar arasında yeniden kullanılan tampon"""
+        shape = (2, max(frames.length(t) for t in tickers), len(tickers))
+        scratch = self._scratch.get(key)
+        if scratch is None or any(a < b for a, b in zip(scratch.shape, shape)):
+            grown = tuple(shape if scratch is None else
+                          (max(a, b) for a, b in zip(scratch.shape, shape)))
+            scratch = self._scratch[key] = np.empty(grown)
+        return scratch[:, :shape[1], :shape[2]]
+
+    def _result_keys(self, s):
+        """
+        {sembol: (son bar zamanı, parametre özeti)}; skorlanabilen ve son barı
+        kesinleşmiş semboller için (süren barın skoru kapanışa kadar değişir)
+        """
+        frames = self._frames(s)
+        tickers = [t for t in self.selected[s.name] if t in frames and frames.length(t) >= s.min_bars]
+        if not tickers:
+            return {}
+        last = frames.last_times(tickers)
+        final = final_bars(tickers, s.interval, last, [frames.tz_of(t) for t in tickers])
+        tickers, last = [t for t, ok in zip(tickers, final) if ok], last[final]
+        base = params_digest(s.cache_params())
+        if not s.fundamentals:
+            return {t: (ts, base) for t, ts in zip(tickers, last)}
+        # Kurallar temel verileri de kullanır: değerleri sembolün özetine katılır
+        known = [t for t in tickers if t in self.fundamentals]
+        rows = dict(zip(known, np.column_stack(
+            [self.fundamentals.column(f, known) for f in s.fundamentals]))) if known else {}
+        return {t: (ts, params_digest(base, rows[t].tobytes() if t in rows else b''))
+                for t, ts in zip(tickers, last)}
+
+    def score(self):
+        """
+        Her strateji kurallarını kendi hisse vektöründe maske olarak uygular;
+        gerekçe metinleri yalnızca skor alan hisseler için üretilir. Sonuç
+        önbelleğinde kaydı olan hisseler hesaplanmaz.
+        """
+        print("⏳ Teknik ve Temel Analizler Başlatılıyor...")
+        keys, cached, pending = {}, {}, {}
+        for s in self.strategies:
+            keys[s.name] = self._result_keys(s)
+            cached[s.name], pending[s.name] = {}, []
+            for ticker in self.selected[s.name]:
+                # Anahtarı olmayanlar (süren bar, kısa geçmiş) önbelleğe bakılmadan hesaplanır
+                row = MISSING if ticker not in keys[s.name] else \
+                    self.result_cache.get(s.name, ticker, s.interval, *keys[s.name][ticker])
+                if row is MISSING:
+                    pending[s.name].append(ticker)
+                else:
+                    cached[s.name][ticker] = row
+        snapshots = self.snapshots(pending) if any(pending.values()) else \
+            {s.name: {} for s in self.strategies}
+
+        for s in self.strategies:
+            tickers = [t for t in pending[s.name] if t in snapshots[s.name]]
+            ctx = ScoringContext(tickers, snapshots[s.name], self.fundamentals)
+            score = np.zeros(len(tickers), dtype=int)
+            with np.errstate(invalid='ignore'):
+                rules = s.rules(ctx) if tickers else []
+            for mask, points, _ in rules:
+                score += np.where(mask, points, 0)
+
+            rows = dict(cached[s.name])
+            if tickers:
+                entry_price, rsi_last = ctx.last('close'), ctx.last('rsi')
+                extras = {column: ctx.last(name) for column, name in s.extra_columns.items()}
+                for j, ticker in enumerate(tickers):
+                    row = None
+                    if score[j] > 0:
+                        row = {
+                            'Hisse': ticker,
+                            'Skor': int(score[j]),
+                            'Gerekçe': " | ".join(describe(j) for mask, _, describe in rules
+                                                  if mask[j]),
+                            'Son Kapanış': entry_price[j],
+                            'RSI_Son': rsi_last[j]
+                        }
+                        row.update({column: values[j] for column, values in extras.items()})
+                    if ticker in keys[s.name]:
+                        last_ts, digest = keys[s.name][ticker]
+                        self.result_cache.put(s.name, ticker, s.interval, last_ts, digest, row)
+                    rows[ticker] = row
+            results = [rows[t] for t in self.selected[s.name] if rows.get(t)]
+            self.results[s.name] = pd.DataFrame(
+                results, columns=RESULT_COLUMNS + list(s.extra_columns))
+            if results:
+                print(f"✅ {s.name}: {len(results)} hisse skor aldı.")
+            else:
+                print(f"❌ {s.name}: Analiz kriterlerine uyan hisse bulunamadı.")
+        self.result_cache.save()
+
+    # --- 4. risk ---
+    def risk(self):
+        """Giriş fiyatına göre Stop-Loss ve Hedef Fiyat seviyeleri"""
+        for s in self.strategies:
+            results = self.results[s.name]
+            if results.empty:
+                continue
+            stop_loss_pct, target_pct = s.risk_levels(results)
+            results['Stop-Loss (%)'] = -stop_loss_pct * 100
+            results['Hedef Fiyat (%)'] = target_pct * 100
+            results['Stop-Loss Fiyatı'] = results['Son Kapanış'] * (1 - stop_loss_pct)
+            results['Hedef Fiyatı'] = results['Son Kapanış'] * (1 + target_pct)
+            cols_to_round = ['Son Kapanış', 'Stop-Loss Fiyatı', 'Hedef Fiyatı', 'RSI_Son',
+                             'Stop-Loss (%)', 'Hedef Fiyat (%)']
+            results[cols_to_round] = results[cols_to_round].round(2)
+
+    # --- 5. rapor ---
+    def report(self, top_n=DEFAULT_TOP_N):
+        """
+        (başlık, rapor) döndürür. Tek stratejide eski tablo biçimi; birden
+        fazlasında strateji başına en iyi top_n satır 'Strateji' sütunuyla
+        tek tabloda birleşir. Hiç sonuç yoksa rapor None'dır.
+        """
+        frames = []
+        for s in self.strategies:
+            results = self.results[s.name]
+            if results.empty:
+                continue
+            best = results.sort_values(by='Skor', ascending=False).head(top_n)[REPORT_COLUMNS]
+            frames.append(best.assign(Strateji=s.name) if len(self.strategies) > 1 else best)
+        if not frames:
+            return "Analiz kriterlerine uyan hisse bulunamadı.", None
+        if len(self.strategies) == 1:
+            return self.strategies[0].report_title(top_n), frames[0]
+        names = ", ".join(s.name for s in self.strategies)
+        report = pd.concat(frames, ignore_index=True)
+        return (f"🌟 En İyi {top_n} Hisse Önerisi ({names})",
+                report[['Strateji'] + REPORT_COLUMNS])
+
+    # --- tek geçiş ---
+    def run(self, run=None, top_n=DEFAULT_TOP_N):
+        """
+        Tüm aşamaları çalıştırır; bellek bütçesi verilmişse evren bütçeye
+        sığan parçalarla taranır (parçanın barları skordan sonra bırakılır).
+        run: metrics.RunMetrics (aşamalar ölçülür). (başlık, rapor) döndürür.
+        """
+        run = run or metrics.active()
+        run.track_cache('bars', getattr(self.loader, 'provider', None))
+        run.track_cache('cassette', find_cassette(getattr(self.loader, 'provider', None)))
+        run.track_cache('fundamentals', self.fundamentals_store)
+        run.track_cache('indicator_state', self.state_store)
+        run.track_cache('analysis_results', self.result_cache)
+
+        with run.stage('prefilter', len(self.tickers)) as stage:
+            self.prefilter()
+            stage.tickers_out = len(self.tickers)
+
+        size = chunk_size(self.memory_budget_mb and self.memory_budget_mb * 2 ** 20,
+                          self.bars_per_ticker()) or max(len(self.tickers), 1)
+        universe, selected = self.tickers, dict(self.selected)
+        scored = {s.name: [] for s in self.strategies}
+        collected = {s.name: [] for s in self.strategies}
+        chunks = 0
+        for start in range(0, len(universe), size):
+            part = set(universe[start:start + size])
+            self.selected = {name: [t for t in tickers if t in part]
+                             for name, tickers in selected.items()}
+            self.tickers = self._union()
+            with run.stage('fetch', len(self.tickers)) as stage:
+                self.fetch()
+                stage.tickers_out = len(self.tickers)
+            with run.stage('filter', len(self.fundamentals)) as stage:
+                self.filter()
+                stage.tickers_out = len(self.tickers)
+            with run.stage('score', len(self.tickers), profile=True) as stage:
+                self.score()
+                stage.tickers_out = sum(len(r) for r in self.results.values())
+            metrics.mark('first_result')
+            for name in scored:
+                scored[name].extend(self.selected[name])
+                collected[name].append(self.results[name])
+            chunks += 1
+        self.selected = scored
+        self.tickers = self._union()
+        if chunks > 1:
+            for name, parts in collected.items():
+                nonempty = [r for r in parts if not r.empty]
+                if nonempty:
+                    self.results[name] = pd.concat(nonempty, ignore_index=True)
+            run.count('screener_chunks', '', chunks)
+
+        total = sum(len(r) for r in self.results.values())
+        with run.stage('risk', total):
+            self.risk()
+        with run.stage('report', total) as stage:
+            title, report_df = self.report(top_n)
+            stage.tickers_out = 0 if report_df is None else len(report_df)
+        return title, report_df
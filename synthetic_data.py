@@ -0,0 +1,141 @@
+"""
+Benchmark ve testler için sentetik OHLCV ve temel veri evreni.
+
+Fiyatlar sembol başına farklı sürüklenme/oynaklıkta geometrik rastgele
+yürüyüştür; açılış boşlukları, gün içi fitiller, hacim patlamaları, kısa
+geçmişli (yeni listelenmiş) semboller ve düzeltilmemiş hisse bölünmeleri
+içerir. Son bar bugünün (ya da verilen tarihin) son iş günüdür, böylece
+tazelik kontrollerinden geçer.
+"""
+import numpy as np
+import pandas as pd
+
+from data_provider import FixtureProvider
+
+WEEKLY_RULE = 'W-FRI'
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_MINUTES = 390
+SECTORS = ('Technology', 'Financial Services', 'Healthcare', 'Consumer Cyclical', 'Industrials',
+           'Energy', 'Communication Services')
+
+
+def _business_days(end, count):
+    end = pd.Timestamp.now().normalize() if end is None else pd.Timestamp(end).normalize()
+    return pd.bdate_range(end=end, periods=count)
+
+
+def to_weekly(df):
+    """Günlük çerçeveyi Cuma etiketli haftalık barlara toplar"""
+    weekly = df.resample(WEEKLY_RULE).agg({'Open': 'first', 'High': 'max', 'Low': 'min',
+                                           'Close': 'last', 'Volume': 'sum'})
+    return weekly.dropna(subset=['Close'])
+
+
+def intraday_frames(n_tickers, n_bars, interval='5m', seed=0, end=None, tz='America/New_York'):
+    """
+    SyntheticUniverse fiyat sürecinin seans içi (09:30-16:00) bar
+    damgalarına taşınmış hali: {sembol: DataFrame}. Oynaklık gün içi
+    ölçeğe indirilmez; akış taraması testleri ve benchmark içindir.
+    """
+    minutes = int(interval.rstrip('m'))
+    per_day = SESSION_MINUTES // minutes
+    days = _business_days(end, -(-n_bars // per_day))
+    offsets = SESSION_OPEN + pd.to_timedelta(np.arange(per_day) * minutes, unit='m')
+    index = pd.DatetimeIndex((days.values[:, None] + offsets.values[None, :]).ravel()[-n_bars:])
+    index = index.tz_localize(tz)
+    universe = SyntheticUniverse(n_tickers, years=(n_bars + 0.5) / 252, seed=seed, end=end,
+                                 split_rate=0, short_history_rate=0, missing_rate=0)
+    return {t: df.iloc[-n_bars:].set_axis(index) for t, df in universe.daily.items()}
+
+
+class SyntheticUniverse:
+    """
+    n_tickers sembollük evren: daily/weekly {sembol: DataFrame},
+    fundamentals {sembol: info}, splits {sembol: (tarih, oran)}.
+    """
+
+    def __init__(self, n_tickers, years=2, seed=0, end=None, split_rate=0.05,
+                 spike_rate=0.02, short_history_rate=0.1, missing_rate=0.03):
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        n_bars = int(years * 252)
+        index = _business_days(end, n_bars)
+        self.tickers = [f"SYN{i:04d}" for i in range(n_tickers)]
+
+        # Fiyat: sembol başına sürüklenme ve oynaklık, kalın kuyruklu getiriler
+        drift = rng.normal(0.0003, 0.0004, n_tickers)
+        vol = rng.uniform(0.01, 0.04, n_tickers)
+        shocks = rng.standard_t(4, (n_bars, n_tickers)) / np.sqrt(2)
+        close = rng.lognormal(3.5, 1.0, n_tickers) * np.exp(np.cumsum(drift + vol * shocks, axis=0))
+        gap = rng.normal(0, 0.3, (n_bars, n_tickers)) * vol
+        opens = np.vstack([close[:1], close[:-1]]) * np.exp(gap)
+        wick = np.abs(rng.normal(0, 0.5, (2, n_bars, n_tickers))) * vol
+        high = np.maximum(opens, close) * (1 + wick[0])
+        low = np.minimum(opens, close) * (1 - wick[1])
+
+        # Hacim: sembol başına taban, günlük gürültü ve ara sıra 3-8 kat patlama
+        base_volume = rng.lognormal(14.5, 1.2, n_tickers)
+        volume = base_volume * rng.lognormal(0, 0.35, (n_bars, n_tickers))
+        spikes = rng.random((n_bars, n_tickers)) < spike_rate
+        volume = np.where(spikes, volume * rng.uniform(3, 8, (n_bars, n_tickers)), volume)
+
+        # Düzeltilmemiş bölünme: bölünme öncesi fiyatlar oran kadar yüksek, hacim düşük
+        self.splits = {}
+        for j in np.flatnonzero(rng.random(n_tickers) < split_rate):
+            at = int(rng.integers(n_bars // 4, n_bars - 5))
+            ratio = int(rng.choice([2, 3, 4]))
+            for panel in (opens, high, low, close):
+                panel[:at, j] *= ratio
+            volume[:at, j] /= ratio
+            self.splits[self.tickers[j]] = (index[at], ratio)
+
+        starts = np.where(rng.random(n_tickers) < short_history_rate,
+                          rng.integers(n_bars // 2, n_bars - 30, n_tickers), 0)
+        missing = rng.random((n_bars, n_tickers)) < missing_rate
+        missing[-1] = False
+
+        self.daily = {}
+        values = np.stack([opens, high, low, close, np.round(volume)], axis=-1)
+        for j, ticker in enumerate(self.tickers):
+            keep = ~missing[starts[j]:, j]
+            frame = pd.DataFrame(values[starts[j]:, j][keep],
+                                 index=index[starts[j]:][keep],
+                                 columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+            self.daily[ticker] = frame
+        self._weekly = None
+
+        self.fundamentals = {}
+        market_cap = 10 ** rng.uniform(8, 12.3, n_tickers)
+        revenue_growth = rng.normal(0.08, 0.15, n_tickers)
+        debt_to_equity = rng.lognormal(-0.5, 0.8, n_tickers)
+        return_on_equity = rng.normal(0.12, 0.12, n_tickers)
+        absent = rng.random((4, n_tickers)) < 0.05
+        sector = rng.choice(SECTORS, n_tickers)
+        for j, ticker in enumerate(self.tickers):
+            info = {'marketCap': float(market_cap[j]), 'revenueGrowth': float(revenue_growth[j]),
+                    'debtToEquity': float(debt_to_equity[j]),
+                    'returnOnEquity': float(return_on_equity[j])}
+            for k, field in enumerate(info.copy()):
+                if absent[k, j]:
+                    del info[field]
+            # Anlık görüntü alanları (ön filtre): son 3 ayın ortalama günlük hacmi
+            frame = self.daily[ticker]
+            info.update({'averageVolume': float(frame['Volume'].tail(63).mean()),
+                         'regularMarketPrice': float(frame['Close'].iloc[-1]),
+                         'sector': str(sector[j])})
+            self.fundamentals[ticker] = info
+
+    @property
+    def weekly(self):
+        if self._weekly is None:
+            self._weekly = {t: to_weekly(df) for t, df in self.daily.items()}
+        return self._weekly
+
+    def bars(self):
+        """FixtureProvider biçiminde {(sembol, aralık): df}"""
+        bars = {(t, '1d'): df for t, df in self.daily.items()}
+        bars.update({(t, '1wk'): df for t, df in self.weekly.items()})
+        return bars
+
+    def provider(self):
+        return FixtureProvider(bars=self.bars(), fundamentals=self.fundamentals)
@@ -0,0 +1,260 @@
+"""
+Telegram mesaj gönderimi: kalıcı bağlantı havuzu, asenkron kuyruk,
+bölme ve hız sınırı.
+
+Mesajlar Bot API'nin 4.096 karakter sınırına göre satır sınırlarından
+bölünür; kod bloğu (```) ortasından bölünen parçalarda blok kapatılıp
+sonraki parçada yeniden açılır. Her sohbet (chat_id) kendi kuyruğundan
+parçaları sırayla gönderir, sohbetler eşzamanlı işlenir. 429 yanıtında
+sunucunun retry_after süresi kadar beklenir; 5xx ve bağlantı hataları
+üstel geri çekilmeyle yeniden denenir. Markdown çözümlenemezse (400)
+parça düz metin olarak yeniden gönderilir.
+
+İstekler tek bir requests.Session (havuzlu HTTPAdapter) üzerinden yapılır;
+TELEGRAM_API_URL ile yerel bir sahte Bot API sunucusuna yönlendirilebilir.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+
+from async_fetch import TokenBucket, backoff_delay, describe_error, is_transient, run_sync
+
+DEFAULT_API_URL = 'https://api.telegram.org'
+MESSAGE_LIMIT = 4096
+FENCE = '```'
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 25.0          # saniyedeki mesaj (Bot API genel sınırı ~30)
+DEFAULT_RETRIES = 4
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+MAX_RETRY_AFTER = 120        # Bundan uzun bekleme istenirse parça başarısız sayılır
+
+
+# -------------------- BÖLME --------------------
+def split_message(text, limit=MESSAGE_LIMIT):
+    """
+    Metni satır sınırlarından en fazla 'limit' karakterlik parçalara böler.
+    Açık kod bloğu parça sonunda kapatılır ve sonraki parçada yeniden açılır;
+    sınırdan uzun tek satırlar karakterden bölünür.
+    """
+    if len(text) <= limit:
+        return [text]
+    budget = limit - 2 * len(FENCE)
+    chunks, lines, size, in_fence = [], [], 0, False
+    for line in text.split("\n"):
+        for piece in [line[i:i + budget] for i in range(0, len(line), budget)] or ['']:
+            toggles = piece.count(FENCE) % 2
+            if lines and size + 1 + len(piece) > budget:
+                chunks.append("\n".join(lines) + (FENCE if in_fence else ''))
+                lines, size = [], 0
+                if in_fence:   # blok yeniden açılır, ilk satırla birleşir
+                    piece, size = FENCE + piece, -len(FENCE)
+            size += len(piece) + (1 if lines else 0)
+            lines.append(piece)
+            if toggles:
+                in_fence = not in_fence
+    chunks.append("\n".join(lines))
+    return chunks
+
+
+# -------------------- RAPOR --------------------
+class DeliveryReport:
+    """Gönderim sonucu: sohbet başına gönderilen parça ve hatalar"""
+
+    def __init__(self):
+        self.sent = {}          # chat_id -> gönderilen parça sayısı
+        self.failed = {}        # chat_id -> neden
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.plain_fallbacks = 0
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return bool(self.sent) and not self.failed
+
+    def summary(self):
+        text = (f"Telegram: {sum(self.sent.values())} parça, {len(self.sent)} sohbet, "
+                f"{len(self.failed)} başarısız ({self.requests} istek, {self.retries} yeniden "
+                f"deneme, {self.rate_limited} hız sınırı, {self.elapsed:.1f} sn)")
+        for chat_id, reason in self.failed.items():
+            text += f"\n  - {chat_id}: {reason}"
+        return text
+
+
+class TelegramAPIError(Exception):
+    """Bot API'nin başarısız yanıtı"""
+
+    def __init__(self, status, description, retry_after=None):
+        super().__init__(f"HTTP {status}: {description}")
+        self.status = status
+        self.description = description
+        self.retry_after = retry_after
+
+    @property
+    def transient(self):
+        return self.status == 429 or self.status >= 500
+
+
+# -------------------- GÖNDERİCİ --------------------
+class TelegramDelivery:
+    """Bir bot için çok sohbetli, havuzlu ve yeniden denemeli gönderici"""
+
+    def __init__(self, token, chat_ids, api_url=DEFAULT_API_URL, parse_mode='Markdown',
+                 concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, retries=DEFAULT_RETRIES,
+                 timeout=DEFAULT_TIMEOUT, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, limit=MESSAGE_LIMIT, session=None, rng=None):
+        self.token = token
+        self.chat_ids = [chat_ids] if isinstance(chat_ids, (str, int)) else list(chat_ids)
+        self.api_url = api_url.rstrip('/')
+        self.parse_mode = parse_mode
+        self.concurrency = concurrency
+        self.rate = rate
+        self.retries = retries
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limit = limit
+        self.session = session or self._make_session(concurrency)
+        self.rng = rng or random.Random()
+        self.queue = []
+
+    @staticmethod
+    def _make_session(pool_size):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1))
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        self.session.close()
+
+    # --- tek istek ---
+    def _post(self, chat_id, text, parse_mode):
+        payload = {'chat_id': chat_id, 'text': text}
+        if parse_mode:
+            payload['parse_mode'] = parse_mode
+        response = self.session.post(f"{self.api_url}/bot{self.token}/sendMessage",
+                                     json=payload, timeout=self.timeout)
+        if response.status_code == 200:
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        retry_after = (body.get('parameters') or {}).get('retry_after') \
+            or response.headers.get('Retry-After')
+        raise TelegramAPIError(response.status_code, body.get('description', response.reason),
+                               float(retry_after) if retry_after else None)
+
+    async def _send_chunk(self, chat_id, text, bucket, semaphore, report):
+        parse_mode = self.parse_mode
+        for attempt in range(self.retries + 1):
+            async with semaphore:
+                await bucket.acquire()
+                report.requests += 1
+                try:
+                    await asyncio.to_thread(self._post, chat_id, text, parse_mode)
+                    return None
+                except Exception as e:
+                    error = e
+
+            if isinstance(error, TelegramAPIError) and error.status == 400 and parse_mode \
+                    and "parse" in error.description.lower():
+                # Bölünen ya da kaçışsız Markdown: düz metinle bir kez daha
+                logging.warning(f"Telegram Markdown hatası ({chat_id}), düz metin gönderiliyor")
+                report.plain_fallbacks += 1
+                parse_mode = None
+                continue
+            transient = error.transient if isinstance(error, TelegramAPIError) \
+                else is_transient(error)
+            if not transient or attempt == self.retries:
+                return describe_error(error)
+            if getattr(error, 'status', None) == 429:
+                report.rate_limited += 1
+                if (error.retry_after or 0) > MAX_RETRY_AFTER:
+                    return describe_error(error)
+                delay = error.retry_after or backoff_delay(attempt, self.base_delay,
+                                                           self.max_delay, rng=self.rng)
+            else:
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay, rng=self.rng)
+            report.retries += 1
+            logging.info(f"Telegram geçici hata ({chat_id}): {describe_error(error)}, "
+                         f"{delay:.2f} sn sonra tekrar denenecek")
+            await asyncio.sleep(delay)
+        return describe_error(error)
+
+    async def _drain(self, chat_id, queue, bucket, semaphore, report):
+        """Sohbetin kuyruğundaki parçaları sırayla gönderir; hata olursa kalanları atlar"""
+        while not queue.empty():
+            text = queue.get_nowait()
+            if chat_id in report.failed:
+                continue
+            reason = await self._send_chunk(chat_id, text, bucket, semaphore, report)
+            if reason is None:
+                report.sent[chat_id] = report.sent.get(chat_id, 0) + 1
+            else:
+                report.failed[chat_id] = reason
+
+    # --- kuyruk ---
+    def enqueue(self, text):
+        """Mesajı (bölünmüş parçalar halinde) gönderim kuyruğuna ekler"""
+        self.queue.extend(split_message(text, self.limit))
+
+    async def flush_async(self, chat_ids=None):
+        """Kuyruğu tüm sohbetlere eşzamanlı (sohbet içinde sıralı) gönderir"""
+        report = DeliveryReport()
+        started = time.perf_counter()
+        chunks, self.queue = self.queue, []
+        bucket = TokenBucket(self.rate)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        queues = {}
+        for chat_id in chat_ids or self.chat_ids:
+            queues[chat_id] = asyncio.Queue()
+            for chunk in chunks:
+                queues[chat_id].put_nowait(chunk)
+        await asyncio.gather(*(self._drain(chat_id, queue, bucket, semaphore, report)
+                               for chat_id, queue in queues.items()))
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def flush(self, chat_ids=None):
+        return run_sync(self.flush_async(chat_ids))
+
+    def send(self, text, chat_ids=None):
+        """Tek mesajı hemen gönderir; DeliveryReport döndürür"""
+        self.enqueue(text)
+        return self.flush(chat_ids)
+
+
+_default_delivery = None
+
+
+def get_default_delivery(token=None, chat_ids=None):
+    """
+    Paylaşılan gönderici (bağlantı havuzu çalıştırmalar arasında korunur).
+    TELEGRAM_TOKEN ve CHAT_ID (virgülle birden fazla sohbet) ortam
+    değişkenleri verilen değerlerin önündedir; TELEGRAM_API_URL Bot API
+    adresini değiştirir.
+    """
+    global _default_delivery
+    token = os.environ.get('TELEGRAM_TOKEN') or token
+    chat_ids = os.environ.get('CHAT_ID') or chat_ids
+    if isinstance(chat_ids, str):
+        chat_ids = [c.strip() for c in chat_ids.split(',') if c.strip()]
+    api_url = os.environ.get('TELEGRAM_API_URL', DEFAULT_API_URL)
+    current = _default_delivery
+    if current is None or (current.token, current.chat_ids, current.api_url) != \
+            (token, list(chat_ids or []), api_url.rstrip('/')):
+        session = current.session if current is not None else None
+        _default_delivery = TelegramDelivery(token, chat_ids or [], api_url=api_url,
+                                             session=session)
+    return _default_delivery
@@ -0,0 +1,18 @@
+"""
+Testler depo kökündeki düz modülleri içe aktarır; kök sys.path'e eklenir
+ve donmuş saat her testten sonra gerçek saate döndürülür.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_provider  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _real_clock():
+    yield
+    data_provider.set_clock(None)
@@ -0,0 +1,85 @@
+"""
+Testler için yerel sahte HTTP sunucusu. Her istek respond(yöntem, yol,
+sorgu, gövde) fonksiyonuna verilir; fonksiyon (durum, başlıklar, gövde)
+ya da (gecikme sn, durum, başlıklar, gövde) döndürür. Sunucu istekleri,
+aynı anda açık istek sayısını ve en yüksek değerini kaydeder.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+class StubServer:
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []        # (zaman, yöntem, yol, sorgu, gövde)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def paths(self):
+        with self._lock:
+            return [r[2] for r in self.requests]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _serve(self, method):
+                url = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = raw
+                path, query = unquote(url.path), parse_qs(url.query)
+                with stub._lock:
+                    stub.requests.append((time.monotonic(), method, path, query, body))
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    response = stub.respond(method, path, query, body)
+                    delay, (status, headers, payload) = (0, response) if len(response) == 3 \
+                        else (response[0], response[1:])
+                    if delay:
+                        time.sleep(delay)
+                    data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                    self.send_response(status)
+                    for key, value in (headers or {}).items():
+                        self.send_header(key, value)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def do_GET(self):
+                self._serve('GET')
+
+            def do_POST(self):
+                self._serve('POST')
+
+        return Handler
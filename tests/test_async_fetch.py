@@ -0,0 +1,169 @@
+"""async_fetch: yeniden deneme, geri çekilme, hız sınırı ve zaman aşımı (sahte sunucuya karşı)"""
+import logging
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from async_fetch import AsyncFetcher, TokenBucket, backoff_delay
+from data_provider import TransientFetchError, YahooChartProvider, YahooProvider, set_clock
+from stub_http import StubServer
+
+BARS = 60
+
+
+def _chart(symbol):
+    stamps = [1700000000 + 86400 * 7 * i for i in range(BARS)]
+    close = list(np.linspace(10, 20, BARS))
+    return {'chart': {'result': [{
+        'meta': {'exchangeTimezoneName': 'America/New_York', 'symbol': symbol},
+        'timestamp': stamps,
+        'indicators': {'quote': [{'open': close, 'high': close, 'low': close, 'close': close,
+                                  'volume': [1e6] * BARS}]}}]}}
+
+
+class Script:
+    """Sembol başına sıralı yanıtlar; liste bitince 200 döner"""
+
+    def __init__(self, plan=None, delay=0.0):
+        self.plan = {k: list(v) for k, v in (plan or {}).items()}
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, query, body):
+        symbol = path.rsplit('/', 1)[-1]
+        with self._lock:
+            steps = self.plan.get(symbol)
+            step = steps.pop(0) if steps else None
+        if step is None:
+            return self.delay, 200, {}, _chart(symbol)
+        if isinstance(step, tuple):   # (gecikme, durum)
+            return step[0], step[1], {}, {}
+        headers = {'Retry-After': '0.05'} if step == 429 else {}
+        return self.delay, step, headers, {}
+
+
+def _fetcher(server, **options):
+    provider = YahooChartProvider(server.url + '/v8/finance/chart/', timeout=5)
+    defaults = dict(concurrency=4, rate=200, retries=3, timeout=2.0, base_delay=0.01,
+                    max_delay=0.1, rng=random.Random(0))
+    defaults.update(options)
+    return AsyncFetcher(provider, **defaults)
+
+
+def test_retries_transient_errors_then_succeeds():
+    plan = {'A': [429, 503], 'B': [500], 'C': [429, 429, 429, 429], 'D': [400], 'E': [404]}
+    with StubServer(Script(plan)) as server:
+        frames, report = _fetcher(server).run(list('ABCDEF'), period='2y', interval='1wk')
+        paths = server.paths()
+    assert sorted(frames) == ['A', 'B', 'F']
+    assert len(frames['A']) == BARS
+    assert report.failed['C'].startswith('TransientFetchError: HTTP 429')
+    assert report.failed['D'].startswith('HTTPError')   # 400 yeniden denenmez
+    assert report.failed['E'] == 'veri yok'
+    count = {s: sum(p.endswith('/' + s) for p in paths) for s in 'ABCDEF'}
+    assert count == {'A': 3, 'B': 2, 'C': 4, 'D': 1, 'E': 1, 'F': 1}
+    assert report.retries == 2 + 1 + 3
+    assert report.requests == len(paths)
+
+
+def test_retry_after_is_honoured():
+    with StubServer(Script({'A': [429, 429]})) as server:
+        _fetcher(server, base_delay=0.0).run(['A'], period='1y')
+        stamps = [r[0] for r in server.requests]
+    # Sunucunun Retry-After (0.05 sn) değeri jitter'ın alt sınırıdır
+    assert all(b - a >= 0.05 for a, b in zip(stamps, stamps[1:]))
+
+
+def test_incremental_request_ends_at_frozen_clock():
+    """period2 dondurulmuş saatten gelir (kaset kaydı/oynatımı ve testler için)"""
+    frozen = 1718000000
+    set_clock(frozen)
+    with StubServer(Script()) as server:
+        provider = YahooChartProvider(server.url + '/v8/finance/chart/', timeout=5)
+        frames = provider.fetch_history(['A'], interval='1wk', start='2024-01-05')
+        query = server.requests[0][3]
+    assert len(frames['A']) == BARS
+    assert query['period1'] == [str(int(pd.Timestamp('2024-01-05', tz='UTC').timestamp()))]
+    assert query['period2'] == [str(frozen)]
+
+
+def test_concurrency_limit():
+    with StubServer(Script(delay=0.05)) as server:
+        frames, report = _fetcher(server, concurrency=3).run(
+            [f"S{i}" for i in range(24)], period='1y')
+    assert len(frames) == 24 and not report.failed
+    assert server.max_in_flight == 3
+
+
+def test_token_bucket_rate():
+    with StubServer(Script()) as server:
+        started = time.monotonic()
+        _fetcher(server, rate=50, burst=1).run([f"S{i}" for i in range(11)], period='1y')
+        elapsed = time.monotonic() - started
+        stamps = sorted(r[0] for r in server.requests)
+    assert elapsed >= 10 / 50 * 0.9
+    assert stamps[-1] - stamps[0] >= 10 / 50 * 0.9
+
+
+def test_timeout_does_not_exceed_concurrency():
+    # İlk istek zaman aşımından uzun sürer: iş parçacığı bitmeden yeni istek açılmamalı
+    with StubServer(Script({'A': [(0.6, 200)]})) as server:
+        frames, report = _fetcher(server, concurrency=1, timeout=0.2).run(
+            ['A', 'B', 'C'], period='1y')
+    assert sorted(frames) == ['A', 'B', 'C']
+    assert report.retries == 1
+    assert server.max_in_flight == 1
+
+
+def test_backoff_delay_bounds():
+    rng = random.Random(1)
+    delays = [backoff_delay(attempt, 0.5, 4.0, rng=rng) for attempt in range(8) for _ in range(50)]
+    assert min(delays) >= 0 and max(delays) <= 4.0
+    assert backoff_delay(0, 0.5, 4.0, retry_after=3.0, rng=rng) >= 3.0
+    assert backoff_delay(0, 0.5, 4.0, retry_after=60, rng=rng) == 4.0
+    assert TokenBucket(5).capacity == 5
+
+
+def test_yahoo_provider_maps_logged_rate_limit(monkeypatch):
+    yf = pytest.importorskip('yfinance')
+
+    def download(tickers, **kwargs):
+        logging.getLogger('yfinance').error(
+            "['AAA']: YFRateLimitError('Too Many Requests. Rate limited. Try after a while.')")
+        return None
+
+    monkeypatch.setattr(yf, 'download', download)
+    with pytest.raises(TransientFetchError) as raised:
+        YahooProvider().fetch_history(['AAA', 'BBB'], period='1y')
+    assert raised.value.status == 429 and raised.value.partial == {}
+
+
+def test_partial_chunk_retries_only_missing(tmp_path):
+    from bar_cache import BarCache, CachingProvider
+    from data_provider import FixtureProvider
+    from synthetic_data import SyntheticUniverse
+
+    universe = SyntheticUniverse(4, years=1, seed=1, split_rate=0, short_history_rate=0)
+
+    class Flaky(FixtureProvider):
+        requested = []
+
+        def fetch_history(self, tickers, period=None, interval='1d', start=None):
+            self.requested.append(list(tickers))
+            frames = super().fetch_history(tickers, period, interval, start)
+            if len(self.requested) == 1:
+                raise TransientFetchError('HTTP 429', status=429,
+                                          partial={t: frames[t] for t in tickers[:2]})
+            return frames
+
+    inner = Flaky(universe.bars())
+    provider = CachingProvider(inner, BarCache(str(tmp_path)))
+    frames, report = AsyncFetcher(provider, base_delay=0.0, rng=random.Random(0)).run(
+        universe.tickers, period='6mo')
+    assert sorted(frames) == universe.tickers and not report.failed
+    assert inner.requested == [universe.tickers, universe.tickers[2:]]
+    assert provider.cache.get(universe.tickers[0], '1d') is not None
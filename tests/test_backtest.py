@@ -0,0 +1,100 @@
+"""backtest: panel hizalama, simülasyon kuralları ve tarayıcıyla tutarlılık"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import DatePanel, Signals, align_frames, run_backtest, simulate, supertrend_signals
+from indicators import stack_frames, supertrend
+from main import evaluate_entry
+from synthetic_data import SyntheticUniverse, to_weekly
+
+
+def _panel(rows, tickers=('A',)):
+    """rows: bar başına sembol başına (açılış, yüksek, düşük, kapanış)"""
+    values = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(tickers), 4)
+    fields = {f: values[:, :, k] for k, f in enumerate(('Open', 'High', 'Low', 'Close'))}
+    index = pd.date_range('2024-01-01', periods=len(rows), freq='B')
+    return DatePanel(index, list(tickers), fields)
+
+
+def _signals(panel, entry, stop, target=np.nan, rank=None, exit_=None):
+    shape = panel.fields['Close'].shape
+    entry = np.asarray(entry, dtype=bool).reshape(shape)
+    return Signals(entry, np.ones(shape) if rank is None else np.asarray(rank, dtype=float),
+                   np.full(shape, stop, dtype=float), np.full(shape, target, dtype=float),
+                   np.zeros(shape, dtype=bool) if exit_ is None else np.asarray(exit_))
+
+
+def test_align_frames_uses_union_of_dates():
+    a = pd.DataFrame({'Close': [1.0, 2.0, 3.0]},
+                     index=pd.date_range('2024-01-01', periods=3, tz='America/New_York'))
+    b = pd.DataFrame({'Close': [5.0, 6.0]}, index=pd.DatetimeIndex(['2024-01-02', '2024-01-04']))
+    panel = align_frames({'A': a, 'B': b, 'EMPTY': b.iloc[:0]}, fields=('Close',))
+    assert panel.tickers == ['A', 'B'] and panel.index.tz is None
+    assert list(panel.index.strftime('%m-%d')) == ['01-01', '01-02', '01-03', '01-04']
+    np.testing.assert_array_equal(panel.fields['Close'],
+                                  [[1, np.nan], [2, 5], [3, np.nan], [np.nan, 6]])
+
+
+def test_stop_gap_and_target_exits():
+    # Giriş kapanıştan; ertesi gün boşlukla stop altında açılış -> açılıştan çıkış
+    panel = _panel([[100, 101, 99, 100], [90, 92, 88, 91], [91, 93, 90, 92]])
+    result = simulate(panel, _signals(panel, [True, False, False], stop=95.0))
+    trade, = result.trades.itertuples()
+    assert (trade.reason, trade.entry, trade.exit, trade.shares) == ('stop', 100.0, 90.0, 100)
+    assert result.equity.iloc[-1] == 50_000 - 100 * 10
+
+    # Aynı barda stop ve hedef görülürse stop
+    panel = _panel([[100, 101, 99, 100], [100, 121, 94, 110]])
+    trade, = simulate(panel, _signals(panel, [True, False], 95.0, 120.0)).trades.itertuples()
+    assert (trade.reason, trade.exit) == ('stop', 95.0)
+
+    # Hedef; dönem sonunda açık kalan pozisyon son fiyattan
+    panel = _panel([[100, 101, 99, 100], [100, 121, 99, 118], [118, 119, 117, 118],
+                    [118, 119, 117, 119]])
+    trades = simulate(panel, _signals(panel, [True, False, True, False], 95.0, 120.0)).trades
+    assert list(trades['reason']) == ['hedef', 'açık']
+    assert list(trades['exit']) == [120.0, 119.0] and list(trades['bars']) == [1, 1]
+
+
+def test_max_positions_take_highest_rank():
+    rows = [[[100, 101, 99, 100]] * 4, [[100, 101, 99, 100]] * 4]
+    panel = _panel(rows, tickers=('A', 'B', 'C', 'D'))
+    rank = [[1.0, 3.0, 2.0, 4.0], [0, 0, 0, 0]]
+    entry = [[True] * 4, [False] * 4]
+    result = simulate(panel, _signals(panel, entry, 98.0, rank=rank), max_positions=2)
+    assert sorted(result.trades['ticker']) == ['B', 'D']
+    assert set(result.trades['shares']) == {250} and result.stats['exposure'] == 1.0
+    # Pozisyon nakitle sınırlı: 500 $ risk / 0,5 $ = 1000 hisse yerine 50.000 / 100
+    trades = simulate(panel, _signals(panel, entry, 99.5, rank=rank), max_positions=2).trades
+    assert list(trades['ticker']) == ['D'] and list(trades['shares']) == [500]
+
+
+def test_supertrend_signals_match_scanner_rule():
+    universe = SyntheticUniverse(30, years=3, seed=21, split_rate=0)
+    weekly = {t: to_weekly(df) for t, df in universe.daily.items()}
+    panel = align_frames(weekly)
+    signals = supertrend_signals(panel, min_bars=0, min_volume=0)
+    entries = 0
+    for j, ticker in enumerate(panel.tickers):
+        p = stack_frames({ticker: weekly[ticker]}, [ticker], ('High', 'Low', 'Close'))
+        st = supertrend(p['High'], p['Low'], p['Close'])
+        candidate = evaluate_entry(ticker, p['Close'][-1, 0], st.supertrend[-1, 0],
+                                   st.direction[-1, 0], st.atr[-1, 0], st.r_score[-1, 0])
+        last = np.flatnonzero(~np.isnan(panel.fields['Close'][:, j]))[-1]
+        assert bool(signals.entry[last, j]) == (candidate is not None)
+        if candidate:
+            entries += 1
+            assert signals.stop[last, j] == pytest.approx(candidate['stop'])
+    assert 0 < entries < len(panel.tickers)
+
+
+def test_run_backtest():
+    universe = SyntheticUniverse(20, years=3, seed=22)
+    weekly = {t: to_weekly(df) for t, df in universe.daily.items()}
+    result = run_backtest(weekly, 'supertrend')
+    assert result.periods_per_year == 52 and len(result.equity) == len(align_frames(weekly).index)
+    assert result.stats['trades'] == len(result.trades) > 0
+    assert (result.trades['exit_date'] >= result.trades['entry_date']).all()
+    with pytest.raises(ValueError):
+        run_backtest(weekly, 'MOMENTUM')
@@ -0,0 +1,67 @@
+"""bar_cache: artımlı güncelleme ve yeniden ölçeklenen geçmişin tespiti"""
+import numpy as np
+import pandas as pd
+
+from bar_cache import BarCache, CachingProvider
+from data_provider import FixtureProvider, set_clock
+from synthetic_data import SyntheticUniverse
+
+SYMBOL = 'SYN0000'
+
+
+def _frames(end):
+    daily = SyntheticUniverse(1, years=1, seed=3, end=end, split_rate=0, missing_rate=0,
+                              short_history_rate=0).daily[SYMBOL]
+    return daily.iloc[:-1], daily
+
+
+def _at(day):
+    # Gün sonu ABD kapanışından sonra: o günün barı tamamlanmıştır
+    set_clock(pd.Timestamp(day).tz_localize('America/New_York').replace(hour=20).timestamp())
+
+
+def _warm_cache(tmp_path, first):
+    inner = FixtureProvider({(SYMBOL, '1d'): first})
+    provider = CachingProvider(inner, BarCache(str(tmp_path)))
+    _at(first.index[-1])
+    provider.fetch_history([SYMBOL], period='6mo')
+    return inner, provider
+
+
+def test_incremental_append_keeps_history(tmp_path):
+    first, full = _frames('2024-03-15')
+    inner, provider = _warm_cache(tmp_path, first)
+    inner.bars[(SYMBOL, '1d')] = full
+    _at(full.index[-1])
+    frames = provider.fetch_history([SYMBOL], period='6mo')
+    assert provider.rebased == 0
+    assert frames[SYMBOL].index[-1] == full.index[-1]
+    np.testing.assert_allclose(frames[SYMBOL]['Close'], full['Close'].loc[frames[SYMBOL].index])
+
+
+def test_rebased_history_is_refetched(tmp_path):
+    first, full = _frames('2024-03-15')
+    inner, provider = _warm_cache(tmp_path, first)
+    # Temettü düzeltmesi: sağlayıcı tüm geçmişi yeniden ölçekledi
+    adjusted = full.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] *= 0.97
+    inner.bars[(SYMBOL, '1d')] = adjusted
+    _at(full.index[-1])
+    frames = provider.fetch_history([SYMBOL], period='6mo')
+    assert provider.rebased == 1
+    np.testing.assert_allclose(frames[SYMBOL]['Close'], adjusted['Close'].loc[frames[SYMBOL].index])
+    cached = provider.cache.get(SYMBOL, '1d')
+    np.testing.assert_allclose(cached['Close'], adjusted['Close'].loc[cached.index])
+
+
+def test_partial_last_bar_is_replaced(tmp_path):
+    first, full = _frames('2024-03-15')
+    inner, provider = _warm_cache(tmp_path, first)
+    # Son önbellek barı yarım gün verisiydi; yalnızca o bar değişti
+    revised = full.copy()
+    revised.loc[first.index[-1], 'Close'] *= 1.05
+    inner.bars[(SYMBOL, '1d')] = revised
+    _at(full.index[-1])
+    frames = provider.fetch_history([SYMBOL], period='6mo')
+    assert provider.rebased == 0
+    assert frames[SYMBOL].loc[first.index[-1], 'Close'] == revised.loc[first.index[-1], 'Close']
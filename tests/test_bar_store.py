@@ -0,0 +1,52 @@
+"""bar_store: hacim hassasiyeti ve sembol başına saat dilimi"""
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore
+from timeframes import resample
+
+
+def _frame(index, start=10.0, volume=1e6):
+    n = len(index)
+    close = start + np.arange(n, dtype=np.float64)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': volume + np.arange(n)}, index=index)
+
+
+def test_large_volume_is_exact():
+    index = pd.date_range('2024-01-02', periods=5, freq='B')
+    volume = 2 ** 24 + 1   # float32'de 2^24'e yuvarlanır
+    store = BarStore.from_frames({'X': _frame(index, volume=volume * 1000)})
+    assert store.values[store.fields.index('Close')].dtype == np.float32
+    np.testing.assert_array_equal(store['X']['Volume'], volume * 1000 + np.arange(5))
+
+
+def test_timezone_is_kept_per_ticker():
+    days = pd.date_range('2024-03-04', periods=10, freq='B')
+    frames = {'THYAO.IS': _frame(days.tz_localize('Europe/Istanbul')),
+              'AAPL': _frame(days.tz_localize('America/New_York')),
+              'NAIVE': _frame(days)}
+    store = BarStore.from_frames(frames)
+    for ticker, df in frames.items():
+        assert store[ticker].index.equals(df.index), ticker
+        assert store.select([ticker])[ticker].index.equals(df.index)
+        assert store.tail('5d')[ticker].index.equals(df.index[-5:])
+    # Yerel gün her sembolün kendi saatiyle (İstanbul gece yarısı UTC'de önceki gün)
+    owners = np.repeat(np.arange(3), 10)
+    days_local = store.local_days(store.times, owners)
+    expected = days.values.astype('datetime64[D]').astype(np.int64)
+    np.testing.assert_array_equal(days_local, np.tile(expected, 3))
+
+
+def test_resample_uses_each_ticker_timezone():
+    days = pd.date_range('2024-03-04', periods=10, freq='B')   # iki tam hafta
+    frames = {'THYAO.IS': _frame(days.tz_localize('Europe/Istanbul')),
+              'AAPL': _frame(days.tz_localize('America/New_York'), volume=3e9)}
+    weekly = resample(BarStore.from_frames(frames), '1wk')
+    for ticker, df in frames.items():
+        out = weekly[ticker]
+        assert len(out) == 2, ticker
+        assert list(out.index.date) == [pd.Timestamp('2024-03-08').date(),
+                                        pd.Timestamp('2024-03-15').date()]
+        assert out.index.tz == df.index.tz
+        assert out['Volume'].iloc[0] == df['Volume'].iloc[:5].sum()
@@ -0,0 +1,61 @@
+"""data_quality: seanslar sembolün kendi borsa takviminden"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_quality
+from data_provider import set_clock
+from market_calendar import EXCHANGES
+from synthetic_data import to_weekly
+
+START, END = '2023-06-01', '2024-05-31'
+US = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'META']
+BIST = ['THYAO.IS', 'GARAN.IS', 'AKBNK.IS', 'ASELS.IS']
+
+
+def _frame(exchange, seed, tz=True):
+    days = pd.DatetimeIndex(EXCHANGES[exchange].sessions(START, END))
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))
+    index = days.tz_localize(EXCHANGES[exchange].tz) if tz else days
+    return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                         'Close': close, 'Volume': rng.integers(1e6, 5e6, len(days))},
+                        index=index, dtype=np.float64)
+
+
+@pytest.fixture
+def frames():
+    set_clock(pd.Timestamp(f'{END} 23:30', tz='America/New_York').timestamp())
+    out = {t: _frame('US', j) for j, t in enumerate(US)}
+    out.update({t: _frame('BIST', 10 + j) for j, t in enumerate(BIST)})
+    return out
+
+
+def test_mixed_exchange_daily_panel_is_clean(frames):
+    report = data_quality.check(frames, '1d')
+    assert report.primary_reasons() == {}
+    assert report.repaired.sum() == 0
+    for ticker in BIST:   # Yalnız başına da aynı
+        alone = data_quality.check({ticker: frames[ticker]}, '1d')
+        assert alone.mask.all() and alone.repaired.sum() == 0
+
+
+def test_mixed_exchange_gaps_use_own_calendar(frames):
+    bist = frames['GARAN.IS']
+    frames['GARAN.IS'] = bist.drop(bist.index[100])               # tek seans: onarılır
+    us = frames['MSFT']
+    frames['MSFT'] = us.drop(us.index[50:53])                     # üç seans: reddedilir
+    report = data_quality.check(frames, '1d', max_fill=2)
+    assert report.primary_reasons() == {'MSFT': 'eksik_veri'}
+    j = report.tickers.index('GARAN.IS')
+    assert report.repaired[j] == 1
+    assert bist.index[100] in report.frames['GARAN.IS'].index
+    others = [k for k, t in enumerate(report.tickers) if t not in ('GARAN.IS', 'MSFT')]
+    assert report.repaired[others].sum() == 0
+
+
+def test_mixed_exchange_weekly_panel_is_clean(frames):
+    weekly = {t: to_weekly(df) for t, df in frames.items()}
+    report = data_quality.check(weekly, '1wk')
+    assert report.primary_reasons() == {}
+    assert report.repaired.sum() == 0
@@ -0,0 +1,160 @@
+"""indicator_state: artımlı durumun toplu (vektörel) yolla aynılığı"""
+import json
+
+import pandas as pd
+import pytest
+
+from data_provider import BatchDataLoader, FixtureProvider, set_clock
+from fundamentals_store import FundamentalsStore
+from indicator_state import IndicatorStateStore, MomentumBundle, SuperTrendBundle, TrendBundle
+from indicators import IndicatorEngine, supertrend
+from result_cache import ResultCache
+from main import latest_supertrend
+from strategies import StrategyRunner, get_strategy, registered_strategies
+from synthetic_data import SyntheticUniverse, to_weekly
+
+END = '2024-06-28'
+PARAMS = SuperTrendBundle.make_params(10, 3.0, 14)
+SLID = 1e-3   # Kaymış pencere: ATR(14) başlangıç etkisi (13/14)^105 ≈ 4e-4
+
+
+@pytest.fixture(scope='module')
+def universe():
+    return SyntheticUniverse(24, years=3, seed=4, end=END, split_rate=0, short_history_rate=0)
+
+
+def _roundtrip(bundle):
+    return type(bundle).from_dict(json.loads(json.dumps(bundle.to_dict())))
+
+
+def _assert_close(actual, expected, rel=1e-9):
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(value, rel=rel, abs=1e-9, nan_ok=True), key
+
+
+def _supertrend_rows(frame):
+    high, low, close = (frame[[c]].to_numpy() for c in ('High', 'Low', 'Close'))
+    st = supertrend(high, low, close, **PARAMS)
+    return [{'close': close[row, 0], 'supertrend': st.supertrend[row, 0],
+             'direction': st.direction[row, 0], 'atr': st.atr[row, 0],
+             'r_score': st.r_score[row, 0]} for row in (-2, -1)]
+
+
+def _batch_momentum(frame):
+    engine = IndicatorEngine({'X': frame})
+    macd, signal_line = engine.macd(12, 26, 9)
+    row = lambda i: {'close': engine.close[i, 0], 'macd': macd[i, 0], 'signal': signal_line[i, 0],
+                     'rsi': engine.rsi(7)[i, 0]}
+    return engine, row(-2), dict(row(-1), volume_ratio=engine.volume_ratio(20)[0])
+
+
+def test_momentum_advance_matches_batch_on_growing_frame(universe):
+    full = universe.daily['SYN0001']
+    frame = full.iloc[:200]
+    engine, _, _ = _batch_momentum(frame)
+    bundle = MomentumBundle.seed(frame, engine.ema(12)[-2, 0], engine.ema(26)[-2, 0],
+                                 engine.macd(12, 26, 9)[1][-2, 0])
+    for end in range(201, 260, 3):
+        frame = full.iloc[:end]
+        bundle = _roundtrip(bundle)
+        prev, current = bundle.advance(frame)
+        _, expected_prev, expected = _batch_momentum(frame)
+        _assert_close(prev, expected_prev)
+        _assert_close(current, expected)
+
+
+def test_anchored_state_rejects_slid_window(universe):
+    full = universe.daily['SYN0002']
+    frame = full.iloc[100:130]
+    engine, _, _ = _batch_momentum(frame)
+    bundle = MomentumBundle.seed(frame, engine.ema(12)[-2, 0], engine.ema(26)[-2, 0],
+                                 engine.macd(12, 26, 9)[1][-2, 0])
+    # '30d' penceresi bir gün kaydı: EMA'lar yeni başlangıçtan hesaplanmalı
+    assert bundle.advance(full.iloc[101:131]) is None
+    assert bundle.advance(full.iloc[100:131]) is not None
+    # Eski biçimde (ilk bar bilgisi olmayan) kayıt yeniden kurulur
+    d = bundle.to_dict()
+    d.pop('first_ts')
+    assert MomentumBundle.from_dict(d).advance(full.iloc[100:132]) is None
+    assert not TrendBundle.anchored   # Sonlu pencereler kaymadan etkilenmez
+
+
+def test_supertrend_advances_on_window_slid_forward(universe):
+    """Haftalık '2y' penceresi bir bar kayar: durum kullanılır, değerler first_ts'den tam hesaplama"""
+    full = universe.weekly['SYN0004']
+    window = 105
+    frame = full.iloc[10:10 + window]
+    high, low, close = (frame[[c]].to_numpy() for c in ('High', 'Low', 'Close'))
+    bundle = SuperTrendBundle.seed(frame, supertrend(high, low, close, **PARAMS), 0, PARAMS)
+    for start in range(11, 16):
+        bundle = _roundtrip(bundle)
+        result = bundle.advance(full.iloc[start:start + window])
+        assert result is not None
+        expected = _supertrend_rows(full.iloc[10:start + window])
+        _assert_close(result[0], expected[0])
+        _assert_close(result[1], expected[1])
+        # Kayan pencereyle toplu hesaplamadan farkı ihmal edilebilir
+        _assert_close(result[1], _supertrend_rows(full.iloc[start:start + window])[1], rel=SLID)
+    # Pencere first_ts'den önce başlıyorsa (daha uzun geçmiş) yeniden kurulur
+    assert bundle.advance(full.iloc[9:16 + window]) is None
+
+
+def test_weekly_scan_uses_state_on_consecutive_fridays(universe):
+    store = IndicatorStateStore()
+    fridays = pd.date_range(end=END, periods=4, freq='W-FRI')
+    for week, friday in enumerate(fridays):
+        set_clock(friday.replace(hour=23).timestamp())
+        frames = {t: df[df.index <= friday].tail(105) for t, df in universe.weekly.items()}
+        hits = store.hits
+        latest = latest_supertrend(frames, store, PARAMS)
+        assert (store.hits - hits == len(frames)) == (week > 0)
+        for ticker, frame in frames.items():
+            _assert_close(latest[ticker], _supertrend_rows(frame)[1], rel=SLID)
+
+
+def test_supertrend_advance_matches_batch_on_growing_frame(universe):
+    full = universe.weekly['SYN0003']
+    frame = full.iloc[:80]
+    high, low, close = (frame[[c]].to_numpy() for c in ('High', 'Low', 'Close'))
+    bundle = SuperTrendBundle.seed(frame, supertrend(high, low, close, **PARAMS), 0, PARAMS)
+    for end in range(81, len(full), 2):
+        frame = full.iloc[:end]
+        bundle = _roundtrip(bundle)
+        prev, current = bundle.advance(frame)
+        high, low, close = (frame[[c]].to_numpy() for c in ('High', 'Low', 'Close'))
+        st = supertrend(high, low, close, **PARAMS)
+        for row, values in ((-2, prev), (-1, current)):
+            _assert_close(values, {'close': close[row, 0], 'supertrend': st.supertrend[row, 0],
+                                   'direction': st.direction[row, 0], 'atr': st.atr[row, 0],
+                                   'r_score': st.r_score[row, 0]})
+
+
+@pytest.mark.parametrize('strategy', registered_strategies())
+def test_warm_runner_matches_cold_on_sliding_window(universe, strategy):
+    """Her gün dönem penceresi kayar; sıcak durumla skorlanan değerler soğuk hesaplamayla aynı"""
+    warm_store = IndicatorStateStore()
+    for day in pd.bdate_range(end=END, periods=8):
+        bars = {}
+        for ticker, df in universe.daily.items():
+            part = df[df.index <= day]
+            bars[(ticker, '1d')], bars[(ticker, '1wk')] = part, to_weekly(part)
+        provider = FixtureProvider(bars, universe.fundamentals)
+        set_clock(day.replace(hour=23).timestamp())
+        snapshots = []
+        for state_store in (warm_store, IndicatorStateStore()):
+            runner = StrategyRunner(universe.tickers, [strategy], loader=BatchDataLoader(provider),
+                                    store=FundamentalsStore(provider), state_store=state_store,
+                                    result_cache=ResultCache())
+            runner.prefilter()
+            runner.fetch()
+            runner.filter()
+            snapshots.append(runner.snapshots()[strategy])
+        warm, cold = snapshots
+        assert warm.keys() == cold.keys()
+        # Kayabilen paketler (haftalık SuperTrend) first_ts'den bu yana hesaplar
+        sliding = get_strategy(strategy).state_kind == SuperTrendBundle.kind
+        for ticker, (prev, current) in cold.items():
+            _assert_close(warm[ticker][0], prev, rel=SLID if sliding else 1e-9)
+            _assert_close(warm[ticker][1], current, rel=SLID if sliding else 1e-9)
+    if get_strategy(strategy).state_kind:
+        assert warm_store.hits > 0
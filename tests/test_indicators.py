@@ -0,0 +1,144 @@
+"""indicators: vektörel motorun sembol bazlı pandas yoluyla aynılığı"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from bar_store import BarStore
+from data_provider import BatchDataLoader, set_clock
+from fundamentals_store import FundamentalsStore
+from indicator_state import IndicatorStateStore
+from indicators import IndicatorEngine, at
+from result_cache import ResultCache
+from strategies import RESULT_COLUMNS, StrategyRunner
+from synthetic_data import SyntheticUniverse
+
+END = '2024-03-15'
+
+
+@pytest.fixture(scope='module')
+def universe():
+    return SyntheticUniverse(300, years=1.5, seed=11, end=END)
+
+
+def _float32(df):
+    # BarStore alanları float32 tutar; referans aynı girdilerle hesaplanır
+    return df.astype(np.float32).astype(np.float64)
+
+
+def _rsi_reference(series, window):
+    # DualStrategyScreener._calculate_rsi
+    diff = series.diff(1).dropna()
+    gain = (diff.where(diff > 0, 0)).rolling(window=window).mean()
+    loss = (-diff.where(diff < 0, 0)).rolling(window=window).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+
+def _reference_scores(frames, infos, strategy):
+    """Vektörel motordan önceki sembol bazlı skor döngüsü"""
+    results = []
+    for ticker, data in frames.items():
+        info = infos[ticker]
+        market_cap = info.get('marketCap')
+        if market_cap is None:
+            continue
+        score, justification = 0, []
+        if strategy == 'AGRESİF':
+            if market_cap > 500_000_000:
+                continue
+            volume_ratio = data['Volume'].iloc[-1] / data['Volume'].iloc[-21:-1].mean()
+            if volume_ratio >= 3.0:
+                score += 4
+                justification.append(f"Hacim Artışı: %{round(volume_ratio * 100)} (Katalizör Sinyali)")
+            ema12 = data['Close'].ewm(span=12, adjust=False).mean()
+            ema26 = data['Close'].ewm(span=26, adjust=False).mean()
+            macd = ema12 - ema26
+            signal_line = macd.ewm(span=9, adjust=False).mean()
+            if macd.iloc[-2] < signal_line.iloc[-2] and macd.iloc[-1] > signal_line.iloc[-1]:
+                score += 3
+                justification.append("MACD Hattı, Sinyal Hattını Yukarı Kesti (Momentum Sinyali)")
+            rsi = _rsi_reference(data['Close'], 7)
+            rsi_prev, rsi_current = rsi.iloc[-2], rsi.iloc[-1]
+            if 30 <= rsi_prev <= 40 and rsi_current > rsi_prev:
+                score += 3
+                justification.append(f"RSI(7) {round(rsi_prev)}-{round(rsi_current)} aralığından yukarı döndü (Tepki Sinyali)")
+        else:
+            if market_cap < 10_000_000_000 or info.get('revenueGrowth', 0.0) <= 0.10:
+                continue
+            revenue_growth = info.get('revenueGrowth', 0.0)
+            if revenue_growth > 0.10:
+                score += 3
+                justification.append(f"Yıllık Gelir Büyümesi: %{round(revenue_growth * 100)} > %10")
+            debt_to_equity = info.get('debtToEquity')
+            if debt_to_equity is not None and debt_to_equity < 0.5:
+                score += 2
+                justification.append(f"D/E Oranı: {round(debt_to_equity, 2)} (Düşük Borçluluk)")
+            return_on_equity = info.get('returnOnEquity')
+            if return_on_equity is not None and return_on_equity > 0.15:
+                score += 2
+                justification.append(f"ROE: %{round(return_on_equity * 100)} (Yüksek Karlılık)")
+            if data['Close'].iloc[-1] > data['Close'].rolling(window=200).mean().iloc[-1]:
+                score += 3
+                justification.append("Fiyat, 200 Günlük Ortalamanın Üzerinde (Uzun Vadeli Trend)")
+            rsi = _rsi_reference(data['Close'], 14)
+            rsi_current = rsi.iloc[-1]
+            if 40 <= rsi_current <= 65:
+                score += 2
+                justification.append(f"RSI(14): {round(rsi_current, 1)} (Sağlıklı Trend)")
+        if score > 0:
+            results.append({'Hisse': ticker, 'Skor': score, 'Gerekçe': " | ".join(justification),
+                            'Son Kapanış': data['Close'].iloc[-1], 'RSI_Son': rsi.iloc[-1]})
+    return pd.DataFrame(results, columns=RESULT_COLUMNS)
+
+
+def test_engine_matches_pandas(universe):
+    frames = {t: df.tail(120) for t, df in universe.daily.items()}
+    engine = IndicatorEngine(frames)
+    macd, signal_line = engine.macd(12, 26, 9)
+    rsi, sma, volume_ratio = engine.rsi(7), engine.sma(50), engine.volume_ratio(20)
+    for j, ticker in enumerate(engine.tickers):
+        close, volume = frames[ticker]['Close'], frames[ticker]['Volume']
+        n = len(close)
+        expected_macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        np.testing.assert_allclose(macd[-n:, j], expected_macd, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(signal_line[-n:, j], expected_macd.ewm(span=9, adjust=False).mean(),
+                                   rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(rsi[-n + 1:, j], _rsi_reference(close, 7), rtol=1e-9)
+        np.testing.assert_allclose(sma[-n:, j], close.rolling(50).mean(), rtol=1e-9)
+        assert volume_ratio[j] == pytest.approx(volume.iloc[-1] / volume.iloc[-21:-1].mean())
+    # Kısa geçmiş: önceki bar yoksa NaN
+    assert np.isnan(at(np.ones((1, 2)), -2)).all()
+
+
+def test_engine_accepts_bar_store(universe):
+    frames = {t: df.tail(60) for t, df in universe.daily.items()}
+    store = BarStore.from_frames(frames, dtype=np.float64)
+    from_frames, from_store = IndicatorEngine(frames), IndicatorEngine(store)
+    assert from_frames.tickers == from_store.tickers
+    np.testing.assert_array_equal(from_frames.rsi(14), from_store.rsi(14))
+
+
+@pytest.mark.parametrize('strategy', ['AGRESİF', 'DENGELİ'])
+def test_runner_scores_match_per_ticker_loop(universe, strategy):
+    set_clock(pd.Timestamp(END).replace(hour=23).timestamp())
+    provider = universe.provider()
+    runner = StrategyRunner(universe.tickers, [strategy], loader=BatchDataLoader(provider),
+                            store=FundamentalsStore(provider), state_store=IndicatorStateStore(),
+                            result_cache=ResultCache())
+    runner.prefilter()
+    runner.fetch()
+    runner.filter()
+    runner.score()
+    actual = runner.results[strategy]
+
+    period = runner.strategies[0].period
+    frames = {t: _float32(df) for t, df in
+              provider.fetch_history(universe.tickers, period=period).items()}
+    expected = _reference_scores(frames, universe.fundamentals, strategy)
+
+    assert len(expected) > 5
+    actual = actual.sort_values('Hisse').reset_index(drop=True)
+    expected = expected.sort_values('Hisse').reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual[['Hisse', 'Skor', 'Gerekçe']],
+                                  expected[['Hisse', 'Skor', 'Gerekçe']], check_dtype=False)
+    np.testing.assert_allclose(actual['Son Kapanış'], expected['Son Kapanış'], rtol=1e-12)
+    np.testing.assert_allclose(actual['RSI_Son'], expected['RSI_Son'], rtol=1e-9)
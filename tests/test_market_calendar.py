@@ -0,0 +1,89 @@
+"""market_calendar: tatil/yarım gün tabloları, seans saatleri ve son seans"""
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from market_calendar import (EXCHANGES, bist_holidays, exchange_for, expected_last_bar,
+                             final_bars, is_current, us_holidays)
+
+US, BIST = EXCHANGES['US'], EXCHANGES['BIST']
+NY, IST = 'America/New_York', 'Europe/Istanbul'
+
+
+def _dates(*days):
+    return sorted(dt.date.fromisoformat(d) for d in days)
+
+
+def test_us_holidays():
+    full, half = us_holidays(2024)
+    assert sorted(full) == _dates('2024-01-01', '2024-01-15', '2024-02-19', '2024-03-29',
+                                  '2024-05-27', '2024-06-19', '2024-07-04', '2024-09-02',
+                                  '2024-11-28', '2024-12-25')
+    assert sorted(half) == _dates('2024-07-03', '2024-11-29', '2024-12-24')
+    # Cumartesiye denk gelen yılbaşı kaydırılmaz; Pazar tatilleri Pazartesiye geçer
+    full, half = us_holidays(2022)
+    assert dt.date(2021, 12, 31) not in us_holidays(2021)[0]
+    assert {dt.date(2022, 6, 20), dt.date(2022, 12, 26)} <= set(full)
+    assert dt.date(2022, 1, 1) not in full
+    # Tatile dönüşen 24 Aralık yarım gün sayılmaz
+    full, half = us_holidays(2021)
+    assert dt.date(2021, 12, 24) in full and half == [dt.date(2021, 11, 26)]
+    # Juneteenth 2022'den önce yok
+    assert dt.date(2021, 6, 18) not in full
+
+
+def test_bist_holidays():
+    full, half = bist_holidays(2024)
+    assert sorted(full) == _dates('2024-01-01', '2024-04-10', '2024-04-11', '2024-04-12',
+                                  '2024-04-23', '2024-05-01', '2024-05-19', '2024-06-16',
+                                  '2024-06-17', '2024-06-18', '2024-06-19', '2024-07-15',
+                                  '2024-08-30', '2024-10-29')
+    # Arifeler ve 28 Ekim yarım gün; Cumartesiye denk gelen Kurban arifesi düşer
+    assert sorted(half) == _dates('2024-04-09', '2024-10-28')
+    # Tablo dışındaki yıllarda yalnızca sabit tatiller; 15 Temmuz 2017'den itibaren
+    assert len(bist_holidays(2030)[0]) == 7 and bist_holidays(2030)[1] == [dt.date(2030, 10, 28)]
+    assert dt.date(2016, 7, 15) not in bist_holidays(2016)[0]
+
+
+def test_session_counts_and_closes():
+    assert len(US.sessions('2024-01-01', '2024-12-31')) == 252
+    assert len(US.sessions('2023-01-01', '2023-12-31')) == 250
+    assert not BIST.is_session('2024-04-11') and US.is_session('2024-04-11')
+    assert not US.is_session('2024-03-29') and BIST.is_session('2024-03-29')
+    # Hafta sonu tatilleri tabloda yer almaz
+    assert not np.isin(np.datetime64('2024-05-19'), BIST.holidays)
+    assert US.session_close('2024-11-29') == pd.Timestamp('2024-11-29 13:00', tz=NY)
+    assert US.session_close('2024-11-27') == pd.Timestamp('2024-11-27 16:00', tz=NY)
+    assert BIST.session_close('2024-04-09') == pd.Timestamp('2024-04-09 12:30', tz=IST)
+    assert US.sessions_between('2024-03-27', '2024-04-01') == 2
+    assert str(US.previous_session('2024-04-01')) == '2024-03-28'
+    assert str(BIST.next_session('2024-04-09')) == '2024-04-15'
+
+
+def test_open_and_last_session():
+    # Yarım günde 13:00 + veri gecikmesinden sonra seans kapalı, bar tamam
+    assert US.is_open(pd.Timestamp('2024-11-29 13:15', tz=NY))
+    assert not US.is_open(pd.Timestamp('2024-11-29 13:45', tz=NY))
+    assert str(US.last_session(pd.Timestamp('2024-11-29 13:45', tz=NY))) == '2024-11-29'
+    assert str(US.last_session(pd.Timestamp('2024-11-29 13:15', tz=NY))) == '2024-11-27'
+    # Bayramda çalışan tarama arifeyi son seans görür
+    assert expected_last_bar('THYAO.IS', '1d', pd.Timestamp('2024-04-11 12:00', tz=IST)) == \
+        pd.Timestamp('2024-04-09')
+    assert expected_last_bar('AAPL', '5m') is None
+    assert exchange_for('^XU100') is BIST and exchange_for('AAPL') is US
+
+    # Kapanıştan sonra sorulmuş seri Pazar günü hâlâ güncel; Pazartesi seans açıkken değil
+    checked = pd.Timestamp('2024-06-28 18:00', tz=NY).timestamp()
+    assert is_current('AAPL', '1d', checked, pd.Timestamp('2024-06-30 12:00', tz=NY))
+    assert not is_current('AAPL', '1d', checked, pd.Timestamp('2024-07-01 10:00', tz=NY))
+
+
+def test_week_ending_on_holiday_is_final_after_last_session():
+    # Paskalya haftası Perşembe biter (Cuma NYSE kapalı, BIST açık)
+    label = pd.Timestamp('2024-03-28', tz=NY).value
+    thursday = pd.Timestamp('2024-03-28 17:00', tz=NY)
+    np.testing.assert_array_equal(
+        final_bars(['AAPL', 'THYAO.IS'], '1wk', [label, pd.Timestamp('2024-03-29').value],
+                   [NY, None], thursday), [True, False])
+    assert not final_bars(['AAPL'], '1wk', [label], NY, pd.Timestamp('2024-03-28 15:00', tz=NY))[0]
@@ -0,0 +1,104 @@
+"""portfolio: daralmalı kovaryans, getiri hizalama ve korelasyon sınırlı seçim"""
+import numpy as np
+import pandas as pd
+
+from portfolio import (RiskModel, portfolio_risk, return_matrix, select_portfolio,
+                       shrinkage_covariance)
+
+
+def _reference(returns):
+    """Ledoit-Wolf (2003) sabit korelasyon hedefi, formüldeki döngülerle"""
+    T, n = returns.shape
+    x = returns - returns.mean(axis=0)
+    s = x.T @ x / T
+    sd = np.sqrt(np.diag(s))
+    r = s / np.outer(sd, sd)
+    rbar = (r.sum() - n) / (n * (n - 1))
+    f = rbar * np.outer(sd, sd)
+    np.fill_diagonal(f, np.diag(s))
+    pi = sum(np.mean((x[:, i] * x[:, j] - s[i, j]) ** 2) for i in range(n) for j in range(n))
+    rho = sum(np.mean((x[:, i] * x[:, i] - s[i, i]) ** 2) for i in range(n))
+    for i in range(n):
+        for j in range(n):
+            if i != j:
+                theta_ii = np.mean((x[:, i] ** 2 - s[i, i]) * (x[:, i] * x[:, j] - s[i, j]))
+                theta_jj = np.mean((x[:, j] ** 2 - s[j, j]) * (x[:, i] * x[:, j] - s[i, j]))
+                rho += rbar / 2 * (sd[j] / sd[i] * theta_ii + sd[i] / sd[j] * theta_jj)
+    gamma = ((f - s) ** 2).sum()
+    delta = min(1.0, max(0.0, (pi - rho) / gamma / T))
+    return delta * f + (1 - delta) * s, delta, rbar
+
+
+def _returns(T, n, seed, common=0.5):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.02, (T, 1))
+    return common * market + rng.normal(0, 0.02, (T, n)) * rng.uniform(0.5, 2.0, n)
+
+
+def test_shrinkage_matches_reference():
+    for T, n, seed in [(52, 6, 1), (20, 15, 2), (260, 4, 3)]:
+        returns = _returns(T, n, seed)
+        cov, delta, mean_corr = shrinkage_covariance(returns)
+        expected, expected_delta, expected_corr = _reference(returns)
+        np.testing.assert_allclose(cov, expected, rtol=1e-10, atol=1e-16)
+        assert abs(delta - expected_delta) < 1e-10 and abs(mean_corr - expected_corr) < 1e-10
+        # Simetrik, pozitif tanımlı; varyanslar örnek varyansı
+        np.testing.assert_allclose(cov, cov.T)
+        assert np.linalg.eigvalsh(cov).min() > 0
+        np.testing.assert_allclose(np.diag(cov), returns.var(axis=0))
+        assert 0.0 <= delta <= 1.0
+
+
+def test_shrinkage_grows_as_history_shortens():
+    returns = _returns(520, 20, 4)
+    short = shrinkage_covariance(returns[-26:])[1]
+    long = shrinkage_covariance(returns)[1]
+    assert short > long
+
+
+def test_nan_returns_and_short_history():
+    returns = _returns(40, 3, 5)
+    with_gaps = returns.copy()
+    with_gaps[:5, 1] = np.nan
+    cov, _, _ = shrinkage_covariance(with_gaps)
+    assert np.isfinite(cov).all()
+    # Tek sembol: daraltma yok
+    single, delta, _ = shrinkage_covariance(returns[:, :1])
+    assert delta == 0.0 and single.shape == (1, 1)
+
+
+def test_weekly_returns_align_by_calendar_week():
+    # Aynı hafta farklı günlerle etiketlenmiş (Cuma / Perşembe tatili) barlar
+    fridays = pd.date_range('2024-01-05', periods=12, freq='W-FRI')
+    thursdays = fridays - pd.Timedelta(days=1)
+    prices = np.exp(np.cumsum(_returns(12, 1, 6)[:, 0])) * 100
+    closes = {'A': pd.Series(prices, index=fridays),
+              'B': pd.Series(prices, index=thursdays.tz_localize('Europe/Istanbul'))}
+    tickers, returns = return_matrix(closes, '1wk', lookback=52)
+    assert tickers == ['A', 'B'] and returns.shape == (11, 2)
+    np.testing.assert_allclose(returns[:, 0], returns[:, 1])
+    assert return_matrix(closes, '1wk', lookback=4)[1].shape == (4, 2)
+
+
+def test_model_and_selection():
+    dates = pd.date_range('2023-01-06', periods=60, freq='W-FRI')
+    base = _returns(60, 3, 7, common=0.0)
+    twin = base[:, 0] + np.random.default_rng(8).normal(0, 0.002, 60)
+    closes = {t: pd.Series(100 * np.exp(np.cumsum(r)), index=dates)
+              for t, r in zip(['A', 'B', 'C', 'A2'], [*base.T, twin])}
+    closes['SHORT'] = closes['A'].iloc[-10:]   # Yetersiz geçmiş: modelde yok
+    model = RiskModel.from_closes(closes, '1wk', lookback=52)
+    assert model.tickers == ['A', 'B', 'C', 'A2']
+    corr = model.correlation_matrix(['A', 'A2', 'SHORT'])
+    assert corr[0, 1] > 0.9
+    assert corr[0, 2] == corr[1, 2] == model.mean_correlation
+
+    candidates = [{'ticker': t, 'price': 100.0, 'stop': 95.0, 'shares': 20,
+                   'position_value': 2000.0, 'actual_risk': 100.0} for t in ['A', 'A2', 'B', 'C']]
+    chosen, skipped = select_portfolio(candidates, model, 3, 1_000.0, 0.7)
+    assert [c['ticker'] for c in chosen] == ['A', 'B', 'C'] and skipped == {'korelasyon': 1}
+    # Dar bütçede ikinci aday bütçeye sığacak kadar küçültülür
+    chosen, _ = select_portfolio(candidates, model, 3, 120.0, 0.7)
+    assert chosen[0]['shares'] == 20 and chosen[1]['shares'] < 20
+    assert chosen[1]['actual_risk'] == chosen[1]['shares'] * 5.0
+    assert portfolio_risk(chosen, model) <= 120.0 + 1e-9
@@ -0,0 +1,83 @@
+"""position_ledger: açık/kapalı geçişleri, çıkış kontrolü ve JSON geri yükleme"""
+import pandas as pd
+
+from position_ledger import PositionLedger, check_exit
+
+
+def _candidate(ticker, price=100.0, stop=95.0, target=115.0):
+    return {'ticker': ticker, 'price': price, 'shares': 10, 'stop': stop, 'target': target,
+            'r_score': 1.5, 'position_value': 10 * price, 'actual_risk': 10 * (price - stop)}
+
+
+def _bars(rows, start='2024-06-03'):
+    index = pd.date_range(start, periods=len(rows), freq='B')
+    return pd.DataFrame(rows, index=index, columns=['Open', 'High', 'Low', 'Close'])
+
+
+def test_one_open_position_per_symbol():
+    with PositionLedger() as ledger:
+        assert ledger.record([_candidate('AAPL'), _candidate('MSFT')], '2024-06-02') == 2
+        # Açık pozisyonu olan sembol yeniden eklenmez
+        assert ledger.record([_candidate('AAPL', 120.0), _candidate('TSLA')], '2024-06-09') == 1
+        assert [p['ticker'] for p in ledger.open_positions()] == ['AAPL', 'MSFT', 'TSLA']
+        aapl = ledger.open_positions()[0]
+        assert aapl['entry_price'] == 100.0 and aapl['last_checked'] == '2024-06-02'
+
+        ledger.close_many([{'id': aapl['id'], 'exit_date': '2024-06-12', 'exit_price': 94.0,
+                            'exit_reason': 'stop'}],
+                          checked={p['id']: '2024-06-12' for p in ledger.open_positions()})
+        closed, = ledger.positions('closed')
+        assert closed['ticker'] == 'AAPL' and closed['exit_reason'] == 'stop'
+        assert closed['last_checked'] == '2024-06-12'
+        assert {p['last_checked'] for p in ledger.open_positions()} == {'2024-06-12'}
+        # Kapanmış pozisyon ikinci kez kapanmaz
+        ledger.close_many([{'id': aapl['id'], 'exit_date': '2024-06-13', 'exit_price': 90.0,
+                            'exit_reason': 'trend'}])
+        assert ledger.positions('closed')[0]['exit_price'] == 94.0
+
+        # Kapandıktan sonra aynı sembol yeniden açılabilir
+        assert ledger.record([_candidate('AAPL', 110.0)], '2024-06-16') == 1
+        assert len(ledger) == 4
+        assert [p['ticker'] for p in ledger.positions(since='2024-06-09')] == ['TSLA', 'AAPL']
+
+
+def test_check_exit():
+    with PositionLedger() as ledger:
+        ledger.record([_candidate('AAPL')], '2024-06-03')
+        position = ledger.open_positions()[0]
+    # Giriş barı sayılmaz; stop ve hedef aynı barda görülürse stop
+    frame = _bars([[100, 101, 90, 96], [100, 104, 97, 103], [103, 116, 94, 110]])
+    exit_, day = check_exit(position, frame)
+    assert (exit_['exit_reason'], exit_['exit_price'], day) == ('stop', 95.0, '2024-06-05')
+    assert exit_['pnl'] == -50.0
+
+    # Boşlukla hedefin üstünde açılış: açılış fiyatından çıkılır
+    exit_, _ = check_exit(position, _bars([[100, 101, 99, 100], [120, 125, 118, 122]]))
+    assert (exit_['exit_reason'], exit_['exit_price']) == ('hedef', 120.0)
+
+    # Seviye görülmedi: yön -1 ise son kapanıştan, değilse son kontrol günü ilerler
+    frame = _bars([[100, 101, 99, 100], [100, 104, 97, 103], [103, 105, 99, 101]])
+    assert check_exit(position, frame) == (None, '2024-06-05')
+    exit_, _ = check_exit(position, frame, direction=-1)
+    assert (exit_['exit_reason'], exit_['exit_price']) == ('trend', 101.0)
+    # Son kontrolden sonra yeni bar yoksa değişiklik yok
+    checked = dict(position, last_checked='2024-06-06')
+    assert check_exit(checked, frame) == (None, '2024-06-06')
+
+
+def test_json_round_trip(tmp_path):
+    path = str(tmp_path / 'pozisyonlar.json')
+    with PositionLedger() as ledger:
+        ledger.record([_candidate('AAPL'), _candidate('MSFT')], '2024-06-02')
+        first = ledger.open_positions()[0]
+        ledger.close_many([{'id': first['id'], 'exit_date': '2024-06-05', 'exit_price': 110.0,
+                            'exit_reason': 'hedef'}])
+        assert ledger.export_json(path) == 2
+        exported = ledger.positions()
+
+    with PositionLedger(str(tmp_path / 'positions.db')) as restored:
+        assert restored.import_json(path) == 2
+        # Aynı dosya tekrar yüklenince id'ye göre üzerine yazılır
+        assert restored.import_json(path) == 2
+        assert restored.positions() == exported
+        assert [p['ticker'] for p in restored.open_positions()] == ['MSFT']
@@ -0,0 +1,90 @@
+"""prefilter: kural alanları, max_age ve haftalık taramada info isteği sayısı"""
+from data_provider import set_clock
+from fundamentals_store import DAY, FIELD_TTLS, FundamentalsStore
+from prefilter import build_snapshot, prefilter, rule_columns
+from synthetic_data import SyntheticUniverse
+
+RULES = {'min_avg_volume': 100_000}
+
+
+START = 1_700_000_000.0
+
+
+def _store():
+    universe = SyntheticUniverse(40, years=1, seed=6)
+    set_clock(START)
+    provider = universe.provider()
+    return universe, FundamentalsStore(provider), provider
+
+
+def test_rule_columns():
+    assert rule_columns({'min_market_cap': 1e9, 'max_market_cap': None,
+                         'exclude_sectors': ['Energy'], 'min_avg_volume': 1}) == \
+        ['market_cap', 'sector', 'avg_volume']
+
+
+def test_weekly_prefilter_does_not_refresh_info_every_week():
+    universe, store, provider = _store()
+    now = START
+    first, _ = prefilter(store, universe.tickers, RULES, max_age=30 * DAY)
+    assert provider.calls == len(universe.tickers)
+
+    # Bir hafta sonra: averageVolume'un 1 günlük TTL'i dolmuş ama max_age içinde
+    now += 7 * DAY
+    set_clock(now)
+    again, _ = prefilter(store, universe.tickers, RULES, max_age=30 * DAY)
+    assert again == first and provider.calls == len(universe.tickers)
+
+    # max_age da dolunca yenilenir; max_age verilmezse TTL geçerlidir
+    now += 24 * DAY
+    set_clock(now)
+    prefilter(store, universe.tickers, RULES, max_age=30 * DAY)
+    assert provider.calls == 2 * len(universe.tickers)
+    now += 2 * DAY
+    set_clock(now)
+    prefilter(store, universe.tickers, RULES)
+    assert provider.calls == 3 * len(universe.tickers)
+
+
+def test_snapshot_requests_only_rule_fields():
+    universe, store, provider = _store()
+    now = START
+    store.get_many(universe.tickers)
+    calls = provider.calls
+    # Piyasa değeri bayat (1 gün) ama hacim kuralı onu kullanmaz
+    now += 2 * DAY
+    set_clock(now)
+    prefilter(store, universe.tickers, RULES, max_age=30 * DAY)
+    assert provider.calls == calls
+    snapshot = build_snapshot(store, universe.tickers, ['avg_volume'], max_age=30 * DAY)
+    assert snapshot['market_cap'].isna().all() and snapshot['avg_volume'].notna().all()
+
+
+def test_daily_refresh_keeps_quarterly_stamps():
+    universe, store, provider = _store()
+    now = START
+    store.get_many(universe.tickers)
+    ticker = universe.tickers[0]
+    stamped = dict(store.records[ticker])
+
+    # Piyasa değeri (1 gün) dolunca info çekilir ama çeyreklik alanlar yeniden damgalanmaz
+    now += 2 * DAY
+    set_clock(now)
+    store.get_many(universe.tickers, ['marketCap', 'revenueGrowth'])
+    assert provider.calls == 2 * len(universe.tickers)
+    record = store.records[ticker]
+    assert record['marketCap'][1] == now
+    for field, ttl in FIELD_TTLS.items():
+        if ttl > DAY:
+            assert record[field] == stamped[field]
+
+    # Çeyreklik TTL dolmadan her gün yalnızca günlük alanlar yenilenir
+    now += 88 * DAY
+    set_clock(now)
+    store.get_many(universe.tickers, ['marketCap', 'revenueGrowth'])
+    assert store.records[ticker]['revenueGrowth'] == stamped['revenueGrowth']
+    now += 1 * DAY
+    set_clock(now)
+    store.get_many(universe.tickers, ['marketCap', 'revenueGrowth'])
+    assert store.records[ticker]['revenueGrowth'][1] == now
+    assert store.records[ticker]['sector'] == stamped['sector']
@@ -0,0 +1,138 @@
+"""result_cache: süren (kapanmamış) barın sonucu önbelleğe girmez"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_provider import BatchDataLoader, FixtureProvider, set_clock
+from fundamentals_store import FundamentalsStore
+from indicator_state import IndicatorStateStore, SuperTrendBundle
+from main import analyze_universe, entry_digest, evaluate_entry, validate_universe
+from market_calendar import final_bars
+from result_cache import ResultCache
+from scan_settings import ATR_PERIOD, SUPER_TREND_MULT, SUPER_TREND_PERIOD
+from scan_pipeline import ScanPipeline
+from strategies import StrategyRunner
+from synthetic_data import SyntheticUniverse, to_weekly
+
+END = '2024-06-26'   # Çarşamba
+OPEN_AT = pd.Timestamp(f'{END} 14:00', tz='America/New_York')
+CLOSED_AT = pd.Timestamp(f'{END} 23:00', tz='America/New_York')
+OPEN, CLOSED = OPEN_AT.timestamp(), CLOSED_AT.timestamp()
+
+
+@pytest.fixture(scope='module')
+def universe():
+    return SyntheticUniverse(60, years=2, seed=12, end=END, split_rate=0, short_history_rate=0)
+
+
+def _forming(df):
+    """Seans ortasındaki son bar: kapanış ve hacim henüz kesinleşmemiş"""
+    df = df.copy()
+    df.iloc[-1, df.columns.get_loc('Close')] *= 0.93
+    df.iloc[-1, df.columns.get_loc('Volume')] *= 0.3
+    df.iloc[-1, df.columns.get_loc('Low')] = min(df['Low'].iloc[-1], df['Close'].iloc[-1])
+    return df
+
+
+def is_final_bar(symbol, interval, last_ts, tz, asof):
+    return bool(final_bars([symbol], interval, [last_ts], tz, asof)[0])
+
+
+def test_final_bars():
+    ny = 'America/New_York'
+    ns = lambda day: pd.Timestamp(day, tz=ny).value
+    assert not is_final_bar('AAPL', '1d', ns('2024-06-26'), ny, OPEN_AT)
+    assert is_final_bar('AAPL', '1d', ns('2024-06-25'), ny, OPEN_AT)
+    assert is_final_bar('AAPL', '1d', ns('2024-06-26'), ny, CLOSED_AT)
+    # Hafta/ay ancak dönemin son seansı kapanınca biter
+    assert not is_final_bar('AAPL', '1wk', ns('2024-06-28'), ny, CLOSED_AT)
+    assert is_final_bar('AAPL', '1wk', ns('2024-06-21'), ny, CLOSED_AT)
+    assert is_final_bar('AAPL', '1wk', ns('2024-06-28'), ny, pd.Timestamp('2024-06-28 17:00', tz=ny))
+    assert not is_final_bar('AAPL', '1mo', ns('2024-06-01'), ny, CLOSED_AT)
+    assert not is_final_bar('AAPL', '5m', ns('2024-06-25'), ny, CLOSED_AT)
+    # Borsalar kendi takvimiyle: 15:00 İstanbul'da BIST seansı sürüyor, ABD'de önceki gün kesin
+    at = pd.Timestamp(f'{END} 15:00', tz='Europe/Istanbul')
+    np.testing.assert_array_equal(
+        final_bars(['THYAO.IS', 'AAPL', 'GARAN.IS'], '1d',
+                   [pd.Timestamp(END).value, pd.Timestamp('2024-06-25').value,
+                    pd.Timestamp('2024-06-25').value], asof=at), [False, True, True])
+
+
+def _run(universe, daily, cache, strategy):
+    bars = {(t, '1d'): df for t, df in daily.items()}
+    bars.update({(t, '1wk'): to_weekly(df) for t, df in daily.items()})
+    provider = FixtureProvider(bars, universe.fundamentals)
+    runner = StrategyRunner(universe.tickers, [strategy], loader=BatchDataLoader(provider),
+                            store=FundamentalsStore(provider), state_store=IndicatorStateStore(),
+                            result_cache=cache)
+    runner.prefilter()
+    runner.fetch()
+    runner.filter()
+    runner.score()
+    return runner.results[strategy].sort_values('Hisse').reset_index(drop=True)
+
+
+@pytest.mark.parametrize('strategy', ['AGRESİF', 'DENGELİ', 'SUPERTREND'])
+def test_runner_does_not_cache_forming_bar(universe, strategy):
+    cache = ResultCache()
+    set_clock(OPEN)
+    _run(universe, {t: _forming(df) for t, df in universe.daily.items()}, cache, strategy)
+    assert len(cache) == 0
+
+    # Kapanıştan sonra aynı zaman damgalı bar kesin değerleriyle gelir
+    set_clock(CLOSED)
+    closed = _run(universe, universe.daily, cache, strategy)
+    pd.testing.assert_frame_equal(closed, _run(universe, universe.daily, ResultCache(), strategy))
+    # Günlük bar artık kesin; haftalık bar Cuma kapanışına kadar sürüyor
+    assert (len(cache) > 0) == (strategy != 'SUPERTREND')
+
+
+def test_analyze_universe_does_not_cache_forming_week(universe):
+    cache = ResultCache()
+    weekly = {t: to_weekly(df) for t, df in universe.daily.items()}
+    set_clock(CLOSED)
+    analyze_universe({t: _forming(df) for t, df in weekly.items()}, result_cache=cache,
+                     state_store=IndicatorStateStore())
+    assert len(cache) == 0
+    actual = analyze_universe(weekly, result_cache=cache, state_store=IndicatorStateStore())
+    assert actual == analyze_universe(weekly, result_cache=ResultCache(),
+                                      state_store=IndicatorStateStore())
+
+    # Önceki hafta kesin: sonucu saklanır ve tekrar hesaplanmadan gelir
+    previous = {t: df.iloc[:-1] for t, df in weekly.items()}
+    first = analyze_universe(previous, result_cache=cache, state_store=IndicatorStateStore())
+    hits = cache.hits
+    assert len(cache) > 0
+    assert analyze_universe(previous, result_cache=cache, state_store=IndicatorStateStore()) == first
+    assert cache.hits > hits
+
+
+def _scan(frames, cache):
+    provider = FixtureProvider({(t, '1wk'): df for t, df in frames.items()}, {})
+    params = SuperTrendBundle.make_params(SUPER_TREND_PERIOD, SUPER_TREND_MULT, ATR_PERIOD)
+    pipeline = ScanPipeline(BatchDataLoader(provider), validate_universe, evaluate_entry,
+                            IndicatorStateStore(), params, workers=1, result_cache=cache,
+                            cache_key=entry_digest(params))
+    candidates, _ = pipeline.run(list(frames), period='2y', interval='1wk')
+    return candidates, pipeline.stats
+
+
+def test_weekly_scan_pipeline_uses_result_cache(universe):
+    cache = ResultCache()
+    weekly = {t: to_weekly(df) for t, df in universe.daily.items()}
+    set_clock(CLOSED)
+    _scan({t: _forming(df) for t, df in weekly.items()}, cache)
+    assert len(cache) == 0
+
+    # Önceki hafta kesin: ikinci taramada hiçbir hisse hesaplanmaz
+    previous = {t: df.iloc[:-1] for t, df in weekly.items()}
+    first, stats = _scan(previous, cache)
+    assert stats['cached'] == 0 and len(cache) == stats['warm'] + stats['cold'] > 0
+    hits = cache.hits
+    second, stats = _scan(previous, cache)
+    assert second == first
+    assert stats['cached'] == len(cache) and stats['warm'] + stats['cold'] == 0
+    assert cache.hits - hits == len(cache)
+    # Aynı anahtar: analyze_universe taramanın sonuçlarını kullanır
+    assert analyze_universe(previous, result_cache=cache, state_store=IndicatorStateStore()) \
+        == sorted(first, key=lambda c: list(previous).index(c['ticker']))
@@ -0,0 +1,54 @@
+"""strategies: SuperTrendStrategy haftalık taramayla aynı eşikleri ve veri denetimini kullanır"""
+import numpy as np
+import pandas as pd
+
+import scan_settings
+from data_provider import BatchDataLoader, FixtureProvider, set_clock
+from fundamentals_store import FundamentalsStore
+from indicator_state import IndicatorStateStore, SuperTrendBundle
+from main import validate_universe
+from result_cache import ResultCache
+from strategies import StrategyRunner, SuperTrendStrategy
+from synthetic_data import SyntheticUniverse
+
+END = '2024-05-31'
+
+
+def test_supertrend_strategy_uses_scan_settings():
+    s = SuperTrendStrategy()
+    assert s.state_params == SuperTrendBundle.make_params(
+        scan_settings.SUPER_TREND_PERIOD, scan_settings.SUPER_TREND_MULT, scan_settings.ATR_PERIOD)
+    assert s.max_pullback_atr == scan_settings.MAX_PULLBACK_ATR
+    assert s.target_r == scan_settings.TARGET_R_MULTIPLE
+    assert s.min_bars == scan_settings.MIN_BARS
+    assert s.prefilter_rules['min_avg_volume'] == scan_settings.PREFILTER_MIN_DAILY_VOLUME
+
+
+def test_supertrend_strategy_validates_like_weekly_scan():
+    # Bölünme, sıçrama, eksik bar ve kısa geçmiş oranları yüksek: denetim gerçekten eler/onarır
+    universe = SyntheticUniverse(80, years=2, seed=9, end=END, split_rate=0.15, spike_rate=0.2,
+                                 short_history_rate=0.2, missing_rate=0.1)
+    weekly = dict(universe.weekly)
+    for ticker in universe.tickers[:10]:
+        weekly[ticker] = weekly[ticker].drop(weekly[ticker].index[-20])   # onarılacak tek boşluk
+    bars = universe.bars()
+    bars.update({(t, '1wk'): df for t, df in weekly.items()})
+    set_clock(pd.Timestamp(END).replace(hour=23).timestamp())
+    provider = FixtureProvider(bars, universe.fundamentals)
+    runner = StrategyRunner(universe.tickers, ['SUPERTREND'], loader=BatchDataLoader(provider),
+                            store=FundamentalsStore(provider), state_store=IndicatorStateStore(),
+                            result_cache=ResultCache())
+    runner.prefilter()
+    survivors = list(runner.selected['SUPERTREND'])
+    runner.fetch()
+    runner.filter()
+
+    expected = validate_universe({t: weekly[t] for t in survivors}, '1wk')
+    selected = runner.selected['SUPERTREND']
+    assert 0 < len(selected) < len(survivors)
+    assert selected == [t for t in survivors if t in expected]
+    store = runner.stores['1wk']
+    assert any(len(expected[t]) > len(weekly[t]) for t in selected)
+    for ticker in selected:
+        np.testing.assert_allclose(store[ticker]['Close'].to_numpy(),
+                                   expected[ticker]['Close'].to_numpy(), rtol=1e-6)
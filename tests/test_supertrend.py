@@ -0,0 +1,61 @@
+"""indicators.supertrend: vektörel çekirdeğin satır satır referansla aynılığı"""
+import numpy as np
+import pytest
+
+from indicators import IndicatorEngine, stack_right_aligned, supertrend, supertrend_reference
+from synthetic_data import SyntheticUniverse
+
+
+def _random_walk(rng, n_bars, n_tickers):
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.03, (n_bars, n_tickers)), axis=0))
+    opens = np.vstack([close[:1], close[:-1]])
+    wick = np.abs(rng.normal(0, 0.01, (2, n_bars, n_tickers)))
+    return np.maximum(opens, close) * (1 + wick[0]), np.minimum(opens, close) * (1 - wick[1]), close
+
+
+def _assert_matches_reference(high, low, close, period, multiplier):
+    result = supertrend(high, low, close, period=period, multiplier=multiplier, atr_period=period)
+    flips = 0
+    for j in range(close.shape[1]):
+        rows = ~np.isnan(close[:, j])
+        h, l, c = high[rows, j], low[rows, j], close[rows, j]
+        line, direction = supertrend_reference(list(h), list(l), list(c), period, multiplier)
+        np.testing.assert_allclose(result.supertrend[rows, j], line, rtol=1e-12, equal_nan=True)
+        np.testing.assert_array_equal(result.direction[rows, j], direction)
+        assert np.isnan(result.direction[~rows, j]).all()
+        flips += int(np.count_nonzero(np.diff(np.asarray(direction)[period - 1:]) != 0))
+    return flips
+
+
+@pytest.mark.parametrize('period,multiplier', [(10, 3.0), (7, 2.0), (14, 1.5)])
+def test_random_panel(period, multiplier):
+    high, low, close = _random_walk(np.random.default_rng(period), 300, 40)
+    flips = _assert_matches_reference(high, low, close, period, multiplier)
+    assert flips > 40   # Her iki yönde dönüşler de karşılaştırıldı
+
+
+def test_ragged_panel():
+    rng = np.random.default_rng(5)
+    lengths = rng.integers(5, 200, 30)
+    lengths[:3] = (9, 10, 11)   # Isınma sınırındaki kısa geçmişler
+    series = [_random_walk(rng, n, 1) for n in lengths]
+    high, low, close = (stack_right_aligned([s[k][:, 0] for s in series]) for k in range(3))
+    flips = _assert_matches_reference(high, low, close, 10, 3.0)
+    assert flips > 0
+    # 9 barlık sütun hiç ısınmaz, 10 barlık sütunun yalnızca son barı dolu
+    direction = supertrend(high, low, close).direction
+    assert np.isnan(direction[:, 0]).all()
+    assert np.count_nonzero(~np.isnan(direction[:, 1])) == 1
+
+
+def test_engine_weekly_universe():
+    universe = SyntheticUniverse(60, years=3, seed=2, end='2024-03-15')
+    engine = IndicatorEngine(universe.weekly)
+    result = engine.supertrend(10, 3.0, 10)
+    for j, ticker in enumerate(engine.tickers):
+        df = universe.weekly[ticker]
+        line, direction = supertrend_reference(list(df['High']), list(df['Low']),
+                                               list(df['Close']), 10, 3.0)
+        n = len(df)
+        np.testing.assert_allclose(result.supertrend[-n:, j], line, rtol=1e-12, equal_nan=True)
+        np.testing.assert_array_equal(result.direction[-n:, j], direction)
@@ -0,0 +1,106 @@
+"""telegram_delivery: bölme, 429/5xx/400 davranışı ve çok sohbetli gönderim (sahte Bot API)"""
+import random
+import threading
+
+from stub_http import StubServer
+from telegram_delivery import FENCE, MESSAGE_LIMIT, TelegramDelivery, split_message
+
+TOKEN = '123:abc'
+
+
+class BotAPI:
+    """chat_id başına sıralı yanıtlar ((durum, gövde) ya da durum); liste bitince ok"""
+
+    def __init__(self, plan=None, delay=0.0):
+        self.plan = {str(k): list(v) for k, v in (plan or {}).items()}
+        self.delay = delay
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, query, body):
+        assert method == 'POST' and path == f"/bot{TOKEN}/sendMessage"
+        chat_id = str(body['chat_id'])
+        with self._lock:
+            steps = self.plan.get(chat_id)
+            step = steps.pop(0) if steps else None
+            if step is None:
+                self.messages.append(body)
+        if step is None:
+            return self.delay, 200, {}, {'ok': True, 'result': {}}
+        status, payload = step if isinstance(step, tuple) else (step, {})
+        return status, {}, dict({'ok': False, 'description': f"error {status}"}, **payload)
+
+
+def _delivery(server, chat_ids, **options):
+    defaults = dict(api_url=server.url, rate=500, base_delay=0.01, max_delay=0.05,
+                    rng=random.Random(0))
+    defaults.update(options)
+    return TelegramDelivery(TOKEN, chat_ids, **defaults)
+
+
+def test_split_message_keeps_rows_and_fences():
+    rows = [f"| SYM{i:04d} | {i * 1.5:10.2f} | gerekçe metni |" for i in range(600)]
+    text = "🌟 Başlık\n" + FENCE + "\n" + "\n".join(rows) + "\n" + FENCE
+    chunks = split_message(text)
+    assert len(chunks) > 1
+    assert all(len(c) <= MESSAGE_LIMIT for c in chunks)
+    assert all(c.count(FENCE) % 2 == 0 for c in chunks)
+    body = [line.replace(FENCE, '') for c in chunks for line in c.split("\n")]
+    assert [line for line in body if line.startswith('| SYM')] == rows
+    assert split_message("kısa") == ["kısa"]
+
+
+def test_rate_limit_honours_retry_after():
+    api = BotAPI({1: [(429, {'parameters': {'retry_after': 0.2}})]})
+    with StubServer(api) as server:
+        report = _delivery(server, [1]).send("merhaba")
+        stamps = [r[0] for r in server.requests]
+    assert report.ok and report.sent == {1: 1}
+    assert report.rate_limited == 1 and report.retries == 1
+    assert stamps[1] - stamps[0] >= 0.2
+
+
+def test_rate_limit_too_long_fails_without_waiting():
+    api = BotAPI({1: [(429, {'parameters': {'retry_after': 3600}})]})
+    with StubServer(api) as server:
+        report = _delivery(server, [1]).send("merhaba")
+    assert not report.ok and '429' in report.failed[1]
+    assert report.elapsed < 1
+
+
+def test_server_errors_are_retried_with_backoff():
+    api = BotAPI({1: [500, 502], 2: [503] * 10})
+    with StubServer(api) as server:
+        report = _delivery(server, [1, 2], retries=3).send("a\n" * 3000)
+    chunks = len(split_message("a\n" * 3000))
+    assert report.sent == {1: chunks}
+    assert '503' in report.failed[2]
+    # Başarısız sohbetin kalan parçaları gönderilmez
+    assert sum(1 for m in api.messages if m['chat_id'] == 2) == 0
+    assert report.retries == 2 + 3
+
+
+def test_bad_request_parse_error_falls_back_to_plain_text():
+    api = BotAPI({1: [(400, {'description': "Bad Request: can't parse entities"})],
+                  2: [(400, {'description': 'Bad Request: chat not found'})]})
+    with StubServer(api) as server:
+        report = _delivery(server, [1, 2]).send("*kapanmamış markdown")
+        requests = [r[4] for r in server.requests]
+    assert report.sent == {1: 1} and report.plain_fallbacks == 1
+    assert 'chat not found' in report.failed[2]
+    assert sum(1 for body in requests if body['chat_id'] == 2) == 1   # 400 yeniden denenmez
+    assert 'parse_mode' not in api.messages[0]
+
+
+def test_fan_out_is_concurrent_and_ordered():
+    rows = "\n".join(f"satır {i}" for i in range(2000))
+    chats = [10, 20, 30]
+    with StubServer(BotAPI(delay=0.05)) as server:
+        api = server.respond
+        report = _delivery(server, chats, concurrency=3).send(rows)
+        max_in_flight = server.max_in_flight
+    expected = split_message(rows)
+    assert report.ok and report.sent == {c: len(expected) for c in chats}
+    for chat_id in chats:
+        assert [m['text'] for m in api.messages if m['chat_id'] == chat_id] == expected
+    assert max_in_flight == 3
@@ -0,0 +1,106 @@
+"""timeframes: hafta/ay sınırları, etiketler, drop_partial ve türetici sağlayıcı"""
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore
+from data_provider import FixtureProvider, set_clock
+from timeframes import ResamplingProvider, period_keys, resample, resample_frame
+
+HOLIDAYS = ['2024-03-29', '2024-05-27', '2024-07-04', '2024-11-28', '2024-12-25']
+
+
+def _daily(start='2024-01-02', end='2024-12-31', tz=None, seed=3):
+    days = pd.bdate_range(start, end, freq='C', holidays=HOLIDAYS)
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))
+    spread = rng.uniform(0.5, 2.0, len(days))
+    return pd.DataFrame({'Open': close * rng.uniform(0.99, 1.01, len(days)),
+                         'High': close + spread, 'Low': close - spread, 'Close': close,
+                         'Volume': rng.integers(1e5, 1e7, len(days)).astype(np.float64)},
+                        index=days.tz_localize(tz) if tz else days)
+
+
+def _expected(df, rule):
+    """pandas ile aynı gruplama; etiket grubun son işlem günü"""
+    grouped = df.groupby(pd.Grouper(freq=rule))
+    out = grouped.agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last',
+                       'Volume': 'sum'})
+    out.index = grouped.apply(lambda g: g.index[-1]).values
+    return out
+
+
+def test_period_keys():
+    days = pd.DatetimeIndex(['2024-06-23', '2024-06-24', '2024-06-30', '2024-07-01'])
+    day_numbers = days.values.astype('datetime64[D]').astype(np.int64)
+    week = period_keys(day_numbers, '1wk')
+    # Pazar önceki haftada, Pazartesi yeni hafta başlar
+    assert week[0] < week[1] == week[2] < week[3]
+    month = period_keys(day_numbers, '1mo')
+    assert month[0] == month[1] == month[2] < month[3]
+
+
+def test_weekly_and_monthly_match_pandas():
+    df = _daily()
+    for interval, rule in (('1wk', 'W-SUN'), ('1mo', 'MS')):
+        actual = resample_frame(df, interval)
+        expected = _expected(df, rule)
+        assert actual.index.equals(pd.DatetimeIndex(expected.index)), interval
+        np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-12)
+    weekly = resample_frame(df, '1wk')
+    # Cuma tatilse hafta Perşembe etiketli
+    assert pd.Timestamp('2024-03-28') in weekly.index and pd.Timestamp('2024-07-05') in weekly.index
+    assert resample_frame(df, '1mo').index[-1] == pd.Timestamp('2024-12-31')
+
+
+def test_local_midnight_bars_stay_in_their_week():
+    # İstanbul gece yarısı UTC'de önceki gün (Pazar) 21:00
+    df = _daily('2024-06-03', '2024-06-28', tz='Europe/Istanbul')
+    weekly = resample_frame(df, '1wk')
+    assert list(weekly.index.strftime('%Y-%m-%d')) == ['2024-06-07', '2024-06-14',
+                                                       '2024-06-21', '2024-06-28']
+    assert weekly.index.tz == df.index.tz
+    assert weekly['Open'].iloc[1] == df['Open'].loc['2024-06-10']
+
+
+def test_missing_values_are_skipped():
+    df = _daily('2024-06-03', '2024-06-14')
+    df.iloc[1, df.columns.get_loc('High')] = np.nan
+    df.iloc[2, df.columns.get_loc('Volume')] = np.nan
+    weekly = resample_frame(df, '1wk')
+    assert weekly['High'].iloc[0] == df['High'].iloc[:5].max()
+    assert weekly['Volume'].iloc[0] == df['Volume'].iloc[:5].sum()
+
+
+def test_drop_partial_by_each_symbol_local_date():
+    frames = {'THYAO.IS': _daily('2024-06-03', '2024-06-28', tz='Europe/Istanbul'),
+              'AAPL': _daily('2024-06-03', '2024-06-28', tz='America/New_York')}
+    store = BarStore.from_frames(frames, dtype=np.float64)
+    # Çarşamba: içinde bulunulan hafta atılır
+    weekly = resample(store, '1wk', drop_partial=True, asof='2024-06-26')
+    assert all(weekly[t].index[-1].day == 21 for t in frames)
+    # Pazar 22:00 UTC: İstanbul'da yeni hafta başladı, New York'ta hâlâ Pazar
+    weekly = resample(store, '1wk', drop_partial=True,
+                      asof=pd.Timestamp('2024-06-30 22:00', tz='UTC'))
+    assert weekly['THYAO.IS'].index[-1].day == 28
+    assert weekly['AAPL'].index[-1].day == 21
+    # Ay sınırı
+    monthly = resample(store, '1mo', drop_partial=True, asof='2024-07-01')
+    assert all(monthly[t].index[-1].day == 28 for t in frames)
+    assert resample(store, '1mo', drop_partial=True, asof='2024-06-30').length('AAPL') == 0
+
+
+def test_provider_derives_weekly_from_cached_daily():
+    df = _daily('2023-01-03', '2024-06-28')
+    provider = ResamplingProvider(FixtureProvider({('AAPL', '1d'): df}, {}))
+    set_clock(pd.Timestamp('2024-06-29 12:00', tz='America/New_York').timestamp())
+    daily = provider.fetch_history(['AAPL'], period='1y', interval='1d')['AAPL']
+    weekly = provider.fetch_history(['AAPL'], period='1y', interval='1wk')['AAPL']
+    assert provider.memo_misses == 1 and provider.memo_hits == 1
+    assert daily.index[0] > pd.Timestamp('2023-06-29')
+    full = resample_frame(df, '1wk')
+    pd.testing.assert_frame_equal(weekly, full[full.index > pd.Timestamp('2023-06-29 12:00')],
+                                  check_freq=False)
+    # Başlangıç tarihli istek haftanın ilk günlerini de içerir
+    since = provider.fetch_history(['AAPL'], interval='1wk', start='2024-06-12')['AAPL']
+    assert since.index[0] == pd.Timestamp('2024-06-14')
+    assert since['Open'].iloc[0] == df['Open'].loc['2024-06-10']
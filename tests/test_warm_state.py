@@ -0,0 +1,102 @@
+"""warm_state: anlık görüntüye yazıp geri açma (barlar ve JSON bölümleri)"""
+import numpy as np
+import pandas as pd
+
+from bar_cache import BarCache
+from fundamentals_store import FundamentalsStore
+from indicator_state import IndicatorStateStore, SuperTrendBundle
+from main import latest_supertrend
+from result_cache import ResultCache
+from synthetic_data import SyntheticUniverse, to_weekly
+from warm_state import ALIGN, MAGIC, open_snapshot, write_snapshot
+
+
+def _warm(tmp_path):
+    universe = SyntheticUniverse(6, years=1, seed=9, split_rate=0)
+    cache = BarCache(str(tmp_path / 'cache'))
+    frames = {}
+    for i, (ticker, df) in enumerate(universe.daily.items()):
+        if i % 2:
+            df = df.tz_localize('America/New_York')
+        frames[ticker] = df
+        cache.put(ticker, '1d', df)
+    cache.flush()
+    fundamentals = FundamentalsStore(universe.provider())
+    fundamentals.get_many(universe.tickers)
+    states = IndicatorStateStore()
+    params = SuperTrendBundle.make_params(10, 3.0, 14)
+    latest_supertrend({t: to_weekly(df) for t, df in universe.daily.items()}, states, params)
+    results = ResultCache()
+    results.put('supertrend', universe.tickers[0], '1wk', 1_700_000_000_000_000_000, 'abc',
+                {'ticker': universe.tickers[0], 'price': 10.5})
+    results.put('supertrend', universe.tickers[1], '1wk', 1_700_000_000_000_000_000, 'abc', None)
+    return frames, cache, fundamentals, states, results
+
+
+def test_round_trip(tmp_path):
+    frames, cache, fundamentals, states, results = _warm(tmp_path)
+    path = str(tmp_path / 'warm_state.bin')
+    count, size = write_snapshot(path, cache, fundamentals, states, results)
+    assert count == len(frames) and size == (tmp_path / 'warm_state.bin').stat().st_size
+    assert (tmp_path / 'warm_state.bin').read_bytes()[:8] == MAGIC
+
+    snapshot = open_snapshot(path)
+    assert all(entry['offset'] % ALIGN == 0 for entry in snapshot.entries.values())
+    assert snapshot.section('fundamentals') == fundamentals.records
+    assert snapshot.section('indicator_state') == states.to_dict() != {}
+    assert snapshot.section('analysis_results') == results.to_dict()
+    assert snapshot.section('missing') is None
+
+    # Boş dizindeki önbellek barları eşlemeden kopyasız okur; saat dilimi korunur
+    restored = BarCache(str(tmp_path / 'empty'))
+    restored.attach(snapshot)
+    assert sorted(restored.keys()) == sorted(f"{t}|1d" for t in frames)
+    for ticker, df in frames.items():
+        records = restored.records(ticker, '1d')
+        assert not records.flags.owndata and not records.flags.writeable
+        out = restored.get(ticker, '1d')
+        assert out.index.equals(df.index), ticker
+        np.testing.assert_allclose(out['Close'], df['Close'], rtol=1e-6)
+
+    # Bölümlerden kurulan depolar aynı sonuçları verir
+    store = FundamentalsStore(None)
+    store.merge(snapshot.section('fundamentals'))
+    assert store.records == fundamentals.records
+    state_store = IndicatorStateStore()
+    state_store.merge(snapshot.section('indicator_state'))
+    assert state_store.to_dict() == states.to_dict()
+    cache2 = ResultCache()
+    cache2.merge(snapshot.section('analysis_results'))
+    ticker = next(iter(frames))
+    assert cache2.get('supertrend', ticker, '1wk', 1_700_000_000_000_000_000, 'abc') == \
+        {'ticker': ticker, 'price': 10.5}
+
+
+def test_newer_local_entry_wins(tmp_path):
+    frames, cache, *_ = _warm(tmp_path)
+    path = str(tmp_path / 'warm_state.bin')
+    ticker, df = next(iter(frames.items()))
+    write_snapshot(path, cache)
+    local = BarCache(str(tmp_path / 'local'))
+    local.put(ticker, '1d', df.iloc[:-5])
+    local.flush()
+    local.attach(open_snapshot(path))
+    # Anlık görüntüdeki seri daha yeni: o okunur
+    assert local.get(ticker, '1d').index[-1] == df.index[-1]
+    newer = pd.concat([df, df.iloc[-1:].set_axis(df.index[-1:] + pd.Timedelta(days=3))])
+    local.put(ticker, '1d', newer)
+    assert local.get(ticker, '1d').index[-1] == newer.index[-1]
+
+
+def test_missing_or_corrupt_snapshot_is_cold_start(tmp_path):
+    assert open_snapshot(None) is None
+    assert open_snapshot(str(tmp_path / 'yok.bin')) is None
+    bad = tmp_path / 'bad.bin'
+    bad.write_bytes(b'NOTWARM!' + bytes(64))
+    assert open_snapshot(str(bad)) is None
+    frames, cache, *_ = _warm(tmp_path)
+    path = tmp_path / 'warm_state.bin'
+    write_snapshot(str(path), cache)
+    truncated = tmp_path / 'truncated.bin'
+    truncated.write_bytes(path.read_bytes()[:40])
+    assert open_snapshot(str(truncated)) is None
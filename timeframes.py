@@ -0,0 +1,248 @@
+"""
+Günlük barlardan haftalık/aylık barlar.
+
+Tüm zaman dilimleri tek bir günlük seriden türetilir: haftalık ve aylık
+OHLCV, BarStore dizileri üzerinde tüm semboller için aynı anda grup
+indirgemeleriyle (np.*.reduceat) kurulur. Gruplar borsanın yerel
+tarihine göre belirlenir (tz'li indekste önce yerel saate çevrilir);
+etiket grubun son *işlem gününün* damgasıdır. Böylece tatiller kendiliğinden
+atlanır (Cuma tatilse hafta Perşembe etiketlidir) ve içinde bulunulan
+yarım hafta/ay o ana kadarki günlerden oluşan bir bar olarak gelir;
+drop_partial=True ile (asof tarihine göre) atılabilir. Tamamlanmış bir
+grubun etiketi sonradan değişmez; artımlı indikatör durumu (sondan bir
+önceki bar) bu yüzden kararlıdır.
+
+ResamplingProvider bir sağlayıcıyı sarar: günlük barları en uzun dönemle
+(BIST_DAILY_PERIOD, varsayılan '2y') bir kez çeker ve süreç içinde
+saklar; aynı sembol için sonraki günlük (daha kısa dönem), haftalık ve
+aylık istekler ağ çağrısı yapmadan bu seriden karşılanır.
+"""
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, _utc_ns
+from data_provider import DataProvider, TransientFetchError, clock_now, period_to_offset
+
+DERIVED_INTERVALS = ('1wk', '1mo')
+DEFAULT_DAILY_PERIOD = '2y'
+DEFAULT_MEMO_TTL = 600       # Günlük serinin süreç içinde yeniden kullanılacağı süre (sn)
+
+
+# -------------------- GRUPLAMA --------------------
+def _local_days(times, tz):
+    """UTC ns -> borsa yerel tarihi (1970'ten gün sayısı)"""
+    index = pd.DatetimeIndex(times.view('datetime64[ns]'))
+    if tz is not None:
+        index = index.tz_localize('UTC').tz_convert(tz).tz_localize(None)
+    return index.values.astype('datetime64[D]').astype(np.int64)
+
+
+def period_keys(days, interval):
+    """Yerel gün sayılarından grup anahtarı (Pazartesi başlangıçlı hafta ya da ay)"""
+    if interval == '1wk':
+        return (days + 3) // 7    # 1970-01-01 Perşembe: Pazartesi-Pazar aynı anahtar
+    if interval == '1mo':
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    raise ValueError(f"Türetilemeyen aralık: {interval}")
+
+
+def resample(store, interval, drop_partial=False, asof=None):
+    """
+    Günlük BarStore'dan haftalık ('1wk') ya da aylık ('1mo') BarStore.
+    Açılış grubun ilk, kapanış son barı; yüksek/düşük en büyük/küçük
+    (NaN atlanır), hacim toplamdır. drop_partial ise her sembolün asof
+    (varsayılan bugün, borsa yerel tarihi) anındaki dönemine düşen son
+    grubu (ve varsa sonrası) atılır.
+    """
+    fields = store.fields
+    lengths = (store.ends - store.starts).astype(np.int64)
+    bars = np.concatenate([np.arange(a, b) for a, b in zip(store.starts, store.ends)]) \
+        if len(lengths) else np.zeros(0, dtype=np.int64)
+    times = store.times[bars]
+    values = [row[bars] for row in store.values]
+    owners = np.repeat(np.arange(len(lengths)), lengths)
+    keys = period_keys(store.local_days(times, owners), interval)
+    if drop_partial:
+        # Bugünün dönemi sembolün kendi yerel tarihiyle (tz'siz asof yerel tarihtir)
+        now = clock_now(tz='UTC') if asof is None else pd.Timestamp(asof)
+        if now.tz is None:
+            day = np.datetime64(now.date(), 'D').astype(np.int64)
+            current = np.full(len(lengths), period_keys(np.array([day]), interval)[0])
+        else:
+            today = np.full(len(lengths), now.value, dtype=np.int64)
+            current = period_keys(store.local_days(today, np.arange(len(lengths))), interval)
+        keep = keys < current[owners]
+        times, owners, keys = times[keep], owners[keep], keys[keep]
+        values = [row[keep] for row in values]
+
+    boundary = np.ones(len(keys), dtype=bool)
+    boundary[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+    first = np.flatnonzero(boundary)
+    last = np.append(first[1:], len(boundary))[:len(first)] - 1   # Grup yoksa boş
+    index = {f: k for k, f in enumerate(fields)}
+    out = [np.empty(len(first), dtype=row.dtype) for row in values]
+    if len(first):
+        for field, k in index.items():
+            row = values[k]
+            if field == 'Open':
+                out[k] = row[first]
+            elif field == 'High':
+                out[k] = np.fmax.reduceat(row, first)
+            elif field == 'Low':
+                out[k] = np.fmin.reduceat(row, first)
+            elif field == 'Volume':
+                out[k] = np.add.reduceat(np.nan_to_num(row), first)
+            else:   # Close ve diğerleri: son değer
+                out[k] = row[last]
+
+    counts = np.bincount(owners[first], minlength=len(lengths)) if len(first) \
+        else np.zeros(len(lengths), dtype=np.int64)
+    ends = np.cumsum(counts)
+    return BarStore(store.tickers, times[last], out, ends - counts, ends, fields, store.tzs)
+
+
+def resample_frame(df, interval, drop_partial=False, asof=None):
+    """Tek çerçeve için resample (float64)"""
+    store = BarStore.from_frames({'_': df}, dtype=np.float64)
+    result = resample(store, interval, drop_partial, asof)
+    return result['_'] if result.length('_') else df.iloc[:0]
+
+
+# -------------------- SAĞLAYICI --------------------
+def _cutoff(period, tz=None):
+    """Dönemin şimdiden geriye başlangıcı (UTC ns); dönem yoksa None"""
+    offset = period_to_offset(period)
+    if offset is None:
+        return None
+    start = clock_now() - offset
+    return int(_utc_ns(pd.DatetimeIndex([start.tz_localize(tz) if tz else start]))[0])
+
+
+def _covers(have, want):
+    """'have' dönemi 'want' dönemini kapsıyor mu ('max' her şeyi kapsar)"""
+    have_offset, want_offset = period_to_offset(have), period_to_offset(want)
+    if have_offset is None:
+        return True
+    if want_offset is None:
+        return False
+    now = clock_now().normalize()
+    return now - have_offset <= now - want_offset
+
+
+class ResamplingProvider(DataProvider):
+    """
+    Günlük barları bir kez çekip diğer aralıkları onlardan türeten sarmalayıcı.
+    hits: süreç içi günlük seriden karşılanan semboller (altındaki önbelleğin
+    isabetleri de eklenir); misses: alttaki önbellekte de soğuk olanlar.
+    """
+    name = 'resample'
+
+    def __init__(self, inner, daily_period=DEFAULT_DAILY_PERIOD, ttl=DEFAULT_MEMO_TTL):
+        self.inner = inner
+        self.daily_period = daily_period
+        self.ttl = ttl
+        self.max_batch = getattr(inner, 'max_batch', None)
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self._daily = {}      # sembol -> (çekim anı, dönem, DataFrame)
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self):
+        return self.memo_hits + getattr(self.inner, 'hits', 0)
+
+    @property
+    def misses(self):
+        return getattr(self.inner, 'misses', self.memo_misses)
+
+    def _daily_frames(self, tickers, period):
+        """Sembollerin en az 'period' kapsayan günlük çerçeveleri (gerekirse tek istekte)"""
+        now = time.monotonic()
+        frames, missing = {}, []
+        with self._lock:
+            for ticker in tickers:
+                cached = self._daily.get(ticker)
+                if cached and now - cached[0] < self.ttl and _covers(cached[1], period):
+                    frames[ticker] = cached[2]
+                else:
+                    missing.append(ticker)
+        self.memo_hits += len(frames)
+        self.memo_misses += len(missing)
+        if missing:
+            fetch_period = period if not _covers(self.daily_period, period) else self.daily_period
+            error = None
+            try:
+                fetched = self.inner.fetch_history(missing, period=fetch_period, interval='1d')
+            except TransientFetchError as e:
+                fetched, error = e.partial, e
+            with self._lock:
+                for ticker, df in fetched.items():
+                    self._daily[ticker] = (now, fetch_period, df)
+            frames.update(fetched)
+            if error is not None:
+                raise TransientFetchError(str(error), error.status, error.retry_after,
+                                          partial=frames) from error
+        return frames
+
+    def fetch_history(self, tickers, period=None, interval='1d', start=None):
+        if interval != '1d' and interval not in DERIVED_INTERVALS:
+            return self.inner.fetch_history(tickers, period=period, interval=interval, start=start)
+        try:
+            if start is not None:
+                # Haftanın/ayın başındaki günler de gelsin diye bir dönem öncesinden çekilir
+                lead = pd.DateOffset(months=1) if interval == '1mo' else pd.DateOffset(weeks=1)
+                daily = self.inner.fetch_history(tickers, interval='1d',
+                                                 start=pd.Timestamp(start) - lead
+                                                 if interval != '1d' else start)
+            else:
+                daily = self._daily_frames(tickers, period or 'max')
+        except TransientFetchError as e:
+            # Alınabilen semboller türetilip hatayla birlikte iletilir
+            partial = self._derive(e.partial, period, interval, start)
+            raise TransientFetchError(str(e), e.status, e.retry_after, partial=partial) from e
+        return self._derive(daily, period, interval, start)
+
+    @staticmethod
+    def _derive(daily, period, interval, start):
+        """Günlük çerçevelerden istenen aralığı ve dönemi (ya da başlangıcı) üretir"""
+        if not daily:
+            return {}
+
+        tz = next((df.index.tz for df in daily.values() if getattr(df.index, 'tz', None)), None)
+        if interval == '1d':
+            frames = daily
+        else:
+            store = resample(BarStore.from_frames(daily, dtype=np.float64), interval)
+            frames = {t: store[t] for t in store.tickers if store.length(t)}
+        if start is not None:
+            begin = pd.Timestamp(start)
+            if tz is not None and begin.tz is None:
+                begin = begin.tz_localize(tz)
+            return {t: df[df.index >= begin] for t, df in frames.items()
+                    if (df.index >= begin).any()}
+        cut = _cutoff(period, tz)
+        if cut is None:
+            return frames
+        out = {}
+        for ticker, df in frames.items():
+            first = int(np.searchsorted(_utc_ns(df.index), cut, side='right'))
+            if first < len(df):
+                out[ticker] = df.iloc[first:] if first else df
+        return out
+
+    def fetch_fundamentals(self, ticker):
+        return self.inner.fetch_fundamentals(ticker)
+
+
+def wrap_provider(provider):
+    """BIST_RESAMPLE=0 değilse sağlayıcıyı ResamplingProvider ile sarar"""
+    if os.environ.get('BIST_RESAMPLE', '1') == '0':
+        return provider
+    period = os.environ.get('BIST_DAILY_PERIOD') or DEFAULT_DAILY_PERIOD
+    logging.debug(f"Haftalık/aylık barlar günlük seriden ({period}) türetilecek")
+    return ResamplingProvider(provider, daily_period=period)
@@ -0,0 +1,223 @@
+"""
+Tek dosyalık sıcak durum anlık görüntüsü (bar önbelleği, temel veriler,
+indikatör durumu, analiz sonuçları).
+
+Zamanlanmış iş her çalıştırmada boş bir makinede başlar; binlerce küçük
+dosyayı açmak ve JSON'ları ayrıştırmak yerine tüm sıcak durum tek bir
+dosyada tutulur ve bellek eşlemesiyle açılır. Biçim:
+
+    MAGIC (8 bayt) | başlık uzunluğu (u64, LE) | başlık (JSON) | hizalı bölümler
+
+Başlık her bar kaydı için manifest bilgisini ve dosyadaki ofsetini, JSON
+bölümleri (temel veri kayıtları, indikatör durumu) için ofset/uzunluğu
+taşır. Açılış yalnızca başlığı okur; barlar bar_cache.BarCache.attach()
+ile bağlandıktan sonra istendikçe eşlemeden kopyasız okunur, JSON bölümleri
+ilgili depo kurulurken ayrıştırılır.
+
+BIST_WARM_SNAPSHOT bir dosya yolu gösteriyorsa get_default_loader,
+get_default_store, get_default_state_store ve get_default_result_cache
+anlık görüntüyü kullanır; yerel dizindeki daha yeni kayıtlar önceliklidir.
+
+    python warm_state.py save warm_state.bin
+    python warm_state.py info warm_state.bin
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+MAGIC = b'BISTWARM'
+VERSION = 1
+ALIGN = 64
+DEFAULT_SNAPSHOT_FILE = 'warm_state.bin'
+_HEADER = struct.Struct('<8sQ')
+
+
+def _pad(n):
+    return -n % ALIGN
+
+
+# -------------------- OKUMA --------------------
+class WarmSnapshot:
+    """Bellek eşlemeli, salt okunur anlık görüntü"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Anlık görüntü değil: {path}")
+        header = json.loads(bytes(self._mmap[_HEADER.size:_HEADER.size + length]))
+        if header.get('version') != VERSION:
+            self.close()
+            raise ValueError(f"Desteklenmeyen anlık görüntü sürümü: {header.get('version')}")
+        self.created = header['created']
+        self.entries = header['bars']   # 'sembol|aralık' -> manifest kaydı + offset
+        self.sections = header['sections']
+
+    def records(self, entry):
+        """Kaydın BAR_DTYPE dizisi (eşlemenin kopyasız görünümü)"""
+        from bar_cache import BAR_DTYPE
+
+        return np.frombuffer(self._mmap, dtype=BAR_DTYPE, count=entry['rows'],
+                             offset=entry['offset'])
+
+    def section(self, name):
+        """JSON bölümünün içeriği (yoksa None)"""
+        if name not in self.sections:
+            return None
+        offset, length = self.sections[name]
+        return json.loads(bytes(self._mmap[offset:offset + length]))
+
+    @property
+    def nbytes(self):
+        return len(self._mmap)
+
+    def close(self):
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Dışarıda kopyasız görünümler yaşıyorsa eşleme süreçle birlikte kapanır
+            pass
+
+
+def open_snapshot(path):
+    """Anlık görüntüyü açar; dosya yoksa ya da bozuksa None (soğuk başlangıç)"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return WarmSnapshot(path)
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        logging.warning(f"Sıcak anlık görüntü okunamadı, soğuk başlangıç: {e}")
+        return None
+
+
+# -------------------- YAZMA --------------------
+def write_snapshot(path, cache=None, fundamentals=None, state_store=None, results=None):
+    """
+    Önbellekteki tüm bar kayıtlarını, temel veri kayıtlarını, indikatör
+    durumunu ve analiz sonuçlarını tek dosyaya atomik olarak yazar; (kayıt
+    sayısı, bayt) döndürür.
+    """
+    from bar_cache import _atomic_write
+
+    arrays, entries = [], {}
+    if cache is not None:
+        for key in cache.keys():
+            symbol, interval = key.rsplit('|', 1)
+            entry = cache.entry(symbol, interval)
+            records = cache.records(symbol, interval) if entry is not None else None
+            if records is None:
+                continue
+            entry = {k: v for k, v in entry.items() if k not in ('file', 'offset')}
+            entries[key] = entry
+            arrays.append((entry, records))
+    blobs = {}
+    if fundamentals is not None:
+        blobs['fundamentals'] = json.dumps(fundamentals.records).encode('utf-8')
+    if state_store is not None:
+        blobs['indicator_state'] = json.dumps(state_store.to_dict()).encode('utf-8')
+    if results is not None:
+        blobs['analysis_results'] = json.dumps(results.to_dict()).encode('utf-8')
+
+    # Ofsetler başlık boyutuna bağlı; başlık sabit noktaya gelene dek yeniden hesaplanır
+    header_length = 0
+    while True:
+        offset = _HEADER.size + header_length
+        offset += _pad(offset)
+        for entry, records in arrays:
+            entry['offset'] = offset
+            offset += records.nbytes + _pad(records.nbytes)
+        sections = {}
+        for name, blob in blobs.items():
+            sections[name] = [offset, len(blob)]
+            offset += len(blob) + _pad(len(blob))
+        header = json.dumps({'version': VERSION, 'created': time.time(), 'bars': entries,
+                             'sections': sections}).encode('utf-8')
+        if len(header) == header_length:
+            break
+        header_length = len(header)
+
+    def write(f):
+        f.write(_HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        f.write(b'\0' * _pad(_HEADER.size + len(header)))
+        for _, records in arrays:
+            f.write(np.ascontiguousarray(records).tobytes())
+            f.write(b'\0' * _pad(records.nbytes))
+        for blob in blobs.values():
+            f.write(blob)
+            f.write(b'\0' * _pad(len(blob)))
+
+    _atomic_write(os.path.abspath(path), write)
+    return len(entries), offset
+
+
+# -------------------- PAYLAŞILAN ANLIK GÖRÜNTÜ --------------------
+_default_snapshot = None
+_loaded = False
+
+
+def get_default_snapshot():
+    """BIST_WARM_SNAPSHOT'taki anlık görüntü (bir kez açılır; tanımlı değilse None)"""
+    global _default_snapshot, _loaded
+    if not _loaded:
+        _loaded = True
+        path = os.environ.get('BIST_WARM_SNAPSHOT')
+        started = time.perf_counter()
+        _default_snapshot = open_snapshot(path)
+        if _default_snapshot is not None:
+            logging.info(f"Sıcak anlık görüntü açıldı: {len(_default_snapshot.entries)} kayıt, "
+                         f"{time.perf_counter() - started:.3f} sn")
+        elif path:
+            logging.info(f"Sıcak anlık görüntü bulunamadı, soğuk başlangıç: {path}")
+    return _default_snapshot
+
+
+def save_default(path):
+    """Paylaşılan önbellek ve depoları tek dosyaya yazar; (kayıt, bayt) döndürür"""
+    from data_provider import get_default_loader
+    from fundamentals_store import get_default_store
+    from indicator_state import get_default_state_store
+    from result_cache import get_default_result_cache
+
+    provider = get_default_loader().provider
+    while provider is not None and not hasattr(provider, 'cache'):
+        provider = getattr(provider, 'inner', None)
+    return write_snapshot(path, cache=getattr(provider, 'cache', None),
+                          fundamentals=get_default_store(), state_store=get_default_state_store(),
+                          results=get_default_result_cache())
+
+
+# -------------------- KOMUT SATIRI --------------------
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] not in ('save', 'info'):
+        print("Kullanım: python warm_state.py save|info <dosya>")
+        return 2
+    command, path = argv
+    if command == 'save':
+        count, size = save_default(path)
+        print(f"✅ {count} bar kaydı anlık görüntüye yazıldı: {path} ({size / 1e6:.1f} MB)")
+        return 0
+    started = time.perf_counter()
+    snapshot = open_snapshot(path)
+    if snapshot is None:
+        print(f"ℹ️ Anlık görüntü yok: {path}")
+        return 1
+    print(f"📦 {path}: {len(snapshot.entries)} bar kaydı, bölümler: "
+          f"{', '.join(snapshot.sections) or '-'}, {snapshot.nbytes / 1e6:.1f} MB, "
+          f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(snapshot.created))}, "
+          f"açılış {(time.perf_counter() - started) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())